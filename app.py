@@ -1,335 +1,37 @@
+import uuid
+from contextlib import nullcontext
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-
-# ---------------------------------------------------------
-# Heizflächentyp-Parameter (Dropdown-Logik)
-# ---------------------------------------------------------
-HEATING_TYPE_PARAMS = {
-    "Fußbodenheizung": {"T_VL": 35.0, "T_RL": 28.0},
-    "Wand-/Deckenheizung": {"T_VL": 38.0, "T_RL": 30.0},
-    "Niedertemperatur-Heizkörper": {"T_VL": 45.0, "T_RL": 38.0},
-    "Standard-Heizkörper": {"T_VL": 60.0, "T_RL": 50.0},
-    "Altbau-Radiator": {"T_VL": 70.0, "T_RL": 60.0},
-}
-
-TOP_TYPE_OPTIONS = [
-    "Dach gegen Außenluft",
-    "Decke gegen beheizten Raum",
-    "Decke gegen unbeheizten Raum / Speicher",
-]
-
-# ---------------------------------------------------------
-# Hilfsfunktionen für Export
-# ---------------------------------------------------------
-def create_pdf_summary(result_df, type_summary_df, total_heating_load_building, T_out, default_T_set, safety_factor, analysis_level, wp_info=None):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # ------------- Titelseite / Kopf -------------
-    y = height - 2 * cm
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(2 * cm, y, "Heizlastberechnung – Ergebnisübersicht")
-
-    y -= 1.0 * cm
-    c.setFont("Helvetica", 10)
-    c.drawString(2 * cm, y, f"Analyse-Level: {analysis_level}")
-    y -= 0.5 * cm
-    c.drawString(2 * cm, y, f"Norm-Außentemperatur: {T_out:.1f} °C")
-    y -= 0.5 * cm
-    c.drawString(2 * cm, y, f"Standard-Innentemperatur: {default_T_set:.1f} °C")
-    y -= 0.5 * cm
-    c.drawString(2 * cm, y, f"Sicherheitszuschlag: {safety_factor * 100:.0f} %")
-
-    # ------------- Raumweise Heizlast (repräsentative Räume) -------------
-    y -= 1.0 * cm
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(2 * cm, y, "Raumweise Heizlast (repräsentative Räume je Wohnungstyp)")
-    y -= 0.7 * cm
-
-    col_titles = ["Wohn-Typ", "Raum", "Fläche [m²]", "T_i [°C]", "Heizlast je Raum [W]"]
-    col_x = [2 * cm, 5 * cm, 10 * cm, 13 * cm, 16 * cm]
-
-    c.setFont("Helvetica-Bold", 9)
-    for title, x in zip(col_titles, col_x):
-        c.drawString(x, y, title)
-
-    y -= 0.5 * cm
-    c.setFont("Helvetica", 9)
-
-    for _, row in result_df.iterrows():
-        if y < 3 * cm:
-            c.showPage()
-            y = height - 2 * cm
-            c.setFont("Helvetica-Bold", 11)
-            c.drawString(2 * cm, y, "Raumweise Heizlast (Fortsetzung)")
-            y -= 0.7 * cm
-            c.setFont("Helvetica-Bold", 9)
-            for title, x in zip(col_titles, col_x):
-                c.drawString(x, y, title)
-            y -= 0.5 * cm
-            c.setFont("Helvetica", 9)
-
-        c.drawString(col_x[0], y, str(row.get("Wohnungstyp", "")))
-        c.drawString(col_x[1], y, str(row["Raum"]))
-        c.drawRightString(col_x[2] + 2.0 * cm, y, f'{row["Fläche (m²)"]:.1f}')
-        c.drawRightString(col_x[3] + 1.5 * cm, y, f'{row["Tᵢ eff (°C)"]:.1f}')
-        c.drawRightString(col_x[4] + 2.0 * cm, y, f'{row["Q_Raum (W)"]:.0f}')
-        y -= 0.4 * cm
-
-    # ------------- Heizlast je Wohnungstyp & Gebäude -------------
-    if type_summary_df is not None and not type_summary_df.empty:
-        if y < 4 * cm:
-            c.showPage()
-            y = height - 2 * cm
-        y -= 0.5 * cm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(2 * cm, y, "Heizlast je Wohnungstyp und für das Gesamtgebäude")
-        y -= 0.7 * cm
-
-        col_titles_type = ["Wohn-Typ", "Anzahl WE", "Heizlast je WE [kW]", "Heizlast Typ gesamt [kW]"]
-        col_x_type = [2 * cm, 7 * cm, 11 * cm, 16 * cm]
-
-        c.setFont("Helvetica-Bold", 9)
-        for title, x in zip(col_titles_type, col_x_type):
-            c.drawString(x, y, title)
-        y -= 0.5 * cm
-        c.setFont("Helvetica", 9)
-
-        for _, row in type_summary_df.iterrows():
-            if y < 3 * cm:
-                c.showPage()
-                y = height - 2 * cm
-                c.setFont("Helvetica-Bold", 11)
-                c.drawString(2 * cm, y, "Heizlast je Wohnungstyp (Fortsetzung)")
-                y -= 0.7 * cm
-                c.setFont("Helvetica-Bold", 9)
-                for title, x in zip(col_titles_type, col_x_type):
-                    c.drawString(x, y, title)
-                y -= 0.5 * cm
-                c.setFont("Helvetica", 9)
-
-            c.drawString(col_x_type[0], y, str(row["Wohnungstyp"]))
-            c.drawRightString(col_x_type[1] + 1.5 * cm, y, f'{row["Anzahl WE Typ"]:,.0f}')
-            c.drawRightString(col_x_type[2] + 2.0 * cm, y, f'{row["Q_WE_kW"]:,.2f}')
-            c.drawRightString(col_x_type[3] + 2.0 * cm, y, f'{row["Q_Typ_geb_kW"]:,.2f}')
-            y -= 0.4 * cm
-
-        if y < 3 * cm:
-            c.showPage()
-            y = height - 2 * cm
-
-        y -= 0.5 * cm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(2 * cm, y, "Gesamtheizlast Gebäude")
-        y -= 0.7 * cm
-        c.setFont("Helvetica", 10)
-        c.drawString(
-            2 * cm,
-            y,
-            f"Summe: {total_heating_load_building:,.0f} W (≈ {total_heating_load_building/1000:,.2f} kW)"
-        )
-
-    # ------------- Q²/Q³: Systemdaten je Raum -------------
-    if analysis_level.startswith("Q²") or analysis_level.startswith("Q³"):
-        c.showPage()
-        y = height - 2 * cm
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(2 * cm, y, "Systemdaten je Raum (Q²/Q³)")
-
-        y -= 0.8 * cm
-        c.setFont("Helvetica", 9)
-        c.drawString(2 * cm, y, "Heizflächentyp und Systemtemperaturen je Raum")
-        y -= 0.6 * cm
-
-        col_titles_sys = ["Wohn-Typ", "Raum", "Heizfläche", "T_VL [°C]", "T_RL [°C]", "T_mittel [°C]"]
-        col_x_sys = [2 * cm, 5 * cm, 9 * cm, 13 * cm, 16 * cm, 19 * cm]
-
-        c.setFont("Helvetica-Bold", 9)
-        for title, x in zip(col_titles_sys, col_x_sys):
-            c.drawString(x, y, title)
-        y -= 0.5 * cm
-        c.setFont("Helvetica", 9)
-
-        for _, row in result_df.iterrows():
-            if y < 3 * cm:
-                c.showPage()
-                y = height - 2 * cm
-                c.setFont("Helvetica-Bold", 12)
-                c.drawString(2 * cm, y, "Systemdaten je Raum (Fortsetzung)")
-                y -= 0.8 * cm
-                c.setFont("Helvetica-Bold", 9)
-                for title, x in zip(col_titles_sys, col_x_sys):
-                    c.drawString(x, y, title)
-                y -= 0.5 * cm
-                c.setFont("Helvetica", 9)
-
-            hf = str(row.get("Heizflächentyp", ""))
-            t_vl = row.get("T_VL (°C)", np.nan)
-            t_rl = row.get("T_RL (°C)", np.nan)
-            t_mid = row.get("T_mittel (°C)", np.nan)
-
-            c.drawString(col_x_sys[0], y, str(row.get("Wohnungstyp", "")))
-            c.drawString(col_x_sys[1], y, str(row["Raum"]))
-            c.drawString(col_x_sys[2], y, hf)
-            c.drawRightString(col_x_sys[3] + 1.2 * cm, y, f'{t_vl:.1f}' if not np.isnan(t_vl) else "-")
-            c.drawRightString(col_x_sys[4] + 1.2 * cm, y, f'{t_rl:.1f}' if not np.isnan(t_rl) else "-")
-            c.drawRightString(col_x_sys[5] + 1.2 * cm, y, f'{t_mid:.1f}' if not np.isnan(t_mid) else "-")
-            y -= 0.4 * cm
-
-    # ------------- Q³: Wärmepumpen-Abgleich & Empfehlung -------------
-    if analysis_level.startswith("Q³") and wp_info is not None and wp_info.get("wp_typ") != "Kein WP / andere Erzeuger":
-        c.showPage()
-        y = height - 2 * cm
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(2 * cm, y, "Wärmepumpen-Abgleich (Q³) – Gesamtgebäude")
-
-        y -= 0.8 * cm
-        c.setFont("Helvetica", 10)
-        c.drawString(2 * cm, y, f"Wärmepumpen-Typ: {wp_info.get('wp_typ')}")
-        y -= 0.5 * cm
-        c.drawString(2 * cm, y, f"Nennleistung WP: {wp_info.get('wp_power_kw', 0):,.1f} kW")
-        y -= 0.5 * cm
-        c.drawString(2 * cm, y, f"Deckungsgrad bei Norm-Heizlast (Gebäude): {wp_info.get('coverage', 0):,.0f} %")
-        y -= 0.5 * cm
-
-        weighted_avg_T = wp_info.get("weighted_avg_T")
-        if weighted_avg_T is not None and not np.isnan(weighted_avg_T):
-            c.drawString(2 * cm, y, f"gewichtete mittlere Systemtemperatur: {weighted_avg_T:,.1f} °C")
-            y -= 0.5 * cm
-
-        cop_est = wp_info.get("cop_est")
-        jaz_est = wp_info.get("jaz_est")
-        heizwaermebedarf = wp_info.get("heizwaermebedarf")
-        strombedarf = wp_info.get("strombedarf")
-        critical_share = wp_info.get("critical_share")
-
-        if cop_est is not None and not np.isnan(cop_est):
-            c.drawString(2 * cm, y, f"geschätzter COP am Auslegungspunkt: {cop_est:,.2f}")
-            y -= 0.5 * cm
-        if jaz_est is not None and not np.isnan(jaz_est):
-            c.drawString(2 * cm, y, f"grobe JAZ-Schätzung: {jaz_est:,.2f}")
-            y -= 0.5 * cm
-        if heizwaermebedarf is not None and heizwaermebedarf > 0 and strombedarf is not None and not np.isnan(strombedarf):
-            c.drawString(2 * cm, y, f"jährlicher Heizwärmebedarf: {heizwaermebedarf:,.0f} kWh/a")
-            y -= 0.5 * cm
-            c.drawString(2 * cm, y, f"resultierender Strombedarf WP (geschätzt): {strombedarf:,.0f} kWh/a")
-            y -= 0.7 * cm
-        if critical_share is not None:
-            c.drawString(2 * cm, y, f"Anteil Heizlast in kritisch/bedingt geeigneten Bereichen (Gebäude): {critical_share:,.0f} %")
-            y -= 0.7 * cm
-
-        # Q-Konzept-Empfehlung (Ampellogik)
-        y -= 0.3 * cm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(2 * cm, y, "Q-Konzept – Empfehlung")
-
-        y -= 0.7 * cm
-        c.setFont("Helvetica", 10)
-
-        coverage = wp_info.get("coverage", 0)
-        text_lines = []
-
-        if coverage < 90:
-            text_lines.append(
-                "Die Wärmepumpe ist für die Gesamtgebäudeheizlast tendenziell unterdimensioniert (< 90 % Deckung). "
-                "Ein bivalenter Betrieb oder eine höhere Nennleistung sollte geprüft werden."
-            )
-        elif 90 <= coverage <= 120:
-            text_lines.append(
-                "Die Wärmepumpe liegt im üblichen Auslegungsbereich (ca. 90–120 % der Gebäude-Norm-Heizlast)."
-            )
-        else:
-            text_lines.append(
-                "Die Wärmepumpe ist für das Gebäude tendenziell überdimensioniert (> 120 % Deckung). "
-                "Dies kann zu Takten und ineffizientem Betrieb führen."
-            )
-
-        if weighted_avg_T is not None and not np.isnan(weighted_avg_T):
-            if weighted_avg_T <= 35:
-                text_lines.append(
-                    "Die mittlere Systemtemperatur ≤ 35 °C deutet auf eine sehr gute Eignung für den Wärmepumpenbetrieb hin "
-                    "(typisch Fußbodenheizung / große Heizflächen)."
-                )
-            elif 35 < weighted_avg_T <= 45:
-                text_lines.append(
-                    "Die mittlere Systemtemperatur zwischen 35–45 °C ist gut für einen effizienten Wärmepumpenbetrieb geeignet."
-                )
-            elif 45 < weighted_avg_T <= 50:
-                text_lines.append(
-                    "Die mittlere Systemtemperatur von 45–50 °C ist nur bedingt optimal. "
-                    "Eine Optimierung der Heizflächen, des hydraulischen Abgleichs oder der Heizkurve sollte geprüft werden."
-                )
-            else:
-                text_lines.append(
-                    "Die mittlere Systemtemperatur > 50 °C ist kritisch für einen effizienten Wärmepumpenbetrieb. "
-                    "Empfohlen werden Maßnahmen wie Heizkörpertausch in Teilbereichen, Reduktion der Vorlauftemperatur "
-                    "und ein detaillierter hydraulischer Abgleich."
-                )
-
-        if critical_share is not None:
-            if critical_share > 0:
-                text_lines.append(
-                    f"Der Anteil der Gebäudeheizlast in nur bedingt oder kritisch für Wärmepumpen geeigneten Bereichen liegt bei "
-                    f"rund {critical_share:,.0f} %. "
-                    "Für eine voll WP-optimierte Anlage sollte in diesen Bereichen eine Anpassung der Heizflächen "
-                    "(z. B. größere Heizkörper, Flächenheizsysteme) oder eine Reduktion der Systemtemperatur geprüft werden."
-                )
-            else:
-                text_lines.append(
-                    "Nahezu die gesamte Gebäudeheizlast liegt in gut oder sehr gut für Wärmepumpen geeigneten Bereichen. "
-                    "Die Anlage ist damit grundsätzlich sehr gut WP-fähig."
-                )
-
-        text_lines.append(
-            "Im Rahmen eines Q³-Konzeptes empfiehlt sich auf Basis dieser Bewertung eine vertiefte technische Analyse "
-            "inklusive hydraulischem Abgleich, Optimierung der Heizflächen und – falls erforderlich – Anpassung des "
-            "Wärmeerzeugerkonzeptes (z. B. bivalente Systeme, Pufferspeicher, Kombination mit PV und Speichern)."
-        )
-
-        for line in text_lines:
-            wrapped = []
-            words = line.split(" ")
-            current = ""
-            for w in words:
-                test_line = current + (" " if current else "") + w
-                if c.stringWidth(test_line, "Helvetica", 10) < (width - 4 * cm):
-                    current = test_line
-                else:
-                    wrapped.append(current)
-                    current = w
-            if current:
-                wrapped.append(current)
-
-            for wl in wrapped:
-                if y < 3 * cm:
-                    c.showPage()
-                    y = height - 2 * cm
-                    c.setFont("Helvetica", 10)
-                c.drawString(2 * cm, y, wl)
-                y -= 0.5 * cm
-
-    c.showPage()
-    c.save()
-    pdf_data = buffer.getvalue()
-    buffer.close()
-    return pdf_data
-
-
-def create_excel(result_df, type_summary_df=None):
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        result_df.to_excel(writer, sheet_name="Räume", index=False)
-        if type_summary_df is not None and not type_summary_df.empty:
-            type_summary_df.to_excel(writer, sheet_name="Wohnungstypen", index=False)
-    buffer.seek(0)
-    return buffer.getvalue()
 
+from heizlast import (
+    ANALYSIS_LEVELS,
+    BUILDING_PROFILES,
+    CLIMATE_ZONES,
+    HEATING_TYPE_PARAMS,
+    RECOMMENDED_PARAMS,
+    TOP_TYPE_OPTIONS,
+    WP_TYPES,
+    beispiel_raumtabelle,
+)
+from heizlast.aggregation import aggregiere_hierarchie
+from heizlast.austausch import ergebnis_tabellen, lese_raumtabelle, pruefe_raumtabelle, pyarrow_verfuegbar, verfuegbare_formate
+from heizlast.cache import berechne_gebaeude_cached, standard_cache, tabellen_hash
+from heizlast.inkrementell import InkrementelleBerechnung
+from heizlast.konstruktionen import Konstruktionskatalog, referenziere, verwendung, wende_profil_an
+from heizlast.linear import LinearesModell, heizlast_je_aussentemperatur
+from heizlast.simulation import lese_testreferenzjahr, simuliere_modell
+from heizlast.katalog import bewerte_modell, lese_katalog, rangliste
+from heizlast.sensitivitaet import monte_carlo
+from heizlast.angrenzung import lese_angrenzung, mit_angrenzung
+from heizlast.dynamik import BAUWEISEN, simuliere_aufheizen
+from heizlast.sanierung import guenstigstes_paket, lese_massnahmen, optimiere_sanierung
+from heizlast.vorlauf import NORMLEISTUNG_SPALTE, vorlauf_analyse
+from heizlast.export import ExportSpeicher, create_excel, create_parquet_zip, create_pdf_summary
+from heizlast.portfolio import GEBAEUDE_SPALTE
+from heizlast.diagnose import Protokoll, stufe
+from heizlast.projekte import ProjektSpeicher
 
 # ---------------------------------------------------------
 # Grundkonfiguration
@@ -339,6 +41,19 @@ st.set_page_config(
     layout="wide"
 )
 
+# ---------------------------------------------------------
+# Statische Tabellen: einmal je Prozess, von allen Sitzungen nur gelesen
+# ---------------------------------------------------------
+@st.cache_resource
+def statische_tabellen():
+    return {
+        "beispiel": beispiel_raumtabelle("Bestand saniert"),
+        "klimazonen": pd.DataFrame(CLIMATE_ZONES),
+    }
+
+
+tabellen = statische_tabellen()
+
 st.title("🔧 Heizlastberechnung (Q / Q² / Q³) by MarekW")
 
 st.markdown(
@@ -359,11 +74,7 @@ nur eine Decke zum beheizten Geschoss darüber hat.
 # ---------------------------------------------------------
 analysis_level = st.radio(
     "Analyse-Level wählen:",
-    options=[
-        "Q¹ – Basis Heizlast (DIN-ähnlich)",
-        "Q² – inkl. Heizflächentyp & Systemtemperaturen",
-        "Q³ – inkl. Wärmepumpen-Abgleich"
-    ],
+    options=ANALYSIS_LEVELS,
     horizontal=False
 )
 
@@ -411,55 +122,17 @@ safety_pct = st.sidebar.number_input(
 )
 safety_factor = safety_pct / 100.0
 
-
-# Empfohlene klimatische Basisparameter je Gebäudetyp (für Komfort-Buttons)
-recommended_params = {
-    "Neubau (Effizienzhaus)": {"T_out": -12.0, "T_in": 21.0, "safety_pct": 5.0},
-    "Bestand saniert": {"T_out": -12.0, "T_in": 20.0, "safety_pct": 10.0},
-    "Altbau unsaniert": {"T_out": -14.0, "T_in": 21.0, "safety_pct": 15.0},
-}
-
-# Beispiel-Norm-Außentemperaturen nach Klimaregion (vereinfachte Tabelle)
-climate_zones = [
-    {"Region": "Norddeutschland (Küste)", "Norm-Außentemperatur (°C)": -10},
-    {"Region": "Mitteldeutschland / NRW / Hessen", "Norm-Außentemperatur (°C)": -12},
-    {"Region": "Süddeutschland / Bayern / BaWü", "Norm-Außentemperatur (°C)": -14},
-    {"Region": "Mittelgebirge / Alpenvorland", "Norm-Außentemperatur (°C)": -16},
-]
-
-# Gebäudetyp-Profile mit typischen U-Werten
-building_profiles = {
-    "Neubau (Effizienzhaus)": {
-        "U_wand": 0.20,
-        "U_top": 0.14,
-        "U_boden": 0.25,
-        "U_fenster": 0.90,
-    },
-    "Bestand saniert": {
-        "U_wand": 0.35,
-        "U_top": 0.25,
-        "U_boden": 0.40,
-        "U_fenster": 1.30,
-    },
-    "Altbau unsaniert": {
-        "U_wand": 1.20,
-        "U_top": 0.80,
-        "U_boden": 0.80,
-        "U_fenster": 2.70,
-    },
-}
-
 selected_profile = st.sidebar.selectbox(
     "Gebäudetyp / U-Wert-Profil",
-    options=list(building_profiles.keys()),
+    options=list(BUILDING_PROFILES.keys()),
     index=1
 )
 
-profile = building_profiles[selected_profile]
+profile = BUILDING_PROFILES[selected_profile]
 
 # Button: empfohlene Klimaparameter je Gebäudetyp setzen
 if st.sidebar.button("Empfohlene Klimaparameter für diesen Gebäudetyp übernehmen"):
-    params = recommended_params.get(selected_profile)
+    params = RECOMMENDED_PARAMS.get(selected_profile)
     if params:
         st.session_state["norm_aussentemp"] = params["T_out"]
         st.session_state["standard_innentemp"] = params["T_in"]
@@ -481,22 +154,75 @@ st.sidebar.markdown(
 """
 )
 
-# Button: U-Werte aus Profil in Tabelle schreiben
+# Button: alle Räume auf die Profil-Konstruktionen des Katalogs umstellen
+# (braucht die aktuelle Tabelle → wird nach dem Editor angewendet)
 if st.sidebar.button("Standard-U-Werte auf Tabelle anwenden"):
-    if "raumtabelle" in st.session_state:
-        df_tmp = st.session_state["raumtabelle"].copy()
-        for col, key in [
-            ("U Wand (W/m²K)", "U_wand"),
-            ("U oberer Abschluss (W/m²K)", "U_top"),
-            ("U Boden (W/m²K)", "U_boden"),
-            ("U Fenster (W/m²K)", "U_fenster"),
-        ]:
-            if col in df_tmp.columns:
-                df_tmp[col] = profile[key]
-        st.session_state["raumtabelle"] = df_tmp
-        st.sidebar.success("Standard-U-Werte wurden angewendet.")
-    else:
-        st.sidebar.warning("Bitte zuerst die Raumtabelle laden bzw. verwenden.")
+    st.session_state["profil_anwenden"] = selected_profile
+if st.session_state.get("profil_angewendet"):
+    st.sidebar.success(st.session_state.pop("profil_angewendet"))
+
+st.sidebar.markdown("**Unsicherheit der Eingaben**")
+mc_aktiv = st.sidebar.checkbox(
+    "ℹ️ Monte-Carlo-Sensitivität (P10/P50/P90) mitberechnen",
+    value=False,
+    help="Streut U-Werte, Luftwechsel und Innentemperatur nach dem gewählten Gebäudetyp und zeigt "
+         "das Band der Gebäudeheizlast sowie die einflussreichsten Eingangsgrößen.",
+)
+mc_stichproben = st.sidebar.number_input(
+    "Anzahl Stichproben",
+    min_value=1000,
+    max_value=200000,
+    value=10000,
+    step=1000,
+    disabled=not mc_aktiv,
+)
+
+st.sidebar.markdown("**Sanierungspakete**")
+sanierung_aktiv = st.sidebar.checkbox(
+    "ℹ️ Sanierungspakete optimieren (Kosten vs. Heizlast vs. WP-Eignung)",
+    value=False,
+    help="Bewertet alle Kombinationen aus Wand-, Dach-/Decken-, Boden- und Fensterdämmung sowie "
+         "Heizflächentausch und zeigt die nicht dominierten Pakete und das günstigste WP-taugliche.",
+)
+massnahmen_datei = st.sidebar.file_uploader(
+    "Kostentabelle der Maßnahmen (CSV, optional)",
+    type=["csv"],
+    disabled=not sanierung_aktiv,
+    help="Je Maßnahme eine Zeile: Maßnahme; Bauteil (Wand, Oberer Abschluss, Boden, Fenster, Heizfläche); "
+         "U neu (W/m²K) bzw. Heizflächentyp neu; Kosten (€/m²); Kosten (€/Raum); Fixkosten (€). "
+         "Ohne Datei gelten grobe Richtwerte.",
+)
+
+st.sidebar.markdown("**Diagnose**")
+diagnose_aktiv = st.sidebar.checkbox(
+    "ℹ️ Laufzeit je Berechnungsstufe protokollieren",
+    value=False,
+    help="Misst Eingabetabelle, Heizflächentyp-Vorgaben, UA/Q-Berechnung, Aggregation, WP-Abgleich und Exporte "
+         "und zeigt sie unten im Diagnose-Bereich (inkl. JSON-Trace).",
+)
+diagnose_speicher = st.sidebar.checkbox(
+    "Speicher je Stufe messen (tracemalloc, verlangsamt die Berechnung)",
+    value=False,
+    disabled=not diagnose_aktiv,
+)
+
+# Protokoll je Sitzung; ohne Diagnose bleiben die Stufen im Rechenkern wirkungslos
+diagnose = None
+if diagnose_aktiv:
+    if st.session_state.get("diagnose") is None or st.session_state["diagnose"].speicher != diagnose_speicher:
+        st.session_state["diagnose"] = Protokoll(speicher=diagnose_speicher, sitzung=uuid.uuid4().hex[:8])
+    diagnose = st.session_state["diagnose"]
+    diagnose.neuer_lauf()
+
+
+def mit_diagnose():
+    return diagnose.aktiv() if diagnose is not None else nullcontext()
+
+
+def export_mit_diagnose(funktion, *args):
+    # Download-Callables laufen in einem eigenen Thread → Protokoll dort aktivieren
+    with mit_diagnose():
+        return funktion(*args)
 
 st.sidebar.markdown(
     """
@@ -506,14 +232,46 @@ st.sidebar.markdown(
 """
 )
 
+# ---------------------------------------------------------
+# Projektspeicher (SQLite, Datei über HEIZLAST_PROJEKTE): Gebäude ablegen und laden
+# ---------------------------------------------------------
+@st.cache_resource
+def projektspeicher():
+    return ProjektSpeicher()
+
+
+def lade_aus_projekt(projekt, gebaeude):
+    # vor dem Skriptlauf: geladene Tabelle ersetzt die Vorgabe, Editor-Änderungen verwerfen
+    st.session_state["eingabe_tabelle"] = projektspeicher().lade_gebaeude(projekt, gebaeude)
+    st.session_state.pop("raumtabelle", None)
+
+
+st.sidebar.markdown("**Projekt**")
+projekt_aktiv = st.sidebar.checkbox(
+    "💾 Projektspeicher (SQLite) verwenden",
+    value=False,
+    help="Speichert Raumtabellen je Gebäude mit Szenario-Parametern und Ergebnissen in einer SQLite-Datei "
+         "und lädt einzelne Gebäude wieder in die Tabelle.",
+)
+projekt_bereich = st.sidebar.container()
+if projekt_aktiv:
+    projekt_name = projekt_bereich.text_input("Projekt", value="Mein Projekt")
+    gebaeude_name = projekt_bereich.text_input("Gebäude-ID", value="Gebäude 1")
+    szenario_name = projekt_bereich.text_input("Szenario", value="Auslegung")
+    gespeichert = projektspeicher().gebaeude(projekt_name)["Gebäude-ID"].tolist()
+    if gespeichert:
+        auswahl = projekt_bereich.selectbox("Gespeichertes Gebäude", gespeichert)
+        projekt_bereich.button(
+            "📂 Gebäude in die Tabelle laden", on_click=lade_aus_projekt, args=(projekt_name, auswahl)
+        )
+
 # ---------------------------------------------------------
 # Eingabe-Tabelle für Räume
 # ---------------------------------------------------------
 st.subheader("Raumdaten je Wohnungstyp eingeben")
 
 st.markdown("#### Orientierung: Beispiel-Norm-Außentemperaturen nach Klimaregion")
-import pandas as _pd_climate
-st.table(_pd_climate.DataFrame(climate_zones))
+st.table(tabellen["klimazonen"])
 
 
 st.markdown(
@@ -530,98 +288,117 @@ Typischer Workflow:
 """
 )
 
-building_default = building_profiles["Bestand saniert"]
-
-default_data = pd.DataFrame(
-    [
-        {
-            "Wohnungstyp": "A",
-            "Anzahl WE Typ": 6,
-            "Raum": "Wohnen/Essen",
-            "Fläche (m²)": 25.0,
-            "Raumhöhe (m)": 2.6,
-            "Tᵢ (°C)": 21.0,
-            "A Wand (m²)": 18.0,
-            "U Wand (W/m²K)": building_default["U_wand"],
-            "A oberer Abschluss (m²)": 0.0,
-            "U oberer Abschluss (W/m²K)": building_default["U_top"],
-            "Typ oberer Abschluss": "Decke gegen beheizten Raum",
-            "A Boden (m²)": 25.0,
-            "U Boden (W/m²K)": building_default["U_boden"],
-            "A Fenster (m²)": 5.0,
-            "U Fenster (W/m²K)": building_default["U_fenster"],
-            "Luftwechsel n (1/h)": 0.7,
-            "Heizflächentyp": "Standard-Heizkörper",
-            "T_VL (°C)": np.nan,
-            "T_RL (°C)": np.nan,
-        },
-        {
-            "Wohnungstyp": "A",
-            "Anzahl WE Typ": 6,
-            "Raum": "Schlafen",
-            "Fläche (m²)": 14.0,
-            "Raumhöhe (m)": 2.6,
-            "Tᵢ (°C)": 18.0,
-            "A Wand (m²)": 12.0,
-            "U Wand (W/m²K)": building_default["U_wand"],
-            "A oberer Abschluss (m²)": 0.0,
-            "U oberer Abschluss (W/m²K)": building_default["U_top"],
-            "Typ oberer Abschluss": "Decke gegen beheizten Raum",
-            "A Boden (m²)": 14.0,
-            "U Boden (W/m²K)": building_default["U_boden"],
-            "A Fenster (m²)": 3.0,
-            "U Fenster (W/m²K)": building_default["U_fenster"],
-            "Luftwechsel n (1/h)": 0.7,
-            "Heizflächentyp": "Standard-Heizkörper",
-            "T_VL (°C)": np.nan,
-            "T_RL (°C)": np.nan,
-        },
-        {
-            "Wohnungstyp": "B",
-            "Anzahl WE Typ": 2,
-            "Raum": "Wohnen/Essen (Staffel)",
-            "Fläche (m²)": 30.0,
-            "Raumhöhe (m)": 2.6,
-            "Tᵢ (°C)": 21.0,
-            "A Wand (m²)": 22.0,
-            "U Wand (W/m²K)": building_default["U_wand"],
-            "A oberer Abschluss (m²)": 30.0,
-            "U oberer Abschluss (W/m²K)": building_default["U_top"],
-            "Typ oberer Abschluss": "Dach gegen Außenluft",
-            "A Boden (m²)": 30.0,
-            "U Boden (W/m²K)": building_default["U_boden"],
-            "A Fenster (m²)": 6.0,
-            "U Fenster (W/m²K)": building_default["U_fenster"],
-            "Luftwechsel n (1/h)": 0.7,
-            "Heizflächentyp": "Standard-Heizkörper",
-            "T_VL (°C)": np.nan,
-            "T_RL (°C)": np.nan,
-        },
-    ]
+def importiere_raumtabelle():
+    # vor dem Skriptlauf: Datei lesen, gegen das Schema der Raumtabelle prüfen und in den Editor übernehmen
+    datei = st.session_state.get("raumtabelle_import")
+    if datei is None:
+        return
+    try:
+        df = lese_raumtabelle(datei, kompakt=False)
+        hinweise = pruefe_raumtabelle(df)  # nur noch Hinweise (z. B. zusätzliche Spalten)
+        if GEBAEUDE_SPALTE in df.columns and df[GEBAEUDE_SPALTE].nunique() > 1:
+            hinweise.append(
+                f"{df[GEBAEUDE_SPALTE].nunique()} Gebäude in der Datei – die App rechnet sie als ein Gebäude "
+                "(Portfolios: python -m heizlast.batch oder berechne_portfolio)."
+            )
+    except Exception as e:
+        st.session_state["import_meldungen"] = ("error", getattr(e, "meldungen", [str(e)]))
+        return
+    st.session_state["eingabe_tabelle"] = df
+    st.session_state.pop("raumtabelle", None)
+    st.session_state["import_meldungen"] = ("info", [f"{len(df)} Räume aus „{datei.name}“ übernommen."] + hinweise)
+
+
+# Parquet/Arrow nur mit pyarrow (optional), CSV immer
+st.file_uploader(
+    "ℹ️ Raumtabelle importieren (Parquet, Arrow/Feather oder CSV, optional)" if pyarrow_verfuegbar()
+    else "ℹ️ Raumtabelle importieren (CSV, optional – Parquet/Arrow benötigt pyarrow)",
+    type=[endung.lstrip(".") for endung in verfuegbare_formate()],
+    key="raumtabelle_import",
+    on_change=importiere_raumtabelle,
+    help="Spalten wie in der Tabelle unten (z. B. „A Wand (m²)“, „U oberer Abschluss (W/m²K)“, "
+         "„Typ oberer Abschluss“). Fehlende Pflichtspalten, Text in Zahlenspalten und unbekannte "
+         "Heizflächentypen werden gemeldet; die Tabelle bleibt dann unverändert.",
 )
+if st.session_state.get("import_meldungen"):
+    art, meldungen = st.session_state["import_meldungen"]
+    (st.error if art == "error" else st.info)("  \n".join(f"- {m}" for m in meldungen))
+
+# data_editor arbeitet auf einer Kopie, die geteilte Tabelle bleibt unverändert
+default_data = st.session_state.get("eingabe_tabelle", tabellen["beispiel"])
+
+with mit_diagnose(), stufe("Eingabetabelle (data_editor)"):
+    data = st.data_editor(
+        default_data,
+        num_rows="dynamic",
+        use_container_width=True,
+        key="raumtabelle",
+        column_config={
+            "Heizflächentyp": st.column_config.SelectboxColumn(
+                "Heizflächentyp",
+                options=list(HEATING_TYPE_PARAMS.keys()),
+                required=True,
+            ),
+            "Wohnungstyp": st.column_config.TextColumn(
+                "Wohnungstyp (z. B. A/B/C)",
+            ),
+            "Typ oberer Abschluss": st.column_config.SelectboxColumn(
+                "Typ oberer Abschluss",
+                options=TOP_TYPE_OPTIONS,
+                required=True,
+            ),
+        }
+    )
 
-data = st.data_editor(
-    default_data,
-    num_rows="dynamic",
-    use_container_width=True,
-    key="raumtabelle",
-    column_config={
-        "Heizflächentyp": st.column_config.SelectboxColumn(
-            "Heizflächentyp",
-            options=list(HEATING_TYPE_PARAMS.keys()),
-            required=True,
-        ),
-        "Wohnungstyp": st.column_config.TextColumn(
-            "Wohnungstyp (z. B. A/B/C)",
-        ),
-        "Typ oberer Abschluss": st.column_config.SelectboxColumn(
-            "Typ oberer Abschluss",
-            options=TOP_TYPE_OPTIONS,
-            required=True,
-        ),
-    }
+profil_anwenden = st.session_state.pop("profil_anwenden", None)
+if profil_anwenden is not None:
+    st.session_state["eingabe_tabelle"] = wende_profil_an(data, profil_anwenden)
+    st.session_state.pop("raumtabelle", None)
+    st.session_state["profil_angewendet"] = f"Standard-U-Werte „{profil_anwenden}“ wurden angewendet."
+    st.rerun()
+
+angrenzung_datei = st.file_uploader(
+    "ℹ️ Angrenzende Räume und Zonen (CSV, optional) – Wärmeströme nach DIN EN 12831",
+    type=["csv"],
+    help="Je gemeinsamer Fläche eine Zeile: Raum; angrenzend; Fläche (m²); U (W/m²K). „angrenzend“ ist ein "
+         "anderer Raum (Spalte „Raum“ bzw. „Raum-ID“) oder eine Zone: Treppenhaus (unbeheizt), Keller (unbeheizt), "
+         "Dachraum (unbeheizt), Nachbarwohnung (abgesenkt). Diese Flächen nicht zusätzlich als Wand/Boden erfassen.",
 )
 
+# ---------------------------------------------------------
+# Live-Vorschau: Tₑ, Tᵢ und Zuschlag wirken ohne Button
+# ---------------------------------------------------------
+# Das lineare Modell wird nur bei geänderter Raumtabelle neu aufgebaut;
+# Änderungen in der Seitenleiste skalieren nur noch die vorberechneten Werte.
+try:
+    with mit_diagnose(), stufe("Live-Vorschau (lineares Modell)"):
+        tabellen_schluessel = tabellen_hash(data)
+        if st.session_state.get("linear_modell_schluessel") != tabellen_schluessel:
+            st.session_state["linear_modell"] = LinearesModell(data)
+            st.session_state["linear_modell_schluessel"] = tabellen_schluessel
+        linear_modell = st.session_state["linear_modell"]
+        live = linear_modell.auswerten(T_out, default_T_set, safety_factor)
+
+    st.markdown("#### ⚡ Live-Vorschau (aktualisiert sich bei jeder Eingabe)")
+    col_live1, col_live2, col_live3 = st.columns(3)
+    with col_live1:
+        st.metric("Gesamtheizlast Gebäude", f"{live.q_gebaeude.sum() / 1000.0:,.2f} kW")
+    with col_live2:
+        live_T = live.weighted_avg_T[0, 0] if live.weighted_avg_T.size else np.nan
+        st.metric("gewichtete mittlere Systemtemperatur", f"{live_T:,.1f} °C" if not np.isnan(live_T) else "n/a")
+    with col_live3:
+        live_krit = live.critical_share[0, 0] if live.critical_share.size else 0.0
+        st.metric("Anteil bedingt/kritisch", f"{live_krit:,.0f} %")
+
+    with st.expander("Gebäudeheizlast je Klimaregion (Tₑ-Variation)"):
+        klima_tabelle = tabellen["klimazonen"].copy()
+        klima_tabelle["Gesamtheizlast Gebäude (kW)"] = heizlast_je_aussentemperatur(
+            linear_modell, klima_tabelle["Norm-Außentemperatur (°C)"], default_T_set, safety_factor
+        ) / 1000.0
+        st.table(klima_tabelle.round(2))
+except Exception as e:
+    st.caption(f"Live-Vorschau nicht verfügbar: {e}")
+
 # ---------------------------------------------------------
 # Wärmepumpen-Parameter (für Q³ relevant, aber immer editierbar)
 # ---------------------------------------------------------
@@ -631,7 +408,7 @@ col_wp1, col_wp2, col_wp3 = st.columns(3)
 with col_wp1:
     wp_typ = st.selectbox(
         "Wärmepumpen-Typ",
-        options=["Luft/Wasser", "Sole/Wasser", "Kein WP / andere Erzeuger"],
+        options=WP_TYPES,
         index=0
     )
 with col_wp2:
@@ -651,183 +428,178 @@ with col_wp3:
         step=5000.0
     )
 
-# ---------------------------------------------------------
-# Berechnung
-# ---------------------------------------------------------
-def berechne_heizlast(df, T_out, default_T_set, safety_factor):
-    df = df.copy()
-
-    # Heizflächentyp → automatische T_VL/T_RL, falls leer/NaN
-    if "Heizflächentyp" in df.columns:
-        for idx, row in df.iterrows():
-            h_type = row.get("Heizflächentyp")
-            if h_type in HEATING_TYPE_PARAMS:
-                params = HEATING_TYPE_PARAMS[h_type]
-                if np.isnan(row.get("T_VL (°C)", np.nan)):
-                    df.at[idx, "T_VL (°C)"] = params["T_VL"]
-                if np.isnan(row.get("T_RL (°C)", np.nan)):
-                    df.at[idx, "T_RL (°C)"] = params["T_RL"]
-
-    # Typ oberer Abschluss: Decke gegen beheizten Raum -> Fläche als 0 werten
-    if "Typ oberer Abschluss" in df.columns and "A oberer Abschluss (m²)" in df.columns:
-        mask_decke_beheizt = df["Typ oberer Abschluss"] == "Decke gegen beheizten Raum"
-        df.loc[mask_decke_beheizt, "A oberer Abschluss (m²)"] = 0.0
-
-    # fehlende Temperaturen mit Standard belegen
-    df["Tᵢ eff (°C)"] = df["Tᵢ (°C)"].fillna(default_T_set)
-
-    # Volumen
-    df["Volumen (m³)"] = df["Fläche (m²)"] * df["Raumhöhe (m)"]
-
-    # Temperaturdifferenz
-    df["ΔT (K)"] = df["Tᵢ eff (°C)"] - T_out
-
-    # UA-Werte je Bauteil
-    df["UA Wand (W/K)"] = df["A Wand (m²)"] * df["U Wand (W/m²K)"]
-    df["UA oberer Abschluss (W/K)"] = df["A oberer Abschluss (m²)"] * df["U oberer Abschluss (W/m²K)"]
-    df["UA Boden (W/K)"] = df["A Boden (m²)"] * df["U Boden (W/m²K)"]
-    df["UA Fenster (W/K)"] = df["A Fenster (m²)"] * df["U Fenster (W/m²K)"]
-
-    df["UA gesamt (W/K)"] = (
-        df["UA Wand (W/K)"]
-        + df["UA oberer Abschluss (W/K)"]
-        + df["UA Boden (W/K)"]
-        + df["UA Fenster (W/K)"]
-    )
-
-    # Transmissionsverluste
-    df["Q_T (W)"] = df["UA gesamt (W/K)"] * df["ΔT (K)"]
-
-    # Lüftungsverluste
-    df["Q_V (W)"] = 0.33 * df["Luftwechsel n (1/h)"] * df["Volumen (m³)"] * df["ΔT (K)"]
-
-    # Heizlast ohne / mit Zuschlag je Raum (repräsentative Wohnung)
-    df["Q_ohne Zuschlag (W)"] = df["Q_T (W)"] + df["Q_V (W)"]
-    df["Q_Raum (W)"] = df["Q_ohne Zuschlag (W)"] * (1.0 + safety_factor)
-
-    # mittlere Systemtemperatur je Raum
-    if "T_VL (°C)" in df.columns and "T_RL (°C)" in df.columns:
-        df["T_mittel (°C)"] = (df["T_VL (°C)"] + df["T_RL (°C)"]) / 2.0
-    else:
-        df["T_mittel (°C)"] = np.nan
-
-    # Ampel-Einstufung je Raum (WP-Eignung)
-    def classify_eignung(t_mid):
-        if np.isnan(t_mid):
-            return "unbekannt"
-        if t_mid <= 35:
-            return "sehr gut"
-        elif t_mid <= 45:
-            return "gut"
-        elif t_mid <= 50:
-            return "bedingt"
-        else:
-            return "kritisch"
-
-    df["WP-Eignung"] = df["T_mittel (°C)"].apply(classify_eignung)
-
-    # Falls Anzahl WE Typ fehlt, auf 1 setzen
-    if "Anzahl WE Typ" not in df.columns:
-        df["Anzahl WE Typ"] = 1
-    df["Anzahl WE Typ"] = df["Anzahl WE Typ"].fillna(1)
-
-    return df
-
+try_datei = st.file_uploader(
+    "ℹ️ Testreferenzjahr (CSV, 8760 Stundenwerte der Außentemperatur) für die stündliche Jahressimulation (optional, Q³)",
+    type=["csv"],
+    help="Eine Spalte „T_aussen (°C)“ (oder eine einzige Zahlenspalte) mit 8760 Stundenwerten. "
+         "Ersetzt die grobe JAZ-Schätzung durch eine simulierte JAZ inkl. Heizwärmebedarf und Backup-Anteil.",
+)
 
-def schaetze_cop(wp_typ, T_mittel_system):
-    if T_mittel_system is None or np.isnan(T_mittel_system):
-        return np.nan
+katalog_datei = st.file_uploader(
+    "ℹ️ Wärmepumpen-Katalog (CSV/JSON mit Leistungs- und COP-Kennfeldern) für die Modellauswahl (optional, Q³)",
+    type=["csv", "json"],
+    help="Je Kennfeldpunkt eine Zeile: Modell, Typ, T_aussen (°C), T_VL (°C), Leistung (kW), COP. "
+         "Alle Modelle werden bei Tₑ und der Auslegungs-Vorlauftemperatur interpoliert und nach "
+         "Deckungsgrad, SCOP und Bivalenzpunkt sortiert.",
+)
 
-    if wp_typ == "Luft/Wasser":
-        cop_ref = 3.2
-    elif wp_typ == "Sole/Wasser":
-        cop_ref = 4.0
-    else:
-        return np.nan
+aufheizen_aktiv = st.checkbox(
+    "ℹ️ Aufheizen nach Nachtabsenkung simulieren (optional, Q³)",
+    value=False,
+    help="Dynamisches RC-Modell je Raum mit Luft- und Massenknoten (UA, Lüftung, Volumen, wirksame Speichermasse). Ermittelt die "
+         "zusätzliche Leistung, um nach der Absenkung in der Aufheizzeit wieder die Solltemperatur zu erreichen, "
+         "und die Zeit bis zum Komfort mit der installierten Leistung – bei Tₑ und, falls vorhanden, über das Testreferenzjahr.",
+)
+col_rh1, col_rh2, col_rh3, col_rh4 = st.columns(4)
+with col_rh1:
+    normal_von, normal_bis = st.slider(
+        "Normalbetrieb (Uhr)", min_value=0, max_value=24, value=(6, 22), disabled=not aufheizen_aktiv,
+        help="Außerhalb dieser Zeit wird abgesenkt (z. B. 22–6 Uhr).",
+    )
+with col_rh2:
+    absenkung_K = st.number_input(
+        "Absenkung (K, 0 = Heizung aus)", min_value=0.0, max_value=15.0, value=4.0, step=1.0,
+        disabled=not aufheizen_aktiv,
+    )
+with col_rh3:
+    bauweise = st.selectbox("Bauweise (Speichermasse)", options=list(BAUWEISEN), index=2, disabled=not aufheizen_aktiv)
+with col_rh4:
+    aufheizzeit_h = st.number_input(
+        "Aufheizzeit (h)", min_value=0.5, max_value=12.0, value=2.0, step=0.5, disabled=not aufheizen_aktiv
+    )
 
-    delta_T = T_mittel_system - 35.0
-    cop = cop_ref - 0.15 * (delta_T / 5.0)
-    cop = max(2.0, min(cop, cop_ref + 0.6))
-    return cop
+if projekt_aktiv and projekt_bereich.button("💾 Gebäude mit Ergebnissen speichern"):
+    try:
+        speicher = projektspeicher()
+        speicher.speichere_raumtabelle(projekt_name, data, gebaeude=gebaeude_name)
+        speicher.szenario(
+            projekt_name,
+            szenario_name,
+            T_out=T_out,
+            default_T_set=default_T_set,
+            safety_factor=safety_factor,
+            analysis_level=analysis_level,
+            wp_typ=wp_typ,
+            wp_power_kw=wp_power_kw_input,
+            heizwaermebedarf=heizwaermebedarf_input,
+        )
+        speicher.berechne(projekt_name, szenario_name, gebaeude=gebaeude_name)
+        projekt_bereich.success(f"„{gebaeude_name}“ in „{projekt_name}“ gespeichert ({len(data)} Räume).")
+    except Exception as e:
+        projekt_bereich.error(f"Speichern fehlgeschlagen: {e}")
 
+# ---------------------------------------------------------
+# Berechnung
+# ---------------------------------------------------------
+# je Sitzung: nur geänderte Zeilen der Raumtabelle neu berechnen
+if "heizlast_inkrementell" not in st.session_state:
+    st.session_state["heizlast_inkrementell"] = InkrementelleBerechnung()
+if "exporte" not in st.session_state:
+    st.session_state["exporte"] = ExportSpeicher()
 
 if st.button("🔍 Heizlast berechnen"):
     try:
-        result = berechne_heizlast(data, T_out, default_T_set, safety_factor)
-
-        # Heizlast je Wohnungstyp (repräsentative Wohnung)
-        if "Wohnungstyp" in result.columns:
-            type_group = result.groupby("Wohnungstyp", dropna=True).agg(
-                Q_WE_W=("Q_Raum (W)", "sum"),
-                Anzahl_WE=("Anzahl WE Typ", "max"),
-            ).reset_index()
-        else:
-            # Fallback: alles als Typ "A"
-            result["Wohnungstyp"] = "A"
-            type_group = result.groupby("Wohnungstyp").agg(
-                Q_WE_W=("Q_Raum (W)", "sum"),
-                Anzahl_WE=("Anzahl WE Typ", "max"),
-            ).reset_index()
-
-        type_group["Q_WE_kW"] = type_group["Q_WE_W"] / 1000.0
-        type_group["Q_Typ_geb_W"] = type_group["Q_WE_W"] * type_group["Anzahl_WE"]
-        type_group["Q_Typ_geb_kW"] = type_group["Q_Typ_geb_W"] / 1000.0
-
-        # Gebäudeheizlast
-        total_heating_load_building = type_group["Q_Typ_geb_W"].sum()
-        heizlast_kw_building = total_heating_load_building / 1000.0 if total_heating_load_building > 0 else 0.0
-
-        # gewichtete Systemtemperatur für das Gebäude
-        if "T_mittel (°C)" in result.columns:
-            # gewichtete nach Gebäudeanteil: Q_Raum * Anzahl_WE
-            result["Q_Raum_geb (W)"] = result["Q_Raum (W)"] * result["Anzahl WE Typ"]
-            mask = result["T_mittel (°C)"].notna() & (result["Q_Raum_geb (W)"] > 0)
-            if mask.any():
-                weighted_avg_T = (
-                    (result.loc[mask, "T_mittel (°C)"] * result.loc[mask, "Q_Raum_geb (W)"]).sum()
-                    / result.loc[mask, "Q_Raum_geb (W)"].sum()
+        with mit_diagnose():
+            with stufe("Heizlastberechnung (mit Cache)"):
+                ergebnis = berechne_gebaeude_cached(
+                    data,
+                    T_out,
+                    default_T_set,
+                    safety_factor,
+                    analysis_level=analysis_level,
+                    wp_typ=wp_typ,
+                    wp_power_kw=wp_power_kw_input,
+                    heizwaermebedarf=heizwaermebedarf_input,
+                    rechner=st.session_state["heizlast_inkrementell"].berechne,
                 )
-            else:
-                weighted_avg_T = np.nan
-        else:
-            weighted_avg_T = np.nan
+            # Wärmeströme zu Nachbarräumen und Zonen auf das (geteilte) Ergebnis aufsetzen
+            if angrenzung_datei is not None:
+                ergebnis = mit_angrenzung(ergebnis, lese_angrenzung(angrenzung_datei, data), T_out, safety_factor)
+            result = ergebnis.result
+            type_group = ergebnis.type_group
+            total_heating_load_building = ergebnis.total_heating_load_building
+            heizlast_kw_building = ergebnis.heizlast_kw_building
+            critical_share = ergebnis.critical_share
+            wp_info = ergebnis.wp_info
+
+            # Summen und gewichtete Mittel je Ebene (Wohnungstyp → Raum) in einem Durchlauf
+            with stufe("Hierarchische Aggregation"):
+                hierarchie = aggregiere_hierarchie(result)
+
+            # Sensitivität, Jahressimulation und Katalogauswahl arbeiten auf dem linearen Modell
+            modell = st.session_state.get("linear_modell")
+            if modell is None or st.session_state.get("linear_modell_schluessel") != tabellen_hash(data):
+                modell = LinearesModell(data)
+
+            # Q²/Q³: minimale Vorlauftemperatur aus den installierten Heizkörpern
+            vorlauf = None
+            if not analysis_level.startswith("Q¹") and NORMLEISTUNG_SPALTE in data.columns \
+                    and pd.to_numeric(data[NORMLEISTUNG_SPALTE], errors="coerce").notna().any():
+                with stufe("Minimale Vorlauftemperatur"):
+                    vorlauf = vorlauf_analyse(data, T_out, default_T_set, safety_factor)
+
+            sensitivitaet = None
+            if mc_aktiv:
+                with stufe("Monte-Carlo-Sensitivität", stichproben=int(mc_stichproben)):
+                    sensitivitaet = monte_carlo(
+                        data, T_out, default_T_set, safety_factor, profil=selected_profile, n=int(mc_stichproben), modell=modell
+                    )
 
-        # Anteil kritischer/bedingt geeigneter Heizlast (Gebäude)
-        if "Q_Raum_geb (W)" not in result.columns:
-            result["Q_Raum_geb (W)"] = result["Q_Raum (W)"] * result["Anzahl WE Typ"]
+            sanierung = None
+            if sanierung_aktiv:
+                with stufe("Sanierungspakete"):
+                    massnahmen = lese_massnahmen(massnahmen_datei) if massnahmen_datei is not None else None
+                    sanierung = optimiere_sanierung(
+                        data, T_out, default_T_set, safety_factor, massnahmen=massnahmen, modell=modell
+                    )
 
-        total_Q_building = result["Q_Raum_geb (W)"].sum()
-        crit_mask = result["WP-Eignung"].isin(["bedingt", "kritisch"])
-        if crit_mask.any() and total_Q_building > 0:
-            critical_share = (result.loc[crit_mask, "Q_Raum_geb (W)"].sum() / total_Q_building) * 100.0
-        else:
-            critical_share = 0.0
-
-        # WP-Info vorbereiten (nur bei Q³ wirklich relevant, bezogen auf Gebäude)
-        wp_info = None
-        coverage = None
-        cop_est = None
-        jaz_est = None
-        heizwaermebedarf = heizwaermebedarf_input
-        strombedarf = None
-
-        if analysis_level.startswith("Q³") and heizlast_kw_building > 0 and wp_typ != "Kein WP / andere Erzeuger":
-            coverage = (wp_power_kw_input / heizlast_kw_building) * 100.0
-            cop_est = schaetze_cop(wp_typ, weighted_avg_T)
-            jaz_est = cop_est - 0.3 if not np.isnan(cop_est) else np.nan
-            if jaz_est is not None and not np.isnan(jaz_est) and jaz_est > 0 and heizwaermebedarf_input > 0:
-                strombedarf = heizwaermebedarf_input / jaz_est
-            wp_info = {
-                "wp_typ": wp_typ,
-                "wp_power_kw": wp_power_kw_input,
-                "coverage": coverage,
-                "cop_est": cop_est,
-                "jaz_est": jaz_est,
-                "heizwaermebedarf": heizwaermebedarf_input,
-                "strombedarf": strombedarf,
-                "weighted_avg_T": weighted_avg_T,
-                "critical_share": critical_share,
-            }
+            simulation = None
+            katalog_rangliste = None
+            katalog_synthetisch = False
+            T_aussen_try = None
+            if analysis_level.startswith("Q³") and (try_datei is not None or katalog_datei is not None):
+                T_aussen_try = lese_testreferenzjahr(try_datei) if try_datei is not None else None
+
+                # stündliche Jahressimulation, falls ein Testreferenzjahr vorliegt
+                if wp_info is not None and T_aussen_try is not None:
+                    with stufe("Jahressimulation (8760 h)"):
+                        sim = simuliere_modell(modell, T_aussen_try, T_out, default_T_set, wp_typ, wp_power_kw_input)
+                    simulation = {
+                        name: float(getattr(sim, name)[0])
+                        for name in ("heizwaermebedarf", "waerme_wp", "backup", "strom_wp", "strom_gesamt", "scop", "jaz_system", "bivalenzpunkt")
+                    }
+                    # wp_info kann aus dem gemeinsamen Cache stammen → nicht verändern, sondern ergänzen
+                    wp_info = dict(wp_info, simulation=simulation)
+
+                # alle Modelle des WP-Katalogs für dieses Gebäude bewerten
+                if katalog_datei is not None:
+                    with stufe("WP-Katalog bewerten"):
+                        bewertung = bewerte_modell(
+                            lese_katalog(katalog_datei), modell, T_out, default_T_set, safety_factor, T_aussen=T_aussen_try
+                        )
+                        katalog_rangliste = rangliste(bewertung)
+                        katalog_synthetisch = bewertung.synthetisches_jahr
+
+            # Aufheizen nach Nachtabsenkung: Auslegungstage bei Tₑ, Jahresbilanz mit Testreferenzjahr
+            aufheizen = aufheizen_jahr = None
+            if analysis_level.startswith("Q³") and aufheizen_aktiv:
+                parameter = dict(
+                    absenkung_von=normal_bis,
+                    absenkung_bis=normal_von,
+                    absenkung_K=absenkung_K if absenkung_K > 0 else None,
+                    bauweise=bauweise,
+                    aufheizzeit_h=aufheizzeit_h,
+                    modell=modell,
+                )
+                aufheizen = simuliere_aufheizen(data, T_out, default_T_set, safety_factor, zeitreihen=True, **parameter)
+                if T_aussen_try is not None:
+                    aufheizen_jahr = simuliere_aufheizen(
+                        data, T_out, default_T_set, safety_factor, T_aussen=T_aussen_try, **parameter
+                    )
+
+        coverage = wp_info["coverage"] if wp_info else None
+        cop_est = wp_info["cop_est"] if wp_info else None
+        jaz_est = wp_info["jaz_est"] if wp_info else None
 
         cols = st.columns((2, 3))
         with cols[0]:
@@ -842,6 +614,7 @@ if st.button("🔍 Heizlast berechnen"):
                 "ΔT (K)",
                 "Q_T (W)",
                 "Q_V (W)",
+                *(["Q_Nachbarn (W)"] if "Q_Nachbarn (W)" in result.columns else []),
                 "Q_Raum (W)",
                 "Heizflächentyp",
                 "T_VL (°C)",
@@ -853,8 +626,9 @@ if st.button("🔍 Heizlast berechnen"):
                 "Typ oberer Abschluss",
             ]].copy()
 
-            for c in ["ΔT (K)", "Q_T (W)", "Q_V (W)", "Q_Raum (W)", "T_VL (°C)", "T_RL (°C)", "T_mittel (°C)"]:
-                anzeige[c] = anzeige[c].round(1)
+            for c in ["ΔT (K)", "Q_T (W)", "Q_V (W)", "Q_Nachbarn (W)", "Q_Raum (W)", "T_VL (°C)", "T_RL (°C)", "T_mittel (°C)"]:
+                if c in anzeige.columns:
+                    anzeige[c] = anzeige[c].round(1)
 
             st.dataframe(anzeige, use_container_width=True)
 
@@ -862,6 +636,12 @@ if st.button("🔍 Heizlast berechnen"):
                 f"### 🔢 Gesamtheizlast Gebäude: **{total_heating_load_building:,.0f} W** "
                 f"(≈ {heizlast_kw_building:,.2f} kW)"
             )
+            if "Q_Nachbarn (W)" in result.columns:
+                q_nachbarn = (result["Q_Nachbarn (W)"] * (1.0 + safety_factor) * result["Anzahl WE Typ"]).sum()
+                st.caption(
+                    f"davon Wärmeströme zu Nachbarräumen und angrenzenden Zonen: {q_nachbarn:+,.0f} W "
+                    "(Ströme zwischen Räumen derselben Wohnung heben sich in der Summe auf)"
+                )
             st.markdown(
                 f"🔍 Anteil Gebäudeheizlast in nur **bedingt/kritisch WP-geeigneten Bereichen**: "
                 f"**{critical_share:,.0f} %**"
@@ -872,35 +652,50 @@ if st.button("🔍 Heizlast berechnen"):
             type_display.columns = ["Wohnungstyp", "Anzahl WE Typ", "Heizlast je WE [kW]", "Heizlast Typ gesamt [kW]"]
             st.dataframe(type_display, use_container_width=True)
 
-            # Exporte
-            excel_bytes = create_excel(result, type_group.rename(columns={
+            # Exporte erst beim Klick auf den Download erzeugen (eigener Thread), je Ergebnis einmal
+            exporte = st.session_state["exporte"]
+            exporte.setze_schluessel(tabellen_hash(
+                data, T_out, default_T_set, safety_factor, analysis_level, repr(wp_info),
+                angrenzung_datei.getvalue() if angrenzung_datei is not None else None,
+            ))
+            typen_export = type_group.rename(columns={
                 "Q_WE_W": "Heizlast je WE [W]",
                 "Q_WE_kW": "Heizlast je WE [kW]",
                 "Q_Typ_geb_W": "Heizlast Typ gesamt [W]",
                 "Q_Typ_geb_kW": "Heizlast Typ gesamt [kW]",
                 "Anzahl_WE": "Anzahl WE Typ",
-            }))
+            })
             st.download_button(
                 label="📥 Ergebnisse als Excel (.xlsx)",
-                data=excel_bytes,
+                data=exporte.bei_bedarf("excel", lambda: export_mit_diagnose(create_excel, result, typen_export, None, None, hierarchie)),
                 file_name="heizlast_mfh_ergebnisse_v5.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore",
             )
 
-            pdf_bytes = create_pdf_summary(
-                result, type_group.rename(columns={
-                    "Wohnungstyp": "Wohnungstyp",
-                    "Anzahl_WE": "Anzahl WE Typ",
-                    "Q_WE_kW": "Q_WE_kW",
-                    "Q_Typ_geb_kW": "Q_Typ_geb_kW",
-                }), total_heating_load_building, T_out, default_T_set, safety_factor, analysis_level, wp_info
+            typen_pdf = type_group.rename(columns={"Anzahl_WE": "Anzahl WE Typ"})
+            pdf_argumente = (
+                result, typen_pdf, total_heating_load_building, T_out, default_T_set, safety_factor, analysis_level, wp_info,
+                # Ebenen-Übersicht im Handout nur, wenn es mehr als Wohnungstyp/Raum gibt (z. B. Treppenhaus, Geschoss)
+                hierarchie if set(hierarchie.ebenen) - {"Wohnungstyp", "Raum"} else None,
             )
             st.download_button(
                 label="📄 Ergebnisse als PDF-Handout (Q-Level & MFH, V5)",
-                data=pdf_bytes,
+                data=exporte.bei_bedarf("pdf", lambda: export_mit_diagnose(create_pdf_summary, *pdf_argumente)),
                 file_name="heizlast_mfh_handout_qkonzept_v5.pdf",
                 mime="application/pdf",
+                on_click="ignore",
             )
+            if pyarrow_verfuegbar():
+                st.download_button(
+                    label="📦 Ergebnisse als Parquet (ZIP: Räume, Wohnungstypen, Gebäude)",
+                    data=exporte.bei_bedarf("parquet", lambda: export_mit_diagnose(create_parquet_zip, ergebnis_tabellen(ergebnis))),
+                    file_name="heizlast_mfh_ergebnisse_parquet.zip",
+                    mime="application/zip",
+                    on_click="ignore",
+                )
+            else:
+                st.caption("Parquet-Export benötigt pyarrow (pip install pyarrow).")
 
         with cols[1]:
             st.subheader("Visualisierung Heizlast je Wohnungstyp [kW]")
@@ -911,13 +706,8 @@ if st.button("🔍 Heizlast berechnen"):
             if analysis_level.startswith("Q²") or analysis_level.startswith("Q³"):
                 st.markdown("#### Mittlere Systemtemperatur je Wohnungstyp (gewichteter Mittelwert)")
                 if "T_mittel (°C)" in result.columns:
-                    temp_type = result.copy()
-                    temp_type["Q_Raum_geb (W)"] = temp_type["Q_Raum (W)"] * temp_type["Anzahl WE Typ"]
-                    temp_group = temp_type[temp_type["T_mittel (°C)"].notna()].groupby("Wohnungstyp").apply(
-                        lambda g: (g["T_mittel (°C)"] * g["Q_Raum_geb (W)"]).sum() / g["Q_Raum_geb (W)"].sum()
-                    )
-                    temp_group = temp_group.to_frame(name="T_mittel_typ (°C)")
-                    st.bar_chart(temp_group)
+                    temp_group = hierarchie.ebene("Wohnungstyp").set_index("Wohnungstyp")[["T_mittel gewichtet (°C)"]]
+                    st.bar_chart(temp_group.rename(columns={"T_mittel gewichtet (°C)": "T_mittel_typ (°C)"}).dropna())
 
         with st.expander("Details / Zwischenwerte (Räume)"):
             st.dataframe(result, use_container_width=True)
@@ -925,6 +715,81 @@ if st.button("🔍 Heizlast berechnen"):
         with st.expander("Details Wohnungstypen / Gebäude"):
             st.dataframe(type_group, use_container_width=True)
 
+        with st.expander("Konstruktionen (U-Werte als Katalog, Räume je Konstruktion)"):
+            st.caption(
+                "Gleiche U-Werte je Bauteil bilden eine Konstruktion; Werte aus den Gebäudetyp-Profilen "
+                "tragen den Profilnamen. Für Sanierungsvarianten über viele Gebäude: heizlast.konstruktionen."
+            )
+            referenzen, katalog = referenziere(data, Konstruktionskatalog.aus_profilen())
+            st.dataframe(verwendung(referenzen, katalog), use_container_width=True)
+
+        with st.expander("Heizlast nach Ebenen (Gebäude → Wohnungstyp → Raum)"):
+            st.dataframe(hierarchie.als_tabelle().round(2), use_container_width=True, hide_index=True)
+
+        with st.expander("Ergebnis-Cache (alle Sitzungen)"):
+            cache_stats = standard_cache().stats()
+            st.write(
+                f"Treffer: **{cache_stats['hits']}** (davon von Platte: {cache_stats['disk_hits']}) · "
+                f"Neuberechnungen: **{cache_stats['misses']}** · "
+                f"Trefferquote: **{cache_stats['hit_rate'] * 100:,.0f} %**  \n"
+                f"Einträge: {cache_stats['entries']} · "
+                f"Speicher: {cache_stats['bytes'] / 1e6:,.1f} / {cache_stats['max_bytes'] / 1e6:,.0f} MB · "
+                f"verdrängt: {cache_stats['evictions']}"
+            )
+
+        if vorlauf is not None:
+            st.subheader("Minimale Vorlauftemperatur mit den installierten Heizkörpern (Q²)")
+            geb = vorlauf.gebaeude.iloc[0]
+            t_min = geb["min. Vorlauftemperatur Gebäude (°C)"]
+            col_vl1, col_vl2, col_vl3, col_vl4 = st.columns(4)
+            with col_vl1:
+                st.metric("minimale Vorlauftemperatur", f"{t_min:,.1f} °C" if np.isfinite(t_min) else "> 90 °C")
+            for spalte, (ziel, titel) in zip((col_vl2, col_vl3, col_vl4), ((55, "55 °C"), (45, "45 °C"), (35, "35 °C"))):
+                with spalte:
+                    st.metric(f"Heizkörper zu tauschen für {titel}", f"{geb[f'Heizkörper zu tauschen bei {ziel} °C']:,d}")
+            st.caption(
+                f"Begrenzender Raum: **{geb['begrenzender Raum']}**. Heizkörperleistung nach "
+                "Q = Q_N · (ΔT_log / 49,8 K)ⁿ mit Normleistung 75/65/20 °C und 10 K Spreizung; "
+                "Anzahl Heizkörper = Räume × Anzahl WE des Wohnungstyps."
+            )
+            st.dataframe(vorlauf.raeume.round(1), use_container_width=True)
+
+        if sensitivitaet is not None:
+            st.subheader("Unsicherheitsband Gebäudeheizlast (Monte-Carlo)")
+            band = sensitivitaet.perzentile.iloc[0]
+            col_mc1, col_mc2, col_mc3 = st.columns(3)
+            with col_mc1:
+                st.metric("P10", f"{band['P10 (kW)']:,.2f} kW")
+            with col_mc2:
+                st.metric("P50 (Median)", f"{band['P50 (kW)']:,.2f} kW")
+            with col_mc3:
+                st.metric("P90", f"{band['P90 (kW)']:,.2f} kW")
+            st.caption(
+                f"{len(sensitivitaet.stichproben):,} Stichproben, Streuungen nach Profil „{selected_profile}“. "
+                "Tornado: Heizlast, wenn jeweils nur eine Eingangsgröße auf ihrem P10-/P90-Wert liegt."
+            )
+            st.bar_chart(sensitivitaet.tornado.set_index("Eingangsgröße")["Spannweite (kW)"])
+            st.dataframe(sensitivitaet.tornado.round(2), use_container_width=True)
+
+        if sanierung is not None:
+            st.subheader("Sanierungspakete – Kosten vs. Heizlast vs. WP-Eignung")
+            paket = guenstigstes_paket(sanierung).iloc[0]
+            if paket["erreichbar"]:
+                st.success(
+                    f"Günstigstes WP-taugliches Paket (keine Heizlast mehr in bedingt/kritisch geeigneten Räumen): "
+                    f"**{paket['Paket']}** für **{paket['Kosten (€)']:,.0f} €** – Heizlast "
+                    f"{paket['Heizlast Gebäude (kW)']:,.1f} kW, T_mittel {paket['T_mittel gewichtet (°C)']:,.1f} °C"
+                )
+            else:
+                st.warning("Mit den Maßnahmen der Kostentabelle wird das Gebäude nicht WP-tauglich.")
+            st.caption(
+                f"{sanierung.kombinationen} Kombinationen, davon {sanierung.bewertet} mit wirksamen Maßnahmen bewertet; "
+                f"{len(sanierung.front)} Pakete sind nicht dominiert (kein anderes ist billiger und zugleich "
+                "bei Heizlast, Anteil bedingt/kritisch und Systemtemperatur mindestens gleich gut)."
+            )
+            st.scatter_chart(sanierung.front, x="Kosten (€)", y="Heizlast Gebäude (kW)", color="T_mittel gewichtet (°C)")
+            st.dataframe(sanierung.front.round(1), use_container_width=True, hide_index=True)
+
         # Wärmepumpen-Auswertung in Q³
         if analysis_level.startswith("Q³") and wp_info is not None:
             st.subheader("Wärmepumpen-Abgleich (Q³) – Gesamtgebäude")
@@ -948,6 +813,62 @@ if st.button("🔍 Heizlast berechnen"):
                 f"**{critical_share:,.0f} %**"
             )
 
+            if simulation is not None:
+                st.markdown("### Stündliche Jahressimulation (Testreferenzjahr, 8760 h)")
+                col_sim1, col_sim2, col_sim3, col_sim4 = st.columns(4)
+                with col_sim1:
+                    st.metric("simulierte JAZ (WP)", f"{simulation['scop']:,.2f}")
+                with col_sim2:
+                    st.metric("Heizwärmebedarf (simuliert)", f"{simulation['heizwaermebedarf']:,.0f} kWh/a")
+                with col_sim3:
+                    st.metric("Strombedarf gesamt", f"{simulation['strom_gesamt']:,.0f} kWh/a")
+                with col_sim4:
+                    st.metric("Backup (Heizstab)", f"{simulation['backup']:,.0f} kWh/a")
+                st.write(
+                    f"- Bivalenzpunkt (WP-Leistung = Gebäudelast): **{simulation['bivalenzpunkt']:,.1f} °C**  \n"
+                    f"- System-JAZ inkl. Heizstab: **{simulation['jaz_system']:,.2f}**  \n"
+                    f"- Strombedarf WP ohne Heizstab: **{simulation['strom_wp']:,.0f} kWh/a**"
+                )
+
+            if aufheizen is not None:
+                st.markdown("### Aufheizen nach Nachtabsenkung (RC-Modell je Raum, Luft + Masse)")
+                geb = aufheizen.gebaeude.iloc[0]
+                zuschlag_kw = geb["Aufheizzuschlag (W)"] / 1000.0
+                col_rh1, col_rh2, col_rh3 = st.columns(3)
+                with col_rh1:
+                    st.metric("Aufheizzuschlag Gebäude", f"{zuschlag_kw:,.1f} kW", f"{geb['Aufheizzuschlag (%)']:,.0f} %")
+                with col_rh2:
+                    st.metric(
+                        "WP-Leistung inkl. Aufheizen (obere Schranke)", f"{heizlast_kw_building + zuschlag_kw:,.1f} kW",
+                        help="Alle Verluste an der Raumluft, ideale Regelung, alle Räume gleichzeitig – Obergrenze, "
+                             "kein Auslegungswert. Für die Auslegung Aufheizzeit und Absenkung prüfen.",
+                    )
+                with col_rh3:
+                    zeit = geb["Zeit bis Komfort max. (h)"]
+                    st.metric("Zeit bis Komfort (max.)", f"{zeit:,.2f} h" if np.isfinite(zeit) else "nicht erreicht")
+                st.caption(
+                    f"Auslegungstage bei Tₑ = {T_out:,.1f} °C, Absenkung {normal_bis}–{normal_von} Uhr, Bauweise „{bauweise}“. "
+                    f"Zuschlag = Mehrleistung, um alle Räume in {aufheizzeit_h:,.1f} h wieder auf Tᵢ zu bringen; "
+                    "Zeit bis Komfort mit der Normheizlast inkl. Sicherheitszuschlag je Raum. "
+                    "Der Zuschlag ist eine obere Schranke (Verluste an der Raumluft, ideale Regelung, "
+                    "alle Räume gleichzeitig) – längere Aufheizzeit oder geringere Absenkung senken ihn deutlich."
+                )
+                if aufheizen_jahr is not None:
+                    jahr = aufheizen_jahr.gebaeude.iloc[0]
+                    st.write(
+                        f"- Testreferenzjahr: Heizwärme mit Absenkung **{jahr['Heizwärme (kWh)']:,.0f} kWh/a**, "
+                        f"Einsparung durch Absenkung **{jahr['Einsparung durch Absenkung (%)']:,.1f} %**  \n"
+                        f"- Zeit bis Komfort im Jahresverlauf (max.): **{jahr['Zeit bis Komfort max. (h)']:,.2f} h**"
+                    )
+                reihen = aufheizen.zeitreihen
+                st.line_chart(pd.DataFrame({
+                    "Heizleistung (kW)": reihen["Heizleistung (W)"][:, 0] / 1000.0,
+                    "T_Raum mittel (°C)": reihen["T_Raum mittel (°C)"][:, 0],
+                }, index=pd.Index(reihen["Stunde"], name="Stunde")))
+                st.dataframe(aufheizen.typen.round(2), use_container_width=True, hide_index=True)
+                with st.expander("Aufheizen je Raum"):
+                    st.dataframe(aufheizen.raeume.round(2), use_container_width=True)
+
             if jaz_est is not None and not np.isnan(jaz_est) and heizwaermebedarf_input > 0:
                 strombedarf = heizwaermebedarf_input / jaz_est
                 st.markdown("### Grobe Strombedarfsschätzung")
@@ -957,7 +878,60 @@ if st.button("🔍 Heizlast berechnen"):
                     f"**{strombedarf:,.0f} kWh/a**"
                 )
 
+        if katalog_rangliste is not None:
+            st.subheader("Wärmepumpen-Katalog – Modellauswahl (Q³)")
+            st.caption(
+                f"{len(katalog_rangliste)} Modelle bewertet bei Tₑ = {T_out:,.1f} °C. Sortierung: "
+                "ausreichende Deckung (≥ 100 %) zuerst, dann Modelle ohne Stunden unter Kennfeld, "
+                "dann höchster SCOP, dann kleinste Leistung. "
+                "Bivalenzpunkt leer = WP deckt die Last bis zur Normtemperatur allein. "
+                "Unterhalb der tiefsten gemessenen Außentemperatur eines Modells wird nicht extrapoliert: "
+                "diese Stunden zählen als Backup (Spalte „Stunden unter Kennfeld“)."
+            )
+            if katalog_synthetisch:
+                st.warning(
+                    "SCOP und Rangfolge beruhen auf einem **synthetischen Referenzjahr** – "
+                    "für eine belastbare Modellauswahl ein Testreferenzjahr (TRY) hochladen."
+                )
+            st.dataframe(katalog_rangliste.head(20), use_container_width=True)
+
     except Exception as e:
         st.error(f"Fehler bei der Berechnung: {e}")
 else:
     st.info("Bitte auf **„Heizlast berechnen“** klicken, nachdem du die Raumdaten je Wohnungstyp geprüft hast.")
+
+# ---------------------------------------------------------
+# Projektübersicht: gespeicherte Gebäudeergebnisse des Szenarios
+# ---------------------------------------------------------
+if projekt_aktiv:
+    with st.expander(f"💾 Projekt „{projekt_name}“ – Gebäude im Szenario „{szenario_name}“"):
+        kritisch_ueber = st.slider("Nur Gebäude mit Anteil bedingt/kritisch über (%)", 0, 100, 0, step=5)
+        gespeicherte = projektspeicher().ergebnisse(projekt_name, szenario_name, kritisch_ueber=kritisch_ueber or None)
+        if gespeicherte.empty:
+            st.write("Keine gespeicherten Ergebnisse für diese Auswahl.")
+        else:
+            st.caption("„aktuell“ = nach der letzten Änderung der Raumtabelle berechnet.")
+            st.dataframe(gespeicherte.round(2), use_container_width=True)
+
+# ---------------------------------------------------------
+# Diagnose: Laufzeit/Speicher je Stufe (Sidebar-Option)
+# ---------------------------------------------------------
+if diagnose is not None:
+    with st.expander("🩺 Diagnose: Laufzeit und Speicher je Stufe"):
+        diagnose_tabelle = diagnose.tabelle(laeufe=2)
+        if diagnose_tabelle.empty:
+            st.write("Noch keine Messwerte.")
+        else:
+            st.caption(
+                "Letzte zwei Skriptläufe, eingerückt nach Verschachtelung. Exporte erscheinen nach dem Download "
+                "beim nächsten Lauf. Mit der Umgebungsvariable HEIZLAST_TRACE=<datei> werden alle Stufen als "
+                "JSON Lines angehängt."
+            )
+            st.dataframe(diagnose_tabelle.round(2), use_container_width=True)
+        st.download_button(
+            label="JSON-Trace herunterladen",
+            data=diagnose.als_json(),
+            file_name="heizlast_diagnose.json",
+            mime="application/json",
+            on_click="ignore",
+        )
@@ -0,0 +1,50 @@
+# Rechenkern der Heizlastberechnung (ohne Streamlit/reportlab/xlsxwriter).
+# Exporte (PDF/Excel) liegen in heizlast.export und werden nur bei Bedarf importiert.
+from .konstanten import (
+    ANALYSIS_LEVELS,
+    BUILDING_PROFILES,
+    CLIMATE_ZONES,
+    EIGNUNGSKLASSEN,
+    HEATING_TYPE_PARAMS,
+    KEIN_WP,
+    KRITISCHE_EIGNUNG,
+    RECOMMENDED_PARAMS,
+    TOP_TYPE_OPTIONS,
+    U_PROFILE_COLUMNS,
+    WP_TYPES,
+    beispiel_raumtabelle,
+)
+from .berechnung import (
+    ABGELEITETE_SPALTEN,
+    GebaeudeErgebnis,
+    aggregiere_gebaeude,
+    aggregiere_wohnungstypen,
+    berechne_gebaeude,
+    berechne_heizlast,
+    eignung_codes,
+    ergebnis_tabelle,
+    gewichtete_systemtemperatur,
+    gewichtete_temperatur_je_typ,
+    klassifiziere_eignung,
+    klassifiziere_eignung_array,
+    kritischer_anteil,
+    raum_kennwerte,
+    schaetze_cop,
+    wp_abgleich,
+)
+from .schema import KATEGORIE_SPALTEN, kompakte_raumtabelle, speicher_je_10k
+from .portfolio import GEBAEUDE_SPALTE, PortfolioErgebnis, berechne_portfolio
+from .aggregation import STANDARD_EBENEN, Hierarchie, aggregiere_hierarchie
+from .projekte import ProjektSpeicher
+from .cache import ErgebnisCache, berechne_gebaeude_cached, standard_cache, tabellen_hash
+from .inkrementell import InkrementelleBerechnung
+from .linear import LinearesErgebnis, LinearesModell, heizlast_je_aussentemperatur
+from .simulation import JahresSimulation, lese_testreferenzjahr, simuliere_jahr, simuliere_modell
+from .katalog import KatalogBewertung, WPKatalog, bewerte_katalog, bewerte_modell, beste_modelle, lese_katalog, rangliste
+from .sensitivitaet import STANDARD_UNSICHERHEITEN, SensitivitaetsErgebnis, Unsicherheit, monte_carlo
+from .vorlauf import NORMLEISTUNG_SPALTE, VorlaufErgebnis, min_vorlauftemperatur, vorlauf_analyse
+from .konstruktionen import KatalogBerechnung, Konstruktionskatalog, loese_auf, referenziere, rueckindex
+from .sanierung import STANDARD_MASSNAHMEN, SanierungsErgebnis, guenstigstes_paket, lese_massnahmen, optimiere_sanierung
+from .angrenzung import STANDARD_ZONEN, Angrenzung, AngrenzungsBerechnung, lese_angrenzung, mit_angrenzung
+from .dynamik import BAUWEISEN, AufheizErgebnis, simuliere_aufheizen
+from .austausch import SchemaFehler, lese_ergebnis, lese_raumtabelle, pruefe_raumtabelle, schreibe_ergebnisse, schreibe_parquet
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+
+from .berechnung import _zahlen
+from .konstanten import KRITISCHE_EIGNUNG
+from .portfolio import GEBAEUDE_SPALTE
+
+# ---------------------------------------------------------
+# Hierarchische Aggregation: Gebäude → Treppenhaus → Geschoss → Wohnungstyp → Raum
+#
+# Summen, Anzahlen und lastgewichtete Mittel für beliebige Gruppierungsebenen
+# in einem Durchlauf über die Raumtabelle (np.bincount je Ebene, kein apply).
+# „Anzahl WE Typ“ gilt je Wohnungstyp innerhalb der übergeordneten Ebenen
+# (Maximum der Gruppe, wie in aggregiere_wohnungstypen); jeder Raum zählt mit
+# dieser Vielfachheit zur Heizlast aller übergeordneten Knoten.
+# ---------------------------------------------------------
+STANDARD_EBENEN = [GEBAEUDE_SPALTE, "Treppenhaus", "Geschoss", "Wohnungstyp", "Raum"]
+
+TYP_EBENE = "Wohnungstyp"
+
+# Platzhalter für fehlende Werte einer Ebene
+OHNE_ANGABE = "(ohne Angabe)"
+
+KNOTEN_SPALTEN = [
+    "Anzahl Räume",
+    "Anzahl WE",
+    "Fläche (m²)",
+    "Q je WE (W)",
+    "Heizlast (W)",
+    "Heizlast (kW)",
+    "Heizlast je m² (W/m²)",
+    "Anteil an Gesamt (%)",
+    "T_mittel gewichtet (°C)",
+    "Anteil bedingt/kritisch (%)",
+]
+
+
+def _erste(ids, anzahl):
+    # erste Zeile je Gruppe (Gruppen-IDs 0..anzahl-1)
+    erste = np.empty(anzahl, dtype=np.int64)
+    erste[ids[::-1]] = np.arange(len(ids) - 1, -1, -1)
+    return erste
+
+
+def _gruppen_max(ids, werte, anzahl):
+    reihenfolge = np.argsort(ids, kind="stable")
+    grenzen = np.flatnonzero(np.r_[True, np.diff(ids[reihenfolge]) != 0])
+    maxima = np.full(anzahl, np.nan)
+    if len(ids):
+        maxima[ids[reihenfolge[grenzen]]] = np.maximum.reduceat(werte[reihenfolge], grenzen)
+    return maxima
+
+
+class Hierarchie:
+    # knoten: ein Knoten je Zeile in Baumreihenfolge (Eltern vor Kindern), Wurzel „Gesamt“;
+    # „Eltern“ ist die Zeilennummer des übergeordneten Knotens (-1 bei der Wurzel)
+
+    def __init__(self, ebenen, knoten):
+        self.ebenen = list(ebenen)
+        self.knoten = knoten
+
+    def __len__(self):
+        return len(self.knoten)
+
+    @property
+    def gesamt(self):
+        return self.knoten.iloc[0]
+
+    def ebene(self, name):
+        # flache Tabelle aller Knoten einer Ebene mit den Werten der übergeordneten Ebenen
+        tiefe = self.ebenen.index(name) + 1
+        knoten = self.knoten[self.knoten["Tiefe"] == tiefe]
+        return knoten[self.ebenen[:tiefe] + KNOTEN_SPALTEN].reset_index(drop=True)
+
+    def kinder(self, zeile=0):
+        return self.knoten[self.knoten["Eltern"] == zeile]
+
+    def bis(self, name):
+        # Teilbaum bis einschließlich Ebene name (z. B. ohne Räume für Berichte)
+        tiefe = self.ebenen.index(name) + 1
+        behalten = self.knoten["Tiefe"].to_numpy() <= tiefe
+        neu = np.cumsum(behalten) - 1
+        knoten = self.knoten[behalten].drop(columns=self.ebenen[tiefe:]).reset_index(drop=True)
+        eltern = knoten["Eltern"].to_numpy()
+        knoten["Eltern"] = np.where(eltern >= 0, neu[np.maximum(eltern, 0)], -1)
+        return Hierarchie(self.ebenen[:tiefe], knoten)
+
+    def als_tabelle(self):
+        # eingerückte Gliederung für Anzeige und Excel
+        gliederung = ["   " * t + str(k) for t, k in zip(self.knoten["Tiefe"], self.knoten["Knoten"])]
+        return pd.concat([
+            pd.DataFrame({"Gliederung": gliederung, "Ebene": self.knoten["Ebene"].to_numpy()}),
+            self.knoten[KNOTEN_SPALTEN].reset_index(drop=True),
+        ], axis=1)
+
+    def als_baum(self):
+        # verschachtelte dicts (z. B. für JSON oder einen Baum in der UI)
+        eintraege = [
+            {"name": k, "ebene": e, **{s: (None if w != w else w) for s, w in zip(KNOTEN_SPALTEN, werte)}, "kinder": []}
+            for k, e, werte in zip(
+                self.knoten["Knoten"].tolist(),
+                self.knoten["Ebene"].tolist(),
+                self.knoten[KNOTEN_SPALTEN].itertuples(index=False, name=None),
+            )
+        ]
+        for eintrag, eltern in zip(eintraege, self.knoten["Eltern"].tolist()):
+            if eltern >= 0:
+                eintraege[eltern]["kinder"].append(eintrag)
+        return eintraege[0] if eintraege else None
+
+
+def aggregiere_hierarchie(result, ebenen=None, typ_ebene=TYP_EBENE, anzahl_spalte="Anzahl WE Typ"):
+    # result: Ergebnistabelle aus berechne_heizlast / berechne_portfolio;
+    # ebenen: Gruppierungsspalten von oben nach unten (Standard: vorhandene STANDARD_EBENEN)
+    if ebenen is None:
+        ebenen = [e for e in STANDARD_EBENEN if e in result.columns]
+    fehlend = [e for e in ebenen if e not in result.columns]
+    if fehlend:
+        raise ValueError(f"Ebenen fehlen in der Ergebnistabelle: {', '.join(fehlend)}")
+    ebenen = list(ebenen)
+    n = len(result)
+
+    q = np.nan_to_num(_zahlen(result["Q_Raum (W)"]))
+    anzahl = _zahlen(result[anzahl_spalte]) if anzahl_spalte in result.columns else np.ones(n)
+    anzahl = np.where(np.isnan(anzahl), 1.0, anzahl)
+
+    # Gruppen-IDs je Tiefe: Tiefe 0 ist die Wurzel, Tiefe d gruppiert nach ebenen[:d]
+    codes, werte = [], []
+    for e in ebenen:
+        spalte = result[e]
+        if isinstance(spalte.dtype, pd.CategoricalDtype):
+            # Kategorien: nur die Codes faktorisieren (-1 = fehlend → letzter Eintrag)
+            c, u = pd.factorize(spalte.cat.codes.to_numpy())
+            u = np.append(spalte.cat.categories.to_numpy(dtype=object), OHNE_ANGABE)[u]
+        else:
+            c, u = pd.factorize(spalte.fillna(OHNE_ANGABE).to_numpy(dtype=object))
+        codes.append(c)
+        werte.append(np.asarray(u, dtype=object))
+    ids = [np.zeros(n, dtype=np.int64)]
+    anzahl_gruppen = [1 if n else 0]
+    for c, u in zip(codes, werte):
+        kombi, _ = pd.factorize(ids[-1] * len(u) + c)
+        ids.append(kombi.astype(np.int64))
+        anzahl_gruppen.append(int(kombi.max()) + 1 if n else 0)
+
+    # Vielfachheit je Raum: Maximum von Anzahl WE Typ je Wohnungstyp innerhalb der Ebenen darüber
+    if typ_ebene in ebenen:
+        typ_tiefe = ebenen.index(typ_ebene) + 1
+        typ_ids, typ_anzahl = ids[typ_tiefe], anzahl_gruppen[typ_tiefe]
+    else:
+        typ_tiefe = ebenen.index("Raum") if "Raum" in ebenen else len(ebenen)
+        typ_ids, typ_anzahl = ids[typ_tiefe], anzahl_gruppen[typ_tiefe]
+        if typ_ebene in result.columns:
+            typ_codes, typ_werte = pd.factorize(result[typ_ebene].astype(object).fillna(OHNE_ANGABE).to_numpy(dtype=object))
+            typ_ids, _ = pd.factorize(typ_ids * max(len(typ_werte), 1) + typ_codes)
+            typ_anzahl = int(typ_ids.max()) + 1 if n else 0
+    vielfach_typ = _gruppen_max(typ_ids, anzahl, typ_anzahl)
+    vielfach = vielfach_typ[typ_ids] if n else anzahl
+    typ_erste = _erste(typ_ids, typ_anzahl)
+
+    q_geb = q * vielfach
+    flaeche = np.nan_to_num(_zahlen(result["Fläche (m²)"])) * vielfach if "Fläche (m²)" in result.columns else None
+    if "T_mittel (°C)" in result.columns:
+        t_mid = _zahlen(result["T_mittel (°C)"])
+        gewicht = np.where(~np.isnan(t_mid) & (q_geb > 0), q_geb, 0.0)
+        tq = np.where(gewicht > 0, t_mid, 0.0) * gewicht
+    else:
+        gewicht = tq = None
+    if "WP-Eignung" in result.columns:
+        q_krit = np.where(result["WP-Eignung"].isin(KRITISCHE_EIGNUNG).to_numpy(), q_geb, 0.0)
+    else:
+        q_krit = None
+    q_gesamt = q_geb.sum()
+
+    # je Tiefe alle Summen mit bincount
+    tabellen = []
+    for tiefe, (g, k) in enumerate(zip(ids, anzahl_gruppen)):
+        erste = _erste(g, k)
+
+        def summe(w):
+            return np.bincount(g, weights=w, minlength=k)
+
+        q_knoten = summe(q_geb)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            spalten = {
+                "Anzahl Räume": np.bincount(g, minlength=k),
+                "Anzahl WE": np.full(k, np.nan),
+                "Fläche (m²)": summe(flaeche) if flaeche is not None else np.full(k, np.nan),
+                "Q je WE (W)": summe(q) if tiefe >= typ_tiefe and typ_ebene in ebenen else np.full(k, np.nan),
+                "Heizlast (W)": q_knoten,
+                "Heizlast (kW)": q_knoten / 1000.0,
+                "Heizlast je m² (W/m²)": np.full(k, np.nan),
+                "Anteil an Gesamt (%)": q_knoten / q_gesamt * 100.0 if q_gesamt > 0 else np.zeros(k),
+                "T_mittel gewichtet (°C)": np.full(k, np.nan),
+                "Anteil bedingt/kritisch (%)": np.zeros(k),
+            }
+            if flaeche is not None:
+                spalten["Heizlast je m² (W/m²)"] = np.where(spalten["Fläche (m²)"] > 0, q_knoten / spalten["Fläche (m²)"], np.nan)
+            if gewicht is not None:
+                q_gew = summe(gewicht)
+                spalten["T_mittel gewichtet (°C)"] = np.where(q_gew > 0, summe(tq) / q_gew, np.nan)
+            if q_krit is not None:
+                spalten["Anteil bedingt/kritisch (%)"] = np.where(q_knoten > 0, summe(q_krit) / q_knoten * 100.0, 0.0)
+        if tiefe <= typ_tiefe and k:
+            # Wohnungstypen liegen vollständig in einem Knoten dieser Tiefe → Vielfachheiten summieren
+            spalten["Anzahl WE"] = np.bincount(g[typ_erste], weights=vielfach_typ, minlength=k)
+        elif typ_ebene in ebenen and k:
+            spalten["Anzahl WE"] = vielfach[erste]
+
+        ebene = ebenen[tiefe - 1] if tiefe else "Gesamt"
+        tabelle = {
+            "Ebene": np.full(k, ebene, dtype=object),
+            "Tiefe": np.full(k, tiefe, dtype=np.int64),
+            "Knoten": werte[tiefe - 1][codes[tiefe - 1][erste]] if tiefe else np.array(["Gesamt"] * k, dtype=object),
+        }
+        for i, e in enumerate(ebenen):
+            tabelle[e] = werte[i][codes[i][erste]] if i < tiefe else np.full(k, None, dtype=object)
+        # Sortierschlüssel: Codes der Ebenen in Eingabereihenfolge, -1 unterhalb der Tiefe
+        schluessel = np.full((k, len(ebenen)), -1, dtype=np.int64)
+        for i in range(tiefe):
+            schluessel[:, i] = codes[i][erste]
+        eltern = ids[tiefe - 1][erste] if tiefe else np.full(k, -1)
+        tabellen.append((tabelle, spalten, schluessel, eltern))
+
+    # Baumreihenfolge: lexikografisch nach den Codes, Eltern (-1) vor ihren Kindern
+    schluessel = np.vstack([t[2] for t in tabellen])
+    reihenfolge = np.lexsort(schluessel.T[::-1]) if len(ebenen) else np.arange(len(schluessel))
+    position = np.empty(len(reihenfolge), dtype=np.int64)
+    position[reihenfolge] = np.arange(len(reihenfolge))
+
+    versatz = np.cumsum([0] + anzahl_gruppen[:-1])
+    eltern = np.concatenate([
+        np.where(t[3] >= 0, position[np.maximum(t[3], 0) + (versatz[tiefe - 1] if tiefe else 0)], -1)
+        for tiefe, t in enumerate(tabellen)
+    ])
+
+    knoten = pd.concat(
+        [pd.DataFrame({**t[0], **t[1]}) for t in tabellen], ignore_index=True
+    )
+    knoten.insert(3, "Eltern", eltern)
+    knoten = knoten.iloc[reihenfolge].reset_index(drop=True)
+    return Hierarchie(ebenen, knoten)
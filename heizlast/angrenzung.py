@@ -0,0 +1,259 @@
+
+import numpy as np
+import pandas as pd
+
+from .austausch import _lese_csv_text
+from .berechnung import aggregiere_gebaeude
+from .diagnose import stufe
+from .konstanten import KEIN_WP
+
+# ---------------------------------------------------------
+# Wärmeströme zwischen Räumen und zu angrenzenden Zonen (DIN EN 12831)
+#
+# Räume und Zonen (unbeheiztes Treppenhaus, Keller, Nachbarwohnung) sind über
+# gemeinsame Flächen verbunden: Kante e = (Raum a, Raum oder Zone b) mit
+# H_e = A · U. Je Raum ergibt sich
+#
+#   Q_Nachbarn,i = Σ_e H_e · (Tᵢ − T_b)         (Raum/Zone mit Temperatur)
+#                + Σ_e H_e · b_u · (Tᵢ − Tₑ)     (Zone mit Temperatur-Korrekturfaktor)
+#
+# Die Kanten liegen als Arrays vor (dünn besetzte Inzidenz Räume × Kanten);
+# ausgewertet wird in einem Durchlauf: Temperaturdifferenz je Kante holen,
+# mit H_e multiplizieren, per np.bincount auf beide Endräume verteilen.
+# Gemeinsame Flächen gehören nicht zusätzlich in „A Wand“ usw.
+# ---------------------------------------------------------
+RAUM_ID_SPALTE = "Raum-ID"
+KANTEN_SPALTEN = ["Raum", "angrenzend", "Fläche (m²)", "U (W/m²K)"]
+ZONEN_SPALTEN = ["Zone", "T (°C)", "b_u"]
+
+# vereinfachte Planungsannahmen – je Projekt anpassbar (zonen=...)
+STANDARD_ZONEN = [
+    {"Zone": "Treppenhaus (unbeheizt)", "T (°C)": np.nan, "b_u": 0.5},
+    {"Zone": "Keller (unbeheizt)", "T (°C)": np.nan, "b_u": 0.5},
+    {"Zone": "Dachraum (unbeheizt)", "T (°C)": np.nan, "b_u": 0.9},
+    {"Zone": "Nachbarwohnung (abgesenkt)", "T (°C)": 16.0, "b_u": np.nan},
+]
+
+
+def raum_schluessel(df):
+    # Namen, über die Kanten Räume ansprechen: „Raum-ID“, sonst „Raum“ (muss eindeutig sein)
+    spalte = RAUM_ID_SPALTE if RAUM_ID_SPALTE in df.columns else "Raum"
+    if spalte not in df.columns:
+        raise ValueError(f"Angrenzung: Raumtabelle braucht eine Spalte „{RAUM_ID_SPALTE}“ oder „Raum“.")
+    namen = df[spalte].astype(str).to_numpy()
+    doppelt = pd.Index(namen)[pd.Index(namen).duplicated()].unique()
+    if len(doppelt):
+        raise ValueError(
+            f"Angrenzung: Raumnamen nicht eindeutig ({', '.join(doppelt[:5])}) – bitte Spalte „{RAUM_ID_SPALTE}“ ergänzen."
+        )
+    return pd.Index(namen)
+
+
+_KANTEN_FELDER = {"a": np.int64, "b": np.int64, "zone": np.int64, "flaeche": float, "u": float, "aktiv": bool}
+
+
+class Angrenzung:
+    # Kanten als Arrays mit Reserve (Anhängen ohne Umkopieren aller Kanten); entfernte
+    # Kanten bleiben als H = 0 stehen, damit Kantennummern gültig bleiben
+    #   a: Raum, b: Raum oder −1, zone: Zone oder −1
+
+    def __init__(self, raeume, zonen=None):
+        # raeume: Raumnamen in Zeilenreihenfolge der Raumtabelle (raum_schluessel)
+        self.raeume = pd.Index(raeume)
+        zonen = pd.DataFrame(STANDARD_ZONEN if zonen is None else zonen)
+        for col in ZONEN_SPALTEN[1:]:
+            zonen[col] = pd.to_numeric(zonen[col], errors="coerce") if col in zonen.columns else np.nan
+        ohne = zonen.loc[zonen["T (°C)"].isna() & zonen["b_u"].isna(), "Zone"]
+        if len(ohne):
+            raise ValueError(f"Angrenzung: Zone ohne Temperatur und ohne b_u: {', '.join(map(str, ohne))}")
+        self.zonen = zonen[ZONEN_SPALTEN].drop_duplicates("Zone", keep="last").reset_index(drop=True)
+        self._zonen_index = pd.Index(self.zonen["Zone"])
+        self._t_zone = self.zonen["T (°C)"].to_numpy(dtype=float)
+        self._b_u = self.zonen["b_u"].to_numpy(dtype=float)
+        self._n = 0
+        self._felder = {name: np.zeros(0, dtype=typ) for name, typ in _KANTEN_FELDER.items()}
+
+    def __getattr__(self, name):
+        # a, b, zone, flaeche, u, aktiv: Sicht auf die belegten Kanten
+        if name in _KANTEN_FELDER:
+            return self.__dict__["_felder"][name][:self._n]
+        raise AttributeError(name)
+
+    @classmethod
+    def aus_tabellen(cls, df, kanten, zonen=None):
+        angrenzung = cls(raum_schluessel(df), zonen)
+        kanten = pd.DataFrame(kanten)
+        fehlend = [c for c in KANTEN_SPALTEN if c not in kanten.columns]
+        if fehlend:
+            raise ValueError(f"Angrenzung: Spalten fehlen: {', '.join(fehlend)}")
+        angrenzung.hinzufuegen(
+            kanten["Raum"].astype(str).to_numpy(),
+            kanten["angrenzend"].astype(str).to_numpy(),
+            pd.to_numeric(kanten["Fläche (m²)"], errors="coerce").to_numpy(dtype=float),
+            pd.to_numeric(kanten["U (W/m²K)"], errors="coerce").to_numpy(dtype=float),
+        )
+        return angrenzung
+
+    def __len__(self):
+        return int(self.aktiv.sum())
+
+    @property
+    def H(self):
+        return self.h()
+
+    def h(self, kanten=slice(None)):
+        # H = A · U je Kante (W/K), entfernte Kanten 0
+        return np.where(self.aktiv[kanten], np.nan_to_num(self.flaeche[kanten] * self.u[kanten]), 0.0)
+
+    def _knoten(self, namen):
+        # Name → (Raum oder −1, Zone oder −1)
+        raum = self.raeume.get_indexer(namen)
+        zone = self._zonen_index.get_indexer(namen)
+        unbekannt = np.asarray(namen)[(raum < 0) & (zone < 0)]
+        if len(unbekannt):
+            raise ValueError(f"Angrenzung: unbekannter Raum bzw. unbekannte Zone: {', '.join(pd.unique(unbekannt)[:5])}")
+        return raum, np.where(raum >= 0, -1, zone)
+
+    def hinzufuegen(self, raum, angrenzend, flaeche, u):
+        # einzelne Kante oder Arrays; Rückgabe: Kantennummer(n)
+        einzeln = np.ndim(raum) == 0
+        raum, angrenzend, flaeche, u = (np.atleast_1d(x) for x in (raum, angrenzend, flaeche, u))
+        a, zone_a = self._knoten(raum)
+        b, zone_b = self._knoten(angrenzend)
+        beide_zonen = (a < 0) & (b < 0)
+        if beide_zonen.any():
+            raise ValueError("Angrenzung: eine Kante braucht mindestens einen Raum.")
+        # Zone immer auf der Seite b
+        tauschen = a < 0
+        a, b = np.where(tauschen, b, a), np.where(tauschen, a, b)
+        zone = np.where(tauschen, zone_a, zone_b)
+        if (a == b).any():
+            raise ValueError("Angrenzung: Raum grenzt an sich selbst.")
+
+        start, ende = self._n, self._n + len(a)
+        if ende > len(self._felder["a"]):
+            kapazitaet = max(ende, 2 * len(self._felder["a"]))
+            for name, werte in self._felder.items():
+                self._felder[name] = np.concatenate([werte[:start], np.zeros(kapazitaet - start, dtype=werte.dtype)])
+        neu = {"a": a, "b": b, "zone": zone, "flaeche": flaeche, "u": u, "aktiv": True}
+        for name, werte in neu.items():
+            self._felder[name][start:ende] = werte
+        self._n = ende
+        nummern = np.arange(start, ende)
+        return int(nummern[0]) if einzeln else nummern
+
+    def setze(self, kante, flaeche=None, u=None):
+        if flaeche is not None:
+            self.flaeche[kante] = flaeche
+        if u is not None:
+            self.u[kante] = u
+
+    def entfernen(self, kante):
+        self.aktiv[kante] = False
+
+    def temperaturdifferenz(self, t_i, T_out, kanten=slice(None)):
+        # Tᵢ(a) − T(b) je Kante; bei Zonen mit b_u: b_u · (Tᵢ(a) − Tₑ)
+        a, b, zone = self.a[kanten], self.b[kanten], self.zone[kanten]
+        t_a = t_i[a]
+        t_zone = self._t_zone[np.maximum(zone, 0)]
+        b_u = self._b_u[np.maximum(zone, 0)]
+        zu_zone = np.where(np.isnan(t_zone), b_u * (t_a - T_out), t_a - t_zone)
+        return np.where(b >= 0, t_a - t_i[np.maximum(b, 0)], zu_zone)
+
+    def waermestroeme(self, t_i, T_out):
+        # Q_Nachbarn je Raum (W, ohne Zuschlag) in einem Durchlauf über alle Kanten
+        t_i = np.asarray(t_i, dtype=float)
+        fluss = self.H * self.temperaturdifferenz(t_i, T_out)
+        return self._verteile(fluss, np.arange(len(self.a)), len(t_i))
+
+    def _verteile(self, fluss, kanten, n):
+        # Kante a → b: a gibt ab (+), ein Raum b nimmt auf (−)
+        b = self.b[kanten]
+        innen = b >= 0
+        return (
+            np.bincount(self.a[kanten], weights=fluss, minlength=n)
+            - np.bincount(b[innen], weights=fluss[innen], minlength=n)
+        )
+
+    def als_tabelle(self):
+        namen = np.where(self.b >= 0, self.raeume.to_numpy()[np.maximum(self.b, 0)],
+                         self._zonen_index.to_numpy()[np.maximum(self.zone, 0)])
+        tabelle = pd.DataFrame({
+            "Raum": self.raeume.to_numpy()[self.a],
+            "angrenzend": namen,
+            "Fläche (m²)": self.flaeche,
+            "U (W/m²K)": self.u,
+            "H (W/K)": self.H,
+        })
+        return tabelle[self.aktiv].rename_axis("Kante")
+
+
+class AngrenzungsBerechnung:
+    # hält Q_Nachbarn je Raum; Änderungen einer Kante wirken nur auf ihre beiden Endräume
+
+    def __init__(self, angrenzung, t_i, T_out, safety_factor=0.0):
+        self.angrenzung = angrenzung
+        self.t_i = np.asarray(t_i, dtype=float).copy()
+        self.T_out = T_out
+        self.safety_factor = safety_factor
+        with stufe("Angrenzung: Wärmeströme (alle Kanten)", zeilen=len(angrenzung.a)):
+            fluss = angrenzung.H * angrenzung.temperaturdifferenz(self.t_i, T_out)
+            self.q = angrenzung._verteile(fluss, np.arange(len(angrenzung.a)), len(self.t_i))
+        # Fluss je Kante, mit derselben Reserve wie die Kantenarrays
+        self._fluss = np.zeros(len(angrenzung._felder["a"]))
+        self._fluss[:len(fluss)] = fluss
+
+    @property
+    def q_nachbarn(self):
+        # je Raum inkl. Zuschlag (W), wie Q_Raum
+        return self.q * (1.0 + self.safety_factor)
+
+    def _neu(self, kanten):
+        kanten = np.atleast_1d(kanten)
+        with stufe("Angrenzung: Wärmeströme (gezielt)", zeilen=len(kanten)):
+            neu = self.angrenzung.h(kanten) * self.angrenzung.temperaturdifferenz(self.t_i, self.T_out, kanten)
+            delta = neu - self._fluss[kanten]
+            b = self.angrenzung.b[kanten]
+            np.add.at(self.q, self.angrenzung.a[kanten], delta)
+            np.subtract.at(self.q, b[b >= 0], delta[b >= 0])
+            self._fluss[kanten] = neu
+
+    def aendere(self, kante, flaeche=None, u=None):
+        self.angrenzung.setze(kante, flaeche, u)
+        self._neu(kante)
+
+    def hinzufuegen(self, raum, angrenzend, flaeche, u):
+        kanten = self.angrenzung.hinzufuegen(raum, angrenzend, flaeche, u)
+        if len(self._fluss) < len(self.angrenzung._felder["a"]):
+            self._fluss = np.concatenate([self._fluss, np.zeros(len(self.angrenzung._felder["a"]) - len(self._fluss))])
+        self._neu(kanten)
+        return kanten
+
+    def entfernen(self, kante):
+        self.angrenzung.entfernen(kante)
+        self._neu(kante)
+
+
+def lese_angrenzung(datei, df, zonen=None):
+    # CSV mit den Spalten aus KANTEN_SPALTEN (Trennzeichen ; mit Dezimalkomma oder ,)
+    return Angrenzung.aus_tabellen(df, _lese_csv_text(datei), zonen)
+
+
+def mit_angrenzung(ergebnis, angrenzung, T_out, safety_factor):
+    # GebaeudeErgebnis um Q_Nachbarn ergänzen (in Q_ohne Zuschlag und Q_Raum) und neu aggregieren;
+    # das übergebene Ergebnis (z. B. aus dem Cache) bleibt unverändert
+    result = ergebnis.result.copy()
+    if len(result) != len(angrenzung.raeume):
+        raise ValueError("Angrenzung: Raumtabelle und Angrenzung passen nicht zusammen.")
+    with stufe("Angrenzung: Wärmeströme (alle Kanten)", zeilen=len(angrenzung.a)):
+        q = angrenzung.waermestroeme(result["Tᵢ eff (°C)"].to_numpy(dtype=float), T_out)
+    result["Q_Nachbarn (W)"] = q
+    result["Q_ohne Zuschlag (W)"] = result["Q_ohne Zuschlag (W)"] + q
+    result["Q_Raum (W)"] = result["Q_Raum (W)"] + q * (1.0 + safety_factor)
+
+    wp_info = ergebnis.wp_info
+    if wp_info is None:
+        return aggregiere_gebaeude(result, "Q¹", KEIN_WP)
+    return aggregiere_gebaeude(
+        result, "Q³", wp_info["wp_typ"], wp_info["wp_power_kw"], wp_info["heizwaermebedarf"]
+    )
@@ -0,0 +1,296 @@
+import importlib.util
+import io
+import os
+
+import pandas as pd
+
+from .aggregation import STANDARD_EBENEN
+from .berechnung import _ZAHLEN_EINGABEN, GebaeudeErgebnis
+from .konstanten import HEATING_TYPE_PARAMS, TOP_TYPE_OPTIONS
+from .konstruktionen import VERWEIS_SPALTEN
+from .portfolio import GEBAEUDE_SPALTE
+from .schema import KATEGORIE_SPALTEN, ZAHLEN_SPALTEN, kompakte_raumtabelle
+from .vorlauf import NORMLEISTUNG_SPALTE
+
+# ---------------------------------------------------------
+# Spaltenformate: Raumtabellen und Ergebnisse als Parquet, Arrow (IPC/Feather) oder CSV
+#
+#   df = lese_raumtabelle("quartier.parquet")                      # gegen das Schema der App geprüft
+#   schreibe_ergebnisse(berechne_portfolio(df, -12, 20, 0.1), "ergebnisse/")
+#   lese_ergebnis("ergebnisse/raeume.parquet", spalten=["Gebäude-ID", "Q_Raum (W)"],
+#                 filter=[("WP-Eignung", "==", "kritisch")])
+#
+# pyarrow wird erst beim ersten Lesen/Schreiben geladen (optional). Parquet und
+# Arrow werden per Memory-Map gelesen, nur die angefragten Spalten werden
+# dekodiert; Textspalten des kompakten Schemas liegen als Dictionary vor und
+# kommen als Categorical an, ohne Umweg über einzelne Python-Strings.
+# ---------------------------------------------------------
+FORMATE = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".csv": "csv",
+}
+
+# Zeilen je Parquet-Zeilengruppe (Einheit für Filter über Min/Max-Statistiken)
+ZEILENGRUPPE = 128 * 1024
+
+ERGEBNIS_DATEIEN = {"raeume": "raeume.parquet", "wohnungstypen": "wohnungstypen.parquet", "gebaeude": "gebaeude.parquet"}
+
+# Schema der Raumtabelle: Pflichtspalten rechnet raum_kennwerte immer, die übrigen sind optional
+PFLICHT_SPALTEN = list(_ZAHLEN_EINGABEN)
+OPTIONALE_SPALTEN = list(dict.fromkeys(
+    [c for c in ZAHLEN_SPALTEN if c not in PFLICHT_SPALTEN]
+    + list(KATEGORIE_SPALTEN)
+    + [c for c in STANDARD_EBENEN if c != "Wohnungstyp"]
+    + [NORMLEISTUNG_SPALTE]
+    + list(VERWEIS_SPALTEN.values())
+))
+ERLAUBTE_WERTE = {
+    "Heizflächentyp": list(HEATING_TYPE_PARAMS),
+    "Typ oberer Abschluss": list(TOP_TYPE_OPTIONS),
+}
+
+
+class SchemaFehler(ValueError):
+
+    def __init__(self, meldungen):
+        self.meldungen = list(meldungen)
+        super().__init__("; ".join(self.meldungen))
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Für Parquet/Arrow wird pyarrow benötigt (pip install pyarrow).") from e
+    return pyarrow
+
+
+def pyarrow_verfuegbar():
+    # ohne Import prüfen (die App fragt das bei jedem Rerun)
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def verfuegbare_formate():
+    # Dateiendungen, die in dieser Umgebung gelesen werden können (ohne pyarrow nur CSV)
+    if pyarrow_verfuegbar():
+        return dict(FORMATE)
+    return {endung: format for endung, format in FORMATE.items() if format == "csv"}
+
+
+def _format(quelle, format=None):
+    if format is not None:
+        return format
+    name = quelle if isinstance(quelle, (str, os.PathLike)) else getattr(quelle, "name", "")
+    endung = os.path.splitext(str(name))[1].lower()
+    if endung not in FORMATE:
+        raise ValueError(f"Unbekanntes Dateiformat „{endung or name}“ (erwartet: {', '.join(FORMATE)}).")
+    return FORMATE[endung]
+
+
+# ---------------------------------------------------------
+# Schema-Prüfung
+# ---------------------------------------------------------
+def pruefe_raumtabelle(df, pflicht=PFLICHT_SPALTEN):
+    # Fehler → SchemaFehler mit allen Meldungen; Rückgabe: Hinweise (z. B. unbekannte Spalten)
+    fehler, hinweise = [], []
+
+    # U-Spalten dürfen durch Verweise auf einen Konstruktionskatalog ersetzt sein
+    fehlend = [c for c in pflicht if c not in df.columns and VERWEIS_SPALTEN.get(c) not in df.columns]
+    if fehlend:
+        fehler.append(f"Pflichtspalten fehlen: {', '.join(fehlend)}")
+
+    for col in ZAHLEN_SPALTEN:
+        if col not in df.columns or pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            continue
+        werte = df[col]
+        zahlen = pd.to_numeric(werte, errors="coerce")
+        ungueltig = zahlen.isna() & werte.notna() & (werte.astype(str).str.strip() != "")
+        if ungueltig.any():
+            beispiel = werte[ungueltig].iloc[0]
+            fehler.append(f"„{col}“: {int(ungueltig.sum())} Werte sind keine Zahlen (z. B. „{beispiel}“, Zeile {ungueltig.idxmax() + 1})")
+
+    for col, erlaubt in ERLAUBTE_WERTE.items():
+        if col not in df.columns:
+            continue
+        werte = pd.Series(pd.unique(df[col].dropna()))
+        unbekannt = werte[~werte.isin(erlaubt)].astype(str).tolist()
+        if unbekannt:
+            fehler.append(f"„{col}“: unbekannte Werte {', '.join(unbekannt[:5])} (erlaubt: {', '.join(erlaubt)})")
+
+    bekannt = set(PFLICHT_SPALTEN) | set(OPTIONALE_SPALTEN)
+    zusaetzlich = [str(c) for c in df.columns if c not in bekannt]
+    if zusaetzlich:
+        hinweise.append(f"Spalten werden nicht berechnet, aber mitgeführt: {', '.join(zusaetzlich)}")
+
+    if fehler:
+        raise SchemaFehler(fehler)
+    return hinweise
+
+
+# ---------------------------------------------------------
+# Lesen
+# ---------------------------------------------------------
+def _lese_text(datei):
+    # Pfad oder Dateiobjekt (z. B. Upload) → Text; Dateiobjekte immer vom Anfang,
+    # damit derselbe Upload mehrfach eingelesen werden kann
+    if hasattr(datei, "getvalue"):
+        inhalt = datei.getvalue()
+    elif hasattr(datei, "read"):
+        if getattr(datei, "seekable", lambda: False)():
+            datei.seek(0)
+        inhalt = datei.read()
+    else:
+        with open(datei, "rb") as f:
+            inhalt = f.read()
+    if isinstance(inhalt, bytes):
+        inhalt = inhalt.decode("utf-8-sig", errors="replace")
+    return inhalt
+
+
+def _lese_csv_text(datei, trennzeichen=(";", "\t", ",")):
+    # kleine CSV-Eingaben (Kanten, Maßnahmen, Katalog, Testreferenzjahr): Trennzeichen aus der
+    # Kopfzeile, Semikolon bei deutschen Exporten mit Dezimalkomma
+    inhalt = _lese_text(datei)
+    kopf = inhalt.split("\n", 1)[0]
+    sep = next((z for z in trennzeichen if z in kopf), trennzeichen[0])
+    return pd.read_csv(io.StringIO(inhalt), sep=sep, decimal="," if sep == ";" else ".")
+
+
+def lese_tabelle(quelle, spalten=None, format=None, filter=None):
+    # Pfad oder Dateiobjekt → pyarrow.Table; spalten: Projektion, filter: Parquet-Filter (DNF)
+    pa = _pyarrow()
+    format = _format(quelle, format)
+    pfad = isinstance(quelle, (str, os.PathLike))
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(quelle, columns=spalten, filters=filter, memory_map=pfad)
+
+    if format == "arrow":
+        import pyarrow.ipc as ipc
+
+        quelle = pa.memory_map(str(quelle)) if pfad else pa.BufferReader(quelle.read())
+        try:
+            tabelle = ipc.open_file(quelle).read_all()
+        except pa.ArrowInvalid:
+            # Arrow-Stream statt Datei-Format
+            quelle.seek(0)
+            tabelle = ipc.open_stream(quelle).read_all()
+        if spalten is not None:
+            tabelle = tabelle.select(spalten)
+
+    else:
+        import pyarrow.csv as pacsv
+
+        # Typen ableiten lassen: Text in Zahlenspalten meldet danach pruefe_raumtabelle
+        optionen = pacsv.ConvertOptions(include_columns=spalten, strings_can_be_null=True)
+        tabelle = pacsv.read_csv(quelle, convert_options=optionen)
+
+    if filter is not None:
+        import pyarrow.parquet as pq
+
+        tabelle = tabelle.filter(pq.filters_to_expression(filter))
+    return tabelle
+
+
+def _als_pandas(tabelle):
+    pa = _pyarrow()
+    # Textspalten des kompakten Schemas als Dictionary → pandas-Categorical
+    kodiert = []
+    for i, feld in enumerate(tabelle.schema):
+        if feld.name in KATEGORIE_SPALTEN and (pa.types.is_string(feld.type) or pa.types.is_large_string(feld.type)):
+            tabelle = tabelle.set_column(i, feld.name, tabelle.column(i).dictionary_encode())
+            kodiert.append(feld.name)
+    df = tabelle.to_pandas()
+    # dictionary_encode ordnet nach erstem Auftreten; sortiert wie kategorie() (z. B. Wohnungstypen A, B, C)
+    for col in kodiert:
+        df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+    return df
+
+
+def _lese(quelle, spalten, format, filter=None):
+    # CSV geht auch ohne pyarrow (langsamer, über pandas)
+    if _format(quelle, format) == "csv" and filter is None:
+        try:
+            _pyarrow()
+        except ImportError:
+            return pd.read_csv(quelle, usecols=spalten)
+    return _als_pandas(lese_tabelle(quelle, spalten, format, filter))
+
+
+def lese_raumtabelle(quelle, spalten=None, format=None, pruefen=True, kompakt=True):
+    # Raumtabelle (ein Gebäude oder Portfolio im Langformat) aus Parquet/Arrow/CSV
+    df = _lese(quelle, spalten, format)
+    if pruefen:
+        pruefe_raumtabelle(df, pflicht=PFLICHT_SPALTEN if spalten is None else [c for c in PFLICHT_SPALTEN if c in spalten])
+    if not kompakt:
+        # z. B. für st.data_editor: Text statt Kategorien, damit neue Werte eingegeben werden können;
+        # leere Zahlenspalten (CSV: Typ „null“) als float, sonst bietet der Editor Textfelder an
+        df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+        for col in ZAHLEN_SPALTEN + [NORMLEISTUNG_SPALTE]:
+            if col in df.columns and df[col].dtype == object:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        return df
+    return kompakte_raumtabelle(df)
+
+
+def lese_ergebnis(quelle, spalten=None, filter=None, format=None):
+    # mit schreibe_ergebnisse/schreibe_parquet abgelegte Tabelle; nur angefragte Spalten/Zeilengruppen
+    return _lese(quelle, spalten, format, filter)
+
+
+# ---------------------------------------------------------
+# Schreiben
+# ---------------------------------------------------------
+def schreibe_parquet(df, ziel, zeilengruppe=ZEILENGRUPPE, kompression="zstd"):
+    # ziel: Pfad oder Dateiobjekt; Kategorien werden als Dictionary gespeichert
+    pa = _pyarrow()
+    import pyarrow.parquet as pq
+
+    tabelle = pa.Table.from_pandas(kompakte_raumtabelle(df), preserve_index=False)
+    # Dictionary-Kodierung nur für Kategorien; bei Spalten mit fast nur verschiedenen Werten
+    # (Raumnamen, IDs) kostet sie je Zeilengruppe ein Vielfaches der Schreibzeit
+    kategorien = [f.name for f in tabelle.schema if pa.types.is_dictionary(f.type)]
+    pq.write_table(tabelle, ziel, row_group_size=zeilengruppe, compression=kompression, use_dictionary=kategorien)
+    return ziel
+
+
+def ergebnis_tabellen(ergebnis, gebaeude=None, building_col=GEBAEUDE_SPALTE):
+    # PortfolioErgebnis oder GebaeudeErgebnis → {"raeume", "wohnungstypen", "gebaeude"}
+    if not isinstance(ergebnis, GebaeudeErgebnis):
+        return {"raeume": ergebnis.rooms, "wohnungstypen": ergebnis.types, "gebaeude": ergebnis.buildings}
+    kennung = {building_col: str(gebaeude)} if gebaeude is not None else {}
+    gebaeude_zeile = pd.DataFrame([{
+        **kennung,
+        "Anzahl Räume": len(ergebnis.result),
+        "Anzahl Wohnungstypen": len(ergebnis.type_group),
+        "Heizlast Gebäude (W)": ergebnis.total_heating_load_building,
+        "Heizlast Gebäude (kW)": ergebnis.heizlast_kw_building,
+        "T_mittel gewichtet (°C)": ergebnis.weighted_avg_T,
+        "Anteil bedingt/kritisch (%)": ergebnis.critical_share,
+    }])
+    raeume, typen = ergebnis.result, ergebnis.type_group
+    if kennung:
+        raeume = raeume.assign(**kennung)[[building_col] + list(raeume.columns)]
+        typen = typen.assign(**kennung)[[building_col] + list(typen.columns)]
+    return {"raeume": raeume, "wohnungstypen": typen, "gebaeude": gebaeude_zeile}
+
+
+def schreibe_ergebnisse(ergebnis, verzeichnis, gebaeude=None, building_col=GEBAEUDE_SPALTE):
+    # eine Parquet-Datei je Ebene; liefert die Pfade
+    os.makedirs(verzeichnis, exist_ok=True)
+    pfade = {}
+    for name, tabelle in ergebnis_tabellen(ergebnis, gebaeude, building_col).items():
+        pfade[name] = schreibe_parquet(tabelle, os.path.join(verzeichnis, ERGEBNIS_DATEIEN[name]))
+    return pfade
+
+
+def parquet_bytes(df, **optionen):
+    puffer = io.BytesIO()
+    schreibe_parquet(df, puffer, **optionen)
+    return puffer.getvalue()
@@ -0,0 +1,245 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from .austausch import FORMATE, lese_raumtabelle, schreibe_parquet
+from .berechnung import berechne_gebaeude
+from .konstanten import KEIN_WP, WP_TYPES
+from .linear import LinearesModell
+from .simulation import lese_testreferenzjahr, simuliere_modell
+
+# ---------------------------------------------------------
+# Batch-Lauf über Verzeichnisse mit Raumtabellen (eine Datei je Gebäude)
+#
+#   python -m heizlast.batch eingabe/ --out ergebnisse/ --level Q3 --workers 4
+# ---------------------------------------------------------
+DATEI_ENDUNGEN = tuple(FORMATE)
+
+AUSGABE_FORMATE = ("csv", "parquet")
+
+LEVEL_KUERZEL = {"Q1": "Q¹", "Q2": "Q²", "Q3": "Q³"}
+
+ZUSAMMENFASSUNG_DATEI = "portfolio_zusammenfassung.csv"
+
+
+def finde_dateien(eingaben):
+    dateien = []
+    for eingabe in eingaben:
+        if os.path.isdir(eingabe):
+            kandidaten = [os.path.join(eingabe, name) for name in os.listdir(eingabe)]
+        else:
+            kandidaten = glob.glob(eingabe)
+        dateien.extend(p for p in kandidaten if os.path.isfile(p) and p.lower().endswith(DATEI_ENDUNGEN))
+    # größte Gebäude zuerst, damit wenige große Dateien am Ende nicht den Pool blockieren
+    return sorted(set(dateien), key=lambda p: (-os.path.getsize(p), p))
+
+
+def _gebaeude_name(pfad):
+    return os.path.splitext(os.path.basename(pfad))[0]
+
+
+def _gebaeude_namen(dateien):
+    # eindeutige Namen je Datei: a/haus.csv, b/haus.csv und haus.parquet würden sonst dieselben
+    # Ergebnisdateien schreiben (auch ohne Groß-/Kleinschreibung, wegen Windows/macOS)
+    vergeben = set()
+    namen = {}
+    for pfad in sorted(dateien):
+        name = basis = _gebaeude_name(pfad)
+        zaehler = 2
+        while name.lower() in vergeben:
+            name = f"{basis}_{zaehler}"
+            zaehler += 1
+        vergeben.add(name.lower())
+        namen[pfad] = name
+    return namen
+
+
+def berechne_datei(auftrag):
+    pfad, name, out_dir, params = auftrag
+    params = dict(params)
+    T_aussen = params.pop("T_aussen", None)
+    ausgabe_format = params.pop("ausgabe_format", "csv")
+    start = time.perf_counter()
+    zeile = {"Gebäude": name, "Datei": pfad}
+    try:
+        df = lese_raumtabelle(pfad)
+        ergebnis = berechne_gebaeude(df, **params)
+        for tabelle, endung in ((ergebnis.result, "raeume"), (ergebnis.type_group, "wohnungstypen")):
+            ziel = os.path.join(out_dir, f"{name}_{endung}.{ausgabe_format}")
+            if ausgabe_format == "parquet":
+                schreibe_parquet(tabelle, ziel)
+            else:
+                tabelle.to_csv(ziel, index=False)
+
+        wp_info = ergebnis.wp_info or {}
+        zeile.update({
+            "Status": "ok",
+            "Fehler": "",
+            "Anzahl Räume": len(df),
+            "Heizlast Gebäude (W)": ergebnis.total_heating_load_building,
+            "Heizlast Gebäude (kW)": ergebnis.heizlast_kw_building,
+            "T_mittel gewichtet (°C)": ergebnis.weighted_avg_T,
+            "Anteil bedingt/kritisch (%)": ergebnis.critical_share,
+            "Deckungsgrad WP (%)": wp_info.get("coverage", np.nan),
+            "COP Auslegung": wp_info.get("cop_est", np.nan),
+            "JAZ-Schätzung": wp_info.get("jaz_est", np.nan),
+            "Strombedarf WP (kWh/a)": wp_info.get("strombedarf") or np.nan,
+        })
+        if T_aussen is not None and ergebnis.wp_info is not None:
+            sim = simuliere_modell(
+                LinearesModell(df), T_aussen, params["T_out"], params["default_T_set"],
+                params["wp_typ"], params["wp_power_kw"],
+            )
+            zeile.update({
+                "Heizwärmebedarf simuliert (kWh/a)": sim.heizwaermebedarf[0],
+                "JAZ simuliert": sim.scop[0],
+                "JAZ System inkl. Heizstab": sim.jaz_system[0],
+                "Strombedarf simuliert (kWh/a)": sim.strom_gesamt[0],
+                "Backup Heizstab (kWh/a)": sim.backup[0],
+                "Bivalenzpunkt (°C)": sim.bivalenzpunkt[0],
+            })
+    except Exception as e:
+        zeile.update({"Status": "Fehler", "Fehler": f"{type(e).__name__}: {e}"})
+    zeile["Rechenzeit (s)"] = time.perf_counter() - start
+    return zeile
+
+
+def _groesse(pfad):
+    try:
+        return os.path.getsize(pfad)
+    except OSError:
+        return 0
+
+
+def _pakete(dateien, workers, chunksize=None):
+    # größte Dateien zuerst und einzeln (LPT), kleine zu Paketen von etwa 1/(8·workers)
+    # der Gesamtgröße gebündelt – so landen die großen Gebäude nicht gemeinsam bei einem Worker
+    groessen = {pfad: _groesse(pfad) for pfad in dateien}
+    reihenfolge = sorted(dateien, key=lambda p: (-groessen[p], p))
+    ziel = sum(groessen.values()) / (workers * 8)
+    max_dateien = chunksize or len(dateien)
+    pakete, paket, summe = [], [], 0
+    for pfad in reihenfolge:
+        paket.append(pfad)
+        summe += groessen[pfad]
+        if summe >= ziel or len(paket) >= max_dateien:
+            pakete.append(paket)
+            paket, summe = [], 0
+    if paket:
+        pakete.append(paket)
+    return pakete
+
+
+def berechne_paket(auftraege):
+    return [berechne_datei(auftrag) for auftrag in auftraege]
+
+
+def fuehre_batch_aus(dateien, out_dir, params, workers=None, chunksize=None, fortschritt=None):
+    # chunksize: höchstens so viele Dateien je Übergabe (Standard: nach Dateigröße gebündelt)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    namen = _gebaeude_namen(dateien)
+
+    zeilen = []
+    if workers == 1:
+        ergebnisse = map(berechne_datei, [(pfad, namen[pfad], out_dir, params) for pfad in dateien])
+        zeilen = _sammle(ergebnisse, len(dateien), fortschritt)
+    else:
+        pakete = [
+            [(pfad, namen[pfad], out_dir, params) for pfad in paket] for paket in _pakete(dateien, workers, chunksize)
+        ]
+        with Pool(processes=workers) as pool:
+            ergebnisse = (zeile for paket in pool.imap_unordered(berechne_paket, pakete, chunksize=1) for zeile in paket)
+            zeilen = _sammle(ergebnisse, len(dateien), fortschritt)
+
+    zusammenfassung = pd.DataFrame(zeilen)
+    if not zusammenfassung.empty:
+        zusammenfassung = zusammenfassung.sort_values("Gebäude", kind="stable").reset_index(drop=True)
+    zusammenfassung.to_csv(os.path.join(out_dir, ZUSAMMENFASSUNG_DATEI), index=False)
+    return zusammenfassung
+
+
+def _sammle(ergebnisse, gesamt, fortschritt):
+    zeilen = []
+    for zeile in ergebnisse:
+        zeilen.append(zeile)
+        if fortschritt is not None:
+            fortschritt(len(zeilen), gesamt, zeile)
+    return zeilen
+
+
+def _drucke_fortschritt(erledigt, gesamt, zeile):
+    status = zeile["Status"] if zeile["Status"] == "ok" else f'FEHLER ({zeile["Fehler"]})'
+    print(f"[{erledigt}/{gesamt}] {zeile['Gebäude']}: {status}", file=sys.stderr, flush=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m heizlast.batch",
+        description="Heizlastberechnung Q¹/Q²/Q³ für viele Gebäude (eine Raumtabelle je Datei).",
+    )
+    parser.add_argument("eingabe", nargs="+", help="Verzeichnis(se) oder Glob-Muster mit CSV-/Parquet-/Arrow-Dateien")
+    parser.add_argument("--out", required=True, help="Ausgabeverzeichnis für Ergebnisse je Gebäude und Zusammenfassung")
+    parser.add_argument("--level", choices=sorted(LEVEL_KUERZEL), default="Q3", help="Analyse-Level (Standard: Q3)")
+    parser.add_argument("--t-out", type=float, default=-12.0, help="Norm-Außentemperatur Tₑ in °C")
+    parser.add_argument("--t-innen", type=float, default=20.0, help="Standard-Innentemperatur Tᵢ in °C")
+    parser.add_argument("--zuschlag", type=float, default=10.0, help="Sicherheitszuschlag in %%")
+    parser.add_argument("--wp-typ", choices=WP_TYPES, default=KEIN_WP, help="Wärmepumpen-Typ für Q³")
+    parser.add_argument("--wp-leistung", type=float, default=0.0, help="Nennleistung WP in kW für Q³")
+    parser.add_argument("--heizwaermebedarf", type=float, default=0.0, help="jährlicher Heizwärmebedarf in kWh/a für Q³")
+    parser.add_argument("--testreferenzjahr", default=None, help="CSV mit 8760 Stundenwerten der Außentemperatur für die Jahressimulation (Q³)")
+    parser.add_argument("--format", choices=AUSGABE_FORMATE, default="csv", help="Format der Ergebnisse je Gebäude (Standard: csv)")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: Anzahl CPUs)")
+    parser.add_argument("--chunksize", type=int, default=None, help="höchstens so viele Dateien je Übergabe an einen Worker (Standard: nach Dateigröße gebündelt)")
+    parser.add_argument("--quiet", action="store_true", help="keine Fortschrittsausgabe")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    dateien = finde_dateien(args.eingabe)
+    if not dateien:
+        print("Keine CSV-/Parquet-/Arrow-Dateien gefunden.", file=sys.stderr)
+        return 2
+
+    params = {
+        "T_out": args.t_out,
+        "default_T_set": args.t_innen,
+        "safety_factor": args.zuschlag / 100.0,
+        "analysis_level": LEVEL_KUERZEL[args.level],
+        "wp_typ": args.wp_typ,
+        "wp_power_kw": args.wp_leistung,
+        "heizwaermebedarf": args.heizwaermebedarf,
+        "ausgabe_format": args.format,
+    }
+    if args.testreferenzjahr:
+        if args.wp_typ == KEIN_WP:
+            print("Für --testreferenzjahr muss --wp-typ gesetzt sein.", file=sys.stderr)
+            return 2
+        params["T_aussen"] = lese_testreferenzjahr(args.testreferenzjahr)
+    start = time.perf_counter()
+    zusammenfassung = fuehre_batch_aus(
+        dateien,
+        args.out,
+        params,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        fortschritt=None if args.quiet else _drucke_fortschritt,
+    )
+    fehler = int((zusammenfassung["Status"] != "ok").sum())
+    print(
+        f"{len(dateien)} Gebäude in {time.perf_counter() - start:.1f} s berechnet, {fehler} Fehler. "
+        f"Zusammenfassung: {os.path.join(args.out, ZUSAMMENFASSUNG_DATEI)}",
+        file=sys.stderr,
+    )
+    return 1 if fehler else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
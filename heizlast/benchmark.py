@@ -0,0 +1,358 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import aggregiere_hierarchie
+from .berechnung import (
+    aggregiere_wohnungstypen,
+    berechne_heizlast,
+    gewichtete_systemtemperatur,
+    gewichtete_temperatur_je_typ,
+)
+from .konstanten import BUILDING_PROFILES, HEATING_TYPE_PARAMS, TOP_TYPE_OPTIONS
+
+# ---------------------------------------------------------
+# Benchmark der Rechen- und Exportpfade
+#
+#   python -m heizlast.benchmark --out ergebnis.json --baseline baseline.json
+#
+# Je Stufe und Tabellengröße: beste Zeit aus mehreren Läufen (ohne
+# tracemalloc) und Spitzenspeicher aus einem eigenen Lauf mit tracemalloc.
+# Ergebnisse als JSON; Vergleich gegen eine gespeicherte Baseline mit
+# relativer Schwelle (Exit-Code 1 bei Regression). Läuft offline.
+# ---------------------------------------------------------
+STANDARD_GROESSEN = [10, 1_000, 100_000]
+ALLE_GROESSEN = [10, 1_000, 100_000, 1_000_000]
+
+# Wohnungstypen je Tabellengröße: wenige, mittel, viele (höchstens so viele wie Räume)
+STANDARD_TYPEN = [2, 50]
+
+# Exporte erzeugen Dateien proportional zur Zeilenzahl → nur bis zu dieser Größe messen
+EXPORT_GRENZEN = {"create_excel": 100_000, "create_pdf_summary": 10_000}
+
+STANDARD_SCHWELLE = 0.25
+
+# Module, die erst beim Export geladen werden sollen (Kaltstart der App ohne sie)
+SCHWERE_MODULE = ["reportlab", "xlsxwriter", "openpyxl"]
+
+APP_PFAD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# Zeitunterschiede darunter gelten als Messrauschen (kleine Tabellen)
+MIN_ABSTAND_S = 0.005
+
+_RAEUME = ["Wohnen/Essen", "Schlafen", "Kind", "Küche", "Bad", "Flur", "Arbeiten"]
+
+
+def synthetische_raumtabelle(n_raeume, n_typen=2, seed=0, profil="Bestand saniert"):
+    # Raumtabelle im Eingabeformat der App mit zufälligen, plausiblen Werten
+    r = np.random.default_rng(seed)
+    u = BUILDING_PROFILES[profil]
+    n_typen = max(1, min(n_typen, n_raeume))
+    typ = np.sort(r.integers(0, n_typen, n_raeume))
+    typ[:n_typen] = np.arange(n_typen)
+    typ.sort()
+    flaeche = r.uniform(6.0, 35.0, n_raeume).round(1)
+    hoehe = r.choice([2.5, 2.6, 2.8], n_raeume)
+    oben = np.array(TOP_TYPE_OPTIONS, dtype=object)[r.integers(0, len(TOP_TYPE_OPTIONS), n_raeume)]
+    heizflaeche = np.array(list(HEATING_TYPE_PARAMS), dtype=object)[r.integers(0, len(HEATING_TYPE_PARAMS), n_raeume)]
+    t_vl = np.where(r.random(n_raeume) < 0.3, r.uniform(35.0, 70.0, n_raeume).round(), np.nan)
+    return pd.DataFrame({
+        "Wohnungstyp": np.array([f"Typ {i + 1}" for i in range(n_typen)], dtype=object)[typ],
+        "Anzahl WE Typ": r.integers(1, 12, n_typen)[typ],
+        "Raum": np.array(_RAEUME, dtype=object)[r.integers(0, len(_RAEUME), n_raeume)],
+        "Fläche (m²)": flaeche,
+        "Raumhöhe (m)": hoehe,
+        "Tᵢ (°C)": np.where(r.random(n_raeume) < 0.2, np.nan, r.choice([18.0, 20.0, 21.0, 24.0], n_raeume)),
+        "A Wand (m²)": (flaeche * r.uniform(0.4, 1.2, n_raeume)).round(1),
+        "U Wand (W/m²K)": u["U_wand"],
+        "A oberer Abschluss (m²)": np.where(oben == "Decke gegen beheizten Raum", 0.0, flaeche),
+        "U oberer Abschluss (W/m²K)": u["U_top"],
+        "Typ oberer Abschluss": oben,
+        "A Boden (m²)": flaeche,
+        "U Boden (W/m²K)": u["U_boden"],
+        "A Fenster (m²)": (flaeche * r.uniform(0.1, 0.25, n_raeume)).round(1),
+        "U Fenster (W/m²K)": u["U_fenster"],
+        "Luftwechsel n (1/h)": r.choice([0.5, 0.7, 1.0], n_raeume),
+        "Heizflächentyp": heizflaeche,
+        "T_VL (°C)": t_vl,
+        "T_RL (°C)": np.where(np.isnan(t_vl), np.nan, t_vl - 8.0),
+    })
+
+
+# ---------------------------------------------------------
+# Stufen: jede bekommt die Eingabe und liefert die Eingabe der nächsten Stufe
+# ---------------------------------------------------------
+def _stufen(T_out=-12.0, default_T_set=20.0, safety_factor=0.10):
+    from .export import create_excel, create_pdf_summary
+
+    def heizlast(df):
+        return berechne_heizlast(df, T_out, default_T_set, safety_factor)
+
+    def aggregation(result):
+        return aggregiere_wohnungstypen(result)
+
+    def t_mittel(result):
+        result = result.assign(**{"Q_Raum_geb (W)": result["Q_Raum (W)"] * result["Anzahl WE Typ"]})
+        return gewichtete_systemtemperatur(result), gewichtete_temperatur_je_typ(result)
+
+    def hierarchie(result):
+        return aggregiere_hierarchie(result)
+
+    def excel(result, type_group):
+        return create_excel(result, type_group)
+
+    def pdf(result, type_group):
+        typen = type_group.rename(columns={"Anzahl_WE": "Anzahl WE Typ"})
+        total = float(type_group["Q_Typ_geb_W"].sum())
+        return create_pdf_summary(result, typen, total, T_out, default_T_set, safety_factor, "Q²")
+
+    return heizlast, aggregation, t_mittel, hierarchie, excel, pdf
+
+
+def miss(funktion, *args, wiederholungen=3, speicher=True):
+    # beste Zeit aus wiederholungen Läufen, danach ein Lauf mit tracemalloc für den Spitzenspeicher
+    zeiten = []
+    ergebnis = None
+    for _ in range(max(wiederholungen, 1)):
+        gc.collect()
+        start = time.perf_counter()
+        ergebnis = funktion(*args)
+        zeiten.append(time.perf_counter() - start)
+    peak_mb = None
+    if speicher:
+        gc.collect()
+        tracemalloc.start()
+        funktion(*args)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024**2
+        tracemalloc.stop()
+    return ergebnis, {"zeit_s": min(zeiten), "zeit_median_s": float(np.median(zeiten)), "peak_mb": peak_mb}
+
+
+# ---------------------------------------------------------
+# Kaltstart: je Messung ein frischer Interpreter
+#
+#   import_heizlast      Import von Rechenkern und Export-Modul
+#   kaltstart_app        Import + erster Lauf von app.py (Time-to-first-render)
+#   sitzung_app          weitere Sitzung im selben Prozess (Ressourcen-Cache warm)
+# ---------------------------------------------------------
+_KALTSTART_SKRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import heizlast, heizlast.export
+zeiten = {"import_heizlast": time.perf_counter() - start}
+if %(app)r:
+    from streamlit.testing.v1 import AppTest
+    AppTest.from_file(%(app)r, default_timeout=300).run()
+    zeiten["kaltstart_app"] = time.perf_counter() - start
+    start = time.perf_counter()
+    AppTest.from_file(%(app)r, default_timeout=300).run()
+    zeiten["sitzung_app"] = time.perf_counter() - start
+geladen = sorted({m.split(".")[0] for m in sys.modules} & set(%(schwer)r))
+print(json.dumps({"zeiten": zeiten, "geladen": geladen}))
+"""
+
+
+def miss_kaltstart(wiederholungen=3, app=APP_PFAD):
+    # app=None oder ohne Streamlit: nur der Import des Pakets
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        app = None
+    if app is not None and not os.path.exists(app):
+        app = None
+    skript = _KALTSTART_SKRIPT % {"app": app or "", "schwer": SCHWERE_MODULE}
+    umgebung = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(APP_PFAD), os.environ.get("PYTHONPATH")])))
+    messungen, geladen = {}, []
+    for _ in range(max(wiederholungen, 1)):
+        lauf = subprocess.run([sys.executable, "-c", skript], capture_output=True, text=True, env=umgebung,
+                              cwd=os.path.dirname(app) if app else None, check=True)
+        ausgabe = json.loads(lauf.stdout.strip().splitlines()[-1])
+        geladen = ausgabe["geladen"]
+        for name, zeit in ausgabe["zeiten"].items():
+            messungen.setdefault(name, []).append(zeit)
+    return [
+        {"stufe": name, "raeume": 0, "typen": 0, "zeit_s": min(zeiten), "zeit_median_s": float(np.median(zeiten)),
+         "peak_mb": None, "schwere_module": geladen}
+        for name, zeiten in messungen.items()
+    ]
+
+
+def fuehre_aus(groessen=STANDARD_GROESSEN, typen=STANDARD_TYPEN, wiederholungen=3, speicher=True,
+               stufen=None, export_grenzen=EXPORT_GRENZEN, fortschritt=None, kaltstart=False):
+    heizlast, aggregation, t_mittel, hierarchie, excel, pdf = _stufen()
+    ergebnisse = []
+
+    if kaltstart:
+        for zeile in miss_kaltstart(wiederholungen):
+            if stufen is None or zeile["stufe"] in stufen:
+                ergebnisse.append(zeile)
+                if fortschritt is not None:
+                    fortschritt(zeile)
+
+    def eintrag(stufe, n, n_typen, werte):
+        zeile = {"stufe": stufe, "raeume": n, "typen": n_typen, **werte}
+        ergebnisse.append(zeile)
+        if fortschritt is not None:
+            fortschritt(zeile)
+
+    def stufe(name, n, n_typen, funktion, *args):
+        # nicht ausgewählte Stufen laufen einmal ungemessen (Eingabe für die nächste Stufe)
+        if stufen is not None and name not in stufen:
+            return funktion(*args)
+        ergebnis, werte = miss(funktion, *args, wiederholungen=wiederholungen, speicher=speicher)
+        eintrag(name, n, n_typen, werte)
+        return ergebnis
+
+    for n in groessen:
+        for n_typen in sorted({min(t, n) for t in typen}):
+            df = synthetische_raumtabelle(n, n_typen)
+            result = stufe("berechne_heizlast", n, n_typen, heizlast, df)
+            type_group = stufe("aggregiere_wohnungstypen", n, n_typen, aggregation, result)
+            if stufen is None or "gewichtete_systemtemperatur" in stufen:
+                stufe("gewichtete_systemtemperatur", n, n_typen, t_mittel, result)
+            if stufen is None or "aggregiere_hierarchie" in stufen:
+                stufe("aggregiere_hierarchie", n, n_typen, hierarchie, result)
+            for name, funktion in (("create_excel", excel), ("create_pdf_summary", pdf)):
+                if (stufen is None or name in stufen) and n <= export_grenzen.get(name, n):
+                    stufe(name, n, n_typen, funktion, result, type_group)
+            del df, result, type_group
+    return ergebnisse
+
+
+def metadaten():
+    return {
+        "zeitpunkt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plattform": platform.platform(),
+        "prozessor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def schreibe_ergebnis(pfad, ergebnisse):
+    with open(pfad, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadaten(), "ergebnisse": ergebnisse}, f, indent=2, ensure_ascii=False)
+
+
+def lese_ergebnis(pfad):
+    with open(pfad, encoding="utf-8") as f:
+        return json.load(f)["ergebnisse"]
+
+
+def vergleiche(ergebnisse, baseline, schwelle=STANDARD_SCHWELLE, min_abstand_s=MIN_ABSTAND_S):
+    # je gemeinsamer Messung: Faktor gegenüber Baseline; Regression, wenn Zeit oder Speicher
+    # um mehr als schwelle steigt (Zeit zusätzlich um mehr als min_abstand_s)
+    basis = {(b["stufe"], b["raeume"], b["typen"]): b for b in baseline}
+    zeilen = []
+    for e in ergebnisse:
+        b = basis.get((e["stufe"], e["raeume"], e["typen"]))
+        if b is None:
+            continue
+        faktor_zeit = e["zeit_s"] / b["zeit_s"] if b["zeit_s"] > 0 else np.nan
+        langsamer = faktor_zeit > 1.0 + schwelle and e["zeit_s"] - b["zeit_s"] > min_abstand_s
+        faktor_speicher = np.nan
+        mehr_speicher = False
+        if e.get("peak_mb") is not None and b.get("peak_mb"):
+            faktor_speicher = e["peak_mb"] / b["peak_mb"]
+            mehr_speicher = faktor_speicher > 1.0 + schwelle and e["peak_mb"] - b["peak_mb"] > 1.0
+        zeilen.append({
+            "stufe": e["stufe"],
+            "raeume": e["raeume"],
+            "typen": e["typen"],
+            "zeit_s": e["zeit_s"],
+            "baseline_zeit_s": b["zeit_s"],
+            "faktor_zeit": faktor_zeit,
+            "peak_mb": e.get("peak_mb"),
+            "baseline_peak_mb": b.get("peak_mb"),
+            "faktor_speicher": faktor_speicher,
+            "regression": bool(langsamer or mehr_speicher),
+        })
+    return pd.DataFrame(zeilen)
+
+
+# ---------------------------------------------------------
+# Kommandozeile
+# ---------------------------------------------------------
+def _zahlen_liste(text):
+    return [int(float(x)) for x in text.split(",") if x.strip()]
+
+
+def _drucke(zeile):
+    peak = f"{zeile['peak_mb']:9.1f} MB" if zeile.get("peak_mb") is not None else "            -"
+    if "schwere_module" in zeile:
+        geladen = ", ".join(zeile["schwere_module"]) or "keine"
+        print(f"{zeile['stufe']:<28} {'Kaltstart':>27} {zeile['zeit_s'] * 1000:10.1f} ms   schwere Module: {geladen}",
+              file=sys.stderr, flush=True)
+        return
+    print(f"{zeile['stufe']:<28} {zeile['raeume']:>9,} Räume {zeile['typen']:>4} Typen "
+          f"{zeile['zeit_s'] * 1000:10.1f} ms {peak}", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m heizlast.benchmark",
+        description="Laufzeit und Spitzenspeicher der Rechen- und Exportpfade mit synthetischen Raumtabellen.",
+    )
+    parser.add_argument("--groessen", type=_zahlen_liste, default=STANDARD_GROESSEN,
+                        help="Anzahl Räume, kommagetrennt (Standard: 10,1000,100000)")
+    parser.add_argument("--alle", action="store_true", help="alle Größen bis 1 000 000 Räume")
+    parser.add_argument("--typen", type=_zahlen_liste, default=STANDARD_TYPEN, help="Anzahl Wohnungstypen, kommagetrennt")
+    parser.add_argument("--stufen", default=None, help="nur diese Stufen, kommagetrennt")
+    parser.add_argument("--wiederholungen", type=int, default=3, help="Läufe je Messung (beste Zeit zählt)")
+    parser.add_argument("--ohne-speicher", action="store_true", help="keinen Spitzenspeicher messen (schneller)")
+    parser.add_argument("--ohne-kaltstart", action="store_true", help="Import und ersten App-Lauf nicht messen")
+    parser.add_argument("--startbudget", type=float, default=None,
+                        help="Budget in s für den ersten App-Lauf im frischen Prozess (Exit-Code 1 bei Überschreitung)")
+    parser.add_argument("--out", default=None, help="JSON-Datei für die Ergebnisse")
+    parser.add_argument("--baseline", default=None, help="JSON-Datei einer früheren Messung zum Vergleich")
+    parser.add_argument("--schwelle", type=float, default=STANDARD_SCHWELLE * 100,
+                        help="zulässige Verschlechterung in %% (Standard: 25)")
+    args = parser.parse_args(argv)
+
+    groessen = sorted(set(args.groessen) | (set(ALLE_GROESSEN) if args.alle else set()))
+    ergebnisse = fuehre_aus(
+        groessen,
+        args.typen,
+        wiederholungen=args.wiederholungen,
+        speicher=not args.ohne_speicher,
+        stufen=args.stufen.split(",") if args.stufen else None,
+        fortschritt=_drucke,
+        kaltstart=not args.ohne_kaltstart,
+    )
+    if args.out:
+        schreibe_ergebnis(args.out, ergebnisse)
+
+    rueckgabe = 0
+    if args.startbudget is not None:
+        for zeile in ergebnisse:
+            if zeile["stufe"] == "kaltstart_app" and zeile["zeit_s"] > args.startbudget:
+                print(f"Startbudget überschritten: {zeile['zeit_s']:.2f} s > {args.startbudget:g} s.", file=sys.stderr)
+                rueckgabe = 1
+
+    if args.baseline:
+        vergleich = vergleiche(ergebnisse, lese_ergebnis(args.baseline), args.schwelle / 100.0)
+        if vergleich.empty:
+            print("Keine gemeinsamen Messungen mit der Baseline.", file=sys.stderr)
+            return 2
+        with pd.option_context("display.width", 160, "display.max_rows", None):
+            print(vergleich.round(3).to_string(index=False), file=sys.stderr)
+        regressionen = int(vergleich["regression"].sum())
+        print(f"{regressionen} Regression(en) bei Schwelle {args.schwelle:g} %.", file=sys.stderr)
+        return 1 if regressionen else rueckgabe
+    return rueckgabe
+
+
+if __name__ == "__main__":
+    sys.exit(main())
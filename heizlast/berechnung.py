@@ -0,0 +1,366 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .konstanten import EIGNUNGSKLASSEN, HEATING_TYPE_PARAMS, KEIN_WP, KRITISCHE_EIGNUNG
+from .diagnose import stufe
+from .schema import KATEGORIE_SPALTEN, kategorie
+
+
+# ---------------------------------------------------------
+# Raumweise Heizlast
+# ---------------------------------------------------------
+# abgeleitete Spalten je Raum (in Ausgabereihenfolge)
+ABGELEITETE_SPALTEN = [
+    "Tᵢ eff (°C)",
+    "Volumen (m³)",
+    "ΔT (K)",
+    "UA Wand (W/K)",
+    "UA oberer Abschluss (W/K)",
+    "UA Boden (W/K)",
+    "UA Fenster (W/K)",
+    "UA gesamt (W/K)",
+    "Q_T (W)",
+    "Q_V (W)",
+    "Q_ohne Zuschlag (W)",
+    "Q_Raum (W)",
+    "T_mittel (°C)",
+    "WP-Eignung",
+]
+
+# Eingabespalten, die von der Berechnung ergänzt bzw. angepasst werden
+ANGEPASSTE_SPALTEN = ["T_VL (°C)", "T_RL (°C)", "A oberer Abschluss (m²)"]
+
+_T_VORGABEN = {
+    "T_VL (°C)": {typ: params["T_VL"] for typ, params in HEATING_TYPE_PARAMS.items()},
+    "T_RL (°C)": {typ: params["T_RL"] for typ, params in HEATING_TYPE_PARAMS.items()},
+}
+
+
+# Zahlenspalten, die raum_kennwerte immer braucht
+_ZAHLEN_EINGABEN = [
+    "Fläche (m²)",
+    "Raumhöhe (m)",
+    "Tᵢ (°C)",
+    "A Wand (m²)",
+    "U Wand (W/m²K)",
+    "A oberer Abschluss (m²)",
+    "U oberer Abschluss (W/m²K)",
+    "A Boden (m²)",
+    "U Boden (W/m²K)",
+    "A Fenster (m²)",
+    "U Fenster (W/m²K)",
+    "Luftwechsel n (1/h)",
+]
+
+
+def _zahlen(werte):
+    try:
+        return np.asarray(werte, dtype=float)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(np.asarray(werte, dtype=object)), errors="coerce").to_numpy(dtype=float)
+
+
+def raum_kennwerte(spalten, T_out, default_T_set, safety_factor):
+    # Kernberechnung auf reinen Arrays; spalten ist ein DataFrame oder ein dict Spalte -> Array
+    werte = {}
+
+    # Eingaben als float-Arrays (Text/None → NaN)
+    with stufe("Eingaben normalisieren", zeilen=len(spalten[_ZAHLEN_EINGABEN[0]])):
+        z = {col: _zahlen(spalten[col]) for col in _ZAHLEN_EINGABEN}
+        for col in _T_VORGABEN:
+            if col in spalten:
+                z[col] = _zahlen(spalten[col])
+
+    # Heizflächentyp → automatische T_VL/T_RL, falls leer/NaN
+    with stufe("Heizflächentyp-Vorgaben"):
+        if "Heizflächentyp" in spalten:
+            heizflaeche = pd.Series(np.asarray(spalten["Heizflächentyp"], dtype=object))
+        for col, vorgaben in _T_VORGABEN.items():
+            if "Heizflächentyp" in spalten:
+                vorgabe = heizflaeche.map(vorgaben).to_numpy(dtype=float)
+                werte[col] = np.where(np.isnan(z[col]), vorgabe, z[col]) if col in z else vorgabe
+            elif col in z:
+                werte[col] = z[col]
+
+    with stufe("UA/Q-Berechnung"):
+        # Typ oberer Abschluss: Decke gegen beheizten Raum -> Fläche als 0 werten
+        a_top = z["A oberer Abschluss (m²)"]
+        if "Typ oberer Abschluss" in spalten:
+            mask_decke_beheizt = np.asarray(spalten["Typ oberer Abschluss"], dtype=object) == "Decke gegen beheizten Raum"
+            a_top = np.where(mask_decke_beheizt, 0.0, a_top)
+        werte["A oberer Abschluss (m²)"] = a_top
+
+        # fehlende Temperaturen mit Standard belegen
+        t_i = z["Tᵢ (°C)"]
+        werte["Tᵢ eff (°C)"] = np.where(np.isnan(t_i), default_T_set, t_i)
+
+        # Volumen
+        werte["Volumen (m³)"] = z["Fläche (m²)"] * z["Raumhöhe (m)"]
+
+        # Temperaturdifferenz
+        delta_T = werte["Tᵢ eff (°C)"] - T_out
+        werte["ΔT (K)"] = delta_T
+
+        # UA-Werte je Bauteil
+        werte["UA Wand (W/K)"] = z["A Wand (m²)"] * z["U Wand (W/m²K)"]
+        werte["UA oberer Abschluss (W/K)"] = a_top * z["U oberer Abschluss (W/m²K)"]
+        werte["UA Boden (W/K)"] = z["A Boden (m²)"] * z["U Boden (W/m²K)"]
+        werte["UA Fenster (W/K)"] = z["A Fenster (m²)"] * z["U Fenster (W/m²K)"]
+
+        werte["UA gesamt (W/K)"] = (
+            werte["UA Wand (W/K)"]
+            + werte["UA oberer Abschluss (W/K)"]
+            + werte["UA Boden (W/K)"]
+            + werte["UA Fenster (W/K)"]
+        )
+
+        # Transmissionsverluste
+        werte["Q_T (W)"] = werte["UA gesamt (W/K)"] * delta_T
+
+        # Lüftungsverluste
+        werte["Q_V (W)"] = 0.33 * z["Luftwechsel n (1/h)"] * werte["Volumen (m³)"] * delta_T
+
+        # Heizlast ohne / mit Zuschlag je Raum (repräsentative Wohnung)
+        werte["Q_ohne Zuschlag (W)"] = werte["Q_T (W)"] + werte["Q_V (W)"]
+        werte["Q_Raum (W)"] = werte["Q_ohne Zuschlag (W)"] * (1.0 + safety_factor)
+
+    with stufe("Systemtemperatur & WP-Eignung"):
+        # mittlere Systemtemperatur je Raum
+        if "T_VL (°C)" in werte and "T_RL (°C)" in werte:
+            werte["T_mittel (°C)"] = (werte["T_VL (°C)"] + werte["T_RL (°C)"]) / 2.0
+        else:
+            werte["T_mittel (°C)"] = np.full(len(t_i), np.nan)
+
+        # Ampel-Einstufung je Raum (WP-Eignung)
+        werte["WP-Eignung"] = klassifiziere_eignung_array(werte["T_mittel (°C)"])
+
+    # Falls Anzahl WE Typ fehlt, auf 1 setzen
+    if "Anzahl WE Typ" in spalten:
+        anzahl = _zahlen(spalten["Anzahl WE Typ"])
+        werte["Anzahl WE Typ"] = np.where(np.isnan(anzahl), 1.0, anzahl)
+    else:
+        werte["Anzahl WE Typ"] = np.ones(len(t_i))
+
+    return werte
+
+
+def ergebnis_tabelle(df, werte, float32=False):
+    # Eingabetabelle + Kennwerte aus raum_kennwerte zur Ergebnistabelle zusammensetzen;
+    # abgeleitete Zahlen in einem vorab angelegten Block, Textspalten als Kategorien
+    df = df.copy()
+    for col in ANGEPASSTE_SPALTEN:
+        if col in werte:
+            df[col] = werte[col]
+    for col in KATEGORIE_SPALTEN:
+        if col in df.columns and col != "WP-Eignung":
+            df[col] = kategorie(df[col], KATEGORIE_SPALTEN[col])
+
+    zahlen = [col for col in ABGELEITETE_SPALTEN if col != "WP-Eignung"]
+    block = np.empty((len(df), len(zahlen)), dtype=np.float32 if float32 else np.float64, order="F")
+    for i, col in enumerate(zahlen):
+        block[:, i] = werte[col]
+    abgeleitet = pd.DataFrame(block, columns=zahlen, index=df.index, copy=False)
+    abgeleitet["WP-Eignung"] = pd.Categorical.from_codes(
+        eignung_codes(werte["T_mittel (°C)"]), categories=EIGNUNGSKLASSEN
+    )
+    df = pd.concat([df.drop(columns=[c for c in ABGELEITETE_SPALTEN if c in df.columns]), abgeleitet], axis=1)
+
+    if "Anzahl WE Typ" not in df.columns:
+        df["Anzahl WE Typ"] = 1
+    df["Anzahl WE Typ"] = df["Anzahl WE Typ"].fillna(1)
+    return df
+
+
+def berechne_heizlast(df, T_out, default_T_set, safety_factor, float32=False):
+    werte = raum_kennwerte(df, T_out, default_T_set, safety_factor)
+    with stufe("Ergebnistabelle"):
+        return ergebnis_tabelle(df, werte, float32)
+
+
+def klassifiziere_eignung(t_mid):
+    if np.isnan(t_mid):
+        return "unbekannt"
+    if t_mid <= 35:
+        return "sehr gut"
+    elif t_mid <= 45:
+        return "gut"
+    elif t_mid <= 50:
+        return "bedingt"
+    else:
+        return "kritisch"
+
+
+def eignung_codes(t_mid):
+    # Index in EIGNUNGSKLASSEN je Raum (gleiche Schwellen wie klassifiziere_eignung)
+    t_mid = np.asarray(t_mid, dtype=float)
+    codes = np.searchsorted(np.array([35.0, 45.0, 50.0]), t_mid, side="left").astype(np.int8)
+    codes[np.isnan(t_mid)] = EIGNUNGSKLASSEN.index("unbekannt")
+    return codes
+
+
+def klassifiziere_eignung_array(t_mid):
+    # vektorisierte Variante von klassifiziere_eignung
+    return np.array(EIGNUNGSKLASSEN, dtype=object)[eignung_codes(t_mid)]
+
+
+def schaetze_cop(wp_typ, T_mittel_system):
+    if T_mittel_system is None or np.isnan(T_mittel_system):
+        return np.nan
+
+    if wp_typ == "Luft/Wasser":
+        cop_ref = 3.2
+    elif wp_typ == "Sole/Wasser":
+        cop_ref = 4.0
+    else:
+        return np.nan
+
+    delta_T = T_mittel_system - 35.0
+    cop = cop_ref - 0.15 * (delta_T / 5.0)
+    cop = max(2.0, min(cop, cop_ref + 0.6))
+    return cop
+
+
+# ---------------------------------------------------------
+# Aggregation Wohnungstyp / Gebäude
+# ---------------------------------------------------------
+def aggregiere_wohnungstypen(result):
+    # Heizlast je Wohnungstyp (repräsentative Wohnung)
+    if "Wohnungstyp" in result.columns:
+        type_group = result.groupby("Wohnungstyp", dropna=True, observed=True).agg(
+            Q_WE_W=("Q_Raum (W)", "sum"),
+            Anzahl_WE=("Anzahl WE Typ", "max"),
+        ).reset_index()
+    else:
+        # Fallback: alles als Typ "A"
+        result["Wohnungstyp"] = "A"
+        type_group = result.groupby("Wohnungstyp", observed=True).agg(
+            Q_WE_W=("Q_Raum (W)", "sum"),
+            Anzahl_WE=("Anzahl WE Typ", "max"),
+        ).reset_index()
+
+    type_group["Q_WE_kW"] = type_group["Q_WE_W"] / 1000.0
+    type_group["Q_Typ_geb_W"] = type_group["Q_WE_W"] * type_group["Anzahl_WE"]
+    type_group["Q_Typ_geb_kW"] = type_group["Q_Typ_geb_W"] / 1000.0
+    return type_group
+
+
+def gewichtete_systemtemperatur(result):
+    # gewichtet nach Gebäudeanteil: Q_Raum * Anzahl_WE
+    if "T_mittel (°C)" not in result.columns:
+        return np.nan
+    q_geb = result["Q_Raum (W)"] * result["Anzahl WE Typ"]
+    mask = result["T_mittel (°C)"].notna() & (q_geb > 0)
+    if not mask.any():
+        return np.nan
+    return (result.loc[mask, "T_mittel (°C)"] * q_geb[mask]).sum() / q_geb[mask].sum()
+
+
+def gewichtete_temperatur_je_typ(result):
+    # gewichteter Mittelwert der Systemtemperatur je Wohnungstyp
+    temp_type = result[result["T_mittel (°C)"].notna()]
+    q_geb = temp_type["Q_Raum (W)"] * temp_type["Anzahl WE Typ"]
+    grouped = pd.DataFrame({
+        "Wohnungstyp": temp_type["Wohnungstyp"],
+        "TQ": temp_type["T_mittel (°C)"] * q_geb,
+        "Q": q_geb,
+    }).groupby("Wohnungstyp", observed=True).sum()
+    return (grouped["TQ"] / grouped["Q"]).to_frame(name="T_mittel_typ (°C)")
+
+
+def kritischer_anteil(result):
+    # Anteil kritischer/bedingt geeigneter Heizlast (Gebäude) in %
+    q_geb = result["Q_Raum (W)"] * result["Anzahl WE Typ"]
+    total_Q_building = q_geb.sum()
+    crit_mask = result["WP-Eignung"].isin(KRITISCHE_EIGNUNG)
+    if crit_mask.any() and total_Q_building > 0:
+        return (q_geb[crit_mask].sum() / total_Q_building) * 100.0
+    return 0.0
+
+
+# ---------------------------------------------------------
+# Q³: Wärmepumpen-Abgleich (Gesamtgebäude)
+# ---------------------------------------------------------
+def wp_abgleich(heizlast_kw_building, weighted_avg_T, critical_share, wp_typ, wp_power_kw, heizwaermebedarf):
+    if heizlast_kw_building <= 0 or wp_typ == KEIN_WP:
+        return None
+
+    coverage = (wp_power_kw / heizlast_kw_building) * 100.0
+    cop_est = schaetze_cop(wp_typ, weighted_avg_T)
+    jaz_est = cop_est - 0.3 if not np.isnan(cop_est) else np.nan
+    strombedarf = None
+    if not np.isnan(jaz_est) and jaz_est > 0 and heizwaermebedarf > 0:
+        strombedarf = heizwaermebedarf / jaz_est
+
+    return {
+        "wp_typ": wp_typ,
+        "wp_power_kw": wp_power_kw,
+        "coverage": coverage,
+        "cop_est": cop_est,
+        "jaz_est": jaz_est,
+        "heizwaermebedarf": heizwaermebedarf,
+        "strombedarf": strombedarf,
+        "weighted_avg_T": weighted_avg_T,
+        "critical_share": critical_share,
+    }
+
+
+# ---------------------------------------------------------
+# Gesamtablauf: Räume → Wohnungstypen → Gebäude → WP
+# ---------------------------------------------------------
+@dataclass
+class GebaeudeErgebnis:
+    result: pd.DataFrame
+    type_group: pd.DataFrame
+    total_heating_load_building: float
+    heizlast_kw_building: float
+    weighted_avg_T: float
+    critical_share: float
+    wp_info: dict = None
+
+
+def berechne_gebaeude(
+    df,
+    T_out,
+    default_T_set,
+    safety_factor,
+    analysis_level="Q¹",
+    wp_typ=KEIN_WP,
+    wp_power_kw=0.0,
+    heizwaermebedarf=0.0,
+):
+    result = berechne_heizlast(df, T_out, default_T_set, safety_factor)
+    return aggregiere_gebaeude(result, analysis_level, wp_typ, wp_power_kw, heizwaermebedarf)
+
+
+def aggregiere_gebaeude(result, analysis_level="Q¹", wp_typ=KEIN_WP, wp_power_kw=0.0, heizwaermebedarf=0.0):
+    # Raumergebnis → Wohnungstypen, Gebäudekennwerte und (Q³) WP-Abgleich
+    with stufe("Aggregation Wohnungstypen/Gebäude"):
+        type_group = aggregiere_wohnungstypen(result)
+
+        # Gebäudeheizlast
+        total_heating_load_building = type_group["Q_Typ_geb_W"].sum()
+        heizlast_kw_building = total_heating_load_building / 1000.0 if total_heating_load_building > 0 else 0.0
+
+        result["Q_Raum_geb (W)"] = result["Q_Raum (W)"] * result["Anzahl WE Typ"]
+        weighted_avg_T = gewichtete_systemtemperatur(result)
+        critical_share = kritischer_anteil(result)
+
+    # WP-Info nur bei Q³ relevant, bezogen auf Gebäude
+    wp_info = None
+    if analysis_level.startswith("Q³"):
+        with stufe("WP-Abgleich"):
+            wp_info = wp_abgleich(
+                heizlast_kw_building, weighted_avg_T, critical_share, wp_typ, wp_power_kw, heizwaermebedarf
+            )
+
+    return GebaeudeErgebnis(
+        result=result,
+        type_group=type_group,
+        total_heating_load_building=total_heating_load_building,
+        heizlast_kw_building=heizlast_kw_building,
+        weighted_avg_T=weighted_avg_T,
+        critical_share=critical_share,
+        wp_info=wp_info,
+    )
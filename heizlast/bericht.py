@@ -0,0 +1,636 @@
+import argparse
+import os
+import sys
+import time
+import zipfile
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from .konstanten import KEIN_WP
+
+# ---------------------------------------------------------
+# Berichts-Engine für Q-Konzept-Handouts
+#
+# Seitenvorlage (Ränder, Seitenumbruch, Fortsetzungsköpfe von Tabellen),
+# gecachte Textbreiten für den Zeilenumbruch und Tabellen aus vorab
+# formatierten Spalten. Ein Handout je Gebäude; für Portfolios parallel
+# in Prozessen gerendert und als ZIP abgelegt.
+# ---------------------------------------------------------
+OBEN = A4[1] - 2 * cm
+UNTEN = 3 * cm
+LINKS = 2 * cm
+
+
+@lru_cache(maxsize=65536)
+def textbreite(text, font="Helvetica", groesse=10):
+    return stringWidth(text, font, groesse)
+
+
+def umbrechen(text, breite, font="Helvetica", groesse=10):
+    # wortweiser Umbruch; Breiten der Standardschriften sind additiv je Zeichen
+    leer = textbreite(" ", font, groesse)
+    zeilen = []
+    aktuell, aktuell_breite = "", 0.0
+    for wort in text.split(" "):
+        wort_breite = textbreite(wort, font, groesse)
+        test_breite = aktuell_breite + (leer if aktuell else 0.0) + wort_breite
+        if test_breite < breite:
+            aktuell = aktuell + (" " if aktuell else "") + wort
+            aktuell_breite = test_breite
+        else:
+            zeilen.append(aktuell)
+            aktuell, aktuell_breite = wort, wort_breite
+    if aktuell:
+        zeilen.append(aktuell)
+    return zeilen
+
+
+@dataclass
+class Spalte:
+    titel: str
+    x: float
+    rechts: float = None  # rechtsbündig bei x + rechts, sonst linksbündig bei x
+
+
+@dataclass
+class Tabelle:
+    titel: str
+    fortsetzung: str
+    spalten: list
+    titel_groesse: int = 11
+    titel_abstand: float = 0.7 * cm
+
+
+class Seitenvorlage:
+    # eine Seitenfolge auf einem Canvas; fusszeile: Text unten links (z. B. Gebäude)
+
+    def __init__(self, c, fusszeile=None):
+        self.c = c
+        self.breite, self.hoehe = A4
+        self.fusszeile = fusszeile
+        self.y = OBEN
+        self.seiten = 1
+        self._schrift = None
+
+    def schrift(self, font, groesse):
+        # setFont nur bei Wechsel, sonst wächst der Seiteninhalt unnötig
+        if self._schrift != (font, groesse):
+            self.c.setFont(font, groesse)
+            self._schrift = (font, groesse)
+
+    def neue_seite(self):
+        self._fuss()
+        self.c.showPage()
+        self.seiten += 1
+        self.y = OBEN
+        self._schrift = None
+
+    def abschliessen(self):
+        self._fuss()
+        self.c.showPage()
+
+    def _fuss(self):
+        if self.fusszeile:
+            self.schrift("Helvetica", 8)
+            self.c.drawString(LINKS, 1.2 * cm, self.fusszeile)
+            self.c.drawRightString(self.breite - LINKS, 1.2 * cm, f"Seite {self.seiten}")
+
+    def text(self, text, font="Helvetica", groesse=10, abstand=0.0):
+        self.schrift(font, groesse)
+        self.c.drawString(LINKS, self.y, text)
+        self.y -= abstand
+
+    def absatz(self, text, groesse=10, zeilenabstand=0.5 * cm):
+        for zeile in umbrechen(text, self.breite - 2 * LINKS, "Helvetica", groesse):
+            if self.y < UNTEN:
+                self.neue_seite()
+            self.schrift("Helvetica", groesse)
+            self.c.drawString(LINKS, self.y, zeile)
+            self.y -= zeilenabstand
+
+    def _kopf(self, tabelle, titel):
+        self.schrift("Helvetica-Bold", tabelle.titel_groesse)
+        self.c.drawString(LINKS, self.y, titel)
+        self.y -= tabelle.titel_abstand
+        self._spaltenkopf(tabelle)
+
+    def _spaltenkopf(self, tabelle):
+        self.schrift("Helvetica-Bold", 9)
+        for spalte in tabelle.spalten:
+            self.c.drawString(spalte.x, self.y, spalte.titel)
+        self.y -= 0.5 * cm
+        self.schrift("Helvetica", 9)
+
+    def tabelle(self, tabelle, spalten_texte, mit_titel=True):
+        # spalten_texte: je Spalte eine Liste fertig formatierter Texte
+        if mit_titel:
+            self._kopf(tabelle, tabelle.titel)
+        else:
+            self._spaltenkopf(tabelle)
+        for zeile in zip(*spalten_texte):
+            if self.y < UNTEN:
+                self.neue_seite()
+                self._kopf(tabelle, tabelle.fortsetzung)
+            for spalte, text in zip(tabelle.spalten, zeile):
+                if spalte.rechts is None:
+                    self.c.drawString(spalte.x, self.y, text)
+                else:
+                    self.c.drawRightString(spalte.x + spalte.rechts, self.y, text)
+            self.y -= 0.4 * cm
+
+
+# ---------------------------------------------------------
+# Tabellenvorlagen des Handouts
+# ---------------------------------------------------------
+RAEUME = Tabelle(
+    "Raumweise Heizlast (repräsentative Räume je Wohnungstyp)",
+    "Raumweise Heizlast (Fortsetzung)",
+    [
+        Spalte("Wohn-Typ", 2 * cm),
+        Spalte("Raum", 5 * cm),
+        Spalte("Fläche [m²]", 10 * cm, 2.0 * cm),
+        Spalte("T_i [°C]", 13 * cm, 1.5 * cm),
+        Spalte("Heizlast je Raum [W]", 16 * cm, 2.0 * cm),
+    ],
+)
+
+WOHNUNGSTYPEN = Tabelle(
+    "Heizlast je Wohnungstyp und für das Gesamtgebäude",
+    "Heizlast je Wohnungstyp (Fortsetzung)",
+    [
+        Spalte("Wohn-Typ", 2 * cm),
+        Spalte("Anzahl WE", 7 * cm, 1.5 * cm),
+        Spalte("Heizlast je WE [kW]", 11 * cm, 2.0 * cm),
+        Spalte("Heizlast Typ gesamt [kW]", 16 * cm, 2.0 * cm),
+    ],
+)
+
+SYSTEMDATEN = Tabelle(
+    "Systemdaten je Raum (Q²/Q³)",
+    "Systemdaten je Raum (Fortsetzung)",
+    [
+        Spalte("Wohn-Typ", 2 * cm),
+        Spalte("Raum", 5 * cm),
+        Spalte("Heizfläche", 9 * cm),
+        Spalte("T_VL [°C]", 13 * cm, 1.2 * cm),
+        Spalte("T_RL [°C]", 16 * cm, 1.2 * cm),
+        Spalte("T_mittel [°C]", 19 * cm, 1.2 * cm),
+    ],
+    titel_groesse=12,
+    titel_abstand=0.8 * cm,
+)
+
+EBENEN = Tabelle(
+    "Heizlast nach Ebenen (Gebäude, Treppenhaus, Geschoss, Wohnungstyp)",
+    "Heizlast nach Ebenen (Fortsetzung)",
+    [
+        Spalte("Gliederung", 2 * cm),
+        Spalte("Anzahl WE", 9 * cm, 1.5 * cm),
+        Spalte("Heizlast [kW]", 11.5 * cm, 2.0 * cm),
+        Spalte("Anteil [%]", 14 * cm, 1.5 * cm),
+        Spalte("T_mittel [°C]", 16.5 * cm, 2.0 * cm),
+    ],
+)
+
+
+# ---------------------------------------------------------
+# Handout-Daten: vorab formatierte Spalten je Gebäude
+# ---------------------------------------------------------
+def _texte(werte):
+    return [str(w) for w in werte]
+
+
+def _zahlen_text(werte, format_, leer=None):
+    werte = np.asarray(werte, dtype=float)
+    if leer is None:
+        return [format(w, format_) for w in werte.tolist()]
+    return [leer if w != w else format(w, format_) for w in werte.tolist()]
+
+
+def _spalte(df, name, standard=""):
+    return df[name].to_numpy() if name in df.columns else np.full(len(df), standard, dtype=object)
+
+
+def raum_texte(result_df):
+    # alle Raumspalten des Handouts auf einmal formatieren (auch für ganze Portfolios)
+    return {
+        "typ": _texte(_spalte(result_df, "Wohnungstyp")),
+        "raum": _texte(result_df["Raum"].to_numpy()),
+        "flaeche": _zahlen_text(result_df["Fläche (m²)"], ".1f"),
+        "t_i": _zahlen_text(result_df["Tᵢ eff (°C)"], ".1f"),
+        "q": _zahlen_text(result_df["Q_Raum (W)"], ".0f"),
+        "heizflaeche": _texte(_spalte(result_df, "Heizflächentyp")),
+        "t_vl": _zahlen_text(_spalte(result_df, "T_VL (°C)", np.nan), ".1f", "-"),
+        "t_rl": _zahlen_text(_spalte(result_df, "T_RL (°C)", np.nan), ".1f", "-"),
+        "t_mittel": _zahlen_text(_spalte(result_df, "T_mittel (°C)", np.nan), ".1f", "-"),
+    }
+
+
+def typ_texte(type_summary_df):
+    anzahl = "Anzahl WE Typ" if "Anzahl WE Typ" in type_summary_df.columns else "Anzahl_WE"
+    return {
+        "typ": _texte(type_summary_df["Wohnungstyp"].to_numpy()),
+        "anzahl": _zahlen_text(type_summary_df[anzahl], ",.0f"),
+        "q_we": _zahlen_text(type_summary_df["Q_WE_kW"], ",.2f"),
+        "q_typ": _zahlen_text(type_summary_df["Q_Typ_geb_kW"], ",.2f"),
+    }
+
+
+def ebenen_texte(hierarchie):
+    # Knoten einer Hierarchie (heizlast.aggregation) in Baumreihenfolge, eingerückt nach Tiefe
+    k = hierarchie.knoten
+    return {
+        "gliederung": ["  " * t + str(name) for t, name in zip(k["Tiefe"].tolist(), k["Knoten"].tolist())],
+        "anzahl": _zahlen_text(k["Anzahl WE"], ",.0f", "-"),
+        "q": _zahlen_text(k["Heizlast (kW)"], ",.2f"),
+        "anteil": _zahlen_text(k["Anteil an Gesamt (%)"], ".1f"),
+        "t_mittel": _zahlen_text(k["T_mittel gewichtet (°C)"], ".1f", "-"),
+    }
+
+
+@dataclass
+class HandoutDaten:
+    raeume: dict
+    typen: dict
+    total_heating_load_building: float
+    T_out: float
+    default_T_set: float
+    safety_factor: float
+    analysis_level: str
+    wp_info: dict = None
+    gebaeude: str = None
+    ebenen: dict = None
+
+
+def handout_daten(result_df, type_summary_df, total_heating_load_building, T_out, default_T_set,
+                  safety_factor, analysis_level, wp_info=None, gebaeude=None, hierarchie=None):
+    # hierarchie: optional, Räume werden ohnehin raumweise aufgeführt → nur bis Wohnungstyp
+    typen = typ_texte(type_summary_df) if type_summary_df is not None and not type_summary_df.empty else None
+    ebenen = None
+    if hierarchie is not None:
+        if "Raum" in hierarchie.ebenen and hierarchie.ebenen.index("Raum") > 0:
+            hierarchie = hierarchie.bis(hierarchie.ebenen[hierarchie.ebenen.index("Raum") - 1])
+        ebenen = ebenen_texte(hierarchie)
+    return HandoutDaten(
+        raeume=raum_texte(result_df),
+        typen=typen,
+        total_heating_load_building=total_heating_load_building,
+        T_out=T_out,
+        default_T_set=default_T_set,
+        safety_factor=safety_factor,
+        analysis_level=analysis_level,
+        wp_info=wp_info,
+        gebaeude=gebaeude,
+        ebenen=ebenen,
+    )
+
+
+# ---------------------------------------------------------
+# Handout zeichnen
+# ---------------------------------------------------------
+def zeichne_handout(seite, d):
+    c = seite.c
+
+    # ------------- Kopf -------------
+    titel = "Heizlastberechnung – Ergebnisübersicht"
+    if d.gebaeude is not None:
+        titel += f" – {d.gebaeude}"
+    seite.text(titel, "Helvetica-Bold", 14, 1.0 * cm)
+    seite.text(f"Analyse-Level: {d.analysis_level}", abstand=0.5 * cm)
+    seite.text(f"Norm-Außentemperatur: {d.T_out:.1f} °C", abstand=0.5 * cm)
+    seite.text(f"Standard-Innentemperatur: {d.default_T_set:.1f} °C", abstand=0.5 * cm)
+    seite.text(f"Sicherheitszuschlag: {d.safety_factor * 100:.0f} %")
+
+    # ------------- Raumweise Heizlast -------------
+    r = d.raeume
+    seite.y -= 1.0 * cm
+    seite.tabelle(RAEUME, [r["typ"], r["raum"], r["flaeche"], r["t_i"], r["q"]])
+
+    # ------------- Heizlast je Wohnungstyp & Gebäude -------------
+    if d.typen is not None:
+        if seite.y < 4 * cm:
+            seite.neue_seite()
+        seite.y -= 0.5 * cm
+        t = d.typen
+        seite.tabelle(WOHNUNGSTYPEN, [t["typ"], t["anzahl"], t["q_we"], t["q_typ"]])
+
+        if seite.y < UNTEN:
+            seite.neue_seite()
+        seite.y -= 0.5 * cm
+        seite.text("Gesamtheizlast Gebäude", "Helvetica-Bold", 11, 0.7 * cm)
+        total = d.total_heating_load_building
+        seite.text(f"Summe: {total:,.0f} W (≈ {total/1000:,.2f} kW)")
+
+    # ------------- Heizlast nach Ebenen (Treppenhaus, Geschoss, ...) -------------
+    if d.ebenen is not None:
+        if seite.y < 4 * cm:
+            seite.neue_seite()
+        seite.y -= 0.8 * cm
+        e = d.ebenen
+        seite.tabelle(EBENEN, [e["gliederung"], e["anzahl"], e["q"], e["anteil"], e["t_mittel"]])
+
+    # ------------- Q²/Q³: Systemdaten je Raum -------------
+    if d.analysis_level.startswith("Q²") or d.analysis_level.startswith("Q³"):
+        seite.neue_seite()
+        seite.text(SYSTEMDATEN.titel, "Helvetica-Bold", 12, 0.8 * cm)
+        seite.text("Heizflächentyp und Systemtemperaturen je Raum", "Helvetica", 9, 0.6 * cm)
+        seite.tabelle(
+            SYSTEMDATEN,
+            [r["typ"], r["raum"], r["heizflaeche"], r["t_vl"], r["t_rl"], r["t_mittel"]],
+            mit_titel=False,
+        )
+
+    # ------------- Q³: Wärmepumpen-Abgleich & Empfehlung -------------
+    wp_info = d.wp_info
+    if d.analysis_level.startswith("Q³") and wp_info is not None and wp_info.get("wp_typ") != KEIN_WP:
+        seite.neue_seite()
+        seite.text("Wärmepumpen-Abgleich (Q³) – Gesamtgebäude", "Helvetica-Bold", 12, 0.8 * cm)
+        seite.schrift("Helvetica", 10)
+        for zeile, abstand in _wp_zeilen(wp_info):
+            c.drawString(LINKS, seite.y, zeile)
+            seite.y -= abstand
+
+        # Q-Konzept-Empfehlung (Ampellogik)
+        seite.y -= 0.3 * cm
+        seite.text("Q-Konzept – Empfehlung", "Helvetica-Bold", 11, 0.7 * cm)
+        for absatz in empfehlungstexte(wp_info):
+            seite.absatz(absatz)
+
+
+def _ist_zahl(wert):
+    return wert is not None and not np.isnan(wert)
+
+
+def _wp_zeilen(wp_info):
+    zeilen = [
+        (f"Wärmepumpen-Typ: {wp_info.get('wp_typ')}", 0.5 * cm),
+        (f"Nennleistung WP: {wp_info.get('wp_power_kw', 0):,.1f} kW", 0.5 * cm),
+        (f"Deckungsgrad bei Norm-Heizlast (Gebäude): {wp_info.get('coverage', 0):,.0f} %", 0.5 * cm),
+    ]
+    weighted_avg_T = wp_info.get("weighted_avg_T")
+    cop_est = wp_info.get("cop_est")
+    jaz_est = wp_info.get("jaz_est")
+    heizwaermebedarf = wp_info.get("heizwaermebedarf")
+    strombedarf = wp_info.get("strombedarf")
+    critical_share = wp_info.get("critical_share")
+
+    if _ist_zahl(weighted_avg_T):
+        zeilen.append((f"gewichtete mittlere Systemtemperatur: {weighted_avg_T:,.1f} °C", 0.5 * cm))
+    if _ist_zahl(cop_est):
+        zeilen.append((f"geschätzter COP am Auslegungspunkt: {cop_est:,.2f}", 0.5 * cm))
+    if _ist_zahl(jaz_est):
+        zeilen.append((f"grobe JAZ-Schätzung: {jaz_est:,.2f}", 0.5 * cm))
+    if heizwaermebedarf is not None and heizwaermebedarf > 0 and _ist_zahl(strombedarf):
+        zeilen.append((f"jährlicher Heizwärmebedarf: {heizwaermebedarf:,.0f} kWh/a", 0.5 * cm))
+        zeilen.append((f"resultierender Strombedarf WP (geschätzt): {strombedarf:,.0f} kWh/a", 0.7 * cm))
+    simulation = wp_info.get("simulation")
+    if simulation is not None:
+        zeilen.append((f"Jahressimulation (8760 h): simulierte JAZ {simulation['scop']:,.2f}, "
+                       f"Heizwärmebedarf {simulation['heizwaermebedarf']:,.0f} kWh/a", 0.5 * cm))
+        zeilen.append((f"Strombedarf gesamt {simulation['strom_gesamt']:,.0f} kWh/a, "
+                       f"davon Heizstab {simulation['backup']:,.0f} kWh/a, "
+                       f"Bivalenzpunkt {simulation['bivalenzpunkt']:,.1f} °C", 0.7 * cm))
+    if critical_share is not None:
+        zeilen.append((f"Anteil Heizlast in kritisch/bedingt geeigneten Bereichen (Gebäude): {critical_share:,.0f} %", 0.7 * cm))
+    return zeilen
+
+
+def empfehlungstexte(wp_info):
+    coverage = wp_info.get("coverage", 0)
+    weighted_avg_T = wp_info.get("weighted_avg_T")
+    critical_share = wp_info.get("critical_share")
+    text_lines = []
+
+    if coverage < 90:
+        text_lines.append(
+            "Die Wärmepumpe ist für die Gesamtgebäudeheizlast tendenziell unterdimensioniert (< 90 % Deckung). "
+            "Ein bivalenter Betrieb oder eine höhere Nennleistung sollte geprüft werden."
+        )
+    elif 90 <= coverage <= 120:
+        text_lines.append(
+            "Die Wärmepumpe liegt im üblichen Auslegungsbereich (ca. 90–120 % der Gebäude-Norm-Heizlast)."
+        )
+    else:
+        text_lines.append(
+            "Die Wärmepumpe ist für das Gebäude tendenziell überdimensioniert (> 120 % Deckung). "
+            "Dies kann zu Takten und ineffizientem Betrieb führen."
+        )
+
+    if _ist_zahl(weighted_avg_T):
+        if weighted_avg_T <= 35:
+            text_lines.append(
+                "Die mittlere Systemtemperatur ≤ 35 °C deutet auf eine sehr gute Eignung für den Wärmepumpenbetrieb hin "
+                "(typisch Fußbodenheizung / große Heizflächen)."
+            )
+        elif 35 < weighted_avg_T <= 45:
+            text_lines.append(
+                "Die mittlere Systemtemperatur zwischen 35–45 °C ist gut für einen effizienten Wärmepumpenbetrieb geeignet."
+            )
+        elif 45 < weighted_avg_T <= 50:
+            text_lines.append(
+                "Die mittlere Systemtemperatur von 45–50 °C ist nur bedingt optimal. "
+                "Eine Optimierung der Heizflächen, des hydraulischen Abgleichs oder der Heizkurve sollte geprüft werden."
+            )
+        else:
+            text_lines.append(
+                "Die mittlere Systemtemperatur > 50 °C ist kritisch für einen effizienten Wärmepumpenbetrieb. "
+                "Empfohlen werden Maßnahmen wie Heizkörpertausch in Teilbereichen, Reduktion der Vorlauftemperatur "
+                "und ein detaillierter hydraulischer Abgleich."
+            )
+
+    if critical_share is not None:
+        if critical_share > 0:
+            text_lines.append(
+                f"Der Anteil der Gebäudeheizlast in nur bedingt oder kritisch für Wärmepumpen geeigneten Bereichen liegt bei "
+                f"rund {critical_share:,.0f} %. "
+                "Für eine voll WP-optimierte Anlage sollte in diesen Bereichen eine Anpassung der Heizflächen "
+                "(z. B. größere Heizkörper, Flächenheizsysteme) oder eine Reduktion der Systemtemperatur geprüft werden."
+            )
+        else:
+            text_lines.append(
+                "Nahezu die gesamte Gebäudeheizlast liegt in gut oder sehr gut für Wärmepumpen geeigneten Bereichen. "
+                "Die Anlage ist damit grundsätzlich sehr gut WP-fähig."
+            )
+
+    text_lines.append(
+        "Im Rahmen eines Q³-Konzeptes empfiehlt sich auf Basis dieser Bewertung eine vertiefte technische Analyse "
+        "inklusive hydraulischem Abgleich, Optimierung der Heizflächen und – falls erforderlich – Anpassung des "
+        "Wärmeerzeugerkonzeptes (z. B. bivalente Systeme, Pufferspeicher, Kombination mit PV und Speichern)."
+    )
+    return text_lines
+
+
+def pdf_handout(daten, fusszeile=None):
+    # ein Handout als PDF-Bytes; liefert zusätzlich die Seitenzahl
+    buffer = BytesIO()
+    seite = Seitenvorlage(canvas.Canvas(buffer, pagesize=A4), fusszeile)
+    zeichne_handout(seite, daten)
+    seite.abschliessen()
+    seite.c.save()
+    return buffer.getvalue(), seite.seiten
+
+
+# ---------------------------------------------------------
+# Portfolio: ein Handout je Gebäude, parallel in einen ZIP
+# ---------------------------------------------------------
+def _dateiname(name):
+    erlaubt = "".join(z if z.isalnum() or z in "-_." else "_" for z in str(name))
+    return f"heizlast_handout_{erlaubt or 'gebaeude'}.pdf"
+
+
+def _dateinamen(namen):
+    # eindeutige Dateinamen in Handout-Reihenfolge: „Haus 1/2“ und „Haus 1_2“ ergäben sonst
+    # denselben Namen (auch ohne Groß-/Kleinschreibung, wegen Windows/macOS beim Entpacken)
+    vergeben = set()
+    dateien = []
+    for name in namen:
+        datei = _dateiname(name)
+        basis, zaehler = datei[:-len(".pdf")], 2
+        while datei.lower() in vergeben:
+            datei = f"{basis}_{zaehler}.pdf"
+            zaehler += 1
+        vergeben.add(datei.lower())
+        dateien.append(datei)
+    return dateien
+
+
+def _rendere_paket(paket):
+    ergebnisse = []
+    for datei, daten in paket:
+        start = time.perf_counter()
+        pdf, seiten = pdf_handout(daten, fusszeile=f"Gebäude {daten.gebaeude}")
+        ergebnisse.append((daten.gebaeude, datei, pdf, seiten, time.perf_counter() - start))
+    return ergebnisse
+
+
+def portfolio_handouts(portfolio, T_out, default_T_set, safety_factor, analysis_level="Q¹",
+                       building_col="Gebäude-ID", wp_infos=None):
+    # Handout-Daten aller Gebäude: Raumtexte einmal für das ganze Portfolio formatieren
+    rooms = portfolio.rooms
+    codes, namen = pd.factorize(rooms[building_col], sort=True)
+    order = np.argsort(codes, kind="stable")
+    grenzen = np.searchsorted(codes[order], np.arange(len(namen) + 1))
+    texte = {k: np.asarray(v, dtype=object)[order] for k, v in raum_texte(rooms).items()}
+
+    typen = portfolio.types
+    typ_codes = pd.Index(namen).get_indexer(typen[building_col])
+    typ_order = np.argsort(typ_codes, kind="stable")
+    typ_grenzen = np.searchsorted(typ_codes[typ_order], np.arange(len(namen) + 1))
+    typ_text = {k: np.asarray(v, dtype=object)[typ_order] for k, v in typ_texte(typen).items()}
+
+    lasten = portfolio.buildings.set_index(building_col)["Heizlast Gebäude (W)"]
+    wp_infos = wp_infos or {}
+    for i, name in enumerate(namen):
+        r = slice(grenzen[i], grenzen[i + 1])
+        t = slice(typ_grenzen[i], typ_grenzen[i + 1])
+        yield HandoutDaten(
+            raeume={k: v[r].tolist() for k, v in texte.items()},
+            typen={k: v[t].tolist() for k, v in typ_text.items()} if t.stop > t.start else None,
+            total_heating_load_building=float(lasten.get(name, 0.0)),
+            T_out=T_out,
+            default_T_set=default_T_set,
+            safety_factor=safety_factor,
+            analysis_level=analysis_level,
+            wp_info=wp_infos.get(name),
+            gebaeude=name,
+        )
+
+
+def rendere_portfolio(handouts, ziel, workers=None, paketgroesse=8, fortschritt=None):
+    # handouts: Iterable von HandoutDaten; ziel: ZIP-Pfad oder Dateiobjekt
+    handouts = list(handouts)
+    handouts = list(zip(_dateinamen(daten.gebaeude for daten in handouts), handouts))
+    pakete = [handouts[i:i + paketgroesse] for i in range(0, len(handouts), paketgroesse)]
+    workers = workers or os.cpu_count() or 1
+
+    zeilen = []
+    with zipfile.ZipFile(ziel, "w", compression=zipfile.ZIP_DEFLATED) as archiv:
+        if workers == 1:
+            ergebnisse = map(_rendere_paket, pakete)
+            zeilen = _sammle(ergebnisse, archiv, len(handouts), fortschritt)
+        else:
+            with Pool(processes=workers) as pool:
+                ergebnisse = pool.imap_unordered(_rendere_paket, pakete)
+                zeilen = _sammle(ergebnisse, archiv, len(handouts), fortschritt)
+
+    bericht = pd.DataFrame(zeilen, columns=["Gebäude", "Datei", "Seiten", "Renderzeit (s)", "Größe (kB)"])
+    return bericht.sort_values("Gebäude", kind="stable").reset_index(drop=True)
+
+
+def _sammle(ergebnisse, archiv, gesamt, fortschritt):
+    zeilen = []
+    for paket in ergebnisse:
+        for gebaeude, datei, pdf, seiten, dauer in paket:
+            archiv.writestr(datei, pdf)
+            zeilen.append((gebaeude, datei, seiten, dauer, len(pdf) / 1024.0))
+            if fortschritt is not None:
+                fortschritt(len(zeilen), gesamt, gebaeude)
+    return zeilen
+
+
+# ---------------------------------------------------------
+# Kommandozeile: python -m heizlast.bericht portfolio.csv --out handouts.zip
+# ---------------------------------------------------------
+def main(argv=None):
+    from .batch import LEVEL_KUERZEL, lese_raumtabelle
+    from .berechnung import wp_abgleich
+    from .konstanten import WP_TYPES
+    from .portfolio import GEBAEUDE_SPALTE, berechne_portfolio
+
+    parser = argparse.ArgumentParser(
+        prog="python -m heizlast.bericht",
+        description="Q-Konzept-Handouts (PDF) für alle Gebäude einer Portfolio-Tabelle als ZIP.",
+    )
+    parser.add_argument("eingabe", help="Portfolio-Tabelle (CSV/Parquet) mit Gebäude-Spalte")
+    parser.add_argument("--out", required=True, help="ZIP-Datei für die Handouts")
+    parser.add_argument("--gebaeude-spalte", default=GEBAEUDE_SPALTE, help="Spalte mit der Gebäude-ID")
+    parser.add_argument("--level", choices=sorted(LEVEL_KUERZEL), default="Q2", help="Analyse-Level (Standard: Q2)")
+    parser.add_argument("--t-out", type=float, default=-12.0, help="Norm-Außentemperatur Tₑ in °C")
+    parser.add_argument("--t-innen", type=float, default=20.0, help="Standard-Innentemperatur Tᵢ in °C")
+    parser.add_argument("--zuschlag", type=float, default=10.0, help="Sicherheitszuschlag in %%")
+    parser.add_argument("--wp-typ", choices=WP_TYPES, default=KEIN_WP, help="Wärmepumpen-Typ für Q³")
+    parser.add_argument("--wp-leistung", type=float, default=0.0, help="Nennleistung WP in kW für Q³")
+    parser.add_argument("--heizwaermebedarf", type=float, default=0.0, help="jährlicher Heizwärmebedarf in kWh/a für Q³")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: Anzahl CPUs)")
+    parser.add_argument("--bericht", default=None, help="optional: CSV mit Seiten und Renderzeit je Gebäude")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = lese_raumtabelle(args.eingabe)
+    portfolio = berechne_portfolio(df, args.t_out, args.t_innen, args.zuschlag / 100.0, args.gebaeude_spalte)
+    wp_infos = None
+    if args.level == "Q3":
+        # WP-Abgleich je Gebäude mit denselben WP-Angaben (wie im Batch-Lauf)
+        wp_infos = {
+            zeile[args.gebaeude_spalte]: wp_abgleich(
+                zeile["Heizlast Gebäude (kW)"], zeile["T_mittel gewichtet (°C)"], zeile["Anteil bedingt/kritisch (%)"],
+                args.wp_typ, args.wp_leistung, args.heizwaermebedarf,
+            )
+            for zeile in portfolio.buildings.to_dict("records")
+        }
+    handouts = portfolio_handouts(
+        portfolio, args.t_out, args.t_innen, args.zuschlag / 100.0, LEVEL_KUERZEL[args.level], args.gebaeude_spalte,
+        wp_infos=wp_infos,
+    )
+    bericht = rendere_portfolio(handouts, args.out, workers=args.workers)
+    if args.bericht:
+        bericht.to_csv(args.bericht, index=False)
+    print(
+        f"{len(bericht)} Handouts, {int(bericht['Seiten'].sum())} Seiten in {time.perf_counter() - start:.1f} s "
+        f"(Rendern je Gebäude Ø {bericht['Renderzeit (s)'].mean() * 1000:.0f} ms) → {args.out}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
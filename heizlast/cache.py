@@ -0,0 +1,192 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .berechnung import berechne_gebaeude
+from .diagnose import stufe
+
+# ---------------------------------------------------------
+# Ergebnis-Cache: Schlüssel = stabiler Hash aus Raumtabelle und Parametern
+# ---------------------------------------------------------
+CACHE_VERSION = 1
+
+
+def tabellen_hash(df, *params):
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"v{CACHE_VERSION}".encode())
+    h.update(repr(list(df.columns)).encode())
+    h.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(repr(params).encode())
+    return h.hexdigest()
+
+
+def _groesse_bytes(obj):
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, "__dict__"):
+        return sum(_groesse_bytes(v) for v in vars(obj).values()) + 256
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    return 64
+
+
+class ErgebnisCache:
+    # LRU-Cache mit Speichergrenze, threadsicher (eine Instanz für alle Sitzungen),
+    # optional mit Ablage als Pickle-Dateien in persist_dir
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, persist_dir=None):
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self._eintraege = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._eintraege)
+
+    def __contains__(self, key):
+        return key in self._eintraege
+
+    def get(self, key):
+        with self._lock:
+            eintrag = self._eintraege.get(key)
+            if eintrag is not None:
+                self._eintraege.move_to_end(key)
+                self.hits += 1
+                return eintrag[0]
+
+        wert = self._lade(key)
+        if wert is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._lege_ab(key, wert, persistieren=False)
+            return wert
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, wert):
+        self._lege_ab(key, wert, persistieren=True)
+
+    def get_or_compute(self, key, berechnung):
+        wert = self.get(key)
+        if wert is None:
+            wert = berechnung()
+            self.put(key, wert)
+        return wert
+
+    def clear(self):
+        with self._lock:
+            self._eintraege.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            anfragen = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._eintraege),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self.hits + self.disk_hits) / anfragen if anfragen else 0.0,
+            }
+
+    # ---------- intern ----------
+    def _lege_ab(self, key, wert, persistieren):
+        groesse = _groesse_bytes(wert)
+        with self._lock:
+            if key in self._eintraege:
+                self._bytes -= self._eintraege.pop(key)[1]
+            if groesse <= self.max_bytes:
+                self._eintraege[key] = (wert, groesse)
+                self._bytes += groesse
+            while self._bytes > self.max_bytes and self._eintraege:
+                _, (_, alt_groesse) = self._eintraege.popitem(last=False)
+                self._bytes -= alt_groesse
+                self.evictions += 1
+        if persistieren and self.persist_dir:
+            self._speichere(key, wert)
+
+    def _pfad(self, key):
+        return os.path.join(self.persist_dir, f"{key}.pkl")
+
+    def _speichere(self, key, wert):
+        tmp = self._pfad(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(wert, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._pfad(key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _lade(self, key):
+        if not self.persist_dir:
+            return None
+        try:
+            with open(self._pfad(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+
+# ---------------------------------------------------------
+# Prozessweiter Standard-Cache und gecachter Gesamtablauf
+# ---------------------------------------------------------
+_standard_cache = None
+_standard_lock = threading.Lock()
+
+
+def standard_cache():
+    global _standard_cache
+    with _standard_lock:
+        if _standard_cache is None:
+            max_mb = float(os.environ.get("HEIZLAST_CACHE_MB", "256"))
+            _standard_cache = ErgebnisCache(
+                max_bytes=int(max_mb * 1024 * 1024),
+                persist_dir=os.environ.get("HEIZLAST_CACHE_DIR") or None,
+            )
+        return _standard_cache
+
+
+def berechne_gebaeude_cached(
+    df,
+    T_out,
+    default_T_set,
+    safety_factor,
+    analysis_level="Q¹",
+    wp_typ=None,
+    wp_power_kw=0.0,
+    heizwaermebedarf=0.0,
+    cache=None,
+    rechner=berechne_gebaeude,
+):
+    # Ergebnis gilt als schreibgeschützt: es wird zwischen Sitzungen geteilt.
+    # rechner: Funktion mit der Signatur von berechne_gebaeude (z. B. InkrementelleBerechnung.berechne)
+    if cache is None:
+        cache = standard_cache()
+    kwargs = {"analysis_level": analysis_level, "wp_power_kw": wp_power_kw, "heizwaermebedarf": heizwaermebedarf}
+    if wp_typ is not None:
+        kwargs["wp_typ"] = wp_typ
+    with stufe("Cache-Schlüssel"):
+        key = tabellen_hash(df, float(T_out), float(default_T_set), float(safety_factor), sorted(kwargs.items()))
+    return cache.get_or_compute(
+        key, lambda: rechner(df, T_out, default_T_set, safety_factor, **kwargs)
+    )
@@ -0,0 +1,191 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# ---------------------------------------------------------
+# Diagnose: Laufzeit und Speicher je Stufe der Berechnung
+#
+#   protokoll = Protokoll(speicher=True)
+#   with protokoll.aktiv():
+#       berechne_gebaeude(...)
+#   protokoll.tabelle()
+#
+# Die Stufen im Rechenkern (with stufe("...")) kosten ohne aktives
+# Protokoll nur einen ContextVar-Zugriff. Jede Stufe wird zusätzlich als
+# JSON-Zeile auf dem Logger „heizlast.diagnose“ ausgegeben; mit der
+# Umgebungsvariable HEIZLAST_TRACE=<datei> werden die Zeilen an die Datei
+# angehängt (JSON Lines, z. B. zum Sammeln über viele Sitzungen).
+# ---------------------------------------------------------
+TRACE_VARIABLE = "HEIZLAST_TRACE"
+
+logger = logging.getLogger("heizlast.diagnose")
+
+_aktiv = contextvars.ContextVar("heizlast_protokoll", default=None)
+_LEER = nullcontext()
+
+# tracemalloc ist prozessweit: Start/Stopp über einen Referenzzähler aller Protokolle mit
+# Speichermessung; reset_peak darf nur ein Thread zur Zeit aufrufen (der „Messende“).
+# Versucht ein anderer Thread parallel zu messen, bekommen die überlappenden Stufen
+# keine Speicherwerte statt falscher.
+_speicher_lock = threading.Lock()
+_speicher = {"nutzer": 0, "eigenes": False, "besitzer": None, "tiefe": 0, "stoerungen": 0}
+
+
+def _speicher_start():
+    with _speicher_lock:
+        if _speicher["nutzer"] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _speicher["eigenes"] = True
+        _speicher["nutzer"] += 1
+
+
+def _speicher_stopp():
+    with _speicher_lock:
+        _speicher["nutzer"] -= 1
+        if _speicher["nutzer"] == 0 and _speicher["eigenes"]:
+            tracemalloc.stop()
+            _speicher["eigenes"] = False
+
+
+def _messung_beginnen():
+    # True, wenn dieser Thread messen darf (frei oder schon Besitzer)
+    with _speicher_lock:
+        ich = threading.get_ident()
+        if _speicher["besitzer"] not in (None, ich):
+            _speicher["stoerungen"] += 1
+            return False
+        _speicher["besitzer"] = ich
+        _speicher["tiefe"] += 1
+        return True
+
+
+def _messung_beenden():
+    with _speicher_lock:
+        _speicher["tiefe"] -= 1
+        if _speicher["tiefe"] == 0:
+            _speicher["besitzer"] = None
+
+
+def stufe(name, **info):
+    # Kontextmanager für eine Stufe; ohne aktives Protokoll wirkungslos
+    protokoll = _aktiv.get()
+    if protokoll is None:
+        return _LEER
+    return protokoll.stufe(name, **info)
+
+
+class Protokoll:
+
+    def __init__(self, speicher=False, sitzung=None, trace_datei=None, max_eintraege=2000):
+        self.speicher = speicher
+        self.sitzung = sitzung
+        self.trace_datei = trace_datei if trace_datei is not None else os.environ.get(TRACE_VARIABLE)
+        self.max_eintraege = max_eintraege
+        self.eintraege = []
+        self.lauf = 0
+        self._lock = threading.Lock()
+        self._ebenen = threading.local()
+
+    def neuer_lauf(self):
+        # z. B. je Skriptlauf der App; Einträge tragen die Laufnummer
+        with self._lock:
+            self.lauf += 1
+        return self.lauf
+
+    @contextmanager
+    def aktiv(self):
+        token = _aktiv.set(self)
+        if self.speicher:
+            _speicher_start()
+        try:
+            yield self
+        finally:
+            if self.speicher:
+                _speicher_stopp()
+            _aktiv.reset(token)
+
+    @contextmanager
+    def stufe(self, name, **info):
+        stapel = self._stapel()
+        messe_speicher = self.speicher and tracemalloc.is_tracing() and _messung_beginnen()
+        if messe_speicher:
+            stoerungen = _speicher["stoerungen"]
+            vorher, spitze_vorher = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        rahmen = {"kind_spitze": 0}
+        stapel.append(rahmen)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            dauer = time.perf_counter() - start
+            stapel.pop()
+            eintrag = {"stufe": name, "ebene": len(stapel), "beginn": start, "dauer_ms": dauer * 1000.0, **info}
+            if messe_speicher:
+                jetzt, spitze = tracemalloc.get_traced_memory()
+                spitze = max(spitze, rahmen["kind_spitze"])
+                _messung_beenden()
+                if _speicher["stoerungen"] == stoerungen:
+                    eintrag["speicher_spitze_mb"] = (spitze - vorher) / 1024**2
+                    eintrag["speicher_netto_mb"] = (jetzt - vorher) / 1024**2
+                # Spitze an die umgebende Stufe weitergeben (reset_peak hat sie gelöscht)
+                if stapel:
+                    stapel[-1]["kind_spitze"] = max(stapel[-1]["kind_spitze"], spitze, spitze_vorher)
+            self._ablegen(eintrag)
+
+    def _stapel(self):
+        if not hasattr(self._ebenen, "stapel"):
+            self._ebenen.stapel = []
+        return self._ebenen.stapel
+
+    def _ablegen(self, eintrag):
+        eintrag = {"zeit": time.time(), **({"sitzung": self.sitzung} if self.sitzung else {}), "lauf": self.lauf, **eintrag}
+        with self._lock:
+            self.eintraege.append(eintrag)
+            if len(self.eintraege) > self.max_eintraege:
+                del self.eintraege[: len(self.eintraege) - self.max_eintraege]
+        if logger.isEnabledFor(logging.INFO) or self.trace_datei:
+            zeile = json.dumps(eintrag, ensure_ascii=False, default=str)
+            logger.info(zeile)
+            if self.trace_datei:
+                with self._lock, open(self.trace_datei, "a", encoding="utf-8") as f:
+                    f.write(zeile + "\n")
+
+    def leeren(self):
+        with self._lock:
+            self.eintraege = []
+
+    def als_json(self):
+        with self._lock:
+            return json.dumps(self.eintraege, ensure_ascii=False, indent=2, default=str)
+
+    def tabelle(self, laeufe=None):
+        # laeufe: nur die letzten n Läufe
+        import pandas as pd
+
+        with self._lock:
+            eintraege = [e for e in self.eintraege if laeufe is None or e["lauf"] > self.lauf - laeufe]
+        df = pd.DataFrame(eintraege)
+        if df.empty:
+            return df
+        # in Startreihenfolge, eingerückt nach Ebene, damit verschachtelte Stufen lesbar bleiben
+        df = df.sort_values("beginn", kind="stable").reset_index(drop=True)
+        df["stufe"] = [("   " * (e - 1) + "↳ " if e else "") + s for e, s in zip(df["ebene"], df["stufe"])]
+        return df.drop(columns=[c for c in ("zeit", "sitzung", "ebene", "beginn") if c in df.columns])
+
+
+def laufzeit_fuer(name):
+    # Dekorator: Funktion als Stufe protokollieren (ohne aktives Protokoll wirkungslos)
+    def dekorator(funktion):
+        @functools.wraps(funktion)
+        def umschlag(*args, **kwargs):
+            with stufe(name):
+                return funktion(*args, **kwargs)
+        return umschlag
+    return dekorator
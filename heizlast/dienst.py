@@ -0,0 +1,523 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .batch import LEVEL_KUERZEL
+from .berechnung import _ZAHLEN_EINGABEN, wp_abgleich
+from .konstanten import KEIN_WP, WP_TYPES
+from .portfolio import berechne_portfolio
+
+# ---------------------------------------------------------
+# Lokaler HTTP/JSON-Dienst für den Rechenkern
+#
+#   python -m heizlast.dienst starten --port 8765
+#   python -m heizlast.dienst lasttest --anfragen 2000 --parallel 32
+#
+#   POST /berechnen   {"raeume": [...], "T_out": -12, "analysis_level": "Q3", ...}
+#   GET  /metriken    Latenz-Perzentile, Bündelgrößen, Fehler
+#
+# Gleichzeitige Anfragen werden zu Bündeln zusammengefasst und als ein
+# Portfolio (eine Anfrage = ein Gebäude) spaltenweise berechnet. JSON lesen,
+# rechnen und JSON schreiben laufen in einem Prozess-Pool; die Event-Loop
+# macht nur Ein-/Ausgabe. Nur Standardbibliothek, gedacht für localhost.
+# ---------------------------------------------------------
+STANDARD_HOST = "127.0.0.1"
+STANDARD_PORT = 8765
+
+# Wartezeit nach der ersten Anfrage eines Bündels (ohne Last kaum Verzögerung)
+BUENDEL_FENSTER_S = 0.002
+MAX_BUENDEL = 64
+MAX_BUENDEL_BYTES = 16 * 1024 * 1024
+MAX_KOERPER_BYTES = 64 * 1024 * 1024
+
+# Latenzen der letzten n Anfragen für die Perzentile
+LATENZ_FENSTER = 10_000
+
+STANDARD_PARAMETER = {
+    "T_out": -12.0,
+    "default_T_set": 20.0,
+    "safety_factor": 0.10,
+    "analysis_level": "Q¹",
+    "wp_typ": KEIN_WP,
+    "wp_power_kw": 0.0,
+    "heizwaermebedarf": 0.0,
+}
+
+AUSGABEN = ("raeume", "wohnungstypen", "gebaeude", "wp")
+
+# interne Gebäude-Spalte im Bündel (Nummer der Anfrage)
+_ANFRAGE_SPALTE = "__anfrage"
+
+_STATUS_TEXTE = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                 413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+logger = logging.getLogger("heizlast.dienst")
+
+
+# ---------------------------------------------------------
+# Rechnen im Worker: Rohdaten des Bündels → (Status, JSON-Bytes) je Anfrage
+# ---------------------------------------------------------
+def _spalten(raeume):
+    # Liste von Zeilen oder dict Spalte → Werte → (dict Spalte → Liste, Anzahl Zeilen)
+    if isinstance(raeume, dict):
+        spalten = {str(col): werte if isinstance(werte, list) else [werte] for col, werte in raeume.items()}
+        laengen = {len(werte) for werte in spalten.values()}
+        if len(laengen) > 1:
+            raise ValueError("Spalten in „raeume“ sind unterschiedlich lang.")
+        return spalten, laengen.pop() if laengen else 0
+    if not all(isinstance(zeile, dict) for zeile in raeume):
+        raise ValueError("„raeume“ muss eine Liste von Objekten (eine je Raum) sein.")
+    namen = list(dict.fromkeys(col for zeile in raeume for col in zeile))
+    return {col: [zeile.get(col) for zeile in raeume] for col in namen}, len(raeume)
+
+
+def lese_anfrage(koerper):
+    # JSON-Körper → (Spalten der Raumtabelle, Zeilen, Parameter, Ausgaben); ValueError bei ungültigen Eingaben
+    try:
+        daten = json.loads(koerper)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"ungültiges JSON: {e}") from None
+    if not isinstance(daten, dict) or "raeume" not in daten:
+        raise ValueError("Objekt mit Feld „raeume“ erwartet (Liste von Zeilen oder dict Spalte → Werte).")
+    if not isinstance(daten["raeume"], (list, dict)):
+        raise ValueError("„raeume“ muss eine Liste von Zeilen oder ein dict Spalte → Werte sein.")
+    spalten, n = _spalten(daten["raeume"])
+    if n == 0:
+        raise ValueError("„raeume“ enthält keine Zeilen.")
+    fehlend = [col for col in _ZAHLEN_EINGABEN if col not in spalten]
+    if fehlend:
+        raise ValueError(f"Spalten fehlen in „raeume“: {', '.join(fehlend)}")
+    if "Wohnungstyp" not in spalten:
+        # wie aggregiere_wohnungstypen: ohne Wohnungstyp ist alles Typ „A“
+        spalten["Wohnungstyp"] = ["A"] * n
+
+    params = dict(STANDARD_PARAMETER)
+    for name, standard in STANDARD_PARAMETER.items():
+        if name in daten and daten[name] is not None:
+            params[name] = daten[name] if isinstance(standard, str) else float(daten[name])
+    params["analysis_level"] = LEVEL_KUERZEL.get(params["analysis_level"], params["analysis_level"])
+    if params["wp_typ"] not in WP_TYPES:
+        raise ValueError(f"unbekannter wp_typ „{params['wp_typ']}“ (erlaubt: {', '.join(WP_TYPES)}).")
+
+    ausgaben = daten.get("ausgabe", AUSGABEN)
+    if isinstance(ausgaben, str):
+        # einzelne Ausgabe als Text statt Liste
+        ausgaben = (ausgaben,)
+    if not isinstance(ausgaben, (list, tuple)):
+        raise ValueError(f"„ausgabe“ muss ein Text oder eine Liste sein (erlaubt: {', '.join(AUSGABEN)}).")
+    unbekannt = [str(a) for a in ausgaben if a not in AUSGABEN]
+    if unbekannt:
+        raise ValueError(f"unbekannte Ausgabe(n): {', '.join(unbekannt)} (erlaubt: {', '.join(AUSGABEN)}).")
+    return spalten, n, params, tuple(ausgaben)
+
+
+def _json_wert(wert):
+    if isinstance(wert, dict):
+        return {k: _json_wert(v) for k, v in wert.items()}
+    if isinstance(wert, np.generic):
+        wert = wert.item()
+    if isinstance(wert, float) and not np.isfinite(wert):
+        return None
+    return wert
+
+
+def _fehler(status, text):
+    return status, json.dumps({"fehler": text}, ensure_ascii=False).encode("utf-8")
+
+
+def _zeilen_json(df):
+    # eine JSON-Zeile je Tabellenzeile; Zeilenumbrüche in Texten sind in JSON maskiert
+    text = df.to_json(orient="records", lines=True, force_ascii=False)
+    return text.split("\n") if text else []
+
+
+def _antworten_gruppe(gruppe):
+    # gruppe: [(i, spalten, n, params, ausgaben)] mit gleichen T_out, default_T_set, safety_factor;
+    # alle Anfragen als eine Tabelle (Spaltenlisten verketten statt DataFrames je Anfrage)
+    params = gruppe[0][3]
+    laengen = [n for _, _, n, _, _ in gruppe]
+    namen = list(dict.fromkeys(col for _, spalten, _, _, _ in gruppe for col in spalten))
+    tabelle = {}
+    for col in namen:
+        werte = []
+        for _, spalten, n, _, _ in gruppe:
+            werte.extend(spalten[col] if col in spalten else [None] * n)
+        tabelle[col] = werte
+    tabelle[_ANFRAGE_SPALTE] = np.repeat(np.arange(len(gruppe)), laengen)
+    ergebnis = berechne_portfolio(
+        pd.DataFrame(tabelle), params["T_out"], params["default_T_set"], params["safety_factor"],
+        building_col=_ANFRAGE_SPALTE,
+    )
+    types = ergebnis.types
+    gebaeude_zeilen = ergebnis.buildings.set_index(_ANFRAGE_SPALTE).to_dict("index")
+
+    # Anfragen liegen zusammenhängend und in Reihenfolge im Bündel → Grenzen statt Gruppierung
+    raum_grenzen = np.concatenate([[0], np.cumsum(laengen)])
+    typ_grenzen = np.searchsorted(types[_ANFRAGE_SPALTE].to_numpy(), np.arange(len(gruppe) + 1))
+    ausgaben_alle = {a for eintrag in gruppe for a in eintrag[4]}
+    raeume = _zeilen_json(ergebnis.rooms.drop(columns=_ANFRAGE_SPALTE)) if "raeume" in ausgaben_alle else None
+    typen = _zeilen_json(types.drop(columns=_ANFRAGE_SPALTE)) if "wohnungstypen" in ausgaben_alle else None
+
+    antworten = {}
+    for j, (i, _, _, params, ausgaben) in enumerate(gruppe):
+        gebaeude = gebaeude_zeilen[j]
+        teile = []
+        if "raeume" in ausgaben:
+            teile.append('"raeume":[' + ",".join(raeume[raum_grenzen[j]:raum_grenzen[j + 1]]) + "]")
+        if "wohnungstypen" in ausgaben:
+            teile.append('"wohnungstypen":[' + ",".join(typen[typ_grenzen[j]:typ_grenzen[j + 1]]) + "]")
+        if "gebaeude" in ausgaben:
+            teile.append('"gebaeude":' + json.dumps(_json_wert(gebaeude), ensure_ascii=False))
+        if "wp" in ausgaben:
+            wp_info = None
+            if params["analysis_level"].startswith("Q³"):
+                wp_info = wp_abgleich(
+                    gebaeude["Heizlast Gebäude (kW)"], gebaeude["T_mittel gewichtet (°C)"],
+                    gebaeude["Anteil bedingt/kritisch (%)"], params["wp_typ"], params["wp_power_kw"],
+                    params["heizwaermebedarf"],
+                )
+            teile.append('"wp":' + json.dumps(_json_wert(wp_info), ensure_ascii=False))
+        antworten[i] = (200, ("{" + ",".join(teile) + "}").encode("utf-8"))
+    return antworten
+
+
+def berechne_buendel(koerper):
+    # koerper: Liste der JSON-Körper; läuft im Worker-Prozess
+    antworten = [None] * len(koerper)
+    gruppen = {}
+    for i, k in enumerate(koerper):
+        try:
+            spalten, n, params, ausgaben = lese_anfrage(k)
+        except (ValueError, TypeError) as e:
+            antworten[i] = _fehler(400, str(e))
+            continue
+        schluessel = (params["T_out"], params["default_T_set"], params["safety_factor"])
+        gruppen.setdefault(schluessel, []).append((i, spalten, n, params, ausgaben))
+
+    for gruppe in gruppen.values():
+        try:
+            fertig = _antworten_gruppe(gruppe)
+        except Exception:
+            # fehlerhafte Anfrage im Bündel finden: einzeln nachrechnen
+            fertig = {}
+            for eintrag in gruppe:
+                try:
+                    fertig.update(_antworten_gruppe([eintrag]))
+                except Exception as e:
+                    fertig[eintrag[0]] = _fehler(422, f"{type(e).__name__}: {e}")
+        for i, antwort in fertig.items():
+            antworten[i] = antwort
+    return antworten
+
+
+# ---------------------------------------------------------
+# HTTP-Server mit Bündelung
+# ---------------------------------------------------------
+def perzentile(werte, stufen=(50, 90, 99)):
+    werte = np.asarray(werte, dtype=float)
+    if not len(werte):
+        return {f"p{p}": None for p in stufen} | {"max": None}
+    return {f"p{p}": float(np.percentile(werte, p)) for p in stufen} | {"max": float(werte.max())}
+
+
+class Dienst:
+    # workers=0: Rechnen in einem Thread statt in Prozessen (z. B. zum Debuggen)
+
+    def __init__(self, workers=None, fenster=BUENDEL_FENSTER_S, max_buendel=MAX_BUENDEL,
+                 max_buendel_bytes=MAX_BUENDEL_BYTES):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.fenster = fenster
+        self.max_buendel = max_buendel
+        self.max_buendel_bytes = max_buendel_bytes
+        self.latenzen = deque(maxlen=LATENZ_FENSTER)
+        self.buendelgroessen = deque(maxlen=LATENZ_FENSTER)
+        self.anfragen = 0
+        self.fehler = 0
+        self.start_zeit = time.time()
+        self._server = None
+        self._pool = None
+        self._warteschlange = None
+        self._buendler = None
+        self._verbindungen = {}
+
+    async def starten(self, host=STANDARD_HOST, port=STANDARD_PORT):
+        self._pool = ProcessPoolExecutor(self.workers) if self.workers > 0 else ThreadPoolExecutor(1)
+        self._frei = asyncio.Semaphore(max(self.workers, 1))
+        self._warteschlange = asyncio.Queue()
+        self._buendler = asyncio.create_task(self._buendeln())
+        self._server = await asyncio.start_server(self._verbindung, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("heizlast.dienst auf http://%s:%s (%s Worker)", host, self.port, self.workers)
+        return self
+
+    async def stoppen(self):
+        self._server.close()
+        # offene Keep-alive-Verbindungen schließen, ihre Handler enden mit EOF
+        for writer in self._verbindungen.values():
+            writer.close()
+        await asyncio.gather(*self._verbindungen, return_exceptions=True)
+        await self._server.wait_closed()
+        self._buendler.cancel()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def berechne(self, koerper):
+        # eine Anfrage einreihen; liefert (Status, JSON-Bytes)
+        zukunft = asyncio.get_running_loop().create_future()
+        await self._warteschlange.put((koerper, zukunft))
+        return await zukunft
+
+    async def _buendeln(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            buendel = [await self._warteschlange.get()]
+            # auf einen freien Worker warten; währenddessen sammeln sich weitere Anfragen
+            await self._frei.acquire()
+            groesse = len(buendel[0][0])
+            frist = loop.time() + self.fenster
+            while len(buendel) < self.max_buendel and groesse < self.max_buendel_bytes:
+                try:
+                    eintrag = self._warteschlange.get_nowait()
+                except asyncio.QueueEmpty:
+                    rest = frist - loop.time()
+                    if rest <= 0:
+                        break
+                    try:
+                        eintrag = await asyncio.wait_for(self._warteschlange.get(), rest)
+                    except asyncio.TimeoutError:
+                        break
+                buendel.append(eintrag)
+                groesse += len(eintrag[0])
+            asyncio.create_task(self._rechne(buendel))
+
+    async def _rechne(self, buendel):
+        try:
+            self.buendelgroessen.append(len(buendel))
+            antworten = await asyncio.get_running_loop().run_in_executor(
+                self._pool, berechne_buendel, [koerper for koerper, _ in buendel]
+            )
+        except Exception as e:
+            logger.exception("Bündel mit %s Anfragen fehlgeschlagen", len(buendel))
+            antworten = [_fehler(500, f"{type(e).__name__}: {e}")] * len(buendel)
+        finally:
+            self._frei.release()
+        for (_, zukunft), antwort in zip(buendel, antworten):
+            if not zukunft.done():
+                zukunft.set_result(antwort)
+
+    def metriken(self):
+        groessen = np.asarray(self.buendelgroessen, dtype=float)
+        return {
+            "anfragen": self.anfragen,
+            "fehler": self.fehler,
+            "laufzeit_s": time.time() - self.start_zeit,
+            "workers": self.workers,
+            "latenz_ms": perzentile(np.asarray(self.latenzen) * 1000.0),
+            "buendel": {
+                "anzahl": len(groessen),
+                "mittlere_groesse": float(groessen.mean()) if len(groessen) else None,
+                "max_groesse": int(groessen.max()) if len(groessen) else None,
+            },
+        }
+
+    async def _bearbeite(self, methode, pfad, koerper):
+        pfad = pfad.split("?", 1)[0]
+        if pfad == "/berechnen":
+            if methode != "POST":
+                return _fehler(405, "POST erwartet.")
+            return await self.berechne(koerper)
+        if pfad in ("/metriken", "/"):
+            if methode != "GET":
+                return _fehler(405, "GET erwartet.")
+            return 200, json.dumps(self.metriken(), ensure_ascii=False).encode("utf-8")
+        return _fehler(404, f"unbekannter Pfad {pfad}")
+
+    async def _verbindung(self, reader, writer):
+        self._verbindungen[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    kopf = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                zeilen = kopf.decode("latin-1").split("\r\n")
+                methode, pfad, version = (zeilen[0].split(" ") + ["", "", ""])[:3]
+                felder = {}
+                for zeile in zeilen[1:]:
+                    if ":" in zeile:
+                        name, wert = zeile.split(":", 1)
+                        felder[name.strip().lower()] = wert.strip()
+                laenge = int(felder.get("content-length", 0) or 0)
+                offen = felder.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                start = time.perf_counter()
+                if laenge > MAX_KOERPER_BYTES:
+                    status, antwort = _fehler(413, f"Anfrage größer als {MAX_KOERPER_BYTES // 1024**2} MB.")
+                    offen = False
+                else:
+                    koerper = await reader.readexactly(laenge) if laenge else b""
+                    status, antwort = await self._bearbeite(methode, pfad, koerper)
+
+                writer.write(
+                    f"HTTP/1.1 {status} {_STATUS_TEXTE.get(status, '')}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(antwort)}\r\n"
+                    f"Connection: {'keep-alive' if offen else 'close'}\r\n\r\n".encode("latin-1") + antwort
+                )
+                await writer.drain()
+                if pfad.startswith("/berechnen"):
+                    self.anfragen += 1
+                    self.fehler += status != 200
+                    self.latenzen.append(time.perf_counter() - start)
+                if not offen:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._verbindungen.pop(asyncio.current_task(), None)
+            writer.close()
+
+
+async def _laufen(host, port, workers, fenster, max_buendel):
+    dienst = await Dienst(workers, fenster, max_buendel).starten(host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await dienst.stoppen()
+
+
+# ---------------------------------------------------------
+# Lasttest-Client (ohne externe Abhängigkeiten)
+# ---------------------------------------------------------
+async def _sende(reader, writer, host, pfad, koerper=None):
+    methode = "POST" if koerper is not None else "GET"
+    koerper = koerper or b""
+    writer.write(
+        f"{methode} {pfad} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(koerper)}\r\n\r\n".encode("latin-1") + koerper
+    )
+    await writer.drain()
+    kopf = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(kopf[0].split(" ")[1])
+    laenge = next(int(z.split(":", 1)[1]) for z in kopf if z.lower().startswith("content-length:"))
+    return status, await reader.readexactly(laenge)
+
+
+def _spalten_json(df):
+    # dict Spalte → Werte (NaN → null)
+    return {col: json.loads(df[col].to_json(orient="values")) for col in df.columns}
+
+
+async def lasttest(host, port, anfragen=1000, parallel=16, raeume=20, typen=2, koerper=None):
+    # parallel offene Verbindungen senden zusammen anfragen Berechnungen; Latenzen aus Client-Sicht
+    if koerper is None:
+        from .benchmark import synthetische_raumtabelle
+
+        # einige verschiedene Gebäude, als Spalten-JSON
+        koerper = [
+            json.dumps({
+                "raeume": _spalten_json(synthetische_raumtabelle(raeume, typen, seed=s)),
+                "analysis_level": "Q3", "wp_typ": "Luft/Wasser", "wp_power_kw": 12.0, "heizwaermebedarf": 25000.0,
+            }).encode("utf-8")
+            for s in range(8)
+        ]
+    latenzen, fehler = [], 0
+    naechste = iter(range(anfragen))
+
+    async def verbindung():
+        nonlocal fehler
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in naechste:
+                start = time.perf_counter()
+                status, _ = await _sende(reader, writer, host, "/berechnen", koerper[i % len(koerper)])
+                latenzen.append(time.perf_counter() - start)
+                fehler += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verbindung() for _ in range(parallel)))
+    dauer = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server = await _sende(reader, writer, host, "/metriken")
+    writer.close()
+    return {
+        "anfragen": anfragen,
+        "parallel": parallel,
+        "raeume_je_anfrage": raeume,
+        "fehler": fehler,
+        "dauer_s": dauer,
+        "durchsatz_je_s": anfragen / dauer if dauer > 0 else None,
+        "latenz_ms": perzentile(np.asarray(latenzen) * 1000.0),
+        "server": json.loads(server),
+    }
+
+
+async def _lasttest_lokal(args):
+    # ohne --url: Dienst im selben Prozess auf freiem Port starten
+    if args.url:
+        host, _, port = args.url.replace("http://", "").rstrip("/").partition(":")
+        return await lasttest(host, int(port or 80), args.anfragen, args.parallel, args.raeume, args.typen)
+    dienst = await Dienst(args.workers, args.fenster / 1000.0, args.max_buendel).starten(STANDARD_HOST, 0)
+    try:
+        return await lasttest(STANDARD_HOST, dienst.port, args.anfragen, args.parallel, args.raeume, args.typen)
+    finally:
+        await dienst.stoppen()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m heizlast.dienst",
+        description="Lokaler HTTP/JSON-Dienst für die Heizlastberechnung mit Bündelung gleichzeitiger Anfragen.",
+    )
+    befehle = parser.add_subparsers(dest="befehl", required=True)
+    for name, hilfe in (("starten", "Dienst starten"), ("lasttest", "Durchsatz und Latenz messen")):
+        p = befehle.add_parser(name, help=hilfe)
+        p.add_argument("--workers", type=int, default=None, help="Anzahl Rechenprozesse (0: ein Thread; Standard: Anzahl CPUs)")
+        p.add_argument("--fenster", type=float, default=BUENDEL_FENSTER_S * 1000.0, help="Bündel-Fenster in ms")
+        p.add_argument("--max-buendel", type=int, default=MAX_BUENDEL, help="höchstens so viele Anfragen je Bündel (1: ohne Bündelung)")
+        if name == "starten":
+            p.add_argument("--host", default=STANDARD_HOST, help="Adresse (Standard: nur localhost)")
+            p.add_argument("--port", type=int, default=STANDARD_PORT, help="Port (Standard: 8765)")
+        else:
+            p.add_argument("--url", default=None, help="laufender Dienst, z. B. http://127.0.0.1:8765 (Standard: eigener Dienst)")
+            p.add_argument("--anfragen", type=int, default=1000, help="Anzahl Berechnungen")
+            p.add_argument("--parallel", type=int, default=16, help="gleichzeitige Verbindungen")
+            p.add_argument("--raeume", type=int, default=20, help="Räume je Anfrage (synthetisch)")
+            p.add_argument("--typen", type=int, default=2, help="Wohnungstypen je Anfrage")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.befehl == "starten":
+        try:
+            asyncio.run(_laufen(args.host, args.port, args.workers, args.fenster / 1000.0, args.max_buendel))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    ergebnis = asyncio.run(_lasttest_lokal(args))
+    latenz = ergebnis["latenz_ms"]
+    buendel = ergebnis["server"]["buendel"]
+    print(
+        f"{ergebnis['anfragen']} Anfragen ({ergebnis['raeume_je_anfrage']} Räume) mit {ergebnis['parallel']} Verbindungen "
+        f"in {ergebnis['dauer_s']:.2f} s → {ergebnis['durchsatz_je_s']:,.0f} Anfragen/s, {ergebnis['fehler']} Fehler\n"
+        f"Latenz Client: p50 {latenz['p50']:.1f} ms · p90 {latenz['p90']:.1f} ms · p99 {latenz['p99']:.1f} ms · "
+        f"max {latenz['max']:.1f} ms\n"
+        f"Bündel: {buendel['anzahl']} (Ø {buendel['mittlere_groesse'] or 0:.1f}, max {buendel['max_groesse'] or 0} Anfragen)",
+        file=sys.stderr,
+    )
+    return 1 if ergebnis["fehler"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .berechnung import _zahlen
+from .diagnose import stufe
+from .linear import LinearesModell
+
+# ---------------------------------------------------------
+# Aufheizen nach Nachtabsenkung: RC-Modell je Raum mit zwei Knoten
+# (Luft/Oberfläche T und Speichermasse Tₘ, Kopplung wie DIN EN ISO 13790)
+#
+#   C_L · dT/dt  = P − H · (T − Tₑ) − H_ms · (T − Tₘ)
+#   C_m · dTₘ/dt = H_ms · (T − Tₘ)
+#
+#   H    = UA gesamt + 0,33 · n · V (W/K)      C_L = 0,33 Wh/(m³K) · V
+#   H_ms = 9,1 W/(m²K) · A_m, A_m = k · Fläche  C_m = c_eff · Fläche
+#
+# Bei stückweise konstantem Tₑ und P ist der Schritt exakt (Matrixexponential
+# E = exp(A·Δt) der 2×2-Systemmatrix, stationär gilt T = Tₘ = Tₑ + P/H):
+#   (T', Tₘ')ᵀ = E · (T, Tₘ)ᵀ + (1 − E · 1) · (Tₑ + P/H)
+# Die Regelung bringt die Raumluft jedes Raums so schnell wie möglich auf den
+# Sollwert, begrenzt auf die installierte Leistung (Normheizlast · (1 + Reserve)).
+# Alle Räume werden gemeinsam Schritt für Schritt fortgeschrieben.
+#
+# Erforderliche Aufheizleistung: die konstante Leistung, die die Raumluft vom
+# Stand am Ende der Absenkung (T₀, Tₘ₀) in der Aufheizzeit t_RH auf Tᵢ bringt
+# (E_RH = exp(A·t_RH), e = 1 − E_LL − E_Lm):
+#   P_RH = H · [Tᵢ − E_LL · T₀ − E_Lm · Tₘ₀ − e · Tₑ] / e
+# Alle Verluste greifen an der Luft an und die Regelung ist ideal – die
+# Aufheizleistung ist damit eine obere Schranke für die Auslegung.
+# ---------------------------------------------------------
+
+# wirksame Wärmekapazität je m² Grundfläche (kJ/(m²K)), Klassen nach DIN EN ISO 13790
+BAUWEISEN = {
+    "sehr leicht": 80.0,
+    "leicht": 110.0,
+    "mittel": 165.0,
+    "schwer": 260.0,
+    "sehr schwer": 370.0,
+}
+# wirksame Massefläche A_m je m² Grundfläche, Klassen nach DIN EN ISO 13790
+MASSEFLAECHEN = {
+    "sehr leicht": 2.5,
+    "leicht": 2.5,
+    "mittel": 2.5,
+    "schwer": 3.0,
+    "sehr schwer": 3.5,
+}
+KAPAZITAET_SPALTE = "Wärmekapazität (kJ/m²K)"
+
+# Wärmeübergang Masse ↔ Raumluft/Oberfläche (W/(m²K) je m² A_m), DIN EN ISO 13790
+H_MS_SPEZIFISCH = 9.1
+
+# ohne Außentemperaturreihe: einige Tage konstant bei der Norm-Außentemperatur
+AUSLEGUNGSTAGE = 3
+
+_C_LUFT = 0.33 * 3600.0  # J/(m³K), passend zu Q_V = 0,33 · n · V
+
+
+@dataclass
+class AufheizErgebnis:
+    raeume: pd.DataFrame
+    typen: pd.DataFrame
+    gebaeude: pd.DataFrame
+    zeitreihen: dict = None   # Heizleistung und mittlere Raumtemperatur je Gebäude und Schritt
+
+
+def _zwei_knoten(H, H_ms, C_L, C_m, t_s):
+    # E = exp(A·t) der Systemmatrix A = [[−(H+H_ms)/C_L, H_ms/C_L], [H_ms/C_m, −H_ms/C_m]]
+    # je Raum über die Eigenwerte (reell, verschieden, ≤ 0); liefert E_LL, E_Lm, E_mL, E_mm
+    a11, a12 = -(H + H_ms) / C_L, H_ms / C_L
+    a21, a22 = H_ms / C_m, -H_ms / C_m
+    mitte = 0.5 * (a11 + a22)
+    wurzel = np.sqrt(0.25 * (a11 - a22) ** 2 + a12 * a21)
+    l1, l2 = mitte + wurzel, mitte - wurzel
+    e1, e2 = np.exp(l1 * t_s), np.exp(l2 * t_s)
+    # Sylvester: E = [e1 · (A − l2·I) − e2 · (A − l1·I)] / (l1 − l2)
+    k1 = (e1 - e2) / (l1 - l2)
+    k0 = (l1 * e2 - l2 * e1) / (l1 - l2)
+    return k1 * a11 + k0, k1 * a12, k1 * a21, k1 * a22 + k0
+
+
+def _zeitplan(n_schritte, schritt_h, von, bis):
+    # je Schritt: Absenkung aktiv? (Fenster darf über Mitternacht gehen)
+    stunde = (np.arange(n_schritte) * schritt_h) % 24.0
+    if von > bis:
+        return (stunde >= von) | (stunde < bis)
+    return (stunde >= von) & (stunde < bis)
+
+
+def simuliere_aufheizen(
+    df,
+    T_out,
+    default_T_set,
+    safety_factor,
+    T_aussen=None,
+    absenkung_von=22.0,
+    absenkung_bis=6.0,
+    absenkung_K=4.0,
+    bauweise="mittel",
+    aufheizzeit_h=2.0,
+    leistungsreserve=0.0,
+    schritt_min=15.0,
+    toleranz_K=0.5,
+    building_col=None,
+    modell=None,
+    zeitreihen=False,
+):
+    # T_aussen: Stundenwerte (z. B. Testreferenzjahr), sonst AUSLEGUNGSTAGE bei T_out;
+    # absenkung_K=None: Heizung im Absenkfenster ganz aus
+    if modell is None:
+        modell = LinearesModell(df, building_col=building_col)
+    if bauweise not in BAUWEISEN:
+        raise ValueError(f"Unbekannte Bauweise „{bauweise}“ (erlaubt: {', '.join(BAUWEISEN)}).")
+
+    # Raumkennwerte
+    flaeche = _zahlen(df["Fläche (m²)"])
+    volumen = flaeche * _zahlen(df["Raumhöhe (m)"])
+    c_eff = np.full(len(modell), BAUWEISEN[bauweise])
+    if KAPAZITAET_SPALTE in df.columns:
+        eigene = _zahlen(df[KAPAZITAET_SPALTE])
+        c_eff = np.where(np.isnan(eigene), c_eff, eigene)
+    C_L = _C_LUFT * volumen
+    C_m = c_eff * 1000.0 * flaeche
+    H = modell.H
+    t_soll = np.where(modell.ohne_t_i, default_T_set, modell.t_i)
+    q_norm = H * (t_soll - T_out) * (1.0 + safety_factor)
+    gueltig = (H > 0) & (C_L > 0) & (C_m >= 0) & ~np.isnan(t_soll)
+    # ungültige Räume rechnen mit Ersatzwerten (kein NaN im Schrittverfahren); ohne Masse nur der Luftknoten
+    mit_masse = gueltig & (C_m > 0)
+    H_g = np.where(gueltig, H, 1.0)
+    C_L_g = np.where(gueltig, C_L, 1.0)
+    C_m_g = np.where(mit_masse, C_m, 1.0)
+    H_ms = np.where(mit_masse, H_MS_SPEZIFISCH * MASSEFLAECHEN[bauweise] * flaeche, 0.0)
+    # Zeitkonstante des Raums als Ganzes (Luft und Masse entladen sich über H)
+    tau = np.where(gueltig, (C_L_g + np.where(mit_masse, C_m, 0.0)) / H_g, np.nan)
+
+    # Zeitachse und Außentemperatur je Schritt
+    schritt_h = schritt_min / 60.0
+    if T_aussen is None:
+        T_aussen = np.full(24 * AUSLEGUNGSTAGE, float(T_out))
+    T_aussen = np.asarray(T_aussen, dtype=float)
+    n_schritte = int(round(len(T_aussen) / schritt_h))
+    T_e = np.interp(np.arange(n_schritte) * schritt_h, np.arange(len(T_aussen)), T_aussen)
+    absenkung = _zeitplan(n_schritte, schritt_h, absenkung_von, absenkung_bis)
+    ende = np.flatnonzero(~absenkung & np.r_[False, absenkung[:-1]])   # erster Schritt nach der Absenkung
+
+    # Schrittkonstanten je Raum: T' = T_frei + P · g (g = (1 − E_LL − E_Lm)/H)
+    e_ll, e_lm, e_ml, e_mm = _zwei_knoten(H_g, H_ms, C_L_g, C_m_g, schritt_h * 3600.0)
+    e_l, e_m = 1.0 - e_ll - e_lm, 1.0 - e_ml - e_mm
+    g_l, g_m = e_l / H_g, e_m / H_g
+    je_k = 1.0 / g_l                        # P = (T' − T_frei) · H/(1 − E_LL − E_Lm)
+    p_max = np.where(gueltig, q_norm * (1.0 + leistungsreserve), 0.0)
+    rh_ll, rh_lm, _, _ = _zwei_knoten(H_g, H_ms, C_L_g, C_m_g, aufheizzeit_h * 3600.0)
+    rh_l = 1.0 - rh_ll - rh_lm
+    # ungültige Räume laufen mit 0 mit (kein NaN im Schrittverfahren) und werden erst in der Ausgabe ausgeblendet
+    soll = np.where(gueltig, t_soll, 0.0)
+    soll_absenkung = soll - absenkung_K if absenkung_K is not None else np.full(len(modell), -np.inf)
+
+    # Gewichte: Gebäude über die Anzahl WE des Wohnungstyps
+    mit_typ = modell.typ_code >= 0
+    anzahl_typ = np.zeros(len(modell))
+    anzahl_typ[mit_typ] = modell.anzahl_typ[modell.typ_code[mit_typ]]
+    n_geb, n_typ = len(modell.gebaeude), len(modell.typen)
+    geb = np.maximum(modell.gebaeude_code, 0)
+    typ = np.maximum(modell.typ_code, 0)
+    im_gebaeude = gueltig & (modell.gebaeude_code >= 0)
+    im_typ = gueltig & mit_typ
+
+    # Zustand: Raumluft T und Speichermasse T_m
+    T = soll.copy()
+    T_m = soll.copy()
+    T_min = T.copy()
+    waerme = np.zeros(len(modell))          # Σ P (W), mal Δt am Ende
+    wartet = np.zeros(len(modell), dtype=bool)
+    start = 0
+    dauer_max = np.zeros(len(modell))
+    dauer_summe = np.zeros(len(modell))
+    tage = 0
+    nicht_erreicht = np.zeros(len(modell), dtype=int)
+    p_rh_max = np.zeros(len(modell))
+    p_rh_geb = np.zeros(n_geb)
+    p_rh_typ = np.zeros(n_typ)
+    reihe_p = np.zeros((n_schritte, n_geb)) if zeitreihen else None
+    reihe_t = np.zeros((n_schritte, n_geb)) if zeitreihen else None
+    gewicht_p = np.where(im_gebaeude, anzahl_typ, 0.0)
+    gewicht_t = np.where(im_gebaeude, flaeche * anzahl_typ, 0.0)
+    flaeche_geb = np.bincount(geb, weights=gewicht_t, minlength=n_geb)
+    ende_menge = set(ende.tolist())
+    komfort = soll - toleranz_K
+
+    with stufe("Aufheizsimulation (RC je Raum)", schritte=n_schritte, raeume=len(modell)):
+        for k in range(n_schritte):
+            if k in ende_menge:
+                # Ende der Absenkung: erforderliche Aufheizleistung und Beginn der Zeitmessung
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    p_rh = H * (soll - rh_ll * T - rh_lm * T_m - rh_l * T_e[k]) / rh_l
+                p_rh = np.where(gueltig, np.maximum(p_rh, 0.0), 0.0)
+                p_rh_max = np.maximum(p_rh_max, p_rh)
+                p_rh_geb = np.maximum(p_rh_geb, np.bincount(geb[im_gebaeude], weights=(p_rh * anzahl_typ)[im_gebaeude], minlength=n_geb))
+                p_rh_typ = np.maximum(p_rh_typ, np.bincount(typ[im_typ], weights=p_rh[im_typ], minlength=n_typ))
+                wartet = gueltig & (T < komfort)
+                start = k
+                tage += 1
+
+            frei = e_ll * T
+            frei += e_lm * T_m
+            frei += e_l * T_e[k]
+            p = (soll_absenkung if absenkung[k] else soll) - frei
+            p *= je_k
+            np.minimum(np.maximum(p, 0.0, out=p), p_max, out=p)
+            T_m *= e_mm
+            T_m += e_ml * T
+            T_m += e_m * T_e[k]
+            T_m += g_m * p
+            frei += g_l * p
+            T = frei
+            waerme += p
+            np.minimum(T_min, T, out=T_min)
+
+            if wartet.any():
+                if absenkung[k]:
+                    # neue Absenkung, bevor der Komfort erreicht war
+                    nicht_erreicht += wartet
+                    dauer_max[wartet] = np.inf
+                    wartet[:] = False
+                else:
+                    erreicht = wartet & (T >= komfort)
+                    if erreicht.any():
+                        dauer = (k + 1 - start) * schritt_h
+                        dauer_max[erreicht] = np.maximum(dauer_max[erreicht], dauer)
+                        dauer_summe[erreicht] += dauer
+                        wartet &= ~erreicht
+
+            if zeitreihen:
+                if n_geb == 1:
+                    reihe_p[k], reihe_t[k] = p @ gewicht_p, T @ gewicht_t
+                else:
+                    reihe_p[k] = np.bincount(geb, weights=p * gewicht_p, minlength=n_geb)
+                    reihe_t[k] = np.bincount(geb, weights=T * gewicht_t, minlength=n_geb)
+
+    with stufe("Aufheizsimulation: Auswertung"):
+        if wartet.any():
+            dauer_max[wartet] = np.inf
+            nicht_erreicht += wartet
+        dt_s = schritt_h * 3600.0
+        waerme_kwh = waerme * dt_s / 3.6e6
+        ohne_absenkung_kwh = np.where(gueltig, _ohne_absenkung(H, t_soll, T_e, p_max) * dt_s / 3.6e6, np.nan)
+        erreicht_tage = tage - nicht_erreicht
+
+        raeume = pd.DataFrame(index=df.index)
+        for col in ([building_col] if building_col else []) + ["Wohnungstyp", "Raum"]:
+            if col in df.columns:
+                raeume[col] = df[col].to_numpy()
+        raeume["Zeitkonstante τ (h)"] = tau / 3600.0
+        raeume["Heizlast Norm (W)"] = q_norm
+        raeume["T_min Absenkung (°C)"] = np.where(gueltig, T_min, np.nan)
+        raeume["Zeit bis Komfort max. (h)"] = np.where(gueltig, dauer_max, np.nan)
+        raeume["Zeit bis Komfort Mittel (h)"] = np.where(gueltig & (erreicht_tage > 0), dauer_summe / np.maximum(erreicht_tage, 1), np.nan)
+        raeume["Komfort nicht erreicht (Tage)"] = nicht_erreicht
+        raeume["Aufheizleistung erforderlich (W)"] = np.where(gueltig, p_rh_max, np.nan)
+        raeume["Aufheizzuschlag (W)"] = np.where(gueltig, np.maximum(p_rh_max - q_norm, 0.0), np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            raeume["Aufheizzuschlag (W/m²)"] = raeume["Aufheizzuschlag (W)"] / flaeche
+        raeume["Heizwärme (kWh)"] = np.where(gueltig, waerme_kwh, np.nan)
+        raeume["Heizwärme ohne Absenkung (kWh)"] = ohne_absenkung_kwh
+
+        # Wohnungstypen: Leistungen je WE (gleichzeitig in allen Räumen des Typs)
+        typen = modell.typen.rename(columns={"Gebäude": building_col}) if building_col else modell.typen[["Wohnungstyp"]].copy()
+        typen["Anzahl_WE"] = modell.anzahl_typ
+        typen["Heizlast Norm je WE (W)"] = np.bincount(typ[im_typ], weights=q_norm[im_typ], minlength=n_typ)
+        typen["Aufheizleistung je WE (W)"] = p_rh_typ
+        typen["Aufheizzuschlag je WE (W)"] = np.maximum(p_rh_typ - typen["Heizlast Norm je WE (W)"], 0.0)
+        zeit_typ = np.zeros(n_typ)
+        np.maximum.at(zeit_typ, typ[im_typ], dauer_max[im_typ])
+        typen["Zeit bis Komfort max. (h)"] = zeit_typ
+
+        # Gebäude
+        q_geb = np.bincount(geb[im_gebaeude], weights=(q_norm * anzahl_typ)[im_gebaeude], minlength=n_geb)
+        waerme_geb = np.bincount(geb[im_gebaeude], weights=(waerme_kwh * anzahl_typ)[im_gebaeude], minlength=n_geb)
+        ohne_geb = np.bincount(geb[im_gebaeude], weights=(np.nan_to_num(ohne_absenkung_kwh) * anzahl_typ)[im_gebaeude], minlength=n_geb)
+        zeit_geb = np.zeros(n_geb)
+        np.maximum.at(zeit_geb, geb[im_gebaeude], dauer_max[im_gebaeude])
+        gebaeude = pd.DataFrame({
+            "Heizlast Norm (W)": q_geb,
+            "Aufheizleistung erforderlich (W)": p_rh_geb,
+            "Aufheizzuschlag (W)": np.maximum(p_rh_geb - q_geb, 0.0),
+        })
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gebaeude["Aufheizzuschlag (%)"] = np.where(q_geb > 0, gebaeude["Aufheizzuschlag (W)"] / q_geb * 100.0, 0.0)
+            gebaeude["Zeit bis Komfort max. (h)"] = zeit_geb
+            gebaeude["Heizwärme (kWh)"] = waerme_geb
+            gebaeude["Einsparung durch Absenkung (%)"] = np.where(ohne_geb > 0, (1.0 - waerme_geb / ohne_geb) * 100.0, 0.0)
+        if building_col:
+            gebaeude.insert(0, building_col, np.asarray(modell.gebaeude))
+
+        reihen = None
+        if zeitreihen:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                reihen = {
+                    "Stunde": np.arange(n_schritte) * schritt_h,
+                    "T_aussen (°C)": T_e,
+                    "Heizleistung (W)": reihe_p,
+                    "T_Raum mittel (°C)": reihe_t / np.where(flaeche_geb > 0, flaeche_geb, np.nan),
+                }
+
+    return AufheizErgebnis(raeume=raeume, typen=typen, gebaeude=gebaeude, zeitreihen=reihen)
+
+
+def _ohne_absenkung(H, t_soll, T_e, p_max):
+    # Heizwärme bei durchgehendem Sollwert (Σ über Schritte, W·Schritt), blockweise
+    summe = np.zeros(len(H))
+    for start in range(0, len(T_e), 2048):
+        T = T_e[None, start:start + 2048]
+        summe += np.minimum(H[:, None] * np.clip(t_soll[:, None] - T, 0.0, None), p_max[:, None]).sum(axis=1)
+    return summe
@@ -0,0 +1,197 @@
+import io
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from .diagnose import laufzeit_fuer
+
+# ---------------------------------------------------------
+# Hilfsfunktionen für Export
+# ---------------------------------------------------------
+@laufzeit_fuer("Export PDF")
+def create_pdf_summary(result_df, type_summary_df, total_heating_load_building, T_out, default_T_set, safety_factor, analysis_level, wp_info=None, hierarchie=None):
+    # Layout und Seitenumbrüche liegen in der Berichts-Engine (heizlast.bericht);
+    # reportlab wird erst beim ersten PDF geladen
+    from .bericht import handout_daten, pdf_handout
+
+    daten = handout_daten(
+        result_df, type_summary_df, total_heating_load_building, T_out, default_T_set, safety_factor,
+        analysis_level, wp_info, hierarchie=hierarchie,
+    )
+    pdf_data, _ = pdf_handout(daten)
+    return pdf_data
+
+
+# ---------------------------------------------------------
+# Parquet-Export: eine Datei je Ebene (Räume, Wohnungstypen, Gebäude), zusammen als ZIP
+# ---------------------------------------------------------
+@laufzeit_fuer("Export Parquet")
+def create_parquet_zip(tabellen):
+    # tabellen: {"raeume": df, ...}, z. B. aus austausch.ergebnis_tabellen; pyarrow erst beim ersten Export
+    from .austausch import ERGEBNIS_DATEIEN, parquet_bytes
+
+    puffer = io.BytesIO()
+    # Parquet ist bereits komprimiert → ZIP nur als Container
+    with zipfile.ZipFile(puffer, "w", compression=zipfile.ZIP_STORED) as archiv:
+        for name, df in tabellen.items():
+            archiv.writestr(ERGEBNIS_DATEIEN.get(name, f"{name}.parquet"), parquet_bytes(df))
+    return puffer.getvalue()
+
+
+# ---------------------------------------------------------
+# Excel-Export: zeilenweise im constant_memory-Modus von xlsxwriter
+# ---------------------------------------------------------
+# Zeilen je Block beim Umwandeln der Spalten in Python-Werte
+EXCEL_BLOCK = 10_000
+
+# Excel erlaubt 1.048.576 Zeilen je Blatt (inkl. Kopfzeile)
+EXCEL_MAX_ZEILEN = 1_048_575
+
+# Zahlenformat nach Einheit im Spaltennamen
+_EXCEL_FORMATE = [
+    (("(kW)", "_kW", "[kW]"), "#,##0.00"),
+    (("(W)", "_W", "[W]"), "#,##0"),
+    (("(kWh/a)",), "#,##0"),
+    (("(°C)", "(K)"), "0.0"),
+    (("(%)",), "0.0"),
+    (("(m²)", "(m³)", "(m)", "(W/K)", "(W/m²K)", "(1/h)"), "0.00"),
+]
+
+
+def _excel_format(name, dtype):
+    for endungen, format_ in _EXCEL_FORMATE:
+        if any(str(name).endswith(e) for e in endungen):
+            return format_
+    if pd.api.types.is_integer_dtype(dtype):
+        return "0"
+    if pd.api.types.is_float_dtype(dtype):
+        return "0.00"
+    return None
+
+
+def _excel_werte(spalte):
+    # Spalte → Liste mit Python-Werten; NaN/None als leere Zelle
+    werte = spalte.to_numpy()
+    if werte.dtype.kind == "f":
+        werte = np.where(np.isfinite(werte), werte, None)
+    elif werte.dtype.kind in "iub":
+        return werte.tolist()
+    else:
+        werte = np.asarray(werte, dtype=object)
+        werte = np.where(pd.isna(werte), None, werte.astype(str))
+    return werte.tolist()
+
+
+def _blattnamen(name, teil):
+    return name if teil == 0 else f"{name} ({teil + 1})"[:31]
+
+
+def _schreibe_blatt(workbook, name, bloecke, kopf_format):
+    # bloecke: DataFrame oder Iterable von DataFrames mit gleichen Spalten
+    if isinstance(bloecke, pd.DataFrame):
+        df = bloecke
+        bloecke = (df.iloc[start:start + EXCEL_BLOCK] for start in range(0, max(len(df), 1), EXCEL_BLOCK))
+
+    teil, zeile, worksheet = 0, 0, None
+    for block in bloecke:
+        if worksheet is None:
+            spalten = list(block.columns)
+            formate = [_excel_format(col, block[col].dtype) for col in spalten]
+            format_objekte = {f: workbook.add_format({"num_format": f}) for f in set(formate) if f}
+
+        werte = [_excel_werte(block[col]) for col in spalten]
+        for zeilenwerte in zip(*werte) if len(block) else [()]:
+            if worksheet is None or zeile > EXCEL_MAX_ZEILEN:
+                worksheet = workbook.add_worksheet(_blattnamen(name, teil))
+                teil += 1
+                for i, (col, f) in enumerate(zip(spalten, formate)):
+                    worksheet.set_column(i, i, max(10, min(len(str(col)) + 2, 40)), format_objekte.get(f))
+                worksheet.write_row(0, 0, [str(col) for col in spalten], kopf_format)
+                worksheet.freeze_panes(1, 0)
+                zeile = 1
+            if zeilenwerte:
+                worksheet.write_row(zeile, 0, zeilenwerte)
+                zeile += 1
+
+
+def schreibe_excel(ziel, blaetter):
+    # ziel: Dateipfad oder binäres Dateiobjekt; blaetter: {Blattname: DataFrame oder Blöcke}
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(ziel, {"constant_memory": True, "in_memory": False})
+    kopf_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    for name, bloecke in blaetter.items():
+        if bloecke is None or (isinstance(bloecke, pd.DataFrame) and bloecke.empty and name != "Räume"):
+            continue
+        _schreibe_blatt(workbook, name, bloecke, kopf_format)
+    workbook.close()
+
+
+@laufzeit_fuer("Export Excel")
+def create_excel(result_df, type_summary_df=None, building_df=None, ziel=None, hierarchie=None):
+    # ohne ziel: Workbook über eine Spool-Datei (erst ab 32 MB auf Platte) als Bytes;
+    # hierarchie (heizlast.aggregation) als eingerückte Gliederung auf eigenem Blatt
+    blaetter = {
+        "Räume": result_df,
+        "Wohnungstypen": type_summary_df,
+        "Gebäude": building_df,
+        "Hierarchie": hierarchie.als_tabelle() if hierarchie is not None else None,
+    }
+    if ziel is not None:
+        schreibe_excel(ziel, blaetter)
+        return None
+    with tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024) as puffer:
+        schreibe_excel(puffer, blaetter)
+        puffer.seek(0)
+        return puffer.read()
+
+
+# ---------------------------------------------------------
+# Exporte bei Bedarf: einmal je Ergebnis-Schlüssel erzeugen, bei neuem Schlüssel verwerfen
+# ---------------------------------------------------------
+class ExportSpeicher:
+    # threadsicher, weil Streamlit Download-Callables in eigenen Threads ausführt
+
+    def __init__(self):
+        self.schluessel = None
+        self._daten = {}
+        self._sperren = {}
+        self._lock = threading.Lock()
+        self.erzeugt = 0
+
+    def setze_schluessel(self, schluessel):
+        with self._lock:
+            if schluessel != self.schluessel:
+                self.schluessel = schluessel
+                self._daten = {}
+                self._sperren = {}
+
+    def hole(self, name, erzeuge, schluessel=None):
+        # erzeuge() läuft höchstens einmal je Schlüssel und Name, auch bei gleichzeitigen Downloads
+        with self._lock:
+            schluessel = self.schluessel if schluessel is None else schluessel
+            if (schluessel, name) in self._daten:
+                return self._daten[(schluessel, name)]
+            sperre = self._sperren.setdefault((schluessel, name), threading.Lock())
+        with sperre:
+            with self._lock:
+                if (schluessel, name) in self._daten:
+                    return self._daten[(schluessel, name)]
+            daten = erzeuge()
+            with self._lock:
+                self.erzeugt += 1
+                # veraltete Ergebnisse (Eingaben inzwischen geändert) nicht mehr ablegen
+                if schluessel == self.schluessel:
+                    self._daten[(schluessel, name)] = daten
+            return daten
+
+    def bei_bedarf(self, name, erzeuge):
+        # Callable für st.download_button(data=...) an den aktuellen Schlüssel gebunden
+        schluessel = self.schluessel
+        return lambda: self.hole(name, erzeuge, schluessel)
+
+    def __contains__(self, name):
+        return (self.schluessel, name) in self._daten
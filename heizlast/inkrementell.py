@@ -0,0 +1,204 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .berechnung import GebaeudeErgebnis, ergebnis_tabelle, raum_kennwerte, wp_abgleich
+from .diagnose import stufe
+from .konstanten import KEIN_WP, KRITISCHE_EIGNUNG
+
+# ---------------------------------------------------------
+# Inkrementelle Neuberechnung bei Änderungen in der Raumtabelle
+#
+# Die Eingabespalten werden zeilenweise mit dem letzten Stand verglichen;
+# nur geänderte/neue Zeilen laufen durch raum_kennwerte. Wohnungstyp- und
+# Gebäudesummen werden fortgeschrieben (alter Beitrag raus, neuer Beitrag
+# rein) statt neu gruppiert.
+# ---------------------------------------------------------
+
+# Reihenfolge der laufenden Gebäudesummen in _summen
+_Q_GEB, _Q_KRIT, _TQ, _Q_GEWICHT = range(4)
+
+
+def _gleich(neu, alt):
+    gleich = np.asarray(neu == alt, dtype=bool)
+    return gleich | (pd.isna(neu) & pd.isna(alt))
+
+
+class InkrementelleBerechnung:
+
+    def __init__(self, voll_ab_anteil=0.5):
+        # ab diesem Anteil geänderter Zeilen ist eine Vollberechnung günstiger
+        self.voll_ab_anteil = voll_ab_anteil
+        self.letzte_aenderung = {}
+        self.reset()
+
+    def reset(self):
+        self._schluessel = None
+        self._index = None
+        self._eingabe = None
+        self._werte = None
+        self._typ = None
+        self._typen = {}
+        self._summen = np.zeros(4)
+
+    def berechne(
+        self,
+        df,
+        T_out,
+        default_T_set,
+        safety_factor,
+        analysis_level="Q¹",
+        wp_typ=KEIN_WP,
+        wp_power_kw=0.0,
+        heizwaermebedarf=0.0,
+    ):
+        params = (T_out, default_T_set, safety_factor)
+        schluessel = (
+            tuple(float(p) for p in params),
+            tuple(df.columns),
+            tuple(str(dtype) for dtype in df.dtypes),
+        )
+        eingabe = {col: df[col].to_numpy(copy=True) for col in df.columns}
+
+        if self._werte is None or schluessel != self._schluessel or not df.index.is_unique:
+            with stufe("Raumwerte (voll)", zeilen=len(df)):
+                self._voll(df, eingabe, params)
+        else:
+            with stufe("Raumwerte (inkrementell)", zeilen=len(df)):
+                self._aktualisiere(df, eingabe, params)
+
+        self._schluessel = schluessel
+        self._index = df.index
+        self._eingabe = eingabe
+
+        with stufe("Ergebnistabelle"):
+            result = ergebnis_tabelle(df, self._werte)
+            if "Wohnungstyp" not in result.columns:
+                result["Wohnungstyp"] = "A"
+            result["Q_Raum_geb (W)"] = result["Q_Raum (W)"] * result["Anzahl WE Typ"]
+        return self._ergebnis(result, analysis_level, wp_typ, wp_power_kw, heizwaermebedarf)
+
+    # ---------- intern ----------
+    def _voll(self, df, eingabe, params):
+        self._typen = {}
+        self._summen = np.zeros(4)
+        self._werte = raum_kennwerte(eingabe, *params)
+        self._typ = eingabe["Wohnungstyp"] if "Wohnungstyp" in eingabe else np.full(len(df), "A", dtype=object)
+        self._anwenden(np.arange(len(df)), +1.0)
+        self.letzte_aenderung = {"voll": True, "neu_berechnet": len(df), "entfernt": 0, "zeilen": len(df)}
+
+    def _aktualisiere(self, df, eingabe, params):
+        n = len(df)
+        if df.index.equals(self._index):
+            pos_alt = np.arange(n)
+        else:
+            pos_alt = self._index.get_indexer(df.index)
+        vorhanden = pos_alt >= 0
+        pos_vorhanden = pos_alt[vorhanden]
+
+        geaendert = np.zeros(int(vorhanden.sum()), dtype=bool)
+        for col, neu in eingabe.items():
+            geaendert |= ~_gleich(neu[vorhanden], self._eingabe[col][pos_vorhanden])
+
+        rein = np.concatenate([np.flatnonzero(vorhanden)[geaendert], np.flatnonzero(~vorhanden)])
+        entfernt = np.setdiff1d(np.arange(len(self._index)), pos_vorhanden, assume_unique=True)
+        raus = np.concatenate([pos_vorhanden[geaendert], entfernt])
+
+        if len(rein) > self.voll_ab_anteil * max(n, 1):
+            self._voll(df, eingabe, params)
+            return
+
+        if len(raus) or len(rein):
+            # alter Beitrag raus (Positionen im alten Stand)
+            self._anwenden(raus, -1.0)
+
+            # Kennwerte in die neue Zeilenordnung übernehmen, geänderte Zeilen neu rechnen
+            neue_werte = raum_kennwerte({col: werte[rein] for col, werte in eingabe.items()}, *params)
+            werte = {}
+            for col, alt in self._werte.items():
+                spalte = alt[pos_alt] if len(alt) else np.empty(n, dtype=alt.dtype)
+                spalte[rein] = neue_werte[col]
+                werte[col] = spalte
+            self._werte = werte
+            self._typ = eingabe["Wohnungstyp"] if "Wohnungstyp" in eingabe else np.full(n, "A", dtype=object)
+
+            # neuer Beitrag rein (Positionen im neuen Stand)
+            self._anwenden(rein, +1.0)
+
+        if n == 0:
+            self._summen[:] = 0.0
+        self.letzte_aenderung = {"voll": False, "neu_berechnet": len(rein), "entfernt": len(entfernt), "zeilen": n}
+
+    def _anwenden(self, pos, vorzeichen):
+        if len(pos) == 0:
+            return
+
+        # leere Zellen (NaN) fallen wie bei groupby/sum der Vollberechnung heraus,
+        # sonst blieben sie dauerhaft in den laufenden Summen
+        q_raum = self._werte["Q_Raum (W)"][pos]
+        anzahl = self._werte["Anzahl WE Typ"][pos]
+        t_mid = self._werte["T_mittel (°C)"][pos]
+        q_geb = np.nan_to_num(q_raum * anzahl)
+        q_raum = np.nan_to_num(q_raum)
+
+        # Gebäudesummen (Gewichtung wie gewichtete_systemtemperatur / kritischer_anteil)
+        gewicht = np.where(~np.isnan(t_mid) & (q_geb > 0), q_geb, 0.0)
+        krit = np.isin(self._werte["WP-Eignung"][pos], KRITISCHE_EIGNUNG)
+        self._summen[_Q_GEB] += vorzeichen * q_geb.sum()
+        self._summen[_Q_KRIT] += vorzeichen * q_geb[krit].sum()
+        self._summen[_TQ] += vorzeichen * (np.where(gewicht > 0, t_mid, 0.0) * gewicht).sum()
+        self._summen[_Q_GEWICHT] += vorzeichen * gewicht.sum()
+
+        # Wohnungstypen: Summe Q_Raum, Häufigkeiten von „Anzahl WE Typ“ (für das Maximum) und Zeilenzahl
+        codes, typen = pd.factorize(self._typ[pos])
+        for code, typ in enumerate(typen):
+            auswahl = codes == code
+            eintrag = self._typen.setdefault(typ, [0.0, Counter(), 0])
+            eintrag[0] += vorzeichen * q_raum[auswahl].sum()
+            werte, haeufigkeit = np.unique(anzahl[auswahl & ~pd.isna(anzahl)], return_counts=True)
+            eintrag[1].update({w: int(vorzeichen) * int(h) for w, h in zip(werte, haeufigkeit)})
+            eintrag[1] += Counter()
+            eintrag[2] += int(vorzeichen) * int(auswahl.sum())
+            if eintrag[2] == 0:
+                del self._typen[typ]
+
+    def _ergebnis(self, result, analysis_level, wp_typ, wp_power_kw, heizwaermebedarf):
+        with stufe("Aggregation Wohnungstypen/Gebäude"):
+            typen = list(self._typen.items())
+            type_group = pd.DataFrame({
+                "Wohnungstyp": [typ for typ, _ in typen],
+                "Q_WE_W": np.array([eintrag[0] for _, eintrag in typen], dtype=float),
+                "Anzahl_WE": np.array([max(eintrag[1]) if eintrag[1] else np.nan for _, eintrag in typen], dtype=float),
+            })
+            if len(type_group):
+                type_group = type_group.sort_values("Wohnungstyp", kind="stable").reset_index(drop=True)
+            if result["Anzahl WE Typ"].dtype.kind in "iu":
+                type_group["Anzahl_WE"] = type_group["Anzahl_WE"].astype(result["Anzahl WE Typ"].dtype)
+            type_group["Q_WE_kW"] = type_group["Q_WE_W"] / 1000.0
+            type_group["Q_Typ_geb_W"] = type_group["Q_WE_W"] * type_group["Anzahl_WE"]
+            type_group["Q_Typ_geb_kW"] = type_group["Q_Typ_geb_W"] / 1000.0
+
+            total_heating_load_building = type_group["Q_Typ_geb_W"].sum()
+            heizlast_kw_building = total_heating_load_building / 1000.0 if total_heating_load_building > 0 else 0.0
+
+            q_geb, q_krit, tq, q_gewicht = self._summen
+            weighted_avg_T = tq / q_gewicht if q_gewicht > 0 else np.nan
+            critical_share = max(q_krit, 0.0) / q_geb * 100.0 if q_geb > 0 else 0.0
+
+        wp_info = None
+        if analysis_level.startswith("Q³"):
+            with stufe("WP-Abgleich"):
+                wp_info = wp_abgleich(
+                    heizlast_kw_building, weighted_avg_T, critical_share, wp_typ, wp_power_kw, heizwaermebedarf
+                )
+
+        return GebaeudeErgebnis(
+            result=result,
+            type_group=type_group,
+            total_heating_load_building=total_heating_load_building,
+            heizlast_kw_building=heizlast_kw_building,
+            weighted_avg_T=weighted_avg_T,
+            critical_share=critical_share,
+            wp_info=wp_info,
+        )
@@ -0,0 +1,334 @@
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .austausch import _lese_csv_text, _lese_text
+from .simulation import heizkurve, synthetisches_referenzjahr
+
+# ---------------------------------------------------------
+# Wärmepumpen-Katalog: Leistungs- und COP-Kennfelder über
+# Außentemperatur × Vorlauftemperatur, Bewertung aller Modelle für alle
+# Gebäude in einem Array-Durchlauf (Modelle × Gebäude × Temperaturklassen)
+#
+# CSV/JSON im Langformat, eine Zeile je Kennfeldpunkt:
+#   Modell; Typ; T_aussen (°C); T_VL (°C); Leistung (kW); COP
+# JSON alternativ je Modell als Raster:
+#   {"Modell": ..., "Typ": ..., "T_aussen": [...], "T_VL": [...],
+#    "Leistung": [[...]], "COP": [[...]]}   (Zeilen = T_aussen, Spalten = T_VL)
+# ---------------------------------------------------------
+KATALOG_SPALTEN = ["Modell", "T_aussen (°C)", "T_VL (°C)", "Leistung (kW)", "COP"]
+
+# Elemente je Rechenblock (Modelle × Gebäude × Temperaturklassen)
+BLOCK_ELEMENTE = 2_000_000
+
+
+def _stuetzstellen(achse, werte):
+    # Index der linken Stützstelle und Gewicht, außerhalb der Achse Randwert
+    # (unterhalb des Messbereichs eines Modells blendet WPKatalog die Werte aus)
+    werte = np.clip(werte, achse[0], achse[-1])
+    if len(achse) == 1:
+        return np.zeros(np.shape(werte), dtype=int), np.zeros(np.shape(werte))
+    i = np.clip(np.searchsorted(achse, werte, side="right") - 1, 0, len(achse) - 2)
+    return i, (werte - achse[i]) / (achse[i + 1] - achse[i])
+
+
+def _bilinear(feld, achse_a, achse_vl, T_a, T_vl):
+    # feld: (..., len(achse_a), len(achse_vl)) → (..., *Form der Abfragepunkte)
+    i, wa = _stuetzstellen(achse_a, T_a)
+    j, wv = _stuetzstellen(achse_vl, T_vl)
+    i1 = np.minimum(i + 1, len(achse_a) - 1)
+    j1 = np.minimum(j + 1, len(achse_vl) - 1)
+    return (
+        feld[..., i, j] * (1 - wa) * (1 - wv)
+        + feld[..., i1, j] * wa * (1 - wv)
+        + feld[..., i, j1] * (1 - wa) * wv
+        + feld[..., i1, j1] * wa * wv
+    )
+
+
+class WPKatalog:
+    # alle Modelle auf gemeinsamen Achsen; oberhalb der höchsten Vorlauftemperatur
+    # eines Modells ist seine Leistung 0 (Temperatur nicht erreichbar), unterhalb
+    # seiner tiefsten gemessenen Außentemperatur sind Leistung und COP unbekannt (NaN)
+
+    def __init__(self, modelle, achse_a, achse_vl, leistung, cop, T_vl_max, T_a_min=None):
+        self.achse_a = np.asarray(achse_a, dtype=float)
+        self.achse_vl = np.asarray(achse_vl, dtype=float)
+        self.leistung = np.asarray(leistung, dtype=float)
+        self.cop = np.asarray(cop, dtype=float)
+        self.T_vl_max = np.asarray(T_vl_max, dtype=float)
+        if T_a_min is None:
+            T_a_min = np.full(len(modelle), self.achse_a[0])
+        self.T_a_min = np.asarray(T_a_min, dtype=float)
+        self.modelle = modelle.reset_index(drop=True).assign(**{"Kennfeld ab T_aussen (°C)": self.T_a_min})
+
+    def __len__(self):
+        return len(self.modelle)
+
+    @classmethod
+    def aus_tabelle(cls, df):
+        fehlend = [c for c in KATALOG_SPALTEN if c not in df.columns]
+        if fehlend:
+            raise ValueError(f"WP-Katalog: Spalten fehlen: {', '.join(fehlend)}")
+        df = df.copy()
+        if "Typ" not in df.columns:
+            df["Typ"] = ""
+        for col in KATALOG_SPALTEN[1:]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df = df.dropna(subset=KATALOG_SPALTEN)
+        if df.empty:
+            raise ValueError("WP-Katalog enthält keine gültigen Kennfeldpunkte.")
+
+        modell_code, namen = pd.factorize(df["Modell"])
+        achse_a, code_a = np.unique(df["T_aussen (°C)"].to_numpy(), return_inverse=True)
+        achse_vl, code_vl = np.unique(df["T_VL (°C)"].to_numpy(), return_inverse=True)
+        modelle = pd.DataFrame({"Modell": namen, "Typ": df.groupby(modell_code)["Typ"].first().to_numpy()})
+
+        # Kennfeldpunkte in ein Raster (Modell × T_aussen × T_VL) einsortieren
+        form = (len(namen), len(achse_a), len(achse_vl))
+        leistung = np.full(form, np.nan)
+        cop = np.full(form, np.nan)
+        leistung[modell_code, code_a, code_vl] = df["Leistung (kW)"].to_numpy()
+        cop[modell_code, code_a, code_vl] = df["COP"].to_numpy()
+        T_vl_max = np.empty(len(namen))
+        T_a_min = np.empty(len(namen))
+
+        # Modelle mit eigenem (gröberem) Raster auf die gemeinsamen Achsen übertragen
+        gitter_a, gitter_vl = np.meshgrid(achse_a, achse_vl, indexing="ij")
+        for m in range(len(namen)):
+            belegt = ~np.isnan(leistung[m]) & ~np.isnan(cop[m])
+            zeilen = np.flatnonzero(belegt.any(axis=1))
+            spalten = np.flatnonzero(belegt.any(axis=0))
+            T_vl_max[m] = achse_vl[spalten[-1]]
+            T_a_min[m] = achse_a[zeilen[0]]
+            if belegt.all():
+                continue
+            raster = np.ix_(zeilen, spalten)
+            if not belegt[raster].all():
+                raise ValueError(f"WP-Katalog: Kennfeld von „{namen[m]}“ ist unvollständig.")
+            a, vl = achse_a[zeilen], achse_vl[spalten]
+            leistung[m] = _bilinear(leistung[m][raster], a, vl, gitter_a, gitter_vl)
+            cop[m] = _bilinear(cop[m][raster], a, vl, gitter_a, gitter_vl)
+
+        return cls(modelle, achse_a, achse_vl, leistung, cop, T_vl_max, T_a_min)
+
+    def _gemessen(self, T_a, ndim):
+        # True, wo T_a im Messbereich des Modells liegt: Form (Modelle, *Form von T_a)
+        return np.asarray(T_a)[None] >= self.T_a_min.reshape((-1,) + (1,) * ndim)
+
+    def interpoliere(self, T_a, T_vl):
+        # Leistung (kW) und COP aller Modelle: Form (Modelle, *Form der Abfragepunkte)
+        T_a, T_vl = np.broadcast_arrays(np.asarray(T_a, dtype=float), np.asarray(T_vl, dtype=float))
+        leistung = _bilinear(self.leistung, self.achse_a, self.achse_vl, T_a, T_vl)
+        cop = _bilinear(self.cop, self.achse_a, self.achse_vl, T_a, T_vl)
+        erreichbar = T_vl[None] <= self.T_vl_max.reshape((-1,) + (1,) * T_vl.ndim)
+        gemessen = self._gemessen(T_a, T_a.ndim)
+        return np.where(gemessen, np.where(erreichbar, leistung, 0.0), np.nan), np.where(gemessen, cop, np.nan)
+
+    def bei_aussentemperatur(self, T_a):
+        # Kennfelder an festen Außentemperaturen: (Modelle, len(T_a), len(achse_vl))
+        T_a = np.asarray(T_a, dtype=float)
+        i, wa = _stuetzstellen(self.achse_a, T_a)
+        i1 = np.minimum(i + 1, len(self.achse_a) - 1)
+        wa = wa[:, None]
+        gemessen = self._gemessen(T_a, 1)[..., None]
+        return tuple(
+            np.where(gemessen, feld[:, i] * (1 - wa) + feld[:, i1] * wa, np.nan) for feld in (self.leistung, self.cop)
+        )
+
+    def interpoliere_klassen(self, klassen, T_vl):
+        # T_vl: (..., Anzahl Klassen) → Leistung und COP (Modelle, ..., Anzahl Klassen)
+        leistung_k, cop_k = klassen
+        k = np.arange(T_vl.shape[-1])
+        j, wv = _stuetzstellen(self.achse_vl, T_vl)
+        j1 = np.minimum(j + 1, len(self.achse_vl) - 1)
+        leistung = leistung_k[:, k, j] * (1 - wv) + leistung_k[:, k, j1] * wv
+        cop = cop_k[:, k, j] * (1 - wv) + cop_k[:, k, j1] * wv
+        erreichbar = T_vl[None] <= self.T_vl_max.reshape((-1,) + (1,) * T_vl.ndim)
+        return np.where(erreichbar | np.isnan(leistung), leistung, 0.0), cop
+
+
+def _raster_zu_tabelle(eintrag):
+    leistung = np.asarray(eintrag["Leistung"], dtype=float)
+    cop = np.asarray(eintrag["COP"], dtype=float)
+    a, vl = np.meshgrid(eintrag["T_aussen"], eintrag["T_VL"], indexing="ij")
+    return pd.DataFrame({
+        "Modell": eintrag["Modell"],
+        "Typ": eintrag.get("Typ", ""),
+        "T_aussen (°C)": a.ravel(),
+        "T_VL (°C)": vl.ravel(),
+        "Leistung (kW)": leistung.ravel(),
+        "COP": cop.ravel(),
+    })
+
+
+def lese_katalog(datei, name=None):
+    # datei: Pfad oder Dateiobjekt (z. B. Upload); Format nach Endung
+    name = name or getattr(datei, "name", None) or str(datei)
+    if name.lower().endswith(".json"):
+        daten = json.loads(_lese_text(datei))
+        if isinstance(daten, dict):
+            daten = daten.get("modelle", [daten])
+        if daten and "Leistung" in daten[0]:
+            df = pd.concat([_raster_zu_tabelle(e) for e in daten], ignore_index=True)
+        else:
+            df = pd.DataFrame(daten)
+    else:
+        df = _lese_csv_text(datei)
+    return WPKatalog.aus_tabelle(df)
+
+
+# ---------------------------------------------------------
+# Bewertung: Deckungsgrad, Bivalenzpunkt, SCOP (Bin-Verfahren)
+# ---------------------------------------------------------
+@dataclass
+class KatalogBewertung:
+    # je Modell × Gebäude (2-D-Arrays)
+    modelle: pd.DataFrame
+    leistung_ausl: np.ndarray
+    cop_ausl: np.ndarray
+    deckungsgrad: np.ndarray
+    bivalenzpunkt: np.ndarray
+    scop: np.ndarray
+    backup_anteil: np.ndarray
+    # Heizstunden unterhalb des gemessenen Kennfelds (dort zählt die Wärme als Backup)
+    stunden_unter_kennfeld: np.ndarray
+    # True, wenn kein Testreferenzjahr vorlag (SCOP aus synthetischem Jahresgang)
+    synthetisches_jahr: bool = False
+
+
+def temperaturklassen(T_aussen, T_out_norm, heizgrenze=15.0):
+    # 1-K-Klassen von der Normtemperatur bis zur Heizgrenze, Stunden je Klasse
+    T_aussen = np.asarray(T_aussen, dtype=float)
+    unten = np.floor(min(T_out_norm, T_aussen.min()))
+    mitten = np.arange(unten, heizgrenze) + 0.5
+    stunden, _ = np.histogram(T_aussen, bins=np.append(mitten - 0.5, heizgrenze))
+    return mitten, stunden.astype(float)
+
+
+def bewerte_katalog(
+    katalog,
+    H_geb,
+    T_i_geb,
+    T_vl_ausl,
+    T_out_norm,
+    safety_factor=0.0,
+    T_aussen=None,
+    heizgrenze=15.0,
+):
+    H_geb, T_i_geb, T_vl_ausl = (
+        np.atleast_1d(np.asarray(x, dtype=float)) for x in np.broadcast_arrays(H_geb, T_i_geb, T_vl_ausl)
+    )
+    synthetisches_jahr = T_aussen is None
+    if synthetisches_jahr:
+        T_aussen = synthetisches_referenzjahr(T_min=T_out_norm)
+    mitten, stunden = temperaturklassen(T_aussen, T_out_norm, heizgrenze)
+    n_mod, n_geb, n_kl = len(katalog), len(H_geb), len(mitten)
+
+    # Auslegungspunkt: Leistung bei Tₑ und Auslegungs-Vorlauftemperatur
+    leistung_ausl, cop_ausl = katalog.interpoliere(T_out_norm, T_vl_ausl)
+    last_ausl = H_geb * (T_i_geb - T_out_norm) * (1.0 + safety_factor) / 1000.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deckungsgrad = np.where(last_ausl > 0, leistung_ausl / last_ausl * 100.0, np.nan)
+
+    bivalenzpunkt = np.full((n_mod, n_geb), np.nan)
+    waerme_wp = np.zeros((n_mod, n_geb))
+    strom_wp = np.zeros((n_mod, n_geb))
+    unter_kennfeld = np.zeros((n_mod, n_geb))
+    bedarf = np.zeros(n_geb)
+    # Außentemperaturen sind für alle Gebäude gleich: diese Achse einmal vorab interpolieren
+    klassen = katalog.bei_aussentemperatur(mitten)
+    block = max(1, BLOCK_ELEMENTE // max(n_mod * n_kl, 1))
+    for start in range(0, n_geb, block):
+        b = slice(start, start + block)
+        last = np.clip(H_geb[b, None] * (T_i_geb[b, None] - mitten) / 1000.0, 0.0, None)
+        T_vl = heizkurve(mitten, T_i_geb[b, None], T_vl_ausl[b, None], T_out_norm)
+        leistung, cop = katalog.interpoliere_klassen(klassen, T_vl)
+        # unterhalb des Messbereichs keine Extrapolation: WP-Anteil dort 0, Stunden ausweisen
+        ausserhalb = np.isnan(leistung)
+        leistung = np.where(ausserhalb, 0.0, leistung)
+        unter_kennfeld[:, b] = (ausserhalb & (last > 0)) @ stunden
+
+        gedeckt = np.minimum(last, leistung)
+        waerme_wp[:, b] = (gedeckt * stunden).sum(axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            strom_wp[:, b] = np.where(gedeckt > 0, gedeckt / cop, 0.0) @ stunden
+        bedarf[b] = last @ stunden
+
+        # Bivalenzpunkt: Nullstelle von Leistung − Last oberhalb der letzten Unterdeckung
+        differenz = leistung - last
+        unter = differenz < 0
+        hat_unter = unter.any(axis=2)
+        k = n_kl - 1 - np.argmax(unter[..., ::-1], axis=2)
+        k1 = np.minimum(k + 1, n_kl - 1)
+        d0 = np.take_along_axis(differenz, k[..., None], axis=2)[..., 0]
+        d1 = np.take_along_axis(differenz, k1[..., None], axis=2)[..., 0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            anteil = np.where((k1 > k) & (d1 != d0), -d0 / (d1 - d0), 0.0)
+        bivalenzpunkt[:, b] = np.where(hat_unter, mitten[k] + anteil * (mitten[k1] - mitten[k]), np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scop = np.where(strom_wp > 0, waerme_wp / strom_wp, np.nan)
+        backup_anteil = np.where(bedarf > 0, (1.0 - waerme_wp / bedarf) * 100.0, 0.0)
+
+    return KatalogBewertung(
+        modelle=katalog.modelle,
+        leistung_ausl=leistung_ausl,
+        cop_ausl=cop_ausl,
+        deckungsgrad=deckungsgrad,
+        bivalenzpunkt=bivalenzpunkt,
+        scop=scop,
+        backup_anteil=np.clip(backup_anteil, 0.0, 100.0),
+        stunden_unter_kennfeld=unter_kennfeld,
+        synthetisches_jahr=synthetisches_jahr,
+    )
+
+
+def bewerte_modell(katalog, modell, T_out_norm, default_T_set, safety_factor=0.0, T_vl_standard=55.0, **kwargs):
+    # Katalogbewertung direkt aus einem LinearesModell (ein oder viele Gebäude)
+    H_geb, T_i_geb = modell.kennlinie(default_T_set)
+    T_vl_ausl = modell.gewichtetes_mittel(modell.t_vl, T_out_norm, default_T_set)
+    T_vl_ausl = np.where(np.isnan(T_vl_ausl), T_vl_standard, T_vl_ausl)
+    T_i_geb = np.where(np.isnan(T_i_geb), default_T_set, T_i_geb)
+    return bewerte_katalog(katalog, H_geb, T_i_geb, T_vl_ausl, T_out_norm, safety_factor, **kwargs)
+
+
+def rangliste(bewertung, gebaeude=0, mindestdeckung=100.0):
+    # Modelle für ein Gebäude: erst ausreichende Deckung, dann Kennfeld über das ganze
+    # Jahr gemessen, dann SCOP, dann kleinste Leistung
+    tabelle = bewertung.modelle.copy()
+    tabelle["Leistung bei Tₑ (kW)"] = bewertung.leistung_ausl[:, gebaeude]
+    tabelle["COP bei Tₑ"] = bewertung.cop_ausl[:, gebaeude]
+    tabelle["Deckungsgrad (%)"] = bewertung.deckungsgrad[:, gebaeude]
+    tabelle["Bivalenzpunkt (°C)"] = bewertung.bivalenzpunkt[:, gebaeude]
+    tabelle["SCOP (geschätzt)"] = bewertung.scop[:, gebaeude]
+    tabelle["Backup-Anteil (%)"] = bewertung.backup_anteil[:, gebaeude]
+    tabelle["Stunden unter Kennfeld (h)"] = bewertung.stunden_unter_kennfeld[:, gebaeude]
+    tabelle["Deckung erfüllt"] = tabelle["Deckungsgrad (%)"] >= mindestdeckung
+    tabelle["außerhalb Kennfeld"] = tabelle["Stunden unter Kennfeld (h)"] > 0
+    return tabelle.sort_values(
+        ["Deckung erfüllt", "außerhalb Kennfeld", "SCOP (geschätzt)", "Leistung bei Tₑ (kW)"],
+        ascending=[False, True, False, True],
+        na_position="last",
+        kind="stable",
+    ).reset_index(drop=True)
+
+
+def beste_modelle(bewertung, mindestdeckung=100.0):
+    # je Gebäude das Modell mit dem höchsten SCOP unter den ausreichend großen,
+    # Modelle mit Stunden unterhalb ihres Kennfelds nur, wenn kein anderes passt
+    erfuellt = bewertung.deckungsgrad >= mindestdeckung
+    scop = np.where(erfuellt & ~np.isnan(bewertung.scop), bewertung.scop, -np.inf)
+    gemessen = np.where(bewertung.stunden_unter_kennfeld == 0, scop, -np.inf)
+    index = np.where(np.isfinite(gemessen).any(axis=0), np.argmax(gemessen, axis=0), np.argmax(scop, axis=0))
+    spalten = np.arange(scop.shape[1])
+    gefunden = np.isfinite(scop[index, spalten])
+    return pd.DataFrame({
+        "Modell": np.where(gefunden, bewertung.modelle["Modell"].to_numpy()[index], None),
+        "Deckungsgrad (%)": np.where(gefunden, bewertung.deckungsgrad[index, spalten], np.nan),
+        "Bivalenzpunkt (°C)": np.where(gefunden, bewertung.bivalenzpunkt[index, spalten], np.nan),
+        "SCOP (geschätzt)": np.where(gefunden, bewertung.scop[index, spalten], np.nan),
+        "Stunden unter Kennfeld (h)": np.where(gefunden, bewertung.stunden_unter_kennfeld[index, spalten], np.nan),
+    })
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------
+# Heizflächentyp-Parameter (Dropdown-Logik)
+# ---------------------------------------------------------
+# n: Heizkörperexponent (Leistung ~ ΔT_log^n)
+HEATING_TYPE_PARAMS = {
+    "Fußbodenheizung": {"T_VL": 35.0, "T_RL": 28.0, "n": 1.1},
+    "Wand-/Deckenheizung": {"T_VL": 38.0, "T_RL": 30.0, "n": 1.1},
+    "Niedertemperatur-Heizkörper": {"T_VL": 45.0, "T_RL": 38.0, "n": 1.3},
+    "Standard-Heizkörper": {"T_VL": 60.0, "T_RL": 50.0, "n": 1.3},
+    "Altbau-Radiator": {"T_VL": 70.0, "T_RL": 60.0, "n": 1.3},
+}
+
+TOP_TYPE_OPTIONS = [
+    "Dach gegen Außenluft",
+    "Decke gegen beheizten Raum",
+    "Decke gegen unbeheizten Raum / Speicher",
+]
+
+ANALYSIS_LEVELS = [
+    "Q¹ – Basis Heizlast (DIN-ähnlich)",
+    "Q² – inkl. Heizflächentyp & Systemtemperaturen",
+    "Q³ – inkl. Wärmepumpen-Abgleich",
+]
+
+WP_TYPES = ["Luft/Wasser", "Sole/Wasser", "Kein WP / andere Erzeuger"]
+KEIN_WP = "Kein WP / andere Erzeuger"
+
+# WP-Eignungsklassen (Reihenfolge = Codes in klassifiziere_eignung_array)
+EIGNUNGSKLASSEN = ["sehr gut", "gut", "bedingt", "kritisch", "unbekannt"]
+
+# WP-Eignungsklassen, deren Heizlast als „bedingt/kritisch“ zählt
+KRITISCHE_EIGNUNG = ["bedingt", "kritisch"]
+
+# ---------------------------------------------------------
+# Gebäudetyp-Profile und Klimaparameter
+# ---------------------------------------------------------
+# Empfohlene klimatische Basisparameter je Gebäudetyp (für Komfort-Buttons)
+RECOMMENDED_PARAMS = {
+    "Neubau (Effizienzhaus)": {"T_out": -12.0, "T_in": 21.0, "safety_pct": 5.0},
+    "Bestand saniert": {"T_out": -12.0, "T_in": 20.0, "safety_pct": 10.0},
+    "Altbau unsaniert": {"T_out": -14.0, "T_in": 21.0, "safety_pct": 15.0},
+}
+
+# Beispiel-Norm-Außentemperaturen nach Klimaregion (vereinfachte Tabelle)
+CLIMATE_ZONES = [
+    {"Region": "Norddeutschland (Küste)", "Norm-Außentemperatur (°C)": -10},
+    {"Region": "Mitteldeutschland / NRW / Hessen", "Norm-Außentemperatur (°C)": -12},
+    {"Region": "Süddeutschland / Bayern / BaWü", "Norm-Außentemperatur (°C)": -14},
+    {"Region": "Mittelgebirge / Alpenvorland", "Norm-Außentemperatur (°C)": -16},
+]
+
+# Gebäudetyp-Profile mit typischen U-Werten
+BUILDING_PROFILES = {
+    "Neubau (Effizienzhaus)": {
+        "U_wand": 0.20,
+        "U_top": 0.14,
+        "U_boden": 0.25,
+        "U_fenster": 0.90,
+    },
+    "Bestand saniert": {
+        "U_wand": 0.35,
+        "U_top": 0.25,
+        "U_boden": 0.40,
+        "U_fenster": 1.30,
+    },
+    "Altbau unsaniert": {
+        "U_wand": 1.20,
+        "U_top": 0.80,
+        "U_boden": 0.80,
+        "U_fenster": 2.70,
+    },
+}
+
+# Zuordnung Tabellenspalte -> Schlüssel im U-Wert-Profil
+U_PROFILE_COLUMNS = [
+    ("U Wand (W/m²K)", "U_wand"),
+    ("U oberer Abschluss (W/m²K)", "U_top"),
+    ("U Boden (W/m²K)", "U_boden"),
+    ("U Fenster (W/m²K)", "U_fenster"),
+]
+
+
+# ---------------------------------------------------------
+# Beispiel-Raumtabelle (MFH mit Wohnungstypen A/B)
+# ---------------------------------------------------------
+def beispiel_raumtabelle(profil="Bestand saniert"):
+    building_default = BUILDING_PROFILES[profil]
+
+    return pd.DataFrame(
+        [
+            {
+                "Wohnungstyp": "A",
+                "Anzahl WE Typ": 6,
+                "Raum": "Wohnen/Essen",
+                "Fläche (m²)": 25.0,
+                "Raumhöhe (m)": 2.6,
+                "Tᵢ (°C)": 21.0,
+                "A Wand (m²)": 18.0,
+                "U Wand (W/m²K)": building_default["U_wand"],
+                "A oberer Abschluss (m²)": 0.0,
+                "U oberer Abschluss (W/m²K)": building_default["U_top"],
+                "Typ oberer Abschluss": "Decke gegen beheizten Raum",
+                "A Boden (m²)": 25.0,
+                "U Boden (W/m²K)": building_default["U_boden"],
+                "A Fenster (m²)": 5.0,
+                "U Fenster (W/m²K)": building_default["U_fenster"],
+                "Luftwechsel n (1/h)": 0.7,
+                "Heizflächentyp": "Standard-Heizkörper",
+                "T_VL (°C)": np.nan,
+                "T_RL (°C)": np.nan,
+                "Heizkörper-Normleistung 75/65/20 (W)": 2400.0,
+            },
+            {
+                "Wohnungstyp": "A",
+                "Anzahl WE Typ": 6,
+                "Raum": "Schlafen",
+                "Fläche (m²)": 14.0,
+                "Raumhöhe (m)": 2.6,
+                "Tᵢ (°C)": 18.0,
+                "A Wand (m²)": 12.0,
+                "U Wand (W/m²K)": building_default["U_wand"],
+                "A oberer Abschluss (m²)": 0.0,
+                "U oberer Abschluss (W/m²K)": building_default["U_top"],
+                "Typ oberer Abschluss": "Decke gegen beheizten Raum",
+                "A Boden (m²)": 14.0,
+                "U Boden (W/m²K)": building_default["U_boden"],
+                "A Fenster (m²)": 3.0,
+                "U Fenster (W/m²K)": building_default["U_fenster"],
+                "Luftwechsel n (1/h)": 0.7,
+                "Heizflächentyp": "Standard-Heizkörper",
+                "T_VL (°C)": np.nan,
+                "T_RL (°C)": np.nan,
+                "Heizkörper-Normleistung 75/65/20 (W)": 1400.0,
+            },
+            {
+                "Wohnungstyp": "B",
+                "Anzahl WE Typ": 2,
+                "Raum": "Wohnen/Essen (Staffel)",
+                "Fläche (m²)": 30.0,
+                "Raumhöhe (m)": 2.6,
+                "Tᵢ (°C)": 21.0,
+                "A Wand (m²)": 22.0,
+                "U Wand (W/m²K)": building_default["U_wand"],
+                "A oberer Abschluss (m²)": 30.0,
+                "U oberer Abschluss (W/m²K)": building_default["U_top"],
+                "Typ oberer Abschluss": "Dach gegen Außenluft",
+                "A Boden (m²)": 30.0,
+                "U Boden (W/m²K)": building_default["U_boden"],
+                "A Fenster (m²)": 6.0,
+                "U Fenster (W/m²K)": building_default["U_fenster"],
+                "Luftwechsel n (1/h)": 0.7,
+                "Heizflächentyp": "Standard-Heizkörper",
+                "T_VL (°C)": np.nan,
+                "T_RL (°C)": np.nan,
+                "Heizkörper-Normleistung 75/65/20 (W)": 2600.0,
+            },
+        ]
+    )
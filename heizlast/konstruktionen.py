@@ -0,0 +1,342 @@
+import numpy as np
+import pandas as pd
+
+from .berechnung import _zahlen, ergebnis_tabelle, raum_kennwerte
+from .diagnose import stufe
+from .konstanten import BUILDING_PROFILES, KRITISCHE_EIGNUNG, U_PROFILE_COLUMNS
+from .portfolio import GEBAEUDE_SPALTE, PortfolioErgebnis
+
+# ---------------------------------------------------------
+# Konstruktionskatalog: benannte Bauteile mit U-Wert, Räume verweisen per ID
+#
+#   ref, katalog = referenziere(df)                 # U-Spalten → „Konstruktion …“-Spalten
+#   rechner = KatalogBerechnung(ref, katalog, T_out=-12, default_T_set=20, safety_factor=0.1)
+#   rechner.aendere("Fenster U=1.3", 0.9)           # nur Räume mit diesem Fenster neu
+#   rechner.gebaeude()
+#
+# Der Rückindex (Konstruktion → Zeilen) macht eine Änderung proportional zur
+# Zahl der betroffenen Räume; Gebäude- und Typsummen werden fortgeschrieben
+# (alter Beitrag raus, neuer rein) wie in heizlast.inkrementell.
+# ---------------------------------------------------------
+KATALOG_SPALTEN = ["Bauteil", "Bezeichnung", "U (W/m²K)"]
+
+# Bauteil → (U-Spalte der Raumtabelle, Verweisspalte, Schlüssel in BUILDING_PROFILES)
+_PROFIL_SCHLUESSEL = dict(U_PROFILE_COLUMNS)
+BAUTEILE = {
+    bauteil: (u_spalte, verweis, _PROFIL_SCHLUESSEL[u_spalte])
+    for bauteil, u_spalte, verweis in (
+        ("Wand", "U Wand (W/m²K)", "Konstruktion Wand"),
+        ("Oberer Abschluss", "U oberer Abschluss (W/m²K)", "Konstruktion oberer Abschluss"),
+        ("Boden", "U Boden (W/m²K)", "Konstruktion Boden"),
+        ("Fenster", "U Fenster (W/m²K)", "Konstruktion Fenster"),
+    )
+}
+VERWEIS_SPALTEN = {u_spalte: verweis for u_spalte, verweis, _ in BAUTEILE.values()}
+
+
+def _kennung(katalog, bauteil, u):
+    # kurze ID; volle Genauigkeit nur, wenn die kurze schon vergeben ist
+    kennung = f"{bauteil} U={u:g}"
+    return kennung if kennung not in katalog else f"{bauteil} U={u!r}"
+
+
+def _wert_schluessel(bauteil, u):
+    return bauteil, round(float(u), 9)
+
+
+class Konstruktionskatalog:
+
+    def __init__(self, tabelle=None):
+        self._eintraege = {}
+        self._nach_wert = {}  # (Bauteil, U gerundet) → ID, für referenziere
+        if tabelle is not None:
+            for kennung, zeile in tabelle.iterrows():
+                self.hinzufuegen(kennung, zeile["Bauteil"], zeile["U (W/m²K)"], zeile.get("Bezeichnung"))
+
+    @classmethod
+    def aus_profilen(cls, profile=BUILDING_PROFILES):
+        # je Gebäudetyp-Profil und Bauteil eine Konstruktion, z. B. „Fenster · Bestand saniert“
+        katalog = cls()
+        for profil, werte in profile.items():
+            for bauteil, (_, _, schluessel) in BAUTEILE.items():
+                katalog.hinzufuegen(f"{bauteil} · {profil}", bauteil, werte[schluessel], f"{bauteil} ({profil})")
+        return katalog
+
+    def __len__(self):
+        return len(self._eintraege)
+
+    def __contains__(self, kennung):
+        return kennung in self._eintraege
+
+    def hinzufuegen(self, kennung, bauteil, u, bezeichnung=None):
+        if bauteil not in BAUTEILE:
+            raise ValueError(f"Unbekanntes Bauteil „{bauteil}“ (erwartet: {', '.join(BAUTEILE)}).")
+        if kennung in self._eintraege:
+            self._vergiss_wert(kennung)
+        self._eintraege[kennung] = {"Bauteil": bauteil, "Bezeichnung": bezeichnung or kennung, "U (W/m²K)": float(u)}
+        self._nach_wert.setdefault(_wert_schluessel(bauteil, u), kennung)
+        return kennung
+
+    def _vergiss_wert(self, kennung):
+        eintrag = self._eintraege[kennung]
+        schluessel = _wert_schluessel(eintrag["Bauteil"], eintrag["U (W/m²K)"])
+        if self._nach_wert.get(schluessel) == kennung:
+            del self._nach_wert[schluessel]
+
+    def bauteil(self, kennung):
+        return self._eintraege[kennung]["Bauteil"]
+
+    def u_wert(self, kennung):
+        return self._eintraege[kennung]["U (W/m²K)"]
+
+    def setze_u(self, kennung, u):
+        alt = self.u_wert(kennung)
+        self._vergiss_wert(kennung)
+        self._eintraege[kennung]["U (W/m²K)"] = float(u)
+        self._nach_wert.setdefault(_wert_schluessel(self.bauteil(kennung), u), kennung)
+        return alt
+
+    def suche(self, bauteil, u):
+        # vorhandene Konstruktion mit gleichem Bauteil und U-Wert
+        return self._nach_wert.get(_wert_schluessel(bauteil, u))
+
+    def u_werte(self, kennungen):
+        # U-Werte zu einem Array von IDs (unbekannt/leer → NaN)
+        u = pd.Series({k: e["U (W/m²K)"] for k, e in self._eintraege.items()}, dtype=float)
+        return u.reindex(pd.Index(kennungen)).to_numpy(dtype=float)
+
+    def als_tabelle(self):
+        return pd.DataFrame.from_dict(self._eintraege, orient="index", columns=KATALOG_SPALTEN).rename_axis("Konstruktion")
+
+    def kopie(self):
+        return Konstruktionskatalog(self.als_tabelle())
+
+
+# ---------------------------------------------------------
+# Raumtabelle ↔ Verweise
+# ---------------------------------------------------------
+def referenziere(df, katalog=None):
+    # U-Spalten durch Verweise auf den Katalog ersetzen (gleiche U-Werte → eine Konstruktion);
+    # liefert (Tabelle mit Verweisen als Categorical, Katalog)
+    katalog = katalog if katalog is not None else Konstruktionskatalog()
+    spalten = {}
+    for col in df.columns:
+        bauteil = next((b for b, (u_spalte, _, _) in BAUTEILE.items() if u_spalte == col), None)
+        if bauteil is None:
+            spalten[col] = df[col]
+            continue
+        codes, werte = pd.factorize(_zahlen(df[col]))
+        kennungen = [katalog.suche(bauteil, u) or katalog.hinzufuegen(_kennung(katalog, bauteil, u), bauteil, u) for u in werte]
+        # U-Werte, die erst nach der Rundung gleich sind, teilen sich eine Konstruktion
+        umschluesseln, kategorien = pd.factorize(np.asarray(kennungen, dtype=object))
+        codes = np.where(codes >= 0, np.append(umschluesseln, -1)[codes], -1)
+        spalten[VERWEIS_SPALTEN[col]] = pd.Categorical.from_codes(codes, categories=pd.Index(kategorien, dtype=object))
+    return pd.DataFrame(spalten, index=df.index), katalog
+
+
+def loese_auf(df, katalog, verweise_behalten=False):
+    # Verweise wieder durch U-Spalten ersetzen (an derselben Stelle)
+    spalten = {}
+    for col in df.columns:
+        bauteil = next((b for b, (_, verweis, _) in BAUTEILE.items() if verweis == col), None)
+        if bauteil is None:
+            spalten[col] = df[col]
+            continue
+        verweis = pd.Categorical(df[col])
+        u = np.append(katalog.u_werte(verweis.categories), np.nan)
+        spalten[BAUTEILE[bauteil][0]] = u[verweis.codes]
+        if verweise_behalten:
+            spalten[col] = df[col]
+    return pd.DataFrame(spalten, index=df.index)
+
+
+def rueckindex(df):
+    # Konstruktion → Zeilenpositionen (aufsteigend) über alle Verweisspalten
+    index = {}
+    for _, verweis_spalte, _ in BAUTEILE.values():
+        if verweis_spalte not in df.columns:
+            continue
+        verweis = pd.Categorical(df[verweis_spalte])
+        codes = verweis.codes
+        reihenfolge = np.argsort(codes, kind="stable")
+        grenzen = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(verweis.categories)))])
+        versatz = int((codes < 0).sum())  # leere Verweise stehen nach argsort vorn
+        for i, kennung in enumerate(verweis.categories):
+            if grenzen[i + 1] > grenzen[i]:
+                zeilen = reihenfolge[versatz + grenzen[i]: versatz + grenzen[i + 1]]
+                index[kennung] = np.union1d(index[kennung], zeilen) if kennung in index else zeilen
+    return index
+
+
+def verwendung(df, katalog):
+    # verwendete Konstruktionen mit Anzahl verweisender Räume
+    index = rueckindex(df)
+    tabelle = katalog.als_tabelle().loc[list(index)]
+    tabelle["Anzahl Räume"] = [len(zeilen) for zeilen in index.values()]
+    return tabelle
+
+
+def wende_profil_an(df, profil, katalog=None):
+    # alle Räume auf die Profil-Konstruktionen (z. B. „Fenster · Altbau unsaniert“) umstellen
+    katalog = katalog if katalog is not None else Konstruktionskatalog.aus_profilen()
+    ref, katalog = referenziere(df, katalog)
+    for bauteil, (_, verweis, _) in BAUTEILE.items():
+        if verweis in ref.columns:
+            ref[verweis] = pd.Categorical([f"{bauteil} · {profil}"] * len(ref))
+    return loese_auf(ref, katalog)
+
+
+# ---------------------------------------------------------
+# Gezielte Neuberechnung nach Änderung einer Konstruktion
+# ---------------------------------------------------------
+class KatalogBerechnung:
+
+    def __init__(self, df, katalog, T_out, default_T_set, safety_factor, building_col=GEBAEUDE_SPALTE):
+        # df: Raumtabelle mit Verweisen (referenziere) – einzelnes Gebäude oder Portfolio
+        self.katalog = katalog
+        self.building_col = building_col
+        self.params = (T_out, default_T_set, safety_factor)
+        self._df = df.reset_index(drop=True)
+        self._index = rueckindex(self._df)
+        self.letzte_aenderung = {}
+
+        with stufe("Katalog: Raumwerte (voll)", zeilen=len(self._df)):
+            aufgeloest = loese_auf(self._df, katalog)
+            self._eingabe = {col: aufgeloest[col].to_numpy(copy=True) for col in aufgeloest.columns}
+            # eigene Kopien: raum_kennwerte darf Eingabe-Arrays durchreichen
+            self._werte = {col: np.array(werte) for col, werte in raum_kennwerte(self._eingabe, *self.params).items()}
+
+        n = len(self._df)
+        gebaeude = self._df[building_col].to_numpy() if building_col in self._df.columns else np.zeros(n, dtype=int)
+        typ = self._df["Wohnungstyp"].to_numpy() if "Wohnungstyp" in self._df.columns else np.full(n, "A", dtype=object)
+        self._geb_codes, self._gebaeude = pd.factorize(gebaeude, sort=False)
+        gruppen = pd.DataFrame({"g": self._geb_codes, "t": typ}).groupby(["g", "t"], sort=False, dropna=True, observed=True)
+        self._typ_codes = gruppen.ngroup().to_numpy()
+        schluessel = gruppen.size().index
+        self._typ_gebaeude = schluessel.get_level_values(0).to_numpy()
+        self._typ_namen = schluessel.get_level_values(1).to_numpy()
+
+        anzahl = pd.Series(self._eingabe["Anzahl WE Typ"]) if "Anzahl WE Typ" in self._eingabe else pd.Series(np.ones(n))
+        self._anzahl = pd.to_numeric(anzahl, errors="coerce").fillna(1).to_numpy(dtype=float)
+        gueltig = self._typ_codes >= 0
+        self._anzahl_we = np.full(len(schluessel), -np.inf)
+        np.maximum.at(self._anzahl_we, self._typ_codes[gueltig], self._anzahl[gueltig])
+
+        # laufende Summen je Gebäude (Q_geb, Q_krit, T·Q, Q_Gewicht) und je Typ (Q je WE)
+        self._summen = np.zeros((4, len(self._gebaeude)))
+        self._q_we = np.zeros(len(schluessel))
+        self._anwenden(np.arange(n), +1.0)
+
+    def _beitraege(self, zeilen):
+        # leere Zellen (NaN) zählen wie bei groupby/sum nicht mit – sonst blieben sie in den laufenden Summen
+        q_raum = np.nan_to_num(self._werte["Q_Raum (W)"][zeilen])
+        q_geb = q_raum * self._anzahl[zeilen]
+        t_mid = self._werte["T_mittel (°C)"][zeilen]
+        gewicht = np.where(~np.isnan(t_mid) & (q_geb > 0), q_geb, 0.0)
+        krit = np.isin(self._werte["WP-Eignung"][zeilen], KRITISCHE_EIGNUNG)
+        return q_raum, np.stack([q_geb, np.where(krit, q_geb, 0.0), np.where(gewicht > 0, t_mid, 0.0) * gewicht, gewicht])
+
+    def _anwenden(self, zeilen, vorzeichen):
+        if not len(zeilen):
+            return
+        q_raum, beitraege = self._beitraege(zeilen)
+        g = self._geb_codes[zeilen]
+        for k in range(4):
+            self._summen[k] += vorzeichen * np.bincount(g, weights=beitraege[k], minlength=self._summen.shape[1])
+        t = self._typ_codes[zeilen]
+        gueltig = t >= 0
+        self._q_we += vorzeichen * np.bincount(t[gueltig], weights=q_raum[gueltig], minlength=len(self._q_we))
+
+    def betroffene_zeilen(self, kennung):
+        return self._index.get(kennung, np.empty(0, dtype=np.intp))
+
+    def aendere(self, kennung, u):
+        # neuer U-Wert einer Konstruktion; rechnet nur die verweisenden Räume neu
+        zeilen = self.betroffene_zeilen(kennung)
+        u_spalte = BAUTEILE[self.katalog.bauteil(kennung)][0]
+        self.katalog.setze_u(kennung, u)
+        self._neu_rechnen(zeilen, u_spalte, float(u))
+        self.letzte_aenderung = {"konstruktion": kennung, "neu_berechnet": len(zeilen), "zeilen": len(self._df)}
+        return zeilen
+
+    def _neu_rechnen(self, zeilen, u_spalte, u):
+        with stufe("Katalog: Raumwerte (gezielt)", zeilen=len(zeilen)):
+            self._anwenden(zeilen, -1.0)
+            self._eingabe[u_spalte][zeilen] = u
+            neu = raum_kennwerte({col: werte[zeilen] for col, werte in self._eingabe.items()}, *self.params)
+            for col, werte in neu.items():
+                self._werte[col][zeilen] = werte
+            self._anwenden(zeilen, +1.0)
+
+    def verweise(self, kennung, zeilen):
+        # Räume (Positionen) auf eine andere Konstruktion umhängen, z. B. Fenstertausch in einzelnen Wohnungen
+        zeilen = np.asarray(zeilen, dtype=np.intp)
+        bauteil = self.katalog.bauteil(kennung)
+        u_spalte, verweis_spalte, _ = BAUTEILE[bauteil]
+        alt = pd.Categorical(self._df[verweis_spalte])
+        if kennung not in alt.categories:
+            alt = alt.add_categories([kennung])
+        alte_kennungen = alt[zeilen].unique()
+        alt[zeilen] = kennung
+        self._df[verweis_spalte] = alt
+        for k in alte_kennungen.dropna():
+            rest = np.setdiff1d(self._index[k], zeilen, assume_unique=True)
+            if len(rest):
+                self._index[k] = rest
+            else:
+                del self._index[k]
+        self._index[kennung] = np.union1d(self._index.get(kennung, np.empty(0, dtype=np.intp)), zeilen)
+        self._neu_rechnen(zeilen, u_spalte, self.katalog.u_wert(kennung))
+        self.letzte_aenderung = {"konstruktion": kennung, "neu_berechnet": len(zeilen), "zeilen": len(self._df)}
+
+    # ---------- Ergebnisse (Spalten wie PortfolioErgebnis) ----------
+    def typen(self):
+        b = self.building_col
+        types = pd.DataFrame({
+            b: self._gebaeude[self._typ_gebaeude],
+            "Wohnungstyp": self._typ_namen,
+            "Q_WE_W": self._q_we,
+            "Anzahl_WE": self._anzahl_we,
+        })
+        types["Q_WE_kW"] = types["Q_WE_W"] / 1000.0
+        types["Q_Typ_geb_W"] = types["Q_WE_W"] * types["Anzahl_WE"]
+        types["Q_Typ_geb_kW"] = types["Q_Typ_geb_W"] / 1000.0
+        return types if b in self._df.columns else types.drop(columns=[b])
+
+    def gebaeude(self):
+        q_geb, q_krit, tq, q_gew = self._summen
+        n_geb = len(self._gebaeude)
+        q_gesamt = np.bincount(self._typ_gebaeude, weights=self._q_we * self._anzahl_we, minlength=n_geb)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weighted_avg_T = np.where(q_gew > 0, tq / q_gew, np.nan)
+            critical_share = np.where(q_geb > 0, q_krit / q_geb * 100.0, 0.0)
+        buildings = pd.DataFrame({
+            self.building_col: self._gebaeude,
+            "Anzahl Räume": np.bincount(self._geb_codes, minlength=n_geb),
+            "Anzahl Wohnungstypen": np.bincount(self._typ_gebaeude, minlength=n_geb),
+            "Heizlast Gebäude (W)": q_gesamt,
+            "Heizlast Gebäude (kW)": np.where(q_gesamt > 0, q_gesamt / 1000.0, 0.0),
+            "T_mittel gewichtet (°C)": weighted_avg_T,
+            "Anteil bedingt/kritisch (%)": critical_share,
+        })
+        return buildings if self.building_col in self._df.columns else buildings.drop(columns=[self.building_col])
+
+    def raeume(self, verweise_behalten=True):
+        rooms = ergebnis_tabelle(loese_auf(self._df, self.katalog, verweise_behalten), self._werte)
+        if "Wohnungstyp" not in rooms.columns:
+            rooms["Wohnungstyp"] = "A"
+        rooms["Q_Raum_geb (W)"] = rooms["Q_Raum (W)"] * rooms["Anzahl WE Typ"]
+        return rooms
+
+    def ergebnis(self):
+        return PortfolioErgebnis(rooms=self.raeume(), types=self.typen(), buildings=self.gebaeude())
+
+    def tabelle(self):
+        # aktuelle Raumtabelle mit Verweisen
+        return self._df.copy()
+
+    def konstruktionen(self):
+        # Katalog mit Anzahl verweisender Räume (Rückindex)
+        tabelle = self.katalog.als_tabelle()
+        tabelle["Anzahl Räume"] = [len(self._index.get(k, ())) for k in tabelle.index]
+        return tabelle
@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .berechnung import _zahlen, raum_kennwerte
+from .konstanten import KRITISCHE_EIGNUNG
+
+# ---------------------------------------------------------
+# Lineare Zerlegung der Heizlast für schnelle Variantenrechnung
+#
+#   Q_Raum = (UA gesamt + 0,33 · n · V) · (Tᵢ − Tₑ) · (1 + Zuschlag)
+#
+# H = UA gesamt + 0,33 · n · V (W/K) hängt nur von der Raumtabelle ab und wird
+# einmal vorberechnet. Neue Werte für Tₑ, Standard-Tᵢ und Zuschlag sind dann
+# nur noch ein Skalieren über alle Räume (auch für ganze Tₑ-Reihen auf einmal).
+# ---------------------------------------------------------
+UA_BAUTEILE = ["UA Wand (W/K)", "UA oberer Abschluss (W/K)", "UA Boden (W/K)", "UA Fenster (W/K)"]
+
+
+@dataclass
+class LinearesErgebnis:
+    # erste Achse: Parametersätze (Länge k), zweite Achse: Räume / Typen / Gebäude
+    q_raum: np.ndarray
+    q_we_typ: np.ndarray
+    q_typ_geb: np.ndarray
+    q_gebaeude: np.ndarray
+    weighted_avg_T: np.ndarray
+    critical_share: np.ndarray
+
+
+def _gruppen(codes):
+    # Sortierreihenfolge und Segmentgrenzen für np.add.reduceat
+    gueltig = np.flatnonzero(codes >= 0)
+    order = gueltig[np.argsort(codes[gueltig], kind="stable")]
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0]) if len(order) else np.array([], dtype=int)
+    return order, starts
+
+
+def _gruppensumme(werte, order, starts):
+    if len(starts) == 0:
+        return np.zeros((werte.shape[0], 0))
+    return np.add.reduceat(werte[:, order], starts, axis=1)
+
+
+class LinearesModell:
+
+    def __init__(self, df, building_col=None):
+        self.building_col = building_col
+        werte = raum_kennwerte(df, 0.0, 0.0, 0.0)
+        n = len(werte["Volumen (m³)"])
+
+        # Anteile von H je Bauteil und Lüftung (für Variantenrechnung je Bauteil)
+        self.ua_bauteile = {col: werte[col] for col in UA_BAUTEILE}
+        self.lueftung = 0.33 * _zahlen(df["Luftwechsel n (1/h)"]) * werte["Volumen (m³)"]
+        self.H = werte["UA gesamt (W/K)"] + self.lueftung
+        self.t_i = _zahlen(df["Tᵢ (°C)"])
+        self.ohne_t_i = np.isnan(self.t_i)
+        self.anzahl = werte["Anzahl WE Typ"]
+        self.t_mittel = werte["T_mittel (°C)"]
+        self.hat_t_mittel = ~np.isnan(self.t_mittel)
+        self.t_vl = werte.get("T_VL (°C)", np.full(n, np.nan))
+        self.krit = np.isin(werte["WP-Eignung"], KRITISCHE_EIGNUNG)
+
+        typ = df["Wohnungstyp"].to_numpy() if "Wohnungstyp" in df.columns else np.full(n, "A", dtype=object)
+        gebaeude = df[building_col].to_numpy() if building_col else np.zeros(n, dtype=int)
+        schluessel = pd.DataFrame({"Gebäude": gebaeude, "Wohnungstyp": typ})
+
+        # Wohnungstypen je Gebäude (sortiert wie groupby, ohne leeren Wohnungstyp)
+        gruppiert = schluessel.groupby(["Gebäude", "Wohnungstyp"], sort=True, dropna=True)
+        self.typ_code = gruppiert.ngroup().fillna(-1).to_numpy(dtype=int)
+        self.typen = gruppiert.size().reset_index()[["Gebäude", "Wohnungstyp"]]
+        self._typ_order, self._typ_starts = _gruppen(self.typ_code)
+        anzahl_max = np.full(len(self.typen), np.nan)
+        gueltig = self.typ_code >= 0
+        np.fmax.at(anzahl_max, self.typ_code[gueltig], self.anzahl[gueltig])
+        self.anzahl_typ = anzahl_max
+
+        # Gebäude
+        self.gebaeude_code, self.gebaeude = pd.factorize(gebaeude, sort=True)
+        self._geb_order, self._geb_starts = _gruppen(self.gebaeude_code)
+        typ_geb = pd.Index(self.gebaeude).get_indexer(self.typen["Gebäude"])
+        self._typgeb_order, self._typgeb_starts = _gruppen(typ_geb)
+        self._typgeb_codes = np.unique(typ_geb)
+
+    def __len__(self):
+        return len(self.H)
+
+    def auswerten(self, T_out, default_T_set, safety_factor):
+        # Parameter als Skalare oder 1-D-Reihen gleicher Länge (z. B. Tₑ-Sweep)
+        T_out, default_T_set, safety_factor = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(T_out, dtype=float)),
+            np.atleast_1d(np.asarray(default_T_set, dtype=float)),
+            np.atleast_1d(np.asarray(safety_factor, dtype=float)),
+        )
+        t_i = np.where(self.ohne_t_i, default_T_set[:, None], self.t_i)
+        q_raum = self.H * (t_i - T_out[:, None]) * (1.0 + safety_factor[:, None])
+
+        # Wohnungstyp: Summe je WE, mal Anzahl WE (Maximum je Typ);
+        # Räume mit leeren Zellen (NaN) zählen wie bei groupby/sum nicht mit
+        q_we_typ = _gruppensumme(np.nan_to_num(q_raum), self._typ_order, self._typ_starts)
+        q_typ_geb = q_we_typ * self.anzahl_typ
+        q_gebaeude = np.zeros((len(T_out), len(self.gebaeude)))
+        if q_typ_geb.shape[1]:
+            q_gebaeude[:, self._typgeb_codes] = _gruppensumme(np.nan_to_num(q_typ_geb), self._typgeb_order, self._typgeb_starts)
+
+        # Gewichtete Systemtemperatur und Anteil bedingt/kritisch je Gebäude
+        q_geb = np.nan_to_num(q_raum * self.anzahl)
+        gewicht = np.where(self.hat_t_mittel & (q_geb > 0), q_geb, 0.0)
+        tq = _gruppensumme(np.where(gewicht > 0, self.t_mittel, 0.0) * gewicht, self._geb_order, self._geb_starts)
+        q_gewicht = _gruppensumme(gewicht, self._geb_order, self._geb_starts)
+        q_summe = _gruppensumme(q_geb, self._geb_order, self._geb_starts)
+        q_krit = _gruppensumme(np.where(self.krit, q_geb, 0.0), self._geb_order, self._geb_starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weighted_avg_T = np.where(q_gewicht > 0, tq / q_gewicht, np.nan)
+            critical_share = np.where(q_summe > 0, q_krit / q_summe * 100.0, 0.0)
+
+        return LinearesErgebnis(
+            q_raum=q_raum,
+            q_we_typ=q_we_typ,
+            q_typ_geb=q_typ_geb,
+            q_gebaeude=q_gebaeude,
+            weighted_avg_T=weighted_avg_T,
+            critical_share=critical_share,
+        )
+
+    def kennlinie(self, default_T_set):
+        # je Gebäude: H_geb (W/K) und mittlere Innentemperatur, sodass
+        # Q_Gebäude(Tₑ) = H_geb · (Tᵢ_geb − Tₑ) ohne Zuschlag
+        erg = self.auswerten([0.0, 1.0], default_T_set, 0.0)
+        H_geb = erg.q_gebaeude[0] - erg.q_gebaeude[1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            T_i_geb = np.where(H_geb > 0, erg.q_gebaeude[0] / H_geb, np.nan)
+        return H_geb, T_i_geb
+
+    def gewichtetes_mittel(self, werte_raum, T_out, default_T_set):
+        # lastgewichteter Mittelwert einer Raumgröße je Gebäude (wie weighted_avg_T)
+        erg = self.auswerten(T_out, default_T_set, 0.0)
+        q_geb = erg.q_raum[0] * self.anzahl
+        gewicht = np.where(~np.isnan(werte_raum) & (q_geb > 0) & (self.gebaeude_code >= 0), q_geb, 0.0)
+        codes = np.maximum(self.gebaeude_code, 0)
+        summe = np.bincount(codes, weights=np.where(gewicht > 0, werte_raum, 0.0) * gewicht, minlength=len(self.gebaeude))
+        gewichte = np.bincount(codes, weights=gewicht, minlength=len(self.gebaeude))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(gewichte > 0, summe / gewichte, np.nan)
+
+    def typ_tabelle(self, T_out, default_T_set, safety_factor):
+        # Wohnungstyp-Tabelle wie aggregiere_wohnungstypen (für einen Parametersatz)
+        erg = self.auswerten(T_out, default_T_set, safety_factor)
+        type_group = self.typen.copy() if self.building_col else self.typen[["Wohnungstyp"]].copy()
+        type_group["Q_WE_W"] = erg.q_we_typ[0]
+        type_group["Anzahl_WE"] = self.anzahl_typ
+        type_group["Q_WE_kW"] = type_group["Q_WE_W"] / 1000.0
+        type_group["Q_Typ_geb_W"] = erg.q_typ_geb[0]
+        type_group["Q_Typ_geb_kW"] = type_group["Q_Typ_geb_W"] / 1000.0
+        return type_group
+
+
+def heizlast_je_aussentemperatur(modell, T_out_werte, default_T_set, safety_factor):
+    # Gebäudeheizlast (W) für eine ganze Reihe von Norm-Außentemperaturen auf einmal
+    erg = modell.auswerten(np.asarray(T_out_werte, dtype=float), default_T_set, safety_factor)
+    return erg.q_gebaeude.sum(axis=1)
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .berechnung import berechne_heizlast
+from .konstanten import KRITISCHE_EIGNUNG
+
+# Spalte, die in Portfolio-Tabellen (Langformat) das Gebäude kennzeichnet
+GEBAEUDE_SPALTE = "Gebäude-ID"
+
+
+# ---------------------------------------------------------
+# Portfolio-Berechnung: alle Gebäude in einem spaltenweisen Durchlauf
+# ---------------------------------------------------------
+@dataclass
+class PortfolioErgebnis:
+    rooms: pd.DataFrame
+    types: pd.DataFrame
+    buildings: pd.DataFrame
+
+
+def berechne_portfolio(df, T_out, default_T_set, safety_factor, building_col=GEBAEUDE_SPALTE, float32=False):
+    if building_col not in df.columns:
+        raise ValueError(f"Spalte „{building_col}“ fehlt in der Portfolio-Tabelle.")
+
+    # Raumwerte: berechne_heizlast arbeitet rein spaltenweise, daher einmal für alle Gebäude
+    rooms = berechne_heizlast(df, T_out, default_T_set, safety_factor, float32)
+    if "Wohnungstyp" not in rooms.columns:
+        rooms["Wohnungstyp"] = "A"
+
+    q_raum = rooms["Q_Raum (W)"].to_numpy(dtype=float)
+    anzahl = rooms["Anzahl WE Typ"].to_numpy(dtype=float)
+    t_mid = rooms["T_mittel (°C)"].to_numpy(dtype=float)
+    q_geb = q_raum * anzahl
+    rooms["Q_Raum_geb (W)"] = q_geb.astype(rooms["Q_Raum (W)"].dtype)
+
+    # Gewichte für die Systemtemperatur: nur Räume mit T_mittel und positiver Last
+    gewicht = np.where(~np.isnan(t_mid) & (q_geb > 0), q_geb, 0.0)
+    hilfs = pd.DataFrame({
+        building_col: rooms[building_col].to_numpy(),
+        "Wohnungstyp": rooms["Wohnungstyp"].to_numpy(),
+        "Q_WE_W": q_raum,
+        "Anzahl_WE": anzahl,
+        "Q_geb": q_geb,
+        "Q_krit": np.where(rooms["WP-Eignung"].isin(KRITISCHE_EIGNUNG).to_numpy(), q_geb, 0.0),
+        "TQ": np.where(gewicht > 0, t_mid, 0.0) * gewicht,
+        "Q_gewicht": gewicht,
+    })
+
+    # Ebene Wohnungstyp je Gebäude (Anzahl WE Typ wie im Einzelgebäude: Maximum je Typ)
+    types = hilfs.groupby([building_col, "Wohnungstyp"], sort=False, dropna=True).agg(
+        Q_WE_W=("Q_WE_W", "sum"),
+        Anzahl_WE=("Anzahl_WE", "max"),
+    ).reset_index()
+    types["Q_WE_kW"] = types["Q_WE_W"] / 1000.0
+    types["Q_Typ_geb_W"] = types["Q_WE_W"] * types["Anzahl_WE"]
+    types["Q_Typ_geb_kW"] = types["Q_Typ_geb_W"] / 1000.0
+
+    # Ebene Gebäude
+    raum_summen = hilfs.groupby(building_col, sort=False).agg(
+        Anzahl_Raeume=("Q_WE_W", "size"),
+        Q_geb=("Q_geb", "sum"),
+        Q_krit=("Q_krit", "sum"),
+        TQ=("TQ", "sum"),
+        Q_gewicht=("Q_gewicht", "sum"),
+    )
+    typ_summen = types.groupby(building_col, sort=False).agg(
+        Anzahl_Typen=("Wohnungstyp", "size"),
+        Q_Gebaeude_W=("Q_Typ_geb_W", "sum"),
+    )
+    summen = raum_summen.join(typ_summen, how="left")
+
+    q_gesamt = summen["Q_Gebaeude_W"].fillna(0.0).to_numpy()
+    q_geb_sum = summen["Q_geb"].to_numpy()
+    q_gew = summen["Q_gewicht"].to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weighted_avg_T = np.where(q_gew > 0, summen["TQ"].to_numpy() / q_gew, np.nan)
+        critical_share = np.where(q_geb_sum > 0, summen["Q_krit"].to_numpy() / q_geb_sum * 100.0, 0.0)
+
+    buildings = pd.DataFrame({
+        building_col: summen.index.to_numpy(),
+        "Anzahl Räume": summen["Anzahl_Raeume"].to_numpy(),
+        "Anzahl Wohnungstypen": summen["Anzahl_Typen"].fillna(0).astype(int).to_numpy(),
+        "Heizlast Gebäude (W)": q_gesamt,
+        "Heizlast Gebäude (kW)": np.where(q_gesamt > 0, q_gesamt / 1000.0, 0.0),
+        "T_mittel gewichtet (°C)": weighted_avg_T,
+        "Anteil bedingt/kritisch (%)": critical_share,
+    })
+
+    return PortfolioErgebnis(rooms=rooms, types=types, buildings=buildings)
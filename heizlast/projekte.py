@@ -0,0 +1,515 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .konstanten import KEIN_WP, KRITISCHE_EIGNUNG
+from .portfolio import GEBAEUDE_SPALTE, berechne_portfolio
+
+# ---------------------------------------------------------
+# Projektspeicher (SQLite): Projekte, Gebäude, Wohnungstypen, Räume, Szenarien, Ergebnisse
+#
+#   speicher = ProjektSpeicher("projekte.sqlite")
+#   speicher.speichere_raumtabelle("Quartier Nord", portfolio_df)      # Langformat mit Gebäude-ID
+#   speicher.szenario("Quartier Nord", "Auslegung", T_out=-14)
+#   speicher.berechne("Quartier Nord", "Auslegung")
+#   speicher.ergebnisse("Quartier Nord", "Auslegung", kritisch_ueber=30)
+#
+# Räume werden je Gebäude ersetzt (eine Transaktion, executemany), Raumspalten
+# heißen wie in der App; neue Spalten werden bei Bedarf angelegt. Ergebnisse
+# liegen je Szenario und Gebäude vor und sind über Indizes ohne Neuberechnung
+# abfragbar; ändern sich Raumtabelle oder Szenario-Parameter, gelten sie als veraltet
+# bzw. werden verworfen.
+# ---------------------------------------------------------
+PROJEKTE_VARIABLE = "HEIZLAST_PROJEKTE"
+STANDARD_DATEI = "heizlast_projekte.sqlite"
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projekte (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    beschreibung TEXT,
+    erstellt REAL NOT NULL,
+    geaendert REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gebaeude (
+    id INTEGER PRIMARY KEY,
+    projekt_id INTEGER NOT NULL REFERENCES projekte(id) ON DELETE CASCADE,
+    gebaeude_id TEXT NOT NULL,
+    spalten TEXT NOT NULL,
+    geaendert REAL NOT NULL,
+    UNIQUE (projekt_id, gebaeude_id)
+);
+CREATE TABLE IF NOT EXISTS wohnungstypen (
+    id INTEGER PRIMARY KEY,
+    gebaeude_pk INTEGER NOT NULL REFERENCES gebaeude(id) ON DELETE CASCADE,
+    name TEXT,
+    anzahl_we REAL
+);
+CREATE INDEX IF NOT EXISTS ix_wohnungstypen_gebaeude ON wohnungstypen (gebaeude_pk);
+CREATE TABLE IF NOT EXISTS raeume (
+    id INTEGER PRIMARY KEY,
+    gebaeude_pk INTEGER NOT NULL REFERENCES gebaeude(id) ON DELETE CASCADE,
+    typ_pk INTEGER REFERENCES wohnungstypen(id) ON DELETE CASCADE,
+    pos INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_raeume_gebaeude ON raeume (gebaeude_pk, pos);
+CREATE INDEX IF NOT EXISTS ix_raeume_typ ON raeume (typ_pk);
+CREATE TABLE IF NOT EXISTS szenarien (
+    id INTEGER PRIMARY KEY,
+    projekt_id INTEGER NOT NULL REFERENCES projekte(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    T_out REAL NOT NULL,
+    default_T_set REAL NOT NULL,
+    safety_factor REAL NOT NULL,
+    analysis_level TEXT NOT NULL,
+    wp_typ TEXT NOT NULL,
+    wp_power_kw REAL NOT NULL,
+    heizwaermebedarf REAL NOT NULL,
+    UNIQUE (projekt_id, name)
+);
+CREATE TABLE IF NOT EXISTS ergebnisse_gebaeude (
+    szenario_id INTEGER NOT NULL REFERENCES szenarien(id) ON DELETE CASCADE,
+    gebaeude_pk INTEGER NOT NULL REFERENCES gebaeude(id) ON DELETE CASCADE,
+    anzahl_raeume INTEGER,
+    anzahl_typen INTEGER,
+    heizlast_w REAL,
+    heizlast_kw REAL,
+    t_mittel REAL,
+    anteil_kritisch REAL,
+    berechnet REAL NOT NULL,
+    PRIMARY KEY (szenario_id, gebaeude_pk)
+);
+CREATE INDEX IF NOT EXISTS ix_ergebnisse_kritisch ON ergebnisse_gebaeude (szenario_id, anteil_kritisch);
+CREATE INDEX IF NOT EXISTS ix_ergebnisse_heizlast ON ergebnisse_gebaeude (szenario_id, heizlast_kw);
+CREATE INDEX IF NOT EXISTS ix_ergebnisse_gebaeude ON ergebnisse_gebaeude (gebaeude_pk);
+CREATE TABLE IF NOT EXISTS ergebnisse_typen (
+    szenario_id INTEGER NOT NULL REFERENCES szenarien(id) ON DELETE CASCADE,
+    typ_pk INTEGER NOT NULL REFERENCES wohnungstypen(id) ON DELETE CASCADE,
+    q_we_w REAL,
+    anzahl_we REAL,
+    q_typ_geb_w REAL,
+    PRIMARY KEY (szenario_id, typ_pk)
+);
+CREATE INDEX IF NOT EXISTS ix_ergebnisse_typen ON ergebnisse_typen (typ_pk);
+CREATE TABLE IF NOT EXISTS ergebnisse_raeume (
+    szenario_id INTEGER NOT NULL REFERENCES szenarien(id) ON DELETE CASCADE,
+    raum_pk INTEGER NOT NULL REFERENCES raeume(id) ON DELETE CASCADE,
+    q_raum_w REAL,
+    t_mittel REAL,
+    kritisch INTEGER,
+    PRIMARY KEY (szenario_id, raum_pk)
+);
+CREATE INDEX IF NOT EXISTS ix_ergebnisse_raeume ON ergebnisse_raeume (raum_pk);
+"""
+
+# Anzeigenamen der Ergebnisspalten (wie PortfolioErgebnis.buildings)
+_GEBAEUDE_ERGEBNIS = {
+    "anzahl_raeume": "Anzahl Räume",
+    "anzahl_typen": "Anzahl Wohnungstypen",
+    "heizlast_w": "Heizlast Gebäude (W)",
+    "heizlast_kw": "Heizlast Gebäude (kW)",
+    "t_mittel": "T_mittel gewichtet (°C)",
+    "anteil_kritisch": "Anteil bedingt/kritisch (%)",
+}
+
+SZENARIO_PARAMETER = {
+    "T_out": -12.0,
+    "default_T_set": 20.0,
+    "safety_factor": 0.10,
+    "analysis_level": "Q¹",
+    "wp_typ": KEIN_WP,
+    "wp_power_kw": 0.0,
+    "heizwaermebedarf": 0.0,
+}
+
+# Spalten der Raumtabelle mit eigener Ablage (Gebäude/Wohnungstyp als Fremdschlüssel)
+_STRUKTUR_SPALTEN = ("Wohnungstyp",)
+
+
+def _name(spalte):
+    return '"' + str(spalte).replace('"', '""') + '"'
+
+
+def _werte(spalte):
+    # Spalte → Liste mit Python-Werten; NaN/None als NULL
+    werte = spalte.to_numpy()
+    if werte.dtype.kind == "f":
+        return np.where(np.isnan(werte), None, werte).tolist()
+    if werte.dtype.kind in "iub":
+        return werte.tolist()
+    werte = np.asarray(werte, dtype=object)
+    return np.where(pd.isna(werte), None, werte).tolist()
+
+
+def _sql_typ(spalte):
+    # nach Inhalt statt dtype: eine leere Zeile aus dem Daten-Editor macht Zahlenspalten zu object
+    art = pd.api.types.infer_dtype(spalte, skipna=True)
+    if art == "empty":
+        art = {"i": "integer", "u": "integer", "b": "boolean", "f": "floating"}.get(spalte.dtype.kind)
+    if art in ("integer", "boolean"):
+        return "INTEGER"
+    return "REAL" if art in ("floating", "mixed-integer-float") else "TEXT"
+
+
+class ProjektSpeicher:
+    # eine Verbindung je Aufruf (threadsicher, z. B. für mehrere Streamlit-Sitzungen)
+
+    def __init__(self, pfad=None):
+        self.pfad = pfad or os.environ.get(PROJEKTE_VARIABLE) or STANDARD_DATEI
+        with self._verbindung() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+            con.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @contextmanager
+    def _verbindung(self):
+        con = sqlite3.connect(self.pfad, timeout=30.0)
+        try:
+            con.execute("PRAGMA foreign_keys=ON")
+            con.execute("PRAGMA synchronous=NORMAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def abfrage(self, sql, parameter=()):
+        with self._verbindung() as con:
+            return pd.read_sql_query(sql, con, params=parameter)
+
+    # ---------- Projekte ----------
+    def _projekt_id(self, con, projekt, anlegen=False):
+        zeile = con.execute("SELECT id FROM projekte WHERE name = ?", (projekt,)).fetchone()
+        if zeile is not None:
+            return zeile[0]
+        if not anlegen:
+            raise KeyError(f"Projekt „{projekt}“ nicht gefunden.")
+        jetzt = time.time()
+        return con.execute(
+            "INSERT INTO projekte (name, erstellt, geaendert) VALUES (?, ?, ?)", (projekt, jetzt, jetzt)
+        ).lastrowid
+
+    def projekt(self, name, beschreibung=None):
+        with self._verbindung() as con:
+            projekt_id = self._projekt_id(con, name, anlegen=True)
+            if beschreibung is not None:
+                con.execute("UPDATE projekte SET beschreibung = ? WHERE id = ?", (beschreibung, projekt_id))
+            return projekt_id
+
+    def projekte(self):
+        return self.abfrage(
+            """
+            SELECT p.name AS Projekt, p.beschreibung AS Beschreibung,
+                   (SELECT COUNT(*) FROM gebaeude g WHERE g.projekt_id = p.id) AS "Anzahl Gebäude",
+                   datetime(p.geaendert, 'unixepoch', 'localtime') AS "geändert"
+            FROM projekte p ORDER BY p.geaendert DESC
+            """
+        )
+
+    def loesche_projekt(self, name):
+        with self._verbindung() as con:
+            con.execute("DELETE FROM projekte WHERE name = ?", (name,))
+
+    # ---------- Raumtabellen ----------
+    def _raumspalten(self, con):
+        # Spaltenname → deklarierter Typ
+        return {zeile[1]: zeile[2] for zeile in con.execute("PRAGMA table_info(raeume)")}
+
+    def speichere_raumtabelle(self, projekt, df, gebaeude=None, building_col=GEBAEUDE_SPALTE):
+        # df: Raumtabelle eines Gebäudes (gebaeude=ID) oder Portfolio im Langformat (building_col);
+        # ersetzt die Räume der enthaltenen Gebäude, liefert deren IDs
+        if gebaeude is None and building_col not in df.columns:
+            raise ValueError(f"Gebäude-ID fehlt: Parameter gebaeude oder Spalte „{building_col}“ angeben.")
+        df = df.reset_index(drop=True)
+        if gebaeude is not None:
+            ids = np.full(len(df), str(gebaeude), dtype=object)
+            df = df.drop(columns=[building_col], errors="ignore")
+        else:
+            ids = df[building_col].astype(str).to_numpy(dtype=object)
+            df = df.drop(columns=[building_col])
+        spalten = [str(col) for col in df.columns]
+        daten_spalten = [col for col in spalten if col not in _STRUKTUR_SPALTEN]
+
+        codes, namen = pd.factorize(ids, sort=False)
+        if gebaeude is not None and not len(namen):
+            namen = np.array([str(gebaeude)], dtype=object)
+        typen = (df["Wohnungstyp"] if "Wohnungstyp" in df.columns else pd.Series([None] * len(df))).astype(object)
+        typen = typen.where(typen.notna(), None).to_numpy(dtype=object)
+        anzahl = (
+            pd.to_numeric(df["Anzahl WE Typ"], errors="coerce").to_numpy(dtype=float)
+            if "Anzahl WE Typ" in df.columns else np.ones(len(df))
+        )
+        werte = [np.asarray(_werte(df[col]), dtype=object) for col in daten_spalten]
+        jetzt = time.time()
+
+        with self._verbindung() as con:
+            projekt_id = self._projekt_id(con, projekt, anlegen=True)
+
+            # fehlende Raumspalten anlegen (Zahlen als REAL, sonst TEXT)
+            vorhanden = self._raumspalten(con)
+            for col in daten_spalten:
+                if col not in vorhanden:
+                    con.execute(f"ALTER TABLE raeume ADD COLUMN {_name(col)} {_sql_typ(df[col])}")
+
+            einfuegen = (
+                f"INSERT INTO raeume (gebaeude_pk, typ_pk, pos{''.join(', ' + _name(c) for c in daten_spalten)}) "
+                f"VALUES (?, ?, ?{', ?' * len(daten_spalten)})"
+            )
+            for g, name in enumerate(namen):
+                # vorhandenes Gebäude behalten (Ergebnisse bleiben als veraltet sichtbar), Räume und Typen ersetzen
+                con.execute(
+                    "INSERT INTO gebaeude (projekt_id, gebaeude_id, spalten, geaendert) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (projekt_id, gebaeude_id) DO UPDATE SET spalten = excluded.spalten, "
+                    "geaendert = excluded.geaendert",
+                    (projekt_id, name, json.dumps(spalten, ensure_ascii=False), jetzt),
+                )
+                gebaeude_pk = con.execute(
+                    "SELECT id FROM gebaeude WHERE projekt_id = ? AND gebaeude_id = ?", (projekt_id, name)
+                ).fetchone()[0]
+                con.execute("DELETE FROM raeume WHERE gebaeude_pk = ?", (gebaeude_pk,))
+                con.execute("DELETE FROM wohnungstypen WHERE gebaeude_pk = ?", (gebaeude_pk,))
+                zeilen = np.flatnonzero(codes == g)
+
+                # Wohnungstypen des Gebäudes (Anzahl WE wie in aggregiere_wohnungstypen: Maximum je Typ)
+                typ_pk = {}
+                for typ in dict.fromkeys(typen[zeilen].tolist()):
+                    maske = typen[zeilen] == typ if typ is not None else pd.isna(typen[zeilen])
+                    max_anzahl = np.nanmax(anzahl[zeilen][maske]) if np.isfinite(anzahl[zeilen][maske]).any() else 1.0
+                    typ_pk[typ] = con.execute(
+                        "INSERT INTO wohnungstypen (gebaeude_pk, name, anzahl_we) VALUES (?, ?, ?)",
+                        (gebaeude_pk, typ, float(max_anzahl)),
+                    ).lastrowid
+
+                con.executemany(
+                    einfuegen,
+                    zip(
+                        [gebaeude_pk] * len(zeilen),
+                        [typ_pk[t] for t in typen[zeilen].tolist()],
+                        range(len(zeilen)),
+                        *(w[zeilen].tolist() for w in werte),
+                    ),
+                )
+            con.execute("UPDATE projekte SET geaendert = ? WHERE id = ?", (jetzt, projekt_id))
+        return [str(name) for name in namen]
+
+    def _lade(self, con, projekt_id, gebaeude=None):
+        bedingung, parameter = "g.projekt_id = ?", [projekt_id]
+        if gebaeude is not None:
+            bedingung += " AND g.gebaeude_id = ?"
+            parameter.append(str(gebaeude))
+        typen = self._raumspalten(con)
+        daten_spalten = [c for c in typen if c not in ("id", "gebaeude_pk", "typ_pk", "pos")]
+        auswahl = "".join(f", r.{_name(c)}" for c in daten_spalten)
+        df = pd.read_sql_query(
+            f"""
+            SELECT g.gebaeude_id AS "__gebaeude", g.spalten AS "__spalten", t.name AS "Wohnungstyp"{auswahl}
+            FROM gebaeude g JOIN raeume r ON r.gebaeude_pk = g.id LEFT JOIN wohnungstypen t ON t.id = r.typ_pk
+            WHERE {bedingung} ORDER BY g.id, r.pos
+            """,
+            con,
+            params=parameter,
+        )
+        # leere Zahlenspalten liest SQLite als object
+        for c in daten_spalten:
+            if typen[c] in ("REAL", "INTEGER") and df[c].dtype == object:
+                df[c] = df[c].astype(float)
+        # Spalten in gespeicherter Reihenfolge (Vereinigung über alle Gebäude)
+        spalten = list(dict.fromkeys(c for s in pd.unique(df["__spalten"]) for c in json.loads(s)))
+        return df, spalten
+
+    def lade_gebaeude(self, projekt, gebaeude):
+        # Raumtabelle eines Gebäudes im Eingabeformat der App
+        with self._verbindung() as con:
+            projekt_id = self._projekt_id(con, projekt)
+            df, spalten = self._lade(con, projekt_id, gebaeude)
+        if df.empty:
+            raise KeyError(f"Gebäude „{gebaeude}“ in Projekt „{projekt}“ nicht gefunden.")
+        return df[spalten].reset_index(drop=True)
+
+    def lade_portfolio(self, projekt, building_col=GEBAEUDE_SPALTE):
+        with self._verbindung() as con:
+            projekt_id = self._projekt_id(con, projekt)
+            df, spalten = self._lade(con, projekt_id)
+        df = df.rename(columns={"__gebaeude": building_col})
+        return df[[building_col] + [c for c in spalten if c != building_col]].reset_index(drop=True)
+
+    def gebaeude(self, projekt):
+        return self.abfrage(
+            """
+            SELECT g.gebaeude_id AS "Gebäude-ID",
+                   (SELECT COUNT(*) FROM raeume r WHERE r.gebaeude_pk = g.id) AS "Anzahl Räume",
+                   (SELECT COUNT(*) FROM wohnungstypen t WHERE t.gebaeude_pk = g.id) AS "Anzahl Wohnungstypen",
+                   datetime(g.geaendert, 'unixepoch', 'localtime') AS "geändert"
+            FROM gebaeude g JOIN projekte p ON p.id = g.projekt_id
+            WHERE p.name = ? ORDER BY g.gebaeude_id
+            """,
+            (projekt,),
+        )
+
+    def loesche_gebaeude(self, projekt, gebaeude):
+        with self._verbindung() as con:
+            projekt_id = self._projekt_id(con, projekt)
+            con.execute("DELETE FROM gebaeude WHERE projekt_id = ? AND gebaeude_id = ?", (projekt_id, str(gebaeude)))
+
+    # ---------- Szenarien und Ergebnisse ----------
+    def szenario(self, projekt, name, **parameter):
+        # anlegen oder Parameter ändern; bei geänderten Parametern werden alte Ergebnisse verworfen
+        unbekannt = set(parameter) - set(SZENARIO_PARAMETER)
+        if unbekannt:
+            raise ValueError(f"unbekannte Szenario-Parameter: {', '.join(sorted(unbekannt))}")
+        with self._verbindung() as con:
+            projekt_id = self._projekt_id(con, projekt, anlegen=True)
+            zeile = con.execute(
+                f"SELECT id, {', '.join(SZENARIO_PARAMETER)} FROM szenarien WHERE projekt_id = ? AND name = ?",
+                (projekt_id, name),
+            ).fetchone()
+            if zeile is None:
+                werte = {**SZENARIO_PARAMETER, **parameter}
+                return con.execute(
+                    f"INSERT INTO szenarien (projekt_id, name, {', '.join(werte)}) VALUES (?, ?{', ?' * len(werte)})",
+                    (projekt_id, name, *werte.values()),
+                ).lastrowid
+            szenario_id, alt = zeile[0], dict(zip(SZENARIO_PARAMETER, zeile[1:]))
+            werte = {**alt, **parameter}
+            if werte != alt:
+                con.execute(
+                    f"UPDATE szenarien SET {', '.join(f'{k} = ?' for k in werte)} WHERE id = ?",
+                    (*werte.values(), szenario_id),
+                )
+                for tabelle in ("ergebnisse_gebaeude", "ergebnisse_typen", "ergebnisse_raeume"):
+                    con.execute(f"DELETE FROM {tabelle} WHERE szenario_id = ?", (szenario_id,))
+            return szenario_id
+
+    def szenarien(self, projekt):
+        return self.abfrage(
+            f"""
+            SELECT s.name AS Szenario, {', '.join('s.' + k for k in SZENARIO_PARAMETER)}
+            FROM szenarien s JOIN projekte p ON p.id = s.projekt_id WHERE p.name = ? ORDER BY s.name
+            """,
+            (projekt,),
+        )
+
+    def _szenario(self, con, projekt_id, szenario):
+        zeile = con.execute(
+            f"SELECT id, {', '.join(SZENARIO_PARAMETER)} FROM szenarien WHERE projekt_id = ? AND name = ?",
+            (projekt_id, szenario),
+        ).fetchone()
+        if zeile is None:
+            raise KeyError(f"Szenario „{szenario}“ nicht gefunden.")
+        return zeile[0], dict(zip(SZENARIO_PARAMETER, zeile[1:]))
+
+    def parameter(self, projekt, szenario):
+        with self._verbindung() as con:
+            return self._szenario(con, self._projekt_id(con, projekt), szenario)[1]
+
+    def speichere_ergebnisse(self, projekt, szenario, ergebnis, building_col=GEBAEUDE_SPALTE):
+        # ergebnis: PortfolioErgebnis zu einer mit lade_portfolio geladenen Tabelle
+        # (Räume je Gebäude in gespeicherter Reihenfolge)
+        rooms, types, buildings = ergebnis.rooms, ergebnis.types, ergebnis.buildings
+        jetzt = time.time()
+        with self._verbindung() as con:
+            projekt_id = self._projekt_id(con, projekt)
+            szenario_id, _ = self._szenario(con, projekt_id, szenario)
+            gebaeude_pk = dict(con.execute(
+                "SELECT gebaeude_id, id FROM gebaeude WHERE projekt_id = ?", (projekt_id,)
+            ).fetchall())
+            ids = buildings[building_col].astype(str).tolist()
+            fehlend = [g for g in ids if g not in gebaeude_pk]
+            if fehlend:
+                raise KeyError(f"Gebäude nicht im Projekt gespeichert: {', '.join(fehlend[:5])}")
+            pks = [gebaeude_pk[g] for g in ids]
+            platzhalter = ", ".join("?" * len(pks))
+
+            con.executemany(
+                "INSERT OR REPLACE INTO ergebnisse_gebaeude (szenario_id, gebaeude_pk, "
+                f"{', '.join(_GEBAEUDE_ERGEBNIS)}, berechnet) VALUES (?, ?{', ?' * len(_GEBAEUDE_ERGEBNIS)}, ?)",
+                zip([szenario_id] * len(pks), pks, *(_werte(buildings[v]) for v in _GEBAEUDE_ERGEBNIS.values()),
+                    [jetzt] * len(pks)),
+            )
+
+            # Wohnungstypen und Räume über (Gebäude, Name) bzw. (Gebäude, Position) zuordnen
+            typ_pk = {
+                (g, name): pk for g, name, pk in con.execute(
+                    f"SELECT gebaeude_pk, name, id FROM wohnungstypen WHERE gebaeude_pk IN ({platzhalter})", pks
+                )
+            }
+            typ_g = types[building_col].astype(str).map(gebaeude_pk).tolist()
+            typ_namen = types["Wohnungstyp"].astype(object).where(types["Wohnungstyp"].notna(), None).tolist()
+            con.executemany(
+                "INSERT OR REPLACE INTO ergebnisse_typen (szenario_id, typ_pk, q_we_w, anzahl_we, q_typ_geb_w) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (szenario_id, typ_pk[(g, n)], q, a, qg)
+                    for g, n, q, a, qg in zip(typ_g, typ_namen, _werte(types["Q_WE_W"]), _werte(types["Anzahl_WE"]),
+                                              _werte(types["Q_Typ_geb_W"]))
+                    if (g, n) in typ_pk
+                ),
+            )
+
+            raum_pk = pd.read_sql_query(
+                f"SELECT gebaeude_pk, pos, id FROM raeume WHERE gebaeude_pk IN ({platzhalter})", con, params=pks
+            ).set_index(["gebaeude_pk", "pos"])["id"]
+            raum_g = rooms[building_col].astype(str).map(gebaeude_pk).to_numpy()
+            pos = pd.Series(raum_g).groupby(raum_g, sort=False).cumcount().to_numpy()
+            raum_ids = raum_pk.reindex(pd.MultiIndex.from_arrays([raum_g, pos])).to_numpy()
+            kritisch = rooms["WP-Eignung"].isin(KRITISCHE_EIGNUNG).to_numpy() if "WP-Eignung" in rooms.columns \
+                else np.zeros(len(rooms), dtype=bool)
+            gueltig = ~pd.isna(raum_ids)
+            con.executemany(
+                "INSERT OR REPLACE INTO ergebnisse_raeume (szenario_id, raum_pk, q_raum_w, t_mittel, kritisch) "
+                "VALUES (?, ?, ?, ?, ?)",
+                zip(
+                    [szenario_id] * int(gueltig.sum()),
+                    raum_ids[gueltig].astype(np.int64).tolist(),
+                    np.asarray(_werte(rooms["Q_Raum (W)"]), dtype=object)[gueltig].tolist(),
+                    np.asarray(_werte(rooms["T_mittel (°C)"]), dtype=object)[gueltig].tolist(),
+                    kritisch[gueltig].astype(int).tolist(),
+                ),
+            )
+
+    def berechne(self, projekt, szenario, gebaeude=None, building_col=GEBAEUDE_SPALTE):
+        # alle (oder ein) Gebäude des Projekts mit den Szenario-Parametern rechnen und ablegen
+        params = self.parameter(projekt, szenario)
+        if gebaeude is None:
+            df = self.lade_portfolio(projekt, building_col)
+        else:
+            df = self.lade_gebaeude(projekt, gebaeude)
+            df.insert(0, building_col, str(gebaeude))
+        ergebnis = berechne_portfolio(df, params["T_out"], params["default_T_set"], params["safety_factor"], building_col)
+        self.speichere_ergebnisse(projekt, szenario, ergebnis, building_col)
+        return ergebnis
+
+    def ergebnisse(self, projekt, szenario, kritisch_ueber=None, heizlast_ueber_kw=None, heizlast_unter_kw=None,
+                   t_mittel_ueber=None):
+        # gespeicherte Gebäudeergebnisse, gefiltert über die Indizes; „aktuell“ = nach der letzten Änderung berechnet
+        bedingungen, parameter = ["p.name = ?", "s.name = ?"], [projekt, szenario]
+        for spalte, operator, wert in (
+            ("e.anteil_kritisch", ">", kritisch_ueber),
+            ("e.heizlast_kw", ">", heizlast_ueber_kw),
+            ("e.heizlast_kw", "<", heizlast_unter_kw),
+            ("e.t_mittel", ">", t_mittel_ueber),
+        ):
+            if wert is not None:
+                bedingungen.append(f"{spalte} {operator} ?")
+                parameter.append(float(wert))
+        anzeige = ", ".join(f'e.{k} AS "{v}"' for k, v in _GEBAEUDE_ERGEBNIS.items())
+        return self.abfrage(
+            f"""
+            SELECT g.gebaeude_id AS "{GEBAEUDE_SPALTE}", {anzeige},
+                   e.berechnet >= g.geaendert AS aktuell,
+                   datetime(e.berechnet, 'unixepoch', 'localtime') AS berechnet
+            FROM ergebnisse_gebaeude e
+            JOIN szenarien s ON s.id = e.szenario_id
+            JOIN projekte p ON p.id = s.projekt_id
+            JOIN gebaeude g ON g.id = e.gebaeude_pk
+            WHERE {' AND '.join(bedingungen)}
+            ORDER BY g.gebaeude_id
+            """,
+            parameter,
+        ).astype({"aktuell": bool})
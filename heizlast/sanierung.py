@@ -0,0 +1,398 @@
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from .austausch import _lese_csv_text
+from .berechnung import _zahlen, eignung_codes
+from .konstanten import EIGNUNGSKLASSEN, HEATING_TYPE_PARAMS, KRITISCHE_EIGNUNG
+from .konstruktionen import BAUTEILE
+from .linear import LinearesModell, UA_BAUTEILE
+
+# ---------------------------------------------------------
+# Sanierungspakete: alle Kombinationen aus Maßnahmen je Bauteil
+# (Wand, oberer Abschluss, Boden, Fenster, Heizfläche) für viele Gebäude
+#
+# Die Heizlast ist linear in den UA-Werten. Je Gebäude und Maßnahme genügen
+# daher vorab gebildete Summen; jede Kombination ist eine Summe dieser Beiträge:
+#
+#   Q     = Q_Lüftung + Σ_Bauteil Q_Bauteil[Maßnahme]
+#   T·Q   = Σ_Bauteil TQ_Bauteil[Heizfläche, Maßnahme]     (ebenso Q_krit, Q_gewicht)
+#
+# Bewertet werden Kosten, Gebäudeheizlast, Anteil bedingt/kritisch und die
+# gewichtete Systemtemperatur; zurück kommt je Gebäude die Pareto-Front.
+# ---------------------------------------------------------
+MASSNAHMEN_SPALTEN = ["Maßnahme", "Bauteil"]
+HEIZFLAECHE = "Heizfläche"
+SANIERUNG_BAUTEILE = list(BAUTEILE) + [HEIZFLAECHE]
+
+# grobe Richtwerte (brutto, Vollkosten) – für echte Auswertungen durch lokale Preise ersetzen
+STANDARD_MASSNAHMEN = [
+    {"Maßnahme": "Außenwand WDVS 14 cm", "Bauteil": "Wand", "U neu (W/m²K)": 0.24, "Kosten (€/m²)": 190.0, "Fixkosten (€)": 6000.0},
+    {"Maßnahme": "Außenwand WDVS 20 cm", "Bauteil": "Wand", "U neu (W/m²K)": 0.16, "Kosten (€/m²)": 230.0, "Fixkosten (€)": 6000.0},
+    {"Maßnahme": "Oberste Geschossdecke dämmen", "Bauteil": "Oberer Abschluss", "U neu (W/m²K)": 0.18, "Kosten (€/m²)": 70.0},
+    {"Maßnahme": "Aufsparrendämmung", "Bauteil": "Oberer Abschluss", "U neu (W/m²K)": 0.14, "Kosten (€/m²)": 280.0, "Fixkosten (€)": 4000.0},
+    {"Maßnahme": "Kellerdecke dämmen", "Bauteil": "Boden", "U neu (W/m²K)": 0.30, "Kosten (€/m²)": 60.0},
+    {"Maßnahme": "Fenster 2-fach Wärmeschutz", "Bauteil": "Fenster", "U neu (W/m²K)": 1.10, "Kosten (€/m²)": 600.0},
+    {"Maßnahme": "Fenster 3-fach Wärmeschutz", "Bauteil": "Fenster", "U neu (W/m²K)": 0.80, "Kosten (€/m²)": 750.0},
+    {"Maßnahme": "Niedertemperatur-Heizkörper", "Bauteil": HEIZFLAECHE, "Heizflächentyp neu": "Niedertemperatur-Heizkörper", "Kosten (€/Raum)": 1500.0},
+    {"Maßnahme": "Fußbodenheizung (Fräsverfahren)", "Bauteil": HEIZFLAECHE, "Heizflächentyp neu": "Fußbodenheizung", "Kosten (€/m²)": 95.0},
+]
+
+# Kombinationen je Rechenblock (Gebäude × Kombinationen)
+BLOCK_ELEMENTE = 2_000_000
+
+# Kandidaten je Schritt der Pareto-Suche
+PARETO_BLOCK = 64
+
+# Rundung der Zielgrößen vor dem Vergleich (Kosten €, Heizlast W, Anteil %, Temperatur °C)
+_RUNDUNG = (2, 3, 6, 6)
+
+_KEINE = "–"
+
+
+def massnahmen_tabelle(massnahmen=None):
+    # Maßnahmentabelle prüfen und vervollständigen (fehlende Kostenspalten = 0)
+    df = pd.DataFrame(STANDARD_MASSNAHMEN if massnahmen is None else massnahmen).copy()
+    fehlend = [c for c in MASSNAHMEN_SPALTEN if c not in df.columns]
+    if fehlend:
+        raise ValueError(f"Maßnahmen: Spalten fehlen: {', '.join(fehlend)}")
+    for col in ("U neu (W/m²K)", "Kosten (€/m²)", "Kosten (€/Raum)", "Fixkosten (€)"):
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else np.nan
+    for col in ("Kosten (€/m²)", "Kosten (€/Raum)", "Fixkosten (€)"):
+        df[col] = df[col].fillna(0.0)
+    if "Heizflächentyp neu" not in df.columns:
+        df["Heizflächentyp neu"] = None
+    df = df.dropna(subset=MASSNAHMEN_SPALTEN).reset_index(drop=True)
+
+    fehler = []
+    unbekannt = sorted(set(df["Bauteil"]) - set(SANIERUNG_BAUTEILE))
+    if unbekannt:
+        fehler.append(f"unbekanntes Bauteil {', '.join(map(str, unbekannt))} (erlaubt: {', '.join(SANIERUNG_BAUTEILE)})")
+    heizflaeche = df["Bauteil"] == HEIZFLAECHE
+    ohne_u = df.loc[~heizflaeche & ~(df["U neu (W/m²K)"] >= 0), "Maßnahme"]
+    if len(ohne_u):
+        fehler.append(f"U neu fehlt für {', '.join(map(str, ohne_u))}")
+    ohne_typ = df.loc[heizflaeche & ~df["Heizflächentyp neu"].isin(list(HEATING_TYPE_PARAMS)), "Maßnahme"]
+    if len(ohne_typ):
+        fehler.append(f"Heizflächentyp neu fehlt oder unbekannt für {', '.join(map(str, ohne_typ))}")
+    doppelt = df.loc[df["Maßnahme"].duplicated(), "Maßnahme"]
+    if len(doppelt):
+        fehler.append(f"Maßnahme doppelt: {', '.join(map(str, doppelt))}")
+    if fehler:
+        raise ValueError("Maßnahmen: " + "; ".join(fehler))
+    return df
+
+
+def lese_massnahmen(datei):
+    # CSV (Trennzeichen ; mit Dezimalkomma oder ,) als Pfad oder Dateiobjekt
+    return massnahmen_tabelle(_lese_csv_text(datei))
+
+
+@dataclass
+class SanierungsErgebnis:
+    front: pd.DataFrame          # je Gebäude die nicht dominierten Pakete, nach Kosten sortiert
+    ausgangslage: pd.DataFrame   # je Gebäude ohne Maßnahme
+    massnahmen: pd.DataFrame
+    kombinationen: int           # Kombinationen je Gebäude
+    bewertet: int                # bewertete Kombinationen über alle Gebäude (ohne wirkungslose Maßnahmen)
+    building_col: str = None
+
+
+def _einordnen(werte, n_achsen, k=None, heiz=False):
+    # (Gebäude, [Optionen von Bauteil k], [Heizfläche]) → Form (Gebäude, *Kombinationsachsen)
+    form = [werte.shape[0]] + [1] * n_achsen
+    if k is not None:
+        form[k + 1] = werte.shape[1]
+    if heiz:
+        form[-1] = werte.shape[-1]
+    return werte.reshape(form)
+
+
+class _Beitraege:
+    # Gebäudesummen je Bauteil und Option (0 = keine Maßnahme):
+    #   q, q_alle, kosten, wirksam: (Gebäude, Optionen)
+    #   tq, q_gewicht, q_krit:      (Gebäude, Optionen, Heizflächen-Optionen)
+
+    def __init__(self, df, modell, massnahmen, T_out, default_T_set, safety_factor, tauschbar=None):
+        code = modell.gebaeude_code
+        gueltig = code >= 0
+        n_geb = len(modell.gebaeude)
+
+        def je_gebaeude(werte):
+            return np.bincount(code[gueltig], weights=np.nan_to_num(werte[gueltig]), minlength=n_geb)
+
+        # Gewichte je Raum wie berechne_portfolio: Gebäudeheizlast über die Anzahl WE des
+        # Wohnungstyps, gewichtete Temperatur und Anteil über die Anzahl WE des Raums
+        t_i = np.where(modell.ohne_t_i, default_T_set, modell.t_i)
+        dT = (t_i - T_out) * (1.0 + safety_factor)
+        mit_typ = modell.typ_code >= 0
+        anzahl_typ = np.zeros(len(modell))
+        anzahl_typ[mit_typ] = modell.anzahl_typ[modell.typ_code[mit_typ]]
+        w_q = anzahl_typ * dT
+        w_alle = modell.anzahl * dT
+        w_pos = np.where(dT > 0, w_alle, 0.0)
+
+        # Heizflächen-Optionen: getauscht wird nur, wo die neue Heizfläche kühler fährt
+        heiz = massnahmen[massnahmen["Bauteil"] == HEIZFLAECHE]
+        if tauschbar is None:
+            tauschbar = np.ones(len(modell), dtype=bool)
+        elif isinstance(tauschbar, str):
+            tauschbar = df[tauschbar].fillna(False).to_numpy(dtype=bool)
+        else:
+            tauschbar = np.asarray(tauschbar, dtype=bool)
+        t_optionen = [modell.t_mittel]
+        getauscht = []
+        for typ_neu in heiz["Heizflächentyp neu"]:
+            t_neu = (HEATING_TYPE_PARAMS[typ_neu]["T_VL"] + HEATING_TYPE_PARAMS[typ_neu]["T_RL"]) / 2.0
+            getauscht.append(tauschbar & (modell.t_mittel > t_neu))
+            t_optionen.append(np.where(getauscht[-1], t_neu, modell.t_mittel))
+        kritisch = [EIGNUNGSKLASSEN.index(k) for k in KRITISCHE_EIGNUNG]
+        faktoren_t = [w_pos * np.nan_to_num(t) for t in t_optionen]
+        faktoren_w = [w_pos * ~np.isnan(t) for t in t_optionen]
+        faktoren_k = [w_alle * np.isin(eignung_codes(t), kritisch) for t in t_optionen]
+
+        # Räume ohne gültige Heizlast (leere U-Werte, Fläche, …) zählen wie in berechne_portfolio gar nicht
+        ohne_h = np.isnan(modell.H)
+
+        def summen(h):
+            # h: Anteil an H je Raum (W/K)
+            h = np.where(ohne_h, 0.0, h)
+            return {
+                "q": je_gebaeude(w_q * h),
+                "q_alle": je_gebaeude(w_alle * h),
+                "tq": np.stack([je_gebaeude(f * h) for f in faktoren_t], axis=1),
+                "q_gewicht": np.stack([je_gebaeude(f * h) for f in faktoren_w], axis=1),
+                "q_krit": np.stack([je_gebaeude(f * h) for f in faktoren_k], axis=1),
+            }
+
+        def kosten(betroffen, flaeche, zeile):
+            # Flächen und Räume zählen mit der Anzahl WE des Wohnungstyps
+            raeume = je_gebaeude(betroffen * anzahl_typ)
+            fix = np.where(je_gebaeude(betroffen.astype(float)) > 0, zeile["Fixkosten (€)"], 0.0)
+            return je_gebaeude(betroffen * anzahl_typ * flaeche) * zeile["Kosten (€/m²)"] + raeume * zeile["Kosten (€/Raum)"] + fix
+
+        # Lüftung hängt von keiner Maßnahme ab
+        self.konstante = summen(modell.lueftung)
+        self.optionen = {}
+        self.teile = []
+        for (bauteil, (u_spalte, _, _)), ua_spalte in zip(BAUTEILE.items(), UA_BAUTEILE):
+            ua = modell.ua_bauteile[ua_spalte]
+            u = _zahlen(df[u_spalte])
+            # wirksame Fläche über UA/U (oberer Abschluss gegen beheizten Raum zählt mit 0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                flaeche = np.where(u > 0, ua / u, 0.0)
+            zeilen = massnahmen[massnahmen["Bauteil"] == bauteil]
+            optionen = [summen(ua)]
+            preise = [np.zeros(n_geb)]
+            wirksam = [np.ones(n_geb, dtype=bool)]
+            for _, zeile in zeilen.iterrows():
+                betroffen = (u > zeile["U neu (W/m²K)"]) & (flaeche > 0)
+                optionen.append(summen(np.where(betroffen, flaeche * zeile["U neu (W/m²K)"], ua)))
+                preise.append(kosten(betroffen, flaeche, zeile))
+                wirksam.append(je_gebaeude(betroffen.astype(float)) > 0)
+            teil = {name: np.stack([o[name] for o in optionen], axis=1) for name in optionen[0]}
+            teil["kosten"] = np.stack(preise, axis=1)
+            teil["wirksam"] = np.stack(wirksam, axis=1)
+            self.optionen[bauteil] = list(zeilen["Maßnahme"])
+            self.teile.append(teil)
+
+        # Heizfläche wirkt nur über T_mittel; Kosten je Raum bzw. je m² Grundfläche
+        grundflaeche = _zahlen(df["Fläche (m²)"])
+        self.optionen[HEIZFLAECHE] = list(heiz["Maßnahme"])
+        self.heiz = {
+            "kosten": np.stack([np.zeros(n_geb)] + [
+                kosten(betroffen, grundflaeche, zeile) for (_, zeile), betroffen in zip(heiz.iterrows(), getauscht)
+            ], axis=1),
+            "wirksam": np.stack([np.ones(n_geb, dtype=bool)] + [
+                je_gebaeude(betroffen.astype(float)) > 0 for betroffen in getauscht
+            ], axis=1),
+        }
+
+    @property
+    def form(self):
+        return tuple(len(o) + 1 for o in self.optionen.values())
+
+    def __len__(self):
+        return len(self.heiz["kosten"])
+
+    def teil(self, b):
+        # Ausschnitt für einen Block von Gebäuden (klein genug für die Worker-Prozesse)
+        teil = object.__new__(_Beitraege)
+        teil.optionen = self.optionen
+        teil.konstante = {name: werte[b] for name, werte in self.konstante.items()}
+        teil.teile = [{name: werte[b] for name, werte in t.items()} for t in self.teile]
+        teil.heiz = {name: werte[b] for name, werte in self.heiz.items()}
+        return teil
+
+    def auswerten(self):
+        # alle Kombinationen: Kosten, Q, Anteil bedingt/kritisch, T_mittel und „gültig“
+        # (keine wirkungslose Maßnahme) je (Gebäude, *form)
+        n_achsen = len(self.form)
+        k = self.konstante
+        Q = _einordnen(k["q"][:, None], n_achsen)
+        Q_alle = _einordnen(k["q_alle"][:, None], n_achsen)
+        TQ = _einordnen(k["tq"], n_achsen, heiz=True)
+        W = _einordnen(k["q_gewicht"], n_achsen, heiz=True)
+        K = _einordnen(k["q_krit"], n_achsen, heiz=True)
+        kosten = _einordnen(self.heiz["kosten"], n_achsen, heiz=True)
+        gueltig = _einordnen(self.heiz["wirksam"], n_achsen, heiz=True)
+        for i, teil in enumerate(self.teile):
+            Q = Q + _einordnen(teil["q"], n_achsen, i)
+            Q_alle = Q_alle + _einordnen(teil["q_alle"], n_achsen, i)
+            TQ = TQ + _einordnen(teil["tq"], n_achsen, i, heiz=True)
+            W = W + _einordnen(teil["q_gewicht"], n_achsen, i, heiz=True)
+            K = K + _einordnen(teil["q_krit"], n_achsen, i, heiz=True)
+            kosten = kosten + _einordnen(teil["kosten"], n_achsen, i)
+            gueltig = gueltig & _einordnen(teil["wirksam"], n_achsen, i)
+
+        form = (len(self),) + self.form
+        with np.errstate(invalid="ignore", divide="ignore"):
+            anteil = np.where(Q_alle > 0, K / Q_alle * 100.0, 0.0)
+            T = np.where(W > 0, TQ / W, np.nan)
+        return tuple(
+            np.broadcast_to(x, form).reshape(len(self), -1) for x in (kosten, Q, anteil, T, gueltig)
+        )
+
+
+def pareto_front(ziele, rang=None):
+    # ziele: (Kandidaten, Zielgrößen), alle zu minimieren, erste Spalte = Kosten;
+    # rang entscheidet bei gleichen Zielen (z. B. Anzahl Maßnahmen).
+    # Kandidaten nach Kosten sortiert prüfen: dominiert ist, wer von einem
+    # günstigeren (oder gleich teuren, früher einsortierten) in allen übrigen
+    # Zielen erreicht wird. Sobald ein Paket überall das Optimum trifft, ist
+    # jedes teurere dominiert → Abbruch. Rückgabe: Indizes der Front.
+    ziele = np.where(np.isnan(ziele), np.inf, ziele)
+    schluessel = list(ziele.T[::-1])
+    order = np.lexsort(schluessel if rang is None else [rang] + schluessel)
+    rest = ziele[:, 1:]
+    optimum = rest.min(axis=0)
+    front = []
+    front_werte = np.empty((0, rest.shape[1]))
+    for start in range(0, len(order), PARETO_BLOCK):
+        block = order[start:start + PARETO_BLOCK]
+        werte = rest[block]
+        frei = ~(front_werte[None, :, :] <= werte[:, None, :]).all(axis=2).any(axis=1)
+        frueher = (werte[None, :, :] <= werte[:, None, :]).all(axis=2) & np.tri(len(block), k=-1, dtype=bool)
+        frei &= ~frueher.any(axis=1)
+        front.append(block[frei])
+        front_werte = np.concatenate([front_werte, werte[frei]])
+        if (front_werte == optimum).all(axis=1).any():
+            break
+    return np.concatenate(front) if front else np.array([], dtype=int)
+
+
+def _block(beitraege):
+    # Pareto-Front je Gebäude eines Blocks: (Gebäude, Kombination, Kosten, Q, Anteil, T), Anzahl bewertet
+    kosten, Q, anteil, T, gueltig = beitraege.auswerten()
+    anzahl = sum(
+        (idx > 0) for idx in np.unravel_index(np.arange(kosten.shape[1]), beitraege.form)
+    )
+    ergebnis = []
+    bewertet = 0
+    for g in range(kosten.shape[0]):
+        kandidaten = np.flatnonzero(gueltig[g])
+        bewertet += len(kandidaten)
+        ziele = np.column_stack([
+            np.round(werte[g, kandidaten], stellen) for werte, stellen in zip((kosten, Q, anteil, T), _RUNDUNG)
+        ])
+        front = kandidaten[pareto_front(ziele, anzahl[kandidaten])]
+        ergebnis.append(np.column_stack([
+            np.full(len(front), g), front, kosten[g, front], Q[g, front], anteil[g, front], T[g, front],
+        ]))
+    ausgangslage = np.column_stack([Q[:, 0], anteil[:, 0], T[:, 0]])
+    return np.concatenate(ergebnis), ausgangslage, bewertet
+
+
+def optimiere_sanierung(
+    df,
+    T_out,
+    default_T_set,
+    safety_factor,
+    massnahmen=None,
+    building_col=None,
+    tauschbar=None,
+    workers=1,
+    modell=None,
+):
+    # massnahmen: Kostentabelle (Standard: STANDARD_MASSNAHMEN); tauschbar: Räume, deren
+    # Heizfläche getauscht werden darf (Bool-Array oder Spaltenname, Standard: alle)
+    massnahmen = massnahmen_tabelle(massnahmen)
+    if modell is None:
+        modell = LinearesModell(df, building_col=building_col)
+    beitraege = _Beitraege(df, modell, massnahmen, T_out, default_T_set, safety_factor, tauschbar)
+    kombinationen = int(np.prod(beitraege.form))
+
+    groesse = max(1, BLOCK_ELEMENTE // kombinationen)
+    auftraege = [beitraege.teil(slice(start, start + groesse)) for start in range(0, len(beitraege), groesse)]
+    if workers and workers > 1 and len(auftraege) > 1:
+        with Pool(processes=workers) as pool:
+            bloecke = pool.map(_block, auftraege)
+    else:
+        bloecke = [_block(auftrag) for auftrag in auftraege]
+
+    # Gebäudeindex der Blöcke auf das ganze Portfolio verschieben
+    zeilen = [werte + np.array([start, 0, 0, 0, 0, 0]) for (werte, _, _), start in zip(bloecke, range(0, len(beitraege), groesse))]
+    zeilen = np.concatenate(zeilen) if zeilen else np.zeros((0, 6))
+    basis = np.concatenate([b[1] for b in bloecke]) if bloecke else np.zeros((0, 3))
+    gebaeude_idx = zeilen[:, 0].astype(int)
+    kombination = np.unravel_index(zeilen[:, 1].astype(int), beitraege.form)
+
+    front = pd.DataFrame(index=pd.RangeIndex(len(zeilen)))
+    if building_col:
+        front[building_col] = np.asarray(modell.gebaeude)[gebaeude_idx]
+    namen = []
+    for (bauteil, optionen), idx in zip(beitraege.optionen.items(), kombination):
+        if optionen:
+            namen.append(np.array([_KEINE] + optionen, dtype=object)[idx])
+            front[bauteil] = namen[-1]
+    pakete = [" + ".join(n for n in paket if n != _KEINE) for paket in zip(*namen)] if namen else [""] * len(zeilen)
+    front.insert(1 if building_col else 0, "Paket", [p or "ohne Maßnahme" for p in pakete])
+    front["Anzahl Maßnahmen"] = sum((idx > 0).astype(int) for idx in kombination)
+    front["Kosten (€)"] = zeilen[:, 2]
+    front["Heizlast Gebäude (kW)"] = zeilen[:, 3] / 1000.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        q_basis = basis[gebaeude_idx, 0]
+        front["Einsparung Heizlast (%)"] = np.where(q_basis > 0, (1.0 - zeilen[:, 3] / q_basis) * 100.0, 0.0)
+    front["Anteil bedingt/kritisch (%)"] = zeilen[:, 4]
+    front["T_mittel gewichtet (°C)"] = zeilen[:, 5]
+
+    ausgangslage = pd.DataFrame({
+        "Heizlast Gebäude (kW)": basis[:, 0] / 1000.0,
+        "Anteil bedingt/kritisch (%)": basis[:, 1],
+        "T_mittel gewichtet (°C)": basis[:, 2],
+    })
+    if building_col:
+        ausgangslage.insert(0, building_col, np.asarray(modell.gebaeude))
+
+    return SanierungsErgebnis(
+        front=front,
+        ausgangslage=ausgangslage,
+        massnahmen=massnahmen,
+        kombinationen=kombinationen,
+        bewertet=sum(b[2] for b in bloecke),
+        building_col=building_col,
+    )
+
+
+def guenstigstes_paket(ergebnis, max_kritisch=0.0, max_T_mittel=None, max_heizlast_kw=None):
+    # je Gebäude das billigste Paket der Front, das die Ziele erreicht
+    # (Standard „WP-tauglich“: keine Heizlast mehr in bedingt/kritisch geeigneten Räumen)
+    front = ergebnis.front
+    erfuellt = front["Anteil bedingt/kritisch (%)"] <= max_kritisch + 1e-9
+    if max_T_mittel is not None:
+        erfuellt &= front["T_mittel gewichtet (°C)"] <= max_T_mittel
+    if max_heizlast_kw is not None:
+        erfuellt &= front["Heizlast Gebäude (kW)"] <= max_heizlast_kw
+    schluessel = [ergebnis.building_col] if ergebnis.building_col else []
+    beste = front[erfuellt].sort_values(schluessel + ["Kosten (€)", "Heizlast Gebäude (kW)"], kind="stable")
+    beste = beste.drop_duplicates(schluessel) if schluessel else beste.head(1)
+
+    # Gebäude ohne passendes Paket bleiben mit „erreichbar = False“ in der Tabelle
+    gebaeude = ergebnis.ausgangslage[schluessel] if schluessel else pd.DataFrame(index=[0])
+    tabelle = gebaeude.merge(beste, on=schluessel, how="left") if schluessel else (
+        beste.reset_index(drop=True) if len(beste) else pd.DataFrame(index=[0], columns=front.columns)
+    )
+    tabelle.insert(len(schluessel), "erreichbar", tabelle["Paket"].notna())
+    return tabelle
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from .konstanten import EIGNUNGSKLASSEN, HEATING_TYPE_PARAMS, TOP_TYPE_OPTIONS
+
+# ---------------------------------------------------------
+# Kompaktes Schema der Raumtabelle
+#
+# Textspalten mit wenigen verschiedenen Werten als Kategorien (ein Code je
+# Zeile statt eines Python-Strings), abgeleitete Größen optional als float32.
+# Bekannte Werte stehen in fester Reihenfolge vorn, weitere Eingaben werden
+# als zusätzliche Kategorien angehängt, damit nichts verloren geht.
+# ---------------------------------------------------------
+KATEGORIE_SPALTEN = {
+    "Wohnungstyp": [],
+    "Heizflächentyp": list(HEATING_TYPE_PARAMS),
+    "Typ oberer Abschluss": list(TOP_TYPE_OPTIONS),
+    "WP-Eignung": list(EIGNUNGSKLASSEN),
+}
+
+# Eingabespalten mit Zahlen (float64, da Eingaben unverändert bleiben sollen)
+ZAHLEN_SPALTEN = [
+    "Anzahl WE Typ",
+    "Fläche (m²)",
+    "Raumhöhe (m)",
+    "Tᵢ (°C)",
+    "A Wand (m²)",
+    "U Wand (W/m²K)",
+    "A oberer Abschluss (m²)",
+    "U oberer Abschluss (W/m²K)",
+    "A Boden (m²)",
+    "U Boden (W/m²K)",
+    "A Fenster (m²)",
+    "U Fenster (W/m²K)",
+    "Luftwechsel n (1/h)",
+    "T_VL (°C)",
+    "T_RL (°C)",
+]
+
+
+def kategorie(werte, bekannte=()):
+    if isinstance(werte, pd.Categorical) or isinstance(getattr(werte, "dtype", None), pd.CategoricalDtype):
+        werte = pd.Categorical(werte)
+        neu = [k for k in werte.categories if k not in bekannte]
+        return werte.set_categories(list(bekannte) + neu)
+    werte = np.asarray(werte, dtype=object)
+    try:
+        codes, gefunden = pd.factorize(werte, sort=True)
+    except TypeError:
+        # gemischte Typen (z. B. Zahlen und Text) lassen sich nicht sortieren
+        codes, gefunden = pd.factorize(werte)
+    neu = [k for k in gefunden if k not in bekannte]
+    kategorien = pd.Index(list(bekannte) + neu)
+    # Codes der gefundenen Werte auf die Reihenfolge der Kategorien umschlüsseln
+    umschluesseln = np.append(kategorien.get_indexer(gefunden), -1)
+    return pd.Categorical.from_codes(umschluesseln[codes], categories=kategorien)
+
+
+def kompakte_raumtabelle(df, float32=False):
+    # Kopie der Raum- oder Ergebnistabelle im kompakten Schema
+    spalten = {}
+    for col in df.columns:
+        werte = df[col]
+        if col in KATEGORIE_SPALTEN:
+            werte = kategorie(werte, KATEGORIE_SPALTEN[col])
+        elif col in ZAHLEN_SPALTEN and werte.dtype == object:
+            werte = pd.to_numeric(werte, errors="coerce")
+        elif float32 and werte.dtype == np.float64 and col not in ZAHLEN_SPALTEN:
+            werte = werte.astype(np.float32)
+        spalten[col] = werte
+    return pd.DataFrame(spalten, index=df.index)
+
+
+def speicher_je_10k(df):
+    # Speicherbedarf in MB je 10 000 Räume (inkl. Python-Strings in object-Spalten)
+    return df.memory_usage(deep=True).sum() / max(len(df), 1) * 10_000 / 1024**2
@@ -0,0 +1,259 @@
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from .linear import LinearesModell, _gruppen, _gruppensumme
+
+# ---------------------------------------------------------
+# Monte-Carlo-Sensitivität der Gebäudeheizlast
+#
+# Unsichere Eingaben (U-Werte, Flächen, Luftwechsel, Temperaturen) werden als
+# Faktoren bzw. Verschiebungen gezogen und als Matrix (Stichproben × Räume)
+# ausgewertet – blockweise, damit der Speicher begrenzt bleibt:
+#
+#   Q_Raum = (Σ UA_Bauteil · f_Bauteil + 0,33 · n · V · f_n) · (Tᵢ + dTᵢ − Tₑ − dTₑ) · (1 + Zuschlag)
+# ---------------------------------------------------------
+AUSSENTEMPERATUR = "Tₑ (°C)"
+
+# Eingabespalte → Anteil von H, den sie skaliert (Temperaturen wirken additiv)
+_KOMPONENTE = {
+    "U Wand (W/m²K)": "UA Wand (W/K)",
+    "A Wand (m²)": "UA Wand (W/K)",
+    "U oberer Abschluss (W/m²K)": "UA oberer Abschluss (W/K)",
+    "A oberer Abschluss (m²)": "UA oberer Abschluss (W/K)",
+    "U Boden (W/m²K)": "UA Boden (W/K)",
+    "A Boden (m²)": "UA Boden (W/K)",
+    "U Fenster (W/m²K)": "UA Fenster (W/K)",
+    "A Fenster (m²)": "UA Fenster (W/K)",
+    "Luftwechsel n (1/h)": "Lüftung",
+}
+_TEMPERATUREN = ["Tᵢ (°C)", AUSSENTEMPERATUR]
+
+# Elemente je Rechenblock (Stichproben × Räume)
+BLOCK_ELEMENTE = 4_000_000
+
+# Quantil der Standardnormalverteilung für P10/P90
+_Z90 = 1.2815515655446004
+
+
+@dataclass
+class Unsicherheit:
+    spalte: str
+    art: str = "normal"     # "normal", "gleich" oder "dreieck" (symmetrisch um den Eingabewert)
+    streuung: float = 0.15  # normal: Standardabweichung, gleich/dreieck: halbe Breite;
+                            # relativ zum Eingabewert, bei Temperaturen absolut in K
+    je_raum: bool = False   # unabhängig je Raum statt einer Ziehung für alle Räume
+
+    def ziehe(self, rng, form):
+        if self.art == "normal":
+            return rng.normal(0.0, self.streuung, form)
+        if self.art == "gleich":
+            return rng.uniform(-self.streuung, self.streuung, form)
+        if self.art == "dreieck":
+            return rng.triangular(-self.streuung, 0.0, self.streuung, form)
+        raise ValueError(f"Unbekannte Verteilung „{self.art}“ für {self.spalte}.")
+
+    def quantil(self, p):
+        # Abweichung beim Quantil p (für P10/P90 im Tornado-Diagramm)
+        if self.art == "normal":
+            z = _Z90 if p > 0.5 else -_Z90
+            return z * self.streuung
+        if self.art == "gleich":
+            return (2.0 * p - 1.0) * self.streuung
+        q = min(p, 1.0 - p)
+        abstand = self.streuung * (1.0 - np.sqrt(2.0 * q))
+        return abstand if p > 0.5 else -abstand
+
+
+def _unsicherheiten(u_streuung, n_streuung):
+    return [
+        Unsicherheit("U Wand (W/m²K)", streuung=u_streuung),
+        Unsicherheit("U oberer Abschluss (W/m²K)", streuung=u_streuung),
+        Unsicherheit("U Boden (W/m²K)", streuung=u_streuung),
+        Unsicherheit("U Fenster (W/m²K)", streuung=u_streuung / 2),
+        Unsicherheit("Luftwechsel n (1/h)", streuung=n_streuung),
+        Unsicherheit("Tᵢ (°C)", streuung=1.0),
+    ]
+
+
+# Standard-Streuungen je Gebäudetyp (BUILDING_PROFILES): im Altbau sind Aufbauten
+# und Luftdichtheit deutlich unsicherer als im Neubau
+STANDARD_UNSICHERHEITEN = {
+    "Neubau (Effizienzhaus)": _unsicherheiten(0.10, 0.20),
+    "Bestand saniert": _unsicherheiten(0.20, 0.30),
+    "Altbau unsaniert": _unsicherheiten(0.30, 0.40),
+}
+
+
+@dataclass
+class SensitivitaetsErgebnis:
+    gebaeude: np.ndarray
+    nominal: np.ndarray       # je Gebäude (W)
+    stichproben: np.ndarray   # Stichproben × Gebäude (W)
+    perzentile: pd.DataFrame
+    tornado: pd.DataFrame
+
+
+class _Raummodell:
+    # Anteile je Raum aus dem LinearesModell und die Gewichte für die Gebäudesumme
+
+    def __init__(self, modell, default_T_set):
+        # Räume ohne gültige Heizlast (leere U-Werte, Fläche, …) zählen wie in berechne_portfolio gar nicht
+        ohne_h = np.isnan(modell.H)
+        self.komponenten = {
+            name: np.where(ohne_h, 0.0, werte)
+            for name, werte in dict(modell.ua_bauteile, **{"Lüftung": modell.lueftung}).items()
+        }
+        self.t_i = np.where(modell.ohne_t_i, default_T_set, modell.t_i)
+        # Raum zählt mit der Anzahl WE seines Wohnungstyps (Maximum je Typ), ohne Typ gar nicht
+        gueltig = modell.typ_code >= 0
+        gewicht = np.zeros(len(modell))
+        gewicht[gueltig] = modell.anzahl_typ[modell.typ_code[gueltig]]
+        self.gewicht = np.nan_to_num(gewicht)
+        self.n_gebaeude = len(modell.gebaeude)
+        self.order, self.starts = _gruppen(modell.gebaeude_code)
+        self.codes = np.unique(modell.gebaeude_code[modell.gebaeude_code >= 0])
+
+        # Gebäudesummen je Komponente: Σ g·C und Σ g·C·Tᵢ (Komponenten × Gebäude)
+        C = np.stack(list(self.komponenten.values())) * self.gewicht
+        self.summe_c = self._je_gebaeude(C)
+        self.summe_ct = self._je_gebaeude(C * self.t_i)
+
+    def _je_gebaeude(self, q):
+        if self.n_gebaeude == 1:
+            return q.sum(axis=1, keepdims=True)
+        ergebnis = np.zeros((q.shape[0], self.n_gebaeude))
+        ergebnis[:, self.codes] = _gruppensumme(q, self.order, self.starts)
+        return ergebnis
+
+    def gebaeudelast_gemeinsam(self, faktoren, verschiebung_ti, verschiebung_te, T_out, safety_factor):
+        # nur gemeinsame Ziehungen (je Stichprobe ein Wert): linear in den Faktoren, daher
+        # Stichproben × Komponenten × Gebäude statt Stichproben × Räume
+        dT = np.reshape(verschiebung_ti - (T_out + verschiebung_te), (-1, 1))
+        q = 0.0
+        for k, name in enumerate(self.komponenten):
+            f = np.reshape(faktoren.get(name, 1.0), (-1, 1))
+            q = q + f * (self.summe_ct[k] + dT * self.summe_c[k])
+        return np.atleast_2d(q * (1.0 + safety_factor))
+
+    def gebaeudelast(self, faktoren, verschiebung_ti, verschiebung_te, T_out, safety_factor):
+        # faktoren: Komponente → (s, 1) oder (s, Räume); Ergebnis (s, Gebäude) in W
+        H = sum(werte * faktoren.get(name, 1.0) for name, werte in self.komponenten.items())
+        q = H * (self.t_i + verschiebung_ti - (T_out + verschiebung_te)) * (1.0 + safety_factor)
+        return self._je_gebaeude(np.atleast_2d(q) * self.gewicht)
+
+
+def _abweichungen(unsicherheiten, werte):
+    # Ziehungen bzw. Quantile je Unsicherheit → Faktoren je Komponente und Temperaturverschiebungen
+    faktoren = {}
+    verschiebung = {spalte: 0.0 for spalte in _TEMPERATUREN}
+    for u, wert in zip(unsicherheiten, werte):
+        if u.spalte in verschiebung:
+            verschiebung[u.spalte] = verschiebung[u.spalte] + wert
+        else:
+            komponente = _KOMPONENTE[u.spalte]
+            faktoren[komponente] = faktoren.get(komponente, 1.0) * np.clip(1.0 + wert, 0.0, None)
+    return faktoren, verschiebung["Tᵢ (°C)"], verschiebung[AUSSENTEMPERATUR]
+
+
+def _block(auftrag):
+    raummodell, unsicherheiten, saat, anzahl, T_out, safety_factor = auftrag
+    rng = np.random.default_rng(saat)
+    n_raeume = len(raummodell.t_i)
+    werte = [u.ziehe(rng, (anzahl, n_raeume) if u.je_raum else (anzahl, 1)) for u in unsicherheiten]
+    faktoren, d_ti, d_te = _abweichungen(unsicherheiten, werte)
+    if not any(u.je_raum for u in unsicherheiten):
+        return raummodell.gebaeudelast_gemeinsam(faktoren, d_ti, d_te, T_out, safety_factor)
+    return raummodell.gebaeudelast(faktoren, d_ti, d_te, T_out, safety_factor)
+
+
+def monte_carlo(
+    df,
+    T_out,
+    default_T_set,
+    safety_factor,
+    unsicherheiten=None,
+    profil="Bestand saniert",
+    n=10_000,
+    seed=0,
+    building_col=None,
+    workers=1,
+    modell=None,
+):
+    # modell: vorhandenes LinearesModell derselben Tabelle (spart den Neuaufbau)
+    if unsicherheiten is None:
+        unsicherheiten = STANDARD_UNSICHERHEITEN[profil]
+    unbekannt = [u.spalte for u in unsicherheiten if u.spalte not in _KOMPONENTE and u.spalte not in _TEMPERATUREN]
+    if unbekannt:
+        raise ValueError(f"Keine Unsicherheit möglich für: {', '.join(unbekannt)}")
+
+    if modell is None:
+        modell = LinearesModell(df, building_col=building_col)
+    raummodell = _Raummodell(modell, default_T_set)
+
+    # Blöcke mit eigenen, von der Worker-Zahl unabhängigen Zufallsströmen
+    breite = len(raummodell.t_i) if any(u.je_raum for u in unsicherheiten) else raummodell.n_gebaeude
+    groesse = max(1, BLOCK_ELEMENTE // max(breite, 1))
+    anzahlen = [min(groesse, n - start) for start in range(0, n, groesse)]
+    saaten = np.random.SeedSequence(seed).spawn(len(anzahlen))
+    auftraege = [
+        (raummodell, unsicherheiten, saat, anzahl, T_out, safety_factor) for saat, anzahl in zip(saaten, anzahlen)
+    ]
+    if workers and workers > 1 and len(auftraege) > 1:
+        with Pool(processes=workers) as pool:
+            bloecke = pool.map(_block, auftraege)
+    else:
+        bloecke = [_block(auftrag) for auftrag in auftraege]
+    stichproben = np.concatenate(bloecke, axis=0) if bloecke else np.zeros((0, raummodell.n_gebaeude))
+
+    nominal = raummodell.gebaeudelast({}, 0.0, 0.0, T_out, safety_factor)[0]
+    gebaeude = np.asarray(modell.gebaeude)
+
+    perzentile = pd.DataFrame({
+        "Nominal (kW)": nominal / 1000.0,
+        "P10 (kW)": np.percentile(stichproben, 10, axis=0) / 1000.0,
+        "P50 (kW)": np.percentile(stichproben, 50, axis=0) / 1000.0,
+        "P90 (kW)": np.percentile(stichproben, 90, axis=0) / 1000.0,
+        "Mittelwert (kW)": stichproben.mean(axis=0) / 1000.0,
+        "Std (kW)": stichproben.std(axis=0) / 1000.0,
+    })
+    if building_col:
+        perzentile.insert(0, building_col, gebaeude)
+
+    return SensitivitaetsErgebnis(
+        gebaeude=gebaeude,
+        nominal=nominal,
+        stichproben=stichproben,
+        perzentile=perzentile,
+        tornado=_tornado(raummodell, unsicherheiten, T_out, safety_factor, nominal, gebaeude, building_col),
+    )
+
+
+def _tornado(raummodell, unsicherheiten, T_out, safety_factor, nominal, gebaeude, building_col):
+    # je Eingangsgröße einzeln auf P10 bzw. P90, alle anderen nominal
+    zeilen = []
+    for i, u in enumerate(unsicherheiten):
+        werte = [0.0] * len(unsicherheiten)
+        last = {}
+        for p in (0.1, 0.9):
+            werte[i] = u.quantil(p)
+            faktoren, d_ti, d_te = _abweichungen(unsicherheiten, werte)
+            last[p] = raummodell.gebaeudelast(faktoren, d_ti, d_te, T_out, safety_factor)[0]
+        zeilen.append(pd.DataFrame({
+            "Eingangsgröße": u.spalte,
+            "Heizlast bei P10 (kW)": last[0.1] / 1000.0,
+            "Heizlast bei P90 (kW)": last[0.9] / 1000.0,
+            "Spannweite (kW)": np.abs(last[0.9] - last[0.1]) / 1000.0,
+        }))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            zeilen[-1]["Spannweite (%)"] = np.where(nominal > 0, np.abs(last[0.9] - last[0.1]) / nominal * 100.0, 0.0)
+        if building_col:
+            zeilen[-1].insert(0, building_col, gebaeude)
+
+    tornado = pd.concat(zeilen, ignore_index=True)
+    sortierung = [building_col, "Spannweite (kW)"] if building_col else ["Spannweite (kW)"]
+    return tornado.sort_values(
+        sortierung, ascending=[True, False] if building_col else [False], kind="stable"
+    ).reset_index(drop=True)
@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .austausch import _lese_csv_text
+from .konstanten import KEIN_WP
+
+# ---------------------------------------------------------
+# Stündliche Jahressimulation (8760 h) der Wärmepumpe
+#
+# Gebäudelast je Stunde aus H_geb (W/K) und Außentemperatur des
+# Testreferenzjahres, Vorlauftemperatur über eine Heizkurve, COP über ein
+# Carnot-Gütegradmodell, Leistungsgrenze der WP mit elektrischem Backup.
+# Alle Größen sind Arrays (Gebäude × Stunden), gerechnet in Gebäudeblöcken.
+# ---------------------------------------------------------
+STUNDEN_JAHR = 8760
+
+TEMPERATUR_SPALTEN = ["T_aussen (°C)", "Außentemperatur (°C)", "T_out", "temp_air", "temperature", "t", "T"]
+
+# Gütegrad bezogen auf Carnot, Quellentemperatur (None = Außenluft),
+# relative Leistungsänderung je K Außentemperatur über dem Auslegungspunkt
+WP_MODELLE = {
+    "Luft/Wasser": {"guete": 0.45, "T_quelle": None, "leistung_pro_K": 0.025},
+    "Sole/Wasser": {"guete": 0.50, "T_quelle": 5.0, "leistung_pro_K": 0.0},
+}
+
+COP_MIN = 1.5
+COP_MAX = 7.0
+
+
+def lese_testreferenzjahr(datei, spalte=None):
+    # CSV mit 8760 Stundenwerten der Außentemperatur (Schaltjahr: 29.02. wird entfernt)
+    df = _lese_csv_text(datei)
+    if spalte is None:
+        spalte = next((c for c in TEMPERATUR_SPALTEN if c in df.columns), None)
+    if spalte is None:
+        zahlen = df.select_dtypes("number").columns if len(df.columns) > 1 else df.columns
+        if len(zahlen) != 1:
+            raise ValueError(
+                "Temperaturspalte im Testreferenzjahr nicht eindeutig; erwartet z. B. „T_aussen (°C)“."
+            )
+        spalte = zahlen[0]
+
+    werte = df[spalte]
+    if not pd.api.types.is_numeric_dtype(werte):
+        werte = werte.astype(str).str.replace(",", ".", regex=False)
+    T_aussen = pd.to_numeric(werte, errors="coerce").to_numpy(dtype=float)
+    if len(T_aussen) == STUNDEN_JAHR + 24:
+        T_aussen = np.delete(T_aussen, np.arange(59 * 24, 60 * 24))
+    if len(T_aussen) != STUNDEN_JAHR:
+        raise ValueError(f"Testreferenzjahr muss {STUNDEN_JAHR} Stundenwerte enthalten, gefunden: {len(T_aussen)}.")
+    if np.isnan(T_aussen).any():
+        raise ValueError("Testreferenzjahr enthält fehlende oder nicht numerische Temperaturwerte.")
+    return T_aussen
+
+
+def heizkurve(T_aussen, T_raum, T_vl_ausl, T_out_norm, exponent=1.3, T_vl_min=25.0):
+    # Vorlauftemperatur: T_raum bei Heizgrenze, T_vl_ausl bei Norm-Außentemperatur
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = np.clip((T_raum - T_aussen) / (T_raum - T_out_norm), 0.0, None)
+    return np.maximum(T_raum + (T_vl_ausl - T_raum) * x ** (1.0 / exponent), T_vl_min)
+
+
+def cop_modell(wp_typ, T_vl, T_quelle):
+    modell = WP_MODELLE[wp_typ]
+    hub = np.maximum(T_vl - T_quelle, 5.0)
+    return np.clip(modell["guete"] * (T_vl + 273.15) / hub, COP_MIN, COP_MAX)
+
+
+@dataclass
+class JahresSimulation:
+    # je Gebäude (1-D-Arrays), Energien in kWh/a
+    heizwaermebedarf: np.ndarray
+    waerme_wp: np.ndarray
+    backup: np.ndarray
+    strom_wp: np.ndarray
+    strom_gesamt: np.ndarray
+    scop: np.ndarray
+    jaz_system: np.ndarray
+    bivalenzpunkt: np.ndarray
+    stundenwerte: dict = None
+
+
+def simuliere_jahr(
+    H_geb,
+    T_i_geb,
+    T_vl_ausl,
+    T_aussen,
+    T_out_norm,
+    wp_typ,
+    wp_power_kw,
+    heizgrenze=15.0,
+    block=256,
+    stundenwerte=False,
+):
+    if wp_typ not in WP_MODELLE:
+        raise ValueError(f"Jahressimulation für „{wp_typ}“ nicht möglich.")
+    modell = WP_MODELLE[wp_typ]
+
+    H_geb, T_i_geb, T_vl_ausl, leistung = (
+        np.atleast_1d(np.asarray(x, dtype=float))
+        for x in np.broadcast_arrays(H_geb, T_i_geb, T_vl_ausl, np.asarray(wp_power_kw, dtype=float) * 1000.0)
+    )
+    # nur Stunden unterhalb der Heizgrenze tragen zum Bedarf bei
+    T_aussen = np.asarray(T_aussen, dtype=float)
+    heizstunden = np.flatnonzero(T_aussen < heizgrenze)
+    T_a = T_aussen[None, heizstunden]
+
+    summen = {name: np.zeros(len(H_geb)) for name in ("bedarf", "waerme_wp", "backup", "strom_wp")}
+    stunden = {}
+    for start in range(0, len(H_geb), block):
+        b = slice(start, start + block)
+        H = H_geb[b, None]
+        T_i = T_i_geb[b, None]
+
+        bedarf = np.clip(H * (T_i - T_a), 0.0, None)
+        T_vl = heizkurve(T_a, T_i, T_vl_ausl[b, None], T_out_norm)
+        T_quelle = T_a if modell["T_quelle"] is None else modell["T_quelle"]
+        cop = cop_modell(wp_typ, T_vl, T_quelle)
+        grenze = leistung[b, None] * np.clip(1.0 + modell["leistung_pro_K"] * (T_a - T_out_norm), 0.0, None)
+
+        waerme_wp = np.minimum(bedarf, grenze)
+        backup = bedarf - waerme_wp
+        strom_wp = waerme_wp / cop
+
+        # Stundenwerte in W → Summe in kWh
+        summen["bedarf"][b] = bedarf.sum(axis=1) / 1000.0
+        summen["waerme_wp"][b] = waerme_wp.sum(axis=1) / 1000.0
+        summen["backup"][b] = backup.sum(axis=1) / 1000.0
+        summen["strom_wp"][b] = strom_wp.sum(axis=1) / 1000.0
+        if stundenwerte and start == 0:
+            for name, werte in (("last_W", bedarf), ("T_VL", T_vl), ("COP", cop), ("waerme_wp_W", waerme_wp), ("backup_W", backup)):
+                stunden[name] = np.full((werte.shape[0], len(T_aussen)), 0.0 if name.endswith("_W") else np.nan)
+                stunden[name][:, heizstunden] = werte
+
+    # Backup als Heizstab (Wirkungsgrad 1)
+    strom_gesamt = summen["strom_wp"] + summen["backup"]
+    k = modell["leistung_pro_K"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scop = np.where(summen["strom_wp"] > 0, summen["waerme_wp"] / summen["strom_wp"], np.nan)
+        jaz_system = np.where(strom_gesamt > 0, summen["bedarf"] / strom_gesamt, np.nan)
+        # Bivalenzpunkt: H·(Tᵢ − T) = P·(1 + k·(T − Tₑ,norm))
+        bivalenzpunkt = (H_geb * T_i_geb - leistung * (1.0 - k * T_out_norm)) / (H_geb + leistung * k)
+
+    return JahresSimulation(
+        heizwaermebedarf=summen["bedarf"],
+        waerme_wp=summen["waerme_wp"],
+        backup=summen["backup"],
+        strom_wp=summen["strom_wp"],
+        strom_gesamt=strom_gesamt,
+        scop=scop,
+        jaz_system=jaz_system,
+        bivalenzpunkt=bivalenzpunkt,
+        stundenwerte=stunden or None,
+    )
+
+
+def simuliere_modell(modell, T_aussen, T_out_norm, default_T_set, wp_typ, wp_power_kw, T_vl_standard=55.0, **kwargs):
+    # Simulation direkt aus einem LinearesModell (ein oder viele Gebäude)
+    if wp_typ == KEIN_WP:
+        raise ValueError("Für die Jahressimulation muss ein Wärmepumpen-Typ gewählt sein.")
+    H_geb, T_i_geb = modell.kennlinie(default_T_set)
+    T_vl_ausl = modell.gewichtetes_mittel(modell.t_vl, T_out_norm, default_T_set)
+    T_vl_ausl = np.where(np.isnan(T_vl_ausl), T_vl_standard, T_vl_ausl)
+    T_i_geb = np.where(np.isnan(T_i_geb), default_T_set, T_i_geb)
+    return simuliere_jahr(H_geb, T_i_geb, T_vl_ausl, T_aussen, T_out_norm, wp_typ, wp_power_kw, **kwargs)
+
+
+def synthetisches_referenzjahr(T_mittel=9.5, amplitude=9.0, tagesamplitude=4.0, T_min=None):
+    # einfacher Sinusverlauf (Jahres- und Tagesgang), nur für Tests/Benchmarks
+    h = np.arange(STUNDEN_JAHR)
+    T = T_mittel - amplitude * np.cos(2 * np.pi * (h - 24 * 20) / STUNDEN_JAHR) \
+        - tagesamplitude * np.cos(2 * np.pi * (h % 24 - 3) / 24)
+    if T_min is not None:
+        T = np.maximum(T, T_min)
+    return T
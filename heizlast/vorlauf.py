@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .berechnung import _zahlen, raum_kennwerte
+from .konstanten import HEATING_TYPE_PARAMS
+
+# ---------------------------------------------------------
+# Minimale Vorlauftemperatur aus den installierten Heizflächen
+#
+# Heizkörperleistung nach EN 442:  Q = Q_N · (ΔT_log / ΔT_log,N)^n
+# mit Normleistung Q_N bei 75/65/20 °C. Je Raum wird die kleinste
+# Vorlauftemperatur gesucht, bei der Q ≥ Q_Raum gilt (Bisektion über alle
+# Räume gleichzeitig); das Gebäude braucht das Maximum über seine Räume.
+# ---------------------------------------------------------
+NORMLEISTUNG_SPALTE = "Heizkörper-Normleistung 75/65/20 (W)"
+EXPONENT_SPALTE = "Heizkörper-Exponent n"
+
+ZIEL_VORLAUFTEMPERATUREN = (55.0, 45.0, 35.0)
+
+STANDARD_EXPONENT = 1.3
+
+# Normbedingungen 75/65/20 °C
+_DT_LOG_NORM = 10.0 / np.log(55.0 / 45.0)
+
+
+def _dt_log(T_vl, T_i, spreizung):
+    # logarithmische Übertemperatur; bei kleinem T_VL − Tᵢ wird die Spreizung
+    # auf die Hälfte begrenzt, damit T_RL über Tᵢ bleibt
+    ueber = np.asarray(T_vl, dtype=float) - T_i
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s = np.minimum(spreizung, 0.5 * ueber)
+        dt = s / np.log(ueber / (ueber - s))
+    return np.where(ueber > 0, dt, 0.0)
+
+
+def heizkoerperleistung(Q_norm, exponent, T_vl, T_i, spreizung=10.0):
+    return Q_norm * (_dt_log(T_vl, T_i, spreizung) / _DT_LOG_NORM) ** exponent
+
+
+def erforderliche_normleistung(Q_raum, exponent, T_vl, T_i, spreizung=10.0):
+    # Normleistung 75/65/20, die bei T_VL gerade Q_Raum liefert
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return Q_raum / (_dt_log(T_vl, T_i, spreizung) / _DT_LOG_NORM) ** exponent
+
+
+def min_vorlauftemperatur(Q_raum, Q_norm, exponent, T_i, spreizung=10.0, T_max=90.0, toleranz=0.01):
+    # je Raum: NaN ohne Heizkörperdaten, inf wenn selbst T_max nicht reicht
+    Q_raum, Q_norm, exponent, T_i = (
+        np.asarray(x, dtype=float) for x in np.broadcast_arrays(Q_raum, Q_norm, exponent, T_i)
+    )
+    unten = T_i.copy()
+    oben = np.full_like(T_i, T_max)
+    n_schritte = int(np.ceil(np.log2(max(T_max - np.nanmin(T_i, initial=T_max), toleranz) / toleranz))) if T_i.size else 0
+    for _ in range(n_schritte):
+        mitte = 0.5 * (unten + oben)
+        reicht = heizkoerperleistung(Q_norm, exponent, mitte, T_i, spreizung) >= Q_raum
+        oben = np.where(reicht, mitte, oben)
+        unten = np.where(reicht, unten, mitte)
+
+    ergebnis = np.where(Q_raum <= 0, T_i, oben)
+    erreichbar = heizkoerperleistung(Q_norm, exponent, T_max, T_i, spreizung) >= Q_raum
+    ergebnis = np.where(erreichbar | (Q_raum <= 0), ergebnis, np.inf)
+    return np.where(np.isnan(Q_norm) | (Q_norm <= 0) | np.isnan(Q_raum), np.nan, ergebnis)
+
+
+@dataclass
+class VorlaufErgebnis:
+    raeume: pd.DataFrame
+    gebaeude: pd.DataFrame
+
+
+def _ziel_text(ziel):
+    return f"{ziel:g} °C"
+
+
+def vorlauf_analyse(
+    df,
+    T_out,
+    default_T_set,
+    safety_factor,
+    building_col=None,
+    ziele=ZIEL_VORLAUFTEMPERATUREN,
+    spreizung=10.0,
+    T_max=90.0,
+):
+    if NORMLEISTUNG_SPALTE not in df.columns:
+        raise ValueError(f"Spalte „{NORMLEISTUNG_SPALTE}“ fehlt (Normleistung der installierten Heizkörper).")
+
+    werte = raum_kennwerte(df, T_out, default_T_set, safety_factor)
+    q_raum = werte["Q_Raum (W)"]
+    t_i = werte["Tᵢ eff (°C)"]
+    q_norm = _zahlen(df[NORMLEISTUNG_SPALTE])
+
+    # Exponent: Eingabe, sonst nach Heizflächentyp, sonst Standard
+    exponent = _zahlen(df[EXPONENT_SPALTE]) if EXPONENT_SPALTE in df.columns else np.full(len(df), np.nan)
+    if "Heizflächentyp" in df.columns:
+        vorgabe = df["Heizflächentyp"].map({typ: p["n"] for typ, p in HEATING_TYPE_PARAMS.items()})
+        exponent = np.where(np.isnan(exponent), vorgabe.to_numpy(dtype=float), exponent)
+    exponent = np.where(np.isnan(exponent), STANDARD_EXPONENT, exponent)
+
+    t_vl_min = min_vorlauftemperatur(q_raum, q_norm, exponent, t_i, spreizung, T_max)
+
+    gebaeude = df[building_col].to_numpy() if building_col else np.zeros(len(df), dtype=int)
+    typ = df["Wohnungstyp"].to_numpy() if "Wohnungstyp" in df.columns else np.full(len(df), "A", dtype=object)
+    # reale Anzahl Heizkörper: Raum × Anzahl WE seines Wohnungstyps (Maximum je Typ)
+    anzahl = pd.Series(werte["Anzahl WE Typ"]).groupby([gebaeude, typ], dropna=False).transform("max").to_numpy()
+
+    raeume = pd.DataFrame(index=df.index)
+    if building_col:
+        raeume[building_col] = gebaeude
+    for col in ("Wohnungstyp", "Raum", "Heizflächentyp"):
+        if col in df.columns:
+            raeume[col] = df[col]
+    raeume["Anzahl WE Typ"] = anzahl
+    raeume["Q_Raum (W)"] = q_raum
+    raeume[NORMLEISTUNG_SPALTE] = q_norm
+    raeume[EXPONENT_SPALTE] = exponent
+    raeume["min. Vorlauftemperatur (°C)"] = t_vl_min
+    for ziel in ziele:
+        raeume[f"Tausch nötig bei {_ziel_text(ziel)}"] = np.where(np.isnan(t_vl_min), False, t_vl_min > ziel)
+        raeume[f"erf. Normleistung bei {_ziel_text(ziel)} (W)"] = erforderliche_normleistung(
+            q_raum, exponent, ziel, t_i, spreizung
+        )
+
+    # Gebäude: Maximum über die Räume mit Heizkörperdaten, begrenzender Raum = Argmax
+    # (Position statt Index-Label, der Index von df muss weder eindeutig noch fortlaufend sein)
+    gruppen = raeume.groupby(gebaeude, sort=True)
+    mit_daten = gruppen["min. Vorlauftemperatur (°C)"].count()
+    position = pd.Series(np.where(np.isnan(t_vl_min), -np.inf, t_vl_min)).groupby(gebaeude, sort=True).idxmax()
+    namen = raeume["Raum"].to_numpy() if "Raum" in raeume.columns else df.index.to_numpy()
+    raum = pd.Series(namen[position.to_numpy()], index=position.index)
+    zeilen = {
+        "Räume mit Heizkörperdaten": mit_daten,
+        "min. Vorlauftemperatur Gebäude (°C)": gruppen["min. Vorlauftemperatur (°C)"].max(),
+        "begrenzender Raum": raum.where(mit_daten > 0),
+    }
+    for ziel in ziele:
+        tausch = raeume[f"Tausch nötig bei {_ziel_text(ziel)}"]
+        zeilen[f"Heizkörper zu tauschen bei {_ziel_text(ziel)}"] = (
+            (tausch * anzahl).groupby(gebaeude).sum().round().astype(int)
+        )
+    tabelle = pd.DataFrame(zeilen)
+    tabelle.index.name = building_col or "Gebäude"
+    tabelle = tabelle.reset_index()
+    if not building_col:
+        tabelle = tabelle.drop(columns="Gebäude")
+
+    return VorlaufErgebnis(raeume=raeume, gebaeude=tabelle)
@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from heizlast import HEATING_TYPE_PARAMS, TOP_TYPE_OPTIONS, beispiel_raumtabelle  # noqa: E402
+
+T_OUT, T_SET, ZUSCHLAG = -12.0, 20.0, 0.10
+
+
+def synthetische_tabelle(n_raeume=400, n_gebaeude=5, seed=0):
+    # zufällige, aber plausible Raumtabelle mit mehreren Gebäuden und Wohnungstypen
+    r = np.random.default_rng(seed)
+    gebaeude = np.sort(r.integers(0, n_gebaeude, n_raeume))
+    df = pd.DataFrame({
+        "Gebäude-ID": [f"G{g:03d}" for g in gebaeude],
+        "Wohnungstyp": np.array(list("ABCD"))[r.integers(0, 4, n_raeume)],
+        "Raum": [f"R{i}" for i in range(n_raeume)],
+        "Fläche (m²)": r.uniform(8, 40, n_raeume),
+        "Raumhöhe (m)": 2.6,
+        "Tᵢ (°C)": np.where(r.random(n_raeume) < 0.2, np.nan, r.choice([18.0, 20.0, 21.0, 24.0], n_raeume)),
+        "A Wand (m²)": r.uniform(5, 30, n_raeume),
+        "U Wand (W/m²K)": r.uniform(0.2, 1.2, n_raeume),
+        "A oberer Abschluss (m²)": r.uniform(0, 30, n_raeume),
+        "U oberer Abschluss (W/m²K)": r.uniform(0.14, 0.8, n_raeume),
+        "Typ oberer Abschluss": r.choice(TOP_TYPE_OPTIONS, n_raeume),
+        "A Boden (m²)": r.uniform(8, 40, n_raeume),
+        "U Boden (W/m²K)": r.uniform(0.25, 0.8, n_raeume),
+        "A Fenster (m²)": r.uniform(1, 8, n_raeume),
+        "U Fenster (W/m²K)": r.uniform(0.9, 2.7, n_raeume),
+        "Luftwechsel n (1/h)": r.uniform(0.3, 1.0, n_raeume),
+        "Heizflächentyp": r.choice(list(HEATING_TYPE_PARAMS), n_raeume),
+        "T_VL (°C)": np.where(r.random(n_raeume) < 0.9, np.nan, 55.0),
+        "T_RL (°C)": np.nan,
+    })
+    df["Anzahl WE Typ"] = (gebaeude * 7 + np.searchsorted(list("ABCD"), df["Wohnungstyp"])) % 8 + 1
+    return df
+
+
+def leere_zeile(df, **werte):
+    # wie eine neu angelegte Zeile im Daten-Editor: alle Zellen leer
+    zeile = pd.DataFrame([{col: werte.get(col) for col in df.columns}])
+    return pd.concat([df, zeile], ignore_index=True)
+
+
+@pytest.fixture
+def beispiel():
+    return beispiel_raumtabelle()
+
+
+@pytest.fixture
+def portfolio():
+    return synthetische_tabelle()
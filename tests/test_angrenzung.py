@@ -0,0 +1,89 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG, leere_zeile
+
+from heizlast import Angrenzung, AngrenzungsBerechnung, berechne_gebaeude, lese_angrenzung, mit_angrenzung
+from heizlast.angrenzung import STANDARD_ZONEN
+
+KANTEN = pd.DataFrame({
+    "Raum": ["Schlafen", "Wohnen/Essen", "Wohnen/Essen (Staffel)", "Keller (unbeheizt)"],
+    "angrenzend": ["Wohnen/Essen", "Treppenhaus (unbeheizt)", "Nachbarwohnung (abgesenkt)", "Schlafen"],
+    "Fläche (m²)": [10.0, 12.0, 8.0, 14.0],
+    "U (W/m²K)": [1.5, 1.2, 1.0, 0.8],
+})
+
+
+class _Upload(io.BytesIO):
+    name = "angrenzung.csv"
+
+
+def test_waermestroeme_von_hand(beispiel):
+    q = Angrenzung.aus_tabellen(beispiel, KANTEN).waermestroeme(np.array([21.0, 18.0, 21.0]), T_OUT)
+    # Wohnen (21 °C) gibt an Schlafen (18 °C) ab: Wohnen 10·1,5·3 + 12·1,2·0,5·33,
+    # Schlafen −10·1,5·3 + 14·0,8·0,5·30, Staffel 8·1,0·(21 − 16)
+    np.testing.assert_allclose(q, [282.6, 123.0, 40.0])
+
+
+def test_upload_mehrfach_lesbar(beispiel):
+    # deutscher Export (; und Dezimalkomma); derselbe Upload wird bei jedem Rerun erneut gelesen
+    upload = _Upload(KANTEN.to_csv(sep=";", decimal=",", index=False).encode("utf-8-sig"))
+    erwartet = Angrenzung.aus_tabellen(beispiel, KANTEN).waermestroeme(np.array([21.0, 18.0, 21.0]), T_OUT)
+    for _ in range(2):
+        q = lese_angrenzung(upload, beispiel).waermestroeme(np.array([21.0, 18.0, 21.0]), T_OUT)
+        np.testing.assert_allclose(q, erwartet)
+
+
+def test_gebaeude_wie_vollberechnung(beispiel):
+    df = leere_zeile(beispiel)
+    df.loc[1, "U Wand (W/m²K)"] = np.nan
+    kanten = pd.concat([KANTEN, pd.DataFrame({
+        "Raum": ["Wohnen/Essen"], "angrenzend": ["Keller (unbeheizt)"], "Fläche (m²)": [5.0], "U (W/m²K)": [np.nan],
+    })], ignore_index=True)
+    angrenzung = Angrenzung.aus_tabellen(df, kanten)
+    voll = berechne_gebaeude(df, T_OUT, T_SET, ZUSCHLAG)
+    erg = mit_angrenzung(voll, angrenzung, T_OUT, ZUSCHLAG)
+
+    q = angrenzung.waermestroeme(voll.result["Tᵢ eff (°C)"].to_numpy(dtype=float), T_OUT)
+    assert np.isfinite(q).all()
+    np.testing.assert_allclose(erg.result["Q_Nachbarn (W)"], q)
+    # Räume ohne gültige Heizlast bleiben draußen, die übrigen bekommen ihren Anteil inkl. Zuschlag
+    zaehlt = voll.result["Q_Raum (W)"].notna().to_numpy()
+    anzahl = voll.result["Anzahl WE Typ"].to_numpy(dtype=float)
+    erwartet = voll.total_heating_load_building + (q * (1 + ZUSCHLAG) * anzahl)[zaehlt].sum()
+    assert erg.total_heating_load_building == pytest.approx(erwartet)
+    # Ausgangsergebnis (z. B. aus dem Cache) bleibt unverändert
+    assert "Q_Nachbarn (W)" not in voll.result.columns
+
+
+def test_inkrementell_wie_voll():
+    rng = np.random.default_rng(0)
+    n, m = 500, 2000
+    namen = [f"R{i}" for i in range(n)]
+    zonen = [z["Zone"] for z in STANDARD_ZONEN]
+    quelle = rng.choice(namen, m)
+    ziel = np.where(rng.random(m) < 0.2, rng.choice(zonen, m), rng.choice(namen, m))
+    ok = quelle != ziel
+    kanten = pd.DataFrame({
+        "Raum": quelle[ok], "angrenzend": ziel[ok],
+        "Fläche (m²)": rng.uniform(2, 20, ok.sum()), "U (W/m²K)": rng.uniform(0.3, 2.0, ok.sum()),
+    })
+    angrenzung = Angrenzung.aus_tabellen(pd.DataFrame({"Raum-ID": namen}), kanten)
+    t_i = rng.uniform(16, 24, n)
+    rechner = AngrenzungsBerechnung(angrenzung, t_i, T_OUT, ZUSCHLAG)
+    for schritt in range(300):
+        kante = int(rng.integers(len(angrenzung.a)))
+        art = schritt % 4
+        if art == 0:
+            rechner.aendere(kante, u=rng.uniform(0.2, 2.0))
+        elif art == 1:
+            rechner.entfernen(kante)
+        elif art == 2:
+            rechner.hinzufuegen(namen[rng.integers(n)], rng.choice(zonen), 5.0, 1.0)
+        else:
+            # leere Zelle im Editor: Kante zählt nicht, bis sie wieder einen Wert hat
+            rechner.aendere(kante, u=np.nan)
+    np.testing.assert_allclose(rechner.q, angrenzung.waermestroeme(t_i, T_OUT), atol=1e-9)
+    np.testing.assert_allclose(rechner.q_nachbarn, rechner.q * (1 + ZUSCHLAG))
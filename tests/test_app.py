@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+APP = Path(__file__).resolve().parents[1] / "app.py"
+
+
+class _EinmalUpload:
+    # wie ein Upload, der nur einmal gelesen werden kann (kein seek/getvalue)
+    name = "try.csv"
+
+    def __init__(self, inhalt):
+        self._inhalt = inhalt
+
+    def read(self):
+        inhalt, self._inhalt = self._inhalt, b""
+        return inhalt
+
+
+def test_aufheizen_mit_testreferenzjahr(monkeypatch):
+    streamlit = pytest.importorskip("streamlit")
+    from streamlit.testing.v1 import AppTest
+
+    stunden = np.arange(8760)
+    T = 9.0 - 11.0 * np.cos(2 * np.pi * stunden / 8760) - 4.0 * np.cos(2 * np.pi * stunden / 24)
+    upload = _EinmalUpload(pd.DataFrame({"T_aussen (°C)": T}).to_csv(sep=";", decimal=",", index=False).encode())
+    original = streamlit.file_uploader
+
+    def file_uploader(label, *args, **kwargs):
+        original(label, *args, **kwargs)
+        return upload if "Testreferenzjahr" in label else None
+
+    monkeypatch.setattr(streamlit, "file_uploader", file_uploader)
+    at = AppTest.from_file(str(APP), default_timeout=120).run()
+    stufe = next(r for r in at.radio if any(str(o).startswith("Q³") for o in r.options))
+    stufe.set_value(next(o for o in stufe.options if str(o).startswith("Q³"))).run()
+    next(c for c in at.checkbox if "Nachtabsenkung" in c.label).check().run()
+    next(b for b in at.button if "berechnen" in b.label).click().run()
+
+    assert not at.exception
+    assert not [e.value for e in at.error]
+    assert any("Testreferenzjahr: Heizwärme mit Absenkung" in m.value for m in at.markdown)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import synthetische_tabelle
+
+from heizlast import SchemaFehler, lese_raumtabelle, pruefe_raumtabelle, schreibe_parquet
+from heizlast.austausch import lese_ergebnis
+from heizlast.schema import KATEGORIE_SPALTEN, kompakte_raumtabelle
+
+
+@pytest.fixture
+def tabelle():
+    df = synthetische_tabelle(n_raeume=200, n_gebaeude=3)
+    df.loc[[3, 40], "U Wand (W/m²K)"] = np.nan
+    df.loc[5, "Typ oberer Abschluss"] = None
+    return df
+
+
+def test_pruefung_gueltige_tabelle(tabelle):
+    assert pruefe_raumtabelle(tabelle.assign(Bemerkung="")) == [
+        "Spalten werden nicht berechnet, aber mitgeführt: Bemerkung"
+    ]
+
+
+def test_pruefung_meldet_text_und_unbekannte_werte(tabelle):
+    df = tabelle.astype({"U Fenster (W/m²K)": object, "Fläche (m²)": object})
+    df.loc[7, "U Fenster (W/m²K)"] = "1,3"
+    df.loc[[8, 9], "Fläche (m²)"] = "ca. 20"
+    df.loc[10, "Fläche (m²)"] = " "
+    df.loc[11, "Heizflächentyp"] = "Kachelofen"
+    with pytest.raises(SchemaFehler) as fehler:
+        pruefe_raumtabelle(df.drop(columns="A Wand (m²)"))
+    meldungen = fehler.value.meldungen
+    assert len(meldungen) == 4
+    assert "A Wand (m²)" in meldungen[0]
+    # leere Zellen (auch nur Leerzeichen) sind erlaubt, Zeilennummer 1-basiert
+    assert "„Fläche (m²)“: 2 Werte" in meldungen[1] and "Zeile 9" in meldungen[1]
+    assert "„U Fenster (W/m²K)“: 1 Werte" in meldungen[2] and "„1,3“" in meldungen[2]
+    assert "Kachelofen" in meldungen[3]
+
+
+def test_csv_mit_text_in_zahlenspalte(tabelle, tmp_path):
+    pfad = tmp_path / "raeume.csv"
+    tabelle.assign(**{"U Wand (W/m²K)": "hoch"}).to_csv(pfad, index=False)
+    with pytest.raises(SchemaFehler, match="U Wand"):
+        lese_raumtabelle(str(pfad))
+
+
+def test_parquet_kategorien_und_projektion(tabelle, tmp_path):
+    pytest.importorskip("pyarrow")
+    pfad = str(tmp_path / "raeume.parquet")
+    schreibe_parquet(tabelle, pfad)
+
+    geladen = lese_raumtabelle(pfad)
+    pd.testing.assert_frame_equal(geladen, kompakte_raumtabelle(tabelle))
+    for col in KATEGORIE_SPALTEN:
+        if col in tabelle.columns:
+            assert isinstance(geladen[col].dtype, pd.CategoricalDtype)
+
+    spalten = ["Gebäude-ID", "Heizflächentyp", "Fläche (m²)"]
+    projektion = lese_raumtabelle(pfad, spalten=spalten)
+    assert projektion.columns.tolist() == spalten
+    pd.testing.assert_frame_equal(projektion, kompakte_raumtabelle(tabelle)[spalten])
+
+    gefiltert = lese_ergebnis(pfad, spalten=spalten, filter=[("Gebäude-ID", "==", "G001")])
+    erwartet = kompakte_raumtabelle(tabelle)[spalten]
+    erwartet = erwartet[erwartet["Gebäude-ID"] == "G001"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(gefiltert, erwartet)
@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG
+
+from heizlast import berechne_gebaeude
+from heizlast.austausch import pyarrow_verfuegbar, schreibe_parquet
+from heizlast.batch import fuehre_batch_aus
+
+PARAMS = {"T_out": T_OUT, "default_T_set": T_SET, "safety_factor": ZUSCHLAG}
+
+
+def test_gleicher_dateiname_ueberschreibt_nichts(beispiel, tmp_path):
+    dateien = []
+    for i, pfad in enumerate([tmp_path / "a" / "haus.csv", tmp_path / "b" / "Haus.csv", tmp_path / "haus.parquet"]):
+        if pfad.suffix == ".parquet" and not pyarrow_verfuegbar():
+            continue
+        df = beispiel.assign(**{"Fläche (m²)": beispiel["Fläche (m²)"] * (1 + i)})
+        pfad.parent.mkdir(exist_ok=True)
+        if pfad.suffix == ".parquet":
+            schreibe_parquet(df, pfad)
+        else:
+            df.to_csv(pfad, index=False)
+        dateien.append((str(pfad), berechne_gebaeude(df, **PARAMS)))
+
+    out = tmp_path / "out"
+    zusammenfassung = fuehre_batch_aus([pfad for pfad, _ in dateien], str(out), PARAMS, workers=1)
+    assert (zusammenfassung["Status"] == "ok").all()
+    assert zusammenfassung["Gebäude"].str.lower().is_unique
+
+    zeilen = zusammenfassung.set_index("Datei")
+    for pfad, erwartet in dateien:
+        assert zeilen.loc[pfad, "Heizlast Gebäude (W)"] == pytest.approx(erwartet.total_heating_load_building)
+        raeume = pd.read_csv(out / f"{zeilen.loc[pfad, 'Gebäude']}_raeume.csv")
+        assert raeume["Q_Raum (W)"].to_numpy() == pytest.approx(erwartet.result["Q_Raum (W)"].to_numpy())
+    assert len(os.listdir(out)) == 2 * len(dateien) + 1
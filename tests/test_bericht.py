@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+from conftest import synthetische_tabelle
+
+pytest.importorskip("reportlab")
+
+from heizlast.bericht import main  # noqa: E402
+
+
+def test_q3_mit_waermepumpe(tmp_path):
+    eingabe = tmp_path / "portfolio.csv"
+    synthetische_tabelle(n_raeume=30, n_gebaeude=3).to_csv(eingabe, index=False)
+
+    seiten = {}
+    for level, wp in (("Q2", []), ("Q3", ["--wp-typ", "Luft/Wasser", "--wp-leistung", "12", "--heizwaermebedarf", "20000"])):
+        bericht = tmp_path / f"{level}.csv"
+        argv = [str(eingabe), "--out", str(tmp_path / f"{level}.zip"), "--level", level, "--workers", "1"]
+        assert main(argv + wp + ["--bericht", str(bericht)]) == 0
+        seiten[level] = pd.read_csv(bericht).set_index("Gebäude")["Seiten"]
+    # je Gebäude eine zusätzliche Seite „Wärmepumpen-Abgleich (Q³)“
+    pd.testing.assert_series_equal(seiten["Q3"], seiten["Q2"] + 1)
@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from heizlast.dienst import AUSGABEN, berechne_buendel, lese_anfrage
+
+
+def _koerper(beispiel, **felder):
+    return json.dumps({"raeume": beispiel.to_dict("records"), **felder}).encode("utf-8")
+
+
+def test_ausgabe_als_text(beispiel):
+    *_, ausgaben = lese_anfrage(_koerper(beispiel, ausgabe="gebaeude"))
+    assert ausgaben == ("gebaeude",)
+    status, antwort = berechne_buendel([_koerper(beispiel, ausgabe="gebaeude")])[0]
+    assert status == 200 and list(json.loads(antwort)) == ["gebaeude"]
+
+
+def test_ausgabe_standard_und_liste(beispiel):
+    assert lese_anfrage(_koerper(beispiel))[3] == AUSGABEN
+    assert lese_anfrage(_koerper(beispiel, ausgabe=["wp", "gebaeude"]))[3] == ("wp", "gebaeude")
+
+
+@pytest.mark.parametrize("ausgabe", [{"gebaeude": True}, 1, ["gebaeude", "raum"], [["gebaeude"]]])
+def test_ungueltige_ausgabe_400(beispiel, ausgabe):
+    status, antwort = berechne_buendel([_koerper(beispiel, ausgabe=ausgabe)])[0]
+    assert status == 400
+    assert "ausgabe" in json.loads(antwort)["fehler"].lower()
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG, leere_zeile
+
+from heizlast import LinearesModell, berechne_gebaeude, berechne_portfolio, simuliere_aufheizen
+from heizlast.dynamik import _C_LUFT, BAUWEISEN, H_MS_SPEZIFISCH, MASSEFLAECHEN, _zwei_knoten
+
+
+def _expm(A, t):
+    # Referenz über die Eigenzerlegung von numpy
+    werte, vektoren = np.linalg.eig(A)
+    return (vektoren @ np.diag(np.exp(werte * t)) @ np.linalg.inv(vektoren)).real
+
+
+def test_zwei_knoten_wie_matrixexponential():
+    r = np.random.default_rng(1)
+    H, H_ms = r.uniform(5, 80, 20), r.uniform(100, 2000, 20)
+    C_L, C_m = r.uniform(1e4, 2e5, 20), r.uniform(1e6, 3e7, 20)
+    for t in (900.0, 7200.0):
+        E = np.stack(_zwei_knoten(H, H_ms, C_L, C_m, t), axis=1).reshape(-1, 2, 2)
+        for i in range(20):
+            A = np.array([[-(H[i] + H_ms[i]) / C_L[i], H_ms[i] / C_L[i]], [H_ms[i] / C_m[i], -H_ms[i] / C_m[i]]])
+            np.testing.assert_allclose(E[i], _expm(A, t), rtol=1e-9, atol=1e-12)
+
+
+def test_aufheizleistung_erreicht_sollwert(beispiel):
+    # eine Absenkung 0–6 Uhr (Heizung aus) aus dem stationären Zustand, danach P_RH für 2 h
+    e = simuliere_aufheizen(
+        beispiel, T_OUT, T_SET, ZUSCHLAG, T_aussen=np.full(7, T_OUT), absenkung_K=None, bauweise="schwer"
+    )
+    H = LinearesModell(beispiel).H
+    flaeche = beispiel["Fläche (m²)"].to_numpy()
+    C_L = _C_LUFT * flaeche * beispiel["Raumhöhe (m)"].to_numpy()
+    C_m = BAUWEISEN["schwer"] * 1000.0 * flaeche
+    H_ms = H_MS_SPEZIFISCH * MASSEFLAECHEN["schwer"] * flaeche
+    t_soll = beispiel["Tᵢ (°C)"].fillna(T_SET).to_numpy()
+    for i in range(len(beispiel)):
+        A = np.array([[-(H[i] + H_ms[i]) / C_L[i], H_ms[i] / C_L[i]], [H_ms[i] / C_m[i], -H_ms[i] / C_m[i]]])
+        x = T_OUT + _expm(A, 6 * 3600.0) @ (np.full(2, t_soll[i]) - T_OUT)
+        assert e.raeume["T_min Absenkung (°C)"].iloc[i] == pytest.approx(x[0])
+        P = e.raeume["Aufheizleistung erforderlich (W)"].iloc[i]
+        ziel = T_OUT + P / H[i]
+        x = ziel + _expm(A, 2 * 3600.0) @ (x - ziel)
+        assert x[0] == pytest.approx(t_soll[i])
+
+
+def test_zuschlag_unter_einknotenmodell(beispiel):
+    # mit einem Knoten (ganze Masse bei Lufttemperatur) lag der Zuschlag bei ~85 W/m²
+    e = simuliere_aufheizen(beispiel, T_OUT, T_SET, ZUSCHLAG, bauweise="mittel")
+    assert (e.raeume["Aufheizzuschlag (W/m²)"] < 60.0).all()
+    ohne = simuliere_aufheizen(beispiel, T_OUT, T_SET, ZUSCHLAG, absenkung_K=0.0)
+    assert ohne.gebaeude["Aufheizzuschlag (W)"].iloc[0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_normheizlast_wie_vollberechnung(beispiel):
+    df = leere_zeile(beispiel)
+    e = simuliere_aufheizen(df, T_OUT, T_SET, ZUSCHLAG)
+    voll = berechne_gebaeude(df, T_OUT, T_SET, ZUSCHLAG)
+    assert e.gebaeude["Heizlast Norm (W)"].iloc[0] == pytest.approx(voll.total_heating_load_building)
+    assert np.isnan(e.raeume["Aufheizleistung erforderlich (W)"].iloc[-1])
+    assert np.isfinite(e.gebaeude.drop(columns="Zeit bis Komfort max. (h)").to_numpy(dtype=float)).all()
+
+
+def test_portfolio_wie_vollberechnung(portfolio):
+    portfolio.loc[[5, 90], "U Wand (W/m²K)"] = np.nan
+    portfolio.loc[200, "Fläche (m²)"] = np.nan
+    e = simuliere_aufheizen(portfolio, T_OUT, T_SET, ZUSCHLAG, T_aussen=np.full(48, T_OUT), building_col="Gebäude-ID")
+    voll = berechne_portfolio(portfolio, T_OUT, T_SET, ZUSCHLAG).buildings.set_index("Gebäude-ID")
+    gebaeude = e.gebaeude.set_index("Gebäude-ID")
+    np.testing.assert_allclose(gebaeude["Heizlast Norm (W)"], voll.loc[gebaeude.index, "Heizlast Gebäude (W)"])
+    assert np.isfinite(gebaeude["Aufheizleistung erforderlich (W)"]).all()
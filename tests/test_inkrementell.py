@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG, leere_zeile, synthetische_tabelle
+
+from heizlast import InkrementelleBerechnung, berechne_gebaeude
+
+
+def assert_wie_voll(ergebnis, df):
+    voll = berechne_gebaeude(df, T_OUT, T_SET, ZUSCHLAG)
+    assert ergebnis.total_heating_load_building == pytest.approx(voll.total_heating_load_building)
+    assert ergebnis.critical_share == pytest.approx(voll.critical_share)
+    assert ergebnis.weighted_avg_T == pytest.approx(voll.weighted_avg_T, nan_ok=True)
+    for col in ("Q_WE_W", "Anzahl_WE"):
+        np.testing.assert_allclose(ergebnis.type_group[col].astype(float), voll.type_group[col].astype(float))
+
+
+def test_aenderungen_wie_vollberechnung():
+    df = synthetische_tabelle().drop(columns="Gebäude-ID")
+    rechner = InkrementelleBerechnung()
+    rechner.berechne(df, T_OUT, T_SET, ZUSCHLAG)
+
+    df.loc[[3, 50, 120], "U Fenster (W/m²K)"] = 0.8
+    df.loc[7, "Wohnungstyp"] = "B"
+    ergebnis = rechner.berechne(df, T_OUT, T_SET, ZUSCHLAG)
+    assert not rechner.letzte_aenderung["voll"]
+    assert rechner.letzte_aenderung["neu_berechnet"] == 4
+    assert_wie_voll(ergebnis, df)
+
+    df = df.drop(index=[10, 11])
+    assert_wie_voll(rechner.berechne(df, T_OUT, T_SET, ZUSCHLAG), df)
+
+
+@pytest.mark.parametrize("tabelle", ["beispiel", "synthetisch"])
+def test_leere_zelle_und_zurueck(tabelle, beispiel):
+    df = beispiel if tabelle == "beispiel" else synthetische_tabelle().drop(columns="Gebäude-ID")
+    rechner = InkrementelleBerechnung()
+    vorher = rechner.berechne(df, T_OUT, T_SET, ZUSCHLAG)
+
+    leer = df.copy()
+    leer.loc[0, "U Wand (W/m²K)"] = np.nan
+    assert_wie_voll(rechner.berechne(leer, T_OUT, T_SET, ZUSCHLAG), leer)
+
+    # nach dem Wiederbefüllen wieder exakt der Ausgangsstand
+    zurueck = rechner.berechne(df, T_OUT, T_SET, ZUSCHLAG)
+    assert zurueck.total_heating_load_building == pytest.approx(vorher.total_heating_load_building)
+    assert zurueck.critical_share == pytest.approx(vorher.critical_share)
+    assert_wie_voll(zurueck, df)
+
+
+def test_neue_leere_editorzeile(beispiel):
+    rechner = InkrementelleBerechnung()
+    rechner.berechne(beispiel, T_OUT, T_SET, ZUSCHLAG)
+    for werte in ({}, {"Wohnungstyp": "A"}):
+        df = leere_zeile(beispiel, **werte)
+        ergebnis = rechner.berechne(df, T_OUT, T_SET, ZUSCHLAG)
+        assert ergebnis.total_heating_load_building == pytest.approx(16462.677)
+        assert ergebnis.critical_share == pytest.approx(100.0)
+        assert_wie_voll(ergebnis, df)
@@ -0,0 +1,67 @@
+import io
+
+import numpy as np
+import pandas as pd
+from conftest import T_OUT, T_SET, ZUSCHLAG
+
+from heizlast import LinearesModell, beste_modelle, bewerte_modell, lese_katalog, rangliste
+
+
+class _Upload(io.BytesIO):
+    name = "katalog.csv"
+
+
+def _katalog(modelle):
+    zeilen = []
+    for name, leistung, achse_a in modelle:
+        for T_a in achse_a:
+            for T_vl in (35.0, 55.0, 75.0):
+                zeilen.append({
+                    "Modell": name,
+                    "Typ": "Luft/Wasser",
+                    "T_aussen (°C)": T_a,
+                    "T_VL (°C)": T_vl,
+                    "Leistung (kW)": leistung * (1 + 0.02 * (T_a + 7)),
+                    "COP": 0.45 * (T_vl + 273.15) / (T_vl - T_a),
+                })
+    return lese_katalog(_Upload(pd.DataFrame(zeilen).to_csv(index=False).encode()))
+
+
+KATALOG = [("WP-tief", 10.0, (-20, -7, 2, 7, 12)), ("WP-ab-7", 10.0, (-7, 2, 7, 12))]
+
+
+def test_kein_randwert_unterhalb_des_kennfelds():
+    katalog = _katalog(KATALOG)
+    leistung, cop = katalog.interpoliere(np.array([-10.0, -7.0]), 45.0)
+    assert np.isnan(leistung[1, 0]) and np.isnan(cop[1, 0])
+    np.testing.assert_allclose(leistung[:, 1], leistung[0, 1])
+    assert np.isfinite(leistung[0]).all()
+
+
+def test_stunden_unter_kennfeld_und_rangfolge(beispiel):
+    T_aussen = np.r_[np.full(100, -10.0), np.full(8660, 5.0)]
+    bewertung = bewerte_modell(
+        _katalog(KATALOG), LinearesModell(beispiel), -5.0, T_SET, ZUSCHLAG, T_aussen=T_aussen
+    )
+    assert not bewertung.synthetisches_jahr
+    np.testing.assert_array_equal(bewertung.stunden_unter_kennfeld[:, 0], [0.0, 100.0])
+    # die Kältestunden zählen beim nur ab −7 °C vermessenen Modell als Backup
+    assert bewertung.backup_anteil[1, 0] > bewertung.backup_anteil[0, 0]
+
+    tabelle = rangliste(bewertung, mindestdeckung=0.0)
+    assert tabelle["Modell"].tolist() == ["WP-tief", "WP-ab-7"]
+    assert tabelle["außerhalb Kennfeld"].tolist() == [False, True]
+    assert beste_modelle(bewertung, mindestdeckung=0.0)["Modell"].tolist() == ["WP-tief"]
+
+
+def test_auslegungspunkt_unterhalb_des_kennfelds(beispiel):
+    bewertung = bewerte_modell(
+        _katalog(KATALOG), LinearesModell(beispiel), T_OUT, T_SET, ZUSCHLAG, T_aussen=np.full(8760, 5.0)
+    )
+    assert np.isnan(bewertung.deckungsgrad[1, 0])
+    assert not rangliste(bewertung, mindestdeckung=0.0).set_index("Modell").loc["WP-ab-7", "Deckung erfüllt"]
+
+
+def test_synthetisches_jahr_wird_gemeldet(beispiel):
+    bewertung = bewerte_modell(_katalog(KATALOG), LinearesModell(beispiel), T_OUT, T_SET, ZUSCHLAG)
+    assert bewertung.synthetisches_jahr
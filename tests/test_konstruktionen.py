@@ -0,0 +1,48 @@
+import numpy as np
+from conftest import T_OUT, T_SET, ZUSCHLAG
+
+from heizlast import KatalogBerechnung, berechne_portfolio, loese_auf, referenziere
+
+
+def assert_wie_portfolio(rechner):
+    df = loese_auf(rechner._df, rechner.katalog)
+    voll = berechne_portfolio(df, T_OUT, T_SET, ZUSCHLAG)
+    gebaeude = rechner.gebaeude().set_index("Gebäude-ID")
+    erwartet = voll.buildings.set_index("Gebäude-ID").loc[gebaeude.index]
+    for col in ("Heizlast Gebäude (W)", "Anteil bedingt/kritisch (%)", "T_mittel gewichtet (°C)"):
+        np.testing.assert_allclose(gebaeude[col], erwartet[col], err_msg=col)
+    typen = rechner.typen().set_index(["Gebäude-ID", "Wohnungstyp"]).sort_index()
+    erwartet = voll.types.set_index(["Gebäude-ID", "Wohnungstyp"]).sort_index()
+    np.testing.assert_allclose(typen["Q_WE_W"], erwartet["Q_WE_W"])
+
+
+def test_aendern_wie_vollberechnung(portfolio):
+    ref, katalog = referenziere(portfolio)
+    rechner = KatalogBerechnung(ref, katalog, T_OUT, T_SET, ZUSCHLAG)
+    assert_wie_portfolio(rechner)
+
+    kennung = ref["Konstruktion Fenster"].iloc[0]
+    zeilen = rechner.aendere(kennung, 0.9)
+    assert len(zeilen) == (ref["Konstruktion Fenster"] == kennung).sum()
+    assert_wie_portfolio(rechner)
+
+    rechner.verweise(ref["Konstruktion Wand"].iloc[1], [0, 2, 4])
+    assert_wie_portfolio(rechner)
+
+
+def test_leere_zellen_und_reparatur(portfolio):
+    portfolio.loc[3, "U Wand (W/m²K)"] = np.nan
+    portfolio.loc[40, "Fläche (m²)"] = np.nan
+    ref, katalog = referenziere(portfolio)
+    rechner = KatalogBerechnung(ref, katalog, T_OUT, T_SET, ZUSCHLAG)
+    gebaeude = rechner.gebaeude()
+    assert np.isfinite(gebaeude["Heizlast Gebäude (W)"]).all()
+    assert_wie_portfolio(rechner)
+
+    # Räume mit leerer Zelle sind auch an geänderten Konstruktionen beteiligt
+    rechner.aendere(ref["Konstruktion Fenster"].iloc[40], 1.1)
+    assert_wie_portfolio(rechner)
+
+    # U-Wert nachtragen: Summen müssen sich vollständig erholen
+    rechner.verweise(ref["Konstruktion Wand"].iloc[0], [3])
+    assert_wie_portfolio(rechner)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG, leere_zeile
+
+from heizlast import LinearesModell, berechne_gebaeude, berechne_portfolio, heizlast_je_aussentemperatur
+
+
+def test_gebaeude_wie_vollberechnung(beispiel):
+    erg = LinearesModell(beispiel).auswerten(T_OUT, T_SET, ZUSCHLAG)
+    voll = berechne_gebaeude(beispiel, T_OUT, T_SET, ZUSCHLAG)
+    assert erg.q_gebaeude[0, 0] == pytest.approx(voll.total_heating_load_building)
+    assert erg.critical_share[0, 0] == pytest.approx(voll.critical_share)
+    assert erg.weighted_avg_T[0, 0] == pytest.approx(voll.weighted_avg_T)
+
+
+def test_portfolio_wie_vollberechnung(portfolio):
+    portfolio.loc[[5, 90], "U Wand (W/m²K)"] = np.nan
+    portfolio.loc[200, "Fläche (m²)"] = np.nan
+    modell = LinearesModell(portfolio, building_col="Gebäude-ID")
+    erg = modell.auswerten(T_OUT, T_SET, ZUSCHLAG)
+    voll = berechne_portfolio(portfolio, T_OUT, T_SET, ZUSCHLAG).buildings.set_index("Gebäude-ID").loc[modell.gebaeude]
+    np.testing.assert_allclose(erg.q_gebaeude[0], voll["Heizlast Gebäude (W)"])
+    np.testing.assert_allclose(erg.critical_share[0], voll["Anteil bedingt/kritisch (%)"])
+    np.testing.assert_allclose(erg.weighted_avg_T[0], voll["T_mittel gewichtet (°C)"])
+
+
+@pytest.mark.parametrize("werte", [{}, {"Wohnungstyp": "A"}, {"Wohnungstyp": "A", "Anzahl WE Typ": 6}])
+def test_leere_editorzeile(beispiel, werte):
+    df = leere_zeile(beispiel, **werte)
+    modell = LinearesModell(df)
+    erg = modell.auswerten(T_OUT, T_SET, ZUSCHLAG)
+    voll = berechne_gebaeude(df, T_OUT, T_SET, ZUSCHLAG)
+    assert erg.q_gebaeude[0, 0] == pytest.approx(voll.total_heating_load_building)
+    assert erg.q_gebaeude[0, 0] == pytest.approx(16462.677)
+    assert erg.critical_share[0, 0] == pytest.approx(100.0)
+
+    # Kennlinie bleibt linear in Tₑ
+    H_geb, T_i_geb = modell.kennlinie(T_SET)
+    q = heizlast_je_aussentemperatur(modell, [-15.0, 0.0], T_SET, 0.0)
+    np.testing.assert_allclose(q, H_geb[0] * (T_i_geb[0] - np.array([-15.0, 0.0])))
+    assert np.isfinite(H_geb).all()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG, leere_zeile, synthetische_tabelle
+
+from heizlast import ProjektSpeicher, berechne_portfolio
+
+
+@pytest.fixture
+def speicher(tmp_path):
+    return ProjektSpeicher(str(tmp_path / "projekte.sqlite"))
+
+
+@pytest.fixture
+def tabelle():
+    df = synthetische_tabelle(n_raeume=60, n_gebaeude=3)
+    df.loc[[3, 40], "U Wand (W/m²K)"] = np.nan
+    df.loc[5, "Typ oberer Abschluss"] = None
+    df.loc[::4, "T_RL (°C)"] = 40.0
+    return df
+
+
+def test_speichern_laden_verlustfrei(speicher, tabelle):
+    speicher.speichere_raumtabelle("Quartier", tabelle)
+    pd.testing.assert_frame_equal(speicher.lade_portfolio("Quartier"), tabelle)
+
+    einzeln = tabelle[tabelle["Gebäude-ID"] == "G001"].drop(columns="Gebäude-ID").reset_index(drop=True)
+    pd.testing.assert_frame_equal(speicher.lade_gebaeude("Quartier", "G001"), einzeln)
+
+
+def test_leere_zeile_bleibt_zahl(speicher, tabelle):
+    # neue Zeile im Daten-Editor: Zahlenspalten werden object, gespeichert werden trotzdem Zahlen
+    df = leere_zeile(tabelle, **{"Gebäude-ID": "G002"})
+    speicher.speichere_raumtabelle("Quartier", df)
+    geladen = speicher.lade_portfolio("Quartier")
+    pd.testing.assert_frame_equal(geladen, df.infer_objects())
+    voll = berechne_portfolio(df, T_OUT, T_SET, ZUSCHLAG).buildings
+    neu = berechne_portfolio(geladen, T_OUT, T_SET, ZUSCHLAG).buildings
+    np.testing.assert_allclose(neu["Heizlast Gebäude (W)"], voll["Heizlast Gebäude (W)"])
+
+
+def test_neu_speichern_macht_ergebnisse_veraltet(speicher, tabelle):
+    speicher.speichere_raumtabelle("Quartier", tabelle)
+    speicher.szenario("Quartier", "Auslegung", T_out=T_OUT, default_T_set=T_SET, safety_factor=ZUSCHLAG)
+    speicher.berechne("Quartier", "Auslegung")
+    ergebnisse = speicher.ergebnisse("Quartier", "Auslegung")
+    voll = berechne_portfolio(tabelle, T_OUT, T_SET, ZUSCHLAG).buildings
+    np.testing.assert_allclose(ergebnisse["Heizlast Gebäude (W)"], voll["Heizlast Gebäude (W)"])
+    assert ergebnisse["aktuell"].all()
+
+    geaendert = tabelle[tabelle["Gebäude-ID"] == "G001"].assign(**{"U Wand (W/m²K)": 0.2})
+    speicher.speichere_raumtabelle("Quartier", geaendert)
+    aktuell = speicher.ergebnisse("Quartier", "Auslegung").set_index("Gebäude-ID")["aktuell"]
+    assert aktuell.to_dict() == {"G000": True, "G001": False, "G002": True}
+
+    speicher.berechne("Quartier", "Auslegung", gebaeude="G001")
+    assert speicher.ergebnisse("Quartier", "Auslegung")["aktuell"].all()
+
+    # geänderte Szenario-Parameter verwerfen die Ergebnisse
+    speicher.szenario("Quartier", "Auslegung", T_out=-14.0)
+    assert speicher.ergebnisse("Quartier", "Auslegung").empty
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG, leere_zeile
+
+from heizlast import berechne_gebaeude, berechne_portfolio, optimiere_sanierung
+from heizlast.konstruktionen import BAUTEILE
+from heizlast.sanierung import _KEINE, HEIZFLAECHE, massnahmen_tabelle
+
+
+@pytest.fixture
+def mit_luecken(portfolio):
+    portfolio.loc[[5, 90], "U Wand (W/m²K)"] = np.nan
+    portfolio.loc[200, "Fläche (m²)"] = np.nan
+    portfolio.loc[300, "Anzahl WE Typ"] = np.nan
+    return leere_zeile(portfolio, **{"Gebäude-ID": "G000"})
+
+
+def _mit_paket(df, zeile, massnahmen):
+    # Paket aus der Front auf die Raumtabelle anwenden (nur Dämmmaßnahmen)
+    df = df.copy()
+    u_neu = massnahmen.set_index("Maßnahme")["U neu (W/m²K)"]
+    for bauteil, (u_spalte, _, _) in BAUTEILE.items():
+        if zeile.get(bauteil, _KEINE) != _KEINE:
+            df[u_spalte] = df[u_spalte].astype(float).clip(upper=u_neu[zeile[bauteil]])
+    return df
+
+
+def test_ausgangslage_wie_portfolio(mit_luecken):
+    erg = optimiere_sanierung(mit_luecken, T_OUT, T_SET, ZUSCHLAG, building_col="Gebäude-ID")
+    voll = berechne_portfolio(mit_luecken, T_OUT, T_SET, ZUSCHLAG).buildings.set_index("Gebäude-ID")
+    basis = erg.ausgangslage.set_index("Gebäude-ID")
+    np.testing.assert_allclose(basis["Heizlast Gebäude (kW)"], voll.loc[basis.index, "Heizlast Gebäude (kW)"])
+    np.testing.assert_allclose(basis["Anteil bedingt/kritisch (%)"], voll.loc[basis.index, "Anteil bedingt/kritisch (%)"])
+    np.testing.assert_allclose(basis["T_mittel gewichtet (°C)"], voll.loc[basis.index, "T_mittel gewichtet (°C)"])
+
+
+def test_front_wie_portfolio(mit_luecken):
+    erg = optimiere_sanierung(mit_luecken, T_OUT, T_SET, ZUSCHLAG, building_col="Gebäude-ID")
+    massnahmen = massnahmen_tabelle()
+    gebaeude = mit_luecken["Gebäude-ID"].to_numpy()
+    geprueft = 0
+    for _, zeile in erg.front.iloc[::7].iterrows():
+        df = _mit_paket(mit_luecken[gebaeude == zeile["Gebäude-ID"]], zeile, massnahmen)
+        voll = berechne_portfolio(df, T_OUT, T_SET, ZUSCHLAG).buildings.iloc[0]
+        assert zeile["Heizlast Gebäude (kW)"] == pytest.approx(voll["Heizlast Gebäude (kW)"])
+        if zeile.get(HEIZFLAECHE, _KEINE) == _KEINE:
+            assert zeile["Anteil bedingt/kritisch (%)"] == pytest.approx(voll["Anteil bedingt/kritisch (%)"])
+            assert zeile["T_mittel gewichtet (°C)"] == pytest.approx(voll["T_mittel gewichtet (°C)"])
+        geprueft += 1
+    assert geprueft > 10
+
+
+def test_einzelgebaeude_mit_leerer_zeile(beispiel):
+    df = leere_zeile(beispiel)
+    erg = optimiere_sanierung(df, T_OUT, T_SET, ZUSCHLAG)
+    voll = berechne_gebaeude(df, T_OUT, T_SET, ZUSCHLAG)
+    assert erg.ausgangslage["Heizlast Gebäude (kW)"].iloc[0] == pytest.approx(voll.heizlast_kw_building)
+    assert erg.ausgangslage["Heizlast Gebäude (kW)"].iloc[0] == pytest.approx(16.462677)
+    assert np.isfinite(erg.front[["Kosten (€)", "Heizlast Gebäude (kW)"]].to_numpy()).all()
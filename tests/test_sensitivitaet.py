@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG, leere_zeile
+
+from heizlast import berechne_gebaeude, berechne_portfolio, monte_carlo
+
+
+def test_nominal_wie_vollberechnung(beispiel):
+    df = leere_zeile(beispiel)
+    df.loc[1, "U Wand (W/m²K)"] = np.nan
+    mc = monte_carlo(df, T_OUT, T_SET, ZUSCHLAG, n=200)
+    assert mc.nominal[0] == pytest.approx(berechne_gebaeude(df, T_OUT, T_SET, ZUSCHLAG).total_heating_load_building)
+    assert np.isfinite(mc.stichproben).all()
+    assert mc.perzentile.notna().all().all()
+
+
+def test_portfolio_wie_vollberechnung(portfolio):
+    portfolio.loc[[5, 90], "U Wand (W/m²K)"] = np.nan
+    portfolio.loc[200, "Fläche (m²)"] = np.nan
+    portfolio.loc[300, "Anzahl WE Typ"] = np.nan
+    mc = monte_carlo(portfolio, T_OUT, T_SET, ZUSCHLAG, n=200, building_col="Gebäude-ID")
+    voll = berechne_portfolio(portfolio, T_OUT, T_SET, ZUSCHLAG).buildings
+    np.testing.assert_allclose(mc.nominal, voll["Heizlast Gebäude (W)"])
+    assert np.isfinite(mc.stichproben).all()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import T_OUT, T_SET, ZUSCHLAG
+
+from heizlast import NORMLEISTUNG_SPALTE, vorlauf_analyse
+
+
+@pytest.fixture
+def mit_heizkoerpern(portfolio):
+    df = portfolio.copy()
+    rng = np.random.default_rng(3)
+    df[NORMLEISTUNG_SPALTE] = rng.uniform(300.0, 2500.0, len(df))
+    df.loc[rng.random(len(df)) < 0.1, NORMLEISTUNG_SPALTE] = np.nan
+    df["Raum"] = [f"R{i}" for i in range(len(df))]
+    return df
+
+
+@pytest.mark.parametrize(
+    "index",
+    [
+        lambda n: np.zeros(n, dtype=int),
+        lambda n: np.arange(n)[::-1] * 7,
+        lambda n: [f"z{i % 5}" for i in range(n)],
+    ],
+    ids=["konstant", "absteigend", "text"],
+)
+def test_unabhaengig_vom_index(mit_heizkoerpern, index):
+    referenz = vorlauf_analyse(mit_heizkoerpern, T_OUT, T_SET, ZUSCHLAG, building_col="Gebäude-ID")
+    df = mit_heizkoerpern.set_axis(index(len(mit_heizkoerpern)))
+    ergebnis = vorlauf_analyse(df, T_OUT, T_SET, ZUSCHLAG, building_col="Gebäude-ID")
+    pd.testing.assert_frame_equal(ergebnis.gebaeude, referenz.gebaeude)
+    pd.testing.assert_frame_equal(ergebnis.raeume.reset_index(drop=True), referenz.raeume)
+
+
+def test_begrenzender_raum_ist_argmax(mit_heizkoerpern):
+    ergebnis = vorlauf_analyse(mit_heizkoerpern, T_OUT, T_SET, ZUSCHLAG, building_col="Gebäude-ID")
+    raeume = ergebnis.raeume.dropna(subset=["min. Vorlauftemperatur (°C)"])
+    erwartet = raeume.loc[raeume.groupby("Gebäude-ID")["min. Vorlauftemperatur (°C)"].idxmax(), "Raum"]
+    assert ergebnis.gebaeude["begrenzender Raum"].tolist() == erwartet.tolist()